@@ -3,12 +3,16 @@ Analysis Routes - New Analysis Types
 Simple Saturation, Where Can I Treat, Compare Analyses
 """
 
-from fastapi import APIRouter, HTTPException, Query, Body
-from typing import Optional, Dict, Any, List
+from fastapi import APIRouter, HTTPException, Query, Body, BackgroundTasks, Header, Response
+from typing import Optional, Dict, Any
 import logging
-from datetime import datetime
 
-from app.services.analysis_engine import AnalysisEngine
+from app.services.analysis_engine import AnalysisEngine, AnalysisInProgressError
+from app.services.grid_store import load_results
+from app.services.grid_cache import grid_cache
+from app.services.graph_prerender import prerender_graphs
+from app.services.isosurface import extract_boundary, zone_level
+from app.services.graph_response_cache import graph_etag, cache_control, etag_matches
 from app.db.mongo import db
 
 logger = logging.getLogger(__name__)
@@ -22,6 +26,7 @@ router = APIRouter()
 
 @router.post("/analysis/simple-saturation")
 async def run_simple_saturation_analysis(
+    background_tasks: BackgroundTasks,
     data: Dict[str, Any] = Body(...)
 ):
     """
@@ -38,11 +43,24 @@ async def run_simple_saturation_analysis(
         "coc_steps": 10,
         "temp_steps": 10,
         "balance_cation": "Na",
-        "balance_anion": "Cl"
+        "balance_anion": "Cl",
+        "engine": "phreeqc",         # or "fast" (NumPy approximation, IS ≤ 0.5)
+        "wait_budget_ms": 2000,      # optional: max PHREEQC queue wait (preview)
+        "deadline_ms": 1500          # optional: progressive coarse → fine grid
     }
     
     Returns:
-        Analysis ID and summary
+        Analysis ID and summary. With wait_budget_ms set and PHREEQC
+        saturated, the grid comes from the fast engine with
+        "approximate": true (estimated ion balance; phases the fast engine
+        cannot compute are listed in "unsupported_phases") and the exact
+        grid replaces it in the stored analysis once computed. Requests
+        whose salts_of_interest the fast engine does not cover are never
+        shed; they wait for PHREEQC.
+        With deadline_ms, the best grid available at the deadline is
+        returned with "complete": false and a "continuation_token"; the
+        remaining passes keep running in the background. The coarse first
+        pass always completes, so the response may arrive after deadline_ms.
     """
     try:
         logger.info("🔬 Simple Saturation Model API called")
@@ -58,10 +76,15 @@ async def run_simple_saturation_analysis(
         temp_steps = data.get("temp_steps", 10)
         balance_cation = data.get("balance_cation", "Na")
         balance_anion = data.get("balance_anion", "Cl")
+        si_engine = data.get("engine", "phreeqc")
+        wait_budget_ms = data.get("wait_budget_ms")
+        deadline_ms = data.get("deadline_ms")
         
         # Validate
         if not base_water:
             raise HTTPException(status_code=400, detail="base_water_analysis is required")
+        if si_engine not in ("phreeqc", "fast"):
+            raise HTTPException(status_code=400, detail="engine must be 'phreeqc' or 'fast'")
         
         # Run analysis
         engine = AnalysisEngine()
@@ -76,20 +99,87 @@ async def run_simple_saturation_analysis(
             coc_steps=coc_steps,
             temp_steps=temp_steps,
             balance_cation=balance_cation,
-            balance_anion=balance_anion
+            balance_anion=balance_anion,
+            engine=si_engine,
+            wait_budget_ms=wait_budget_ms,
+            deadline_ms=deadline_ms
         )
         
+        # Exact, complete grids get their default graphs pre-rendered
+        # (replace_with_exact / the continuation do it when they finish)
+        if result.get("approximate"):
+            background_tasks.add_task(engine.replace_with_exact, result["analysis_id"])
+        elif result.get("continuation_token"):
+            background_tasks.add_task(_continue_in_background, engine, result["continuation_token"])
+        else:
+            background_tasks.add_task(prerender_graphs, result["analysis_id"])
+        
         logger.info(f"✅ Analysis complete: {result['analysis_id']}")
         
         return result
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Simple Saturation API failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/analysis/simple-saturation/continue")
+async def continue_simple_saturation_analysis(
+    background_tasks: BackgroundTasks,
+    data: Dict[str, Any] = Body(...)
+):
+    """
+    Resume a deadline-bounded Simple Saturation analysis
+    
+    Request Body:
+    {
+        "continuation_token": "...",
+        "deadline_ms": 1500          # optional; omit to finish all passes
+    }
+    
+    Returns:
+        Updated summary; "continuation_token" is null once complete.
+        409 while another run (e.g. the background continuation started by
+        simple-saturation) is continuing the analysis.
+    """
+    try:
+        token = data.get("continuation_token")
+        if not token:
+            raise HTTPException(status_code=400, detail="continuation_token is required")
+        
+        engine = AnalysisEngine()
+        result = await engine.continue_progressive(token, deadline_ms=data.get("deadline_ms"))
+        if result["complete"]:
+            background_tasks.add_task(prerender_graphs, result["analysis_id"])
+        return result
+        
+    except HTTPException:
+        raise
+    except AnalysisInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Continue Simple Saturation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _continue_in_background(engine: AnalysisEngine, token: str) -> None:
+    """Finish a progressive analysis unless a /continue call already holds it"""
+    try:
+        result = await engine.continue_progressive(token)
+        if result["complete"]:
+            await prerender_graphs(result["analysis_id"])
+    except AnalysisInProgressError as e:
+        logger.info(f"⏭️ Background continuation skipped: {e}")
+    except Exception as e:
+        logger.error(f"❌ Background continuation failed: {e}")
+
+
 # ========================================
 # WHERE CAN I TREAT - FIXED DOSAGE
 # ========================================
@@ -177,14 +267,20 @@ async def run_where_can_i_treat_auto(
     """
     Where Can I Treat - Auto-Select Dosages
     
-    AI determines optimal dosages to treat every CoC
+    Finds, per (pH, CoC, temp) cell, the minimal blended product dosage
+    that keeps every target salt green (bisection over dosage, warm-started
+    from the neighbouring CoC cell, memoized PHREEQC results)
+    
+    Ion actives (Zn, PO4, ...) are added to the water; phosphonate/polymer
+    actives raise the green limit as an SI credit. Other actives are
+    returned as unmodelled_actives; a blend with neither is rejected (400).
     
     Request Body:
     {
         "base_water_analysis": {...},
         "products": [
-            {"product_id": "prod-123"},
-            {"product_id": "prod-456"}
+            {"product_id": "prod-123", "ratio": 2},
+            {"product_id": "prod-456", "ratio": 1}
         ],
         "ph_range": [7.0, 8.5],
         "coc_range": [2.0, 5.0],
@@ -192,7 +288,9 @@ async def run_where_can_i_treat_auto(
         "target_salts": ["Calcite", "Gypsum"],
         "ph_steps": 10,
         "coc_steps": 10,
-        "temp_steps": 5
+        "temp_steps": 5,
+        "dosage_range": [0, 100],
+        "tolerance_ppm": 1.0
     }
     
     Returns:
@@ -201,21 +299,221 @@ async def run_where_can_i_treat_auto(
     try:
         logger.info("🤖 Where Can I Treat (Auto) API called")
         
-        # TODO: Implement auto-dosage selection logic
-        # This is complex - requires iterative optimization
+        base_water = data.get("base_water_analysis")
+        products = data.get("products", [])
+        target_salts = data.get("target_salts", ["Calcite"])
+        dosage_range = tuple(data.get("dosage_range", [0, 100]))
+        tolerance_ppm = float(data.get("tolerance_ppm", 1.0))
         
-        raise HTTPException(
-            status_code=501,
-            detail="Auto-dosage selection not yet implemented. Use /where-can-i-treat-fixed for now."
+        if not base_water:
+            raise HTTPException(status_code=400, detail="base_water_analysis is required")
+        if not products:
+            raise HTTPException(status_code=400, detail="At least one product is required")
+        if dosage_range[1] <= dosage_range[0] or tolerance_ppm <= 0:
+            raise HTTPException(status_code=400, detail="Invalid dosage_range / tolerance_ppm")
+        
+        engine = AnalysisEngine()
+        
+        result = await engine.run_where_can_i_treat_auto(
+            base_water_analysis=base_water,
+            products=products,
+            ph_range=tuple(data.get("ph_range", [7.0, 8.5])),
+            coc_range=tuple(data.get("coc_range", [2.0, 5.0])),
+            temp_range=tuple(data.get("temp_range", [25, 35])),
+            target_salts=target_salts,
+            ph_steps=data.get("ph_steps", 10),
+            coc_steps=data.get("coc_steps", 10),
+            temp_steps=data.get("temp_steps", 5),
+            dosage_range=dosage_range,
+            tolerance_ppm=tolerance_ppm,
+            balance_cation=data.get("balance_cation", "Na"),
+            balance_anion=data.get("balance_anion", "Cl")
         )
         
+        return result
+        
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Where Can I Treat (Auto) API failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ========================================
+# MAX-CoC FRONTIER
+# ========================================
+
+@router.post("/analysis/max-coc-frontier")
+async def run_max_coc_frontier(
+    data: Dict[str, Any] = Body(...)
+):
+    """
+    Highest CoC that keeps every target salt green, per (pH, temperature)
+    
+    Bisects on CoC for each (pH, temp) pair instead of a full 3D sweep.
+    
+    Request Body:
+    {
+        "base_water_analysis": {...},
+        "ph_range": [7.0, 8.5],
+        "temp_range": [25, 45],
+        "coc_range": [1.0, 10.0],
+        "target_salts": ["Calcite", "Gypsum", "SiO2(a)"],
+        "ph_steps": 10,
+        "temp_steps": 5,
+        "coc_tolerance": 0.1,
+        "engine": "phreeqc"          # or "fast"
+    }
+    
+    Returns:
+        Frontier curve/surface: max_coc per (pH, temp) with the limiting salt
+    """
+    try:
+        logger.info("📈 Max-CoC frontier API called")
+        
+        base_water = data.get("base_water_analysis")
+        coc_tolerance = float(data.get("coc_tolerance", 0.1))
+        coc_range = tuple(data.get("coc_range", [1.0, 10.0]))
+        si_engine = data.get("engine", "phreeqc")
+        
+        if not base_water:
+            raise HTTPException(status_code=400, detail="base_water_analysis is required")
+        if coc_range[1] <= coc_range[0] or coc_tolerance <= 0:
+            raise HTTPException(status_code=400, detail="Invalid coc_range / coc_tolerance")
+        if si_engine not in ("phreeqc", "fast"):
+            raise HTTPException(status_code=400, detail="engine must be 'phreeqc' or 'fast'")
+        
+        engine = AnalysisEngine()
+        
+        return await engine.run_max_coc_frontier(
+            base_water_analysis=base_water,
+            ph_range=tuple(data.get("ph_range", [7.0, 8.5])),
+            temp_range=tuple(data.get("temp_range", [25, 45])),
+            coc_range=coc_range,
+            target_salts=data.get("target_salts", ["Calcite"]),
+            ph_steps=data.get("ph_steps", 10),
+            temp_steps=data.get("temp_steps", 5),
+            coc_tolerance=coc_tolerance,
+            balance_cation=data.get("balance_cation", "Na"),
+            balance_anion=data.get("balance_anion", "Cl"),
+            engine=si_engine
+        )
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Max-CoC frontier API failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ========================================
+# CCPP GRID
+# ========================================
+
+@router.post("/analysis/ccpp-grid")
+async def run_ccpp_grid(
+    data: Dict[str, Any] = Body(...)
+):
+    """
+    Calcium carbonate precipitation potential over a 3D grid
+    
+    Request Body:
+    {
+        "base_water_analysis": {...},
+        "ph_range": [7.0, 8.5],
+        "coc_range": [1.0, 8.0],
+        "temp_range": [25, 45],
+        "ph_steps": 10,
+        "coc_steps": 10,
+        "temp_steps": 5
+    }
+    
+    Returns:
+        ccpp_surface[pH][CoC][temp] in mg/L CaCO3 (single batched run)
+    """
+    try:
+        logger.info("🧱 CCPP grid API called")
+        
+        base_water = data.get("base_water_analysis")
+        if not base_water:
+            raise HTTPException(status_code=400, detail="base_water_analysis is required")
+        
+        engine = AnalysisEngine()
+        
+        return await engine.run_ccpp_grid(
+            base_water_analysis=base_water,
+            ph_range=tuple(data.get("ph_range", [7.0, 8.5])),
+            coc_range=tuple(data.get("coc_range", [1.0, 8.0])),
+            temp_range=tuple(data.get("temp_range", [25, 45])),
+            ph_steps=data.get("ph_steps", 10),
+            coc_steps=data.get("coc_steps", 10),
+            temp_steps=data.get("temp_steps", 5),
+            balance_cation=data.get("balance_cation", "Na"),
+            balance_anion=data.get("balance_anion", "Cl")
+        )
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ CCPP grid API failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ========================================
+# MIXING RATIO SWEEP
+# ========================================
+
+@router.post("/analysis/mixing-sweep")
+async def run_mixing_sweep(
+    data: Dict[str, Any] = Body(...)
+):
+    """
+    SI across blend ratios of 2-3 source (makeup) waters
+    
+    Request Body:
+    {
+        "source_waters": [{...}, {...}, {...}],
+        "steps": 11,                          # lattice points per simplex edge
+        "ratios": [[0.7, 0.3], [0.5, 0.5]],   # optional, overrides steps
+        "salts_of_interest": ["Calcite", "Gypsum"]
+    }
+    
+    Returns:
+        Per-blend SI / classification (all blends as batched MIX runs)
+    """
+    try:
+        logger.info("🧪 Mixing sweep API called")
+        
+        sources = data.get("source_waters") or []
+        if len(sources) not in (2, 3):
+            raise HTTPException(status_code=400, detail="source_waters must contain 2 or 3 waters")
+        
+        engine = AnalysisEngine()
+        
+        return await engine.run_mixing_sweep(
+            source_waters=sources,
+            steps=int(data.get("steps", 11)),
+            ratios=data.get("ratios"),
+            salts_of_interest=data.get("salts_of_interest"),
+            balance_cation=data.get("balance_cation", "Na"),
+            balance_anion=data.get("balance_anion", "Cl")
+        )
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Mixing sweep API failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ========================================
 # COMPARE 2 ANALYSES
 # ========================================
@@ -291,6 +589,10 @@ async def get_analysis_results(analysis_id: str):
         if "_id" in analysis:
             del analysis["_id"]
         
+        # Columnar grids: expand the per-point list for API compatibility
+        if analysis.get("storage") == "columnar":
+            analysis["results"] = list(await load_results(analysis))
+        
         return analysis
         
     except HTTPException:
@@ -301,95 +603,79 @@ async def get_analysis_results(analysis_id: str):
 
 
 # ========================================
-# GET 3D GRAPH DATA
+# SI BOUNDARY GEOMETRY (isosurface / contours)
 # ========================================
 
-@router.get("/analysis/{analysis_id}/3d-graph")
-async def get_3d_graph_data(
+@router.get("/analysis/{analysis_id}/si-boundary")
+async def get_si_boundary(
     analysis_id: str,
+    response: Response,
     salt_name: str = Query(..., description="Mineral name (e.g., 'Calcite')"),
-    x_axis: str = Query("pH", description="X-axis parameter"),
-    y_axis: str = Query("CoC", description="Y-axis parameter"),
-    fixed_z_value: Optional[float] = Query(None, description="Fixed value for Z-axis")
+    threshold: str = Query("0", description="SI level, or 'yellow' / 'red' zone boundary"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
-    Get 3D graph data for visualization
+    Surface where a mineral's SI crosses a threshold, extracted from the
+    stored SI tensor instead of shipping every grid point
     
     Args:
-        analysis_id: Analysis ID
-        salt_name: Which mineral to graph
-        x_axis: X-axis parameter ("pH", "CoC", "temp")
-        y_axis: Y-axis parameter ("pH", "CoC", "temp")
-        fixed_z_value: Fixed value for 3rd axis (optional)
+        analysis_id: Analysis ID (columnar grid storage)
+        salt_name: Which mineral
+        threshold: SI value (default 0 = saturation), "yellow" (green/yellow
+            boundary) or "red" (yellow/red boundary) from the salt table
     
     Returns:
-        Graph data ready for frontend plotting
+        pH × CoC × temp grids: {"type": "mesh", vertices [[pH, CoC, temp]], faces [[a, b, c]]}
+        Grids with one fixed axis: {"type": "polylines", axes, polylines [[[x, y], ...]]}
     """
     try:
-        logger.info(f"📈 3D graph data request: {analysis_id}, salt={salt_name}")
-        
-        # Get analysis
         analysis = await db.db.analysis_results.find_one({"analysis_id": analysis_id})
         
         if not analysis:
             raise HTTPException(status_code=404, detail=f"Analysis {analysis_id} not found")
+        if analysis.get("storage") != "columnar":
+            raise HTTPException(
+                status_code=400,
+                detail=f"Analysis {analysis_id} has no columnar grid; re-run it to extract boundaries"
+            )
         
-        results = analysis.get("results", [])
-        
-        # Extract SI values for the requested salt
-        graph_data = {
-            "x_values": [],
-            "y_values": [],
-            "z_values": [],
-            "si_values": []
-        }
+        try:
+            level = zone_level(salt_name, threshold)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        etag = graph_etag(analysis, salt_name, "pH", "CoC", f"si-boundary:{level}")
+        cache_headers = {"ETag": etag, "Cache-Control": cache_control(analysis)}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=cache_headers)
+        response.headers.update(cache_headers)
+        
+        surface = await grid_cache.get_mineral(analysis_id, salt_name)
+        if surface is None:
+            raise HTTPException(status_code=400, detail="No grid results found in this analysis.")
+        if surface["si"] is None:
+            raise HTTPException(status_code=404, detail=f"No SI values for {salt_name} in this analysis")
+        
+        axes = [surface["ph_values"], surface["coc_values"], surface["temp_values"]]
+        try:
+            geometry = extract_boundary(surface["si"], axes, level)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        logger.info(
+            f"✅ SI boundary {salt_name} @ {level}: {geometry['type']}, {geometry['vertex_count']} vertices"
+        )
         
-        axis_map = {
-            "pH": "pH",
-            "CoC": "CoC",
-            "temp": "temperature_C"
+        return {
+            "analysis_id": analysis_id,
+            "salt_name": salt_name,
+            "threshold": threshold,
+            "si_level": level,
+            **geometry
         }
-        
-        x_key = axis_map.get(x_axis)
-        y_key = axis_map.get(y_axis)
-        
-        if not x_key or not y_key:
-            raise HTTPException(status_code=400, detail="Invalid axis parameter")
-        
-        for result in results:
-            # Find SI for this salt
-            si_list = result.get("saturation_indices", [])
-            si_value = None
-            
-            for si in si_list:
-                if si["mineral_name"] == salt_name:
-                    si_value = si["si_value"]
-                    break
-            
-            if si_value is not None:
-                graph_data["x_values"].append(result[x_key])
-                graph_data["y_values"].append(result[y_key])
-                graph_data["si_values"].append(si_value)
-                
-                # Add Z value (or fixed value)
-                if fixed_z_value is not None:
-                    graph_data["z_values"].append(fixed_z_value)
-                else:
-                    # Get the 3rd axis value
-                    z_axis = [a for a in ["pH", "CoC", "temp"] if a != x_axis and a != y_axis][0]
-                    z_key = axis_map[z_axis]
-                    graph_data["z_values"].append(result[z_key])
-        
-        graph_data["salt_name"] = salt_name
-        graph_data["x_axis"] = x_axis
-        graph_data["y_axis"] = y_axis
-        
-        logger.info(f"✅ Graph data prepared: {len(graph_data['si_values'])} points")
-        
-        return graph_data
-        
+    
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ 3D graph data failed: {e}")
+        logger.error(f"❌ SI boundary failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
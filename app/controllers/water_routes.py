@@ -3,23 +3,38 @@
 Water Analysis Routes - Enhanced
 EXISTING endpoints kept intact.
 NEW endpoints added:
+  POST /analyze/batch
   POST /calculations/standalone
   POST /calculations/cooling-tower
   GET  /analysis/{id}/3d-graph
   GET  /analysis/history
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Query
-from typing import Optional, Dict, Any, List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, BackgroundTasks, Header, Response
+from typing import Optional, Dict, Any
+import asyncio
 import logging
 from datetime import datetime
 
 from app.services.ocr_service          import OCRService
-from app.services.phreeqc_service      import PHREEQCService
+from app.services.phreeqc_service      import PHREEQCService, PHREEQCSaturatedError, PHREEQC_QUEUE_BUDGET_MS
 from app.services.graph_service        import GraphService
+from app.services.render_pool          import render
 from app.services.standalone_calculations import StandaloneCalculations
 from app.services.cooling_tower_service    import CoolingTowerService
 from app.services.chemical_dosage_service  import ChemicalDosageService
+from app.services.phreeqc_database         import get_database_index
+from app.services.fast_si_engine           import (
+    FastSIEngine, approximate_analysis, to_results as fast_si_to_results
+)
+from app.utils.salt_data_table             import get_common_scale_formers
+from app.services.grid_store               import ColumnarGrid, save_grid, load_results
+from app.services.grid_cache               import grid_cache
+from app.services.graph_prerender          import prerender_graphs, prerender_salts
+from app.services.graph_response_cache     import (
+    graph_etag, cache_control, etag_matches, get_render, save_render, json_body, png_body,
+    surface_json_body
+)
 from app.db.mongo import db
 
 logger = logging.getLogger(__name__)
@@ -62,7 +77,7 @@ async def extract_parameters(file: UploadFile = File(...)):
 
 
 @router.post("/analyze")
-async def analyze_water(data: Dict[str, Any]):
+async def analyze_water(data: Dict[str, Any], background_tasks: BackgroundTasks):
     """
     Full water quality analysis (single point)
     Input:  extracted parameters
@@ -71,69 +86,59 @@ async def analyze_water(data: Dict[str, Any]):
     ✅ Auto-adds Temperature if missing
     ✅ Auto-fixes Chloride = 0 issue
     ✅ Auto-sets balance_cation and balance_anion
+    ✅ Optional Monte Carlo: "monte_carlo": {"samples": 500,
+       "default_uncertainty": 0.05, "uncertainties": {"Ca": 0.1}, "seed": 1}
+       (or true) → SI percentiles per mineral from perturbed lab values
+    ✅ Load shedding: if no PHREEQC slot frees up within
+       PHREEQC_QUEUE_BUDGET_MS, answers from the fast engine (+ LSI/RSI)
+       with "approximate": true and stores the exact result later
     """
     try:
         logger.info("🔬 Single-point analysis started")
         
-        # ✅ STEP 1: Get parameters
-        original_params = data.get("parameters", {})
+        # ✅ STEPS 1-5: Defaults, name mapping, balance ions
+        mapped_params, balance_cation, balance_anion = _prepare_sample(data.get("parameters", {}))
         
-        # ✅ STEP 2: Auto-add Temperature if missing
-        if "Temperature" not in original_params:
-            logger.info("⚠️  Temperature missing, adding default 25°C")
-            original_params["Temperature"] = {"value": 25, "unit": "°C"}
-        
-        # ✅ STEP 3: Auto-fix Chloride = 0 issue
-        chloride_value = _get_param_value(original_params, "Chloride")
-        if chloride_value is not None and chloride_value == 0:
-            logger.info("⚠️  Chloride = 0, changing to 1 mg/L")
-            original_params["Chloride"] = {"value": 1, "unit": "mg/L"}
-        
-        # ✅ STEP 4: Map parameter names (Calcium → Ca, etc.)
-        mapped_params = map_water_parameters(original_params)
-        
-        logger.info(f"📊 Mapped {len(original_params)} → {len(mapped_params)} PHREEQC params")
-        
-        # ✅ STEP 5: Auto-determine balance ions
-        # Use Na/Cl if available, otherwise use K/SO4
-        balance_cation = "Na" if "Na" in mapped_params else "K"
-        balance_anion  = "Cl" if "Cl" in mapped_params else "SO4"
-        
-        logger.info(f"⚖️  Ion balance: {balance_cation} (cation), {balance_anion} (anion)")
-        
-        # ✅ STEP 6: Run PHREEQC analysis
+        # ✅ STEP 6: Run PHREEQC analysis (approximate if PHREEQC is saturated)
         phreeqc = PHREEQCService()
-        result  = await phreeqc.analyze(
-            mapped_params,
-            balance_cation=balance_cation,
-            balance_anion=balance_anion
-        )
+        approximate = False
+        try:
+            result = await phreeqc.analyze(
+                mapped_params,
+                balance_cation=balance_cation,
+                balance_anion=balance_anion,
+                wait_budget_ms=PHREEQC_QUEUE_BUDGET_MS
+            )
+        except PHREEQCSaturatedError as e:
+            logger.warning(f"⚠️ {e} → approximate result")
+            result = approximate_analysis(
+                phreeqc.estimate_ion_balance(mapped_params, balance_cation, balance_anion),
+                get_database_index(phreeqc.phreeqc_dat)
+            )
+            approximate = True
 
         # ✅ STEP 7: Generate graphs (only if SI data exists)
-        graph_svc = GraphService()
-        graphs = {}
-        
-        si_data = result.get("saturation_indices", [])
-        if si_data and len(si_data) > 0:
+        graphs = await _si_bar_chart(result)
+
+        # ✅ STEP 7b: Monte Carlo SI confidence bands (optional, exact runs only)
+        monte_carlo = None
+        mc_options = data.get("monte_carlo")
+        if mc_options and not approximate:
+            mc_options = mc_options if isinstance(mc_options, dict) else {}
+            if not 1 <= int(mc_options.get("samples", 500)) <= 5000:
+                raise HTTPException(status_code=400, detail="monte_carlo samples must be between 1 and 5000")
             try:
-                graphs = graph_svc.generate_si_bar_chart(si_data)
-                logger.info(f"✅ Graph generated with {len(si_data)} minerals")
-            except Exception as e:
-                logger.warning(f"⚠️ Graph generation failed: {e}")
-                graphs = {
-                    "image_base64": None,
-                    "minerals": [],
-                    "values": [],
-                    "error": str(e)
-                }
-        else:
-            logger.warning("⚠️ No saturation indices data - skipping graph generation")
-            graphs = {
-                "image_base64": None,
-                "minerals": [],
-                "values": [],
-                "note": "No mineral saturation data available for this water sample"
-            }
+                monte_carlo = await phreeqc.monte_carlo(
+                    mapped_params,
+                    n_samples=int(mc_options.get("samples", 500)),
+                    default_uncertainty=mc_options.get("default_uncertainty", 0.05),
+                    uncertainties=mc_options.get("uncertainties"),
+                    balance_cation=balance_cation,
+                    balance_anion=balance_anion,
+                    seed=mc_options.get("seed")
+                )
+            except ValueError as e:     # invalid uncertainties
+                raise HTTPException(status_code=422, detail=str(e))
 
         # ✅ STEP 8: Save to DB
 # ✅ STEP 8: Save to DB
@@ -145,22 +150,194 @@ async def analyze_water(data: Dict[str, Any]):
             "result":       result,
             "results":      [result],      # ✅ এই লাইন যোগ করুন (3D graph এর জন্য)
             "graphs":       graphs,
+            "monte_carlo":  monte_carlo,
+            "approximate":  approximate,
             "created_at":   datetime.utcnow()
 }
         await db.save_analysis(analysis_doc)
 
+        if approximate:
+            background_tasks.add_task(
+                _replace_with_exact_analysis,
+                analysis_doc["analysis_id"], mapped_params, balance_cation, balance_anion
+            )
+
         return {
             "status":      "success",
             "analysis_id": analysis_doc["analysis_id"],
+            "approximate": approximate,
             "result":      result,
-            "graphs":      graphs
+            "graphs":      graphs,
+            "monte_carlo": monte_carlo
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Analyze failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/analyze/batch")
+async def analyze_water_batch(data: Dict[str, Any], include_graphs: bool = False):
+    """
+    Batched multi-sample analysis
+    Input:  {"samples": [{"parameters": {...}, "sample_id": "optional"}, ...]}
+    Output: per-sample status / result in input order
+
+    All samples are normalized like /analyze, ion-balanced together in one
+    multi-SOLUTION PHREEQC input per iteration, speciated as one batch and
+    saved with a single insert_many. SI charts only with include_graphs=true.
+    """
+    samples = data.get("samples", [])
+    if not samples:
+        raise HTTPException(status_code=400, detail="samples must be a non-empty list")
+
+    try:
+        logger.info(f"🔬 Batch analysis started: {len(samples)} samples")
+
+        prepared = [_prepare_sample(sample.get("parameters", {})) for sample in samples]
+        results = await PHREEQCService().analyze_batch(
+            [mapped for mapped, _, _ in prepared],
+            [(cation, anion) for _, cation, anion in prepared]
+        )
+
+        batch_id = f"BATCH-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+        created_at = datetime.utcnow()
+        docs = []
+        statuses = []
+
+        charts = [None] * len(results)
+        if include_graphs:
+            # Rendered concurrently in the render pool
+            ok = [i for i, result in enumerate(results) if "error" not in result]
+            for i, chart in zip(ok, await asyncio.gather(*(_si_bar_chart(results[i]) for i in ok))):
+                charts[i] = chart
+
+        for i, (sample, (mapped, _, _), result) in enumerate(zip(samples, prepared, results)):
+            sample_id = sample.get("sample_id", i + 1)
+            if "error" in result:
+                statuses.append({"sample_id": sample_id, "status": "error", "error": result["error"]})
+                continue
+
+            graphs = charts[i]
+            doc = {
+                "analysis_id":   f"STD-{batch_id[6:]}-{i + 1:03d}",
+                "analysis_type": "standard",
+                "batch_id":      batch_id,
+                "input":         sample,
+                "mapped_input":  mapped,
+                "result":        result,
+                "results":       [result],
+                "graphs":        graphs,
+                "approximate":   False,
+                "created_at":    created_at
+            }
+            docs.append(doc)
+            statuses.append({
+                "sample_id":   sample_id,
+                "status":      "success",
+                "analysis_id": doc["analysis_id"],
+                "result":      result,
+                "graphs":      graphs
+            })
+
+        await db.save_analyses(docs)
+
+        logger.info(f"✅ Batch analysis done: {len(docs)}/{len(samples)} succeeded")
+        return {
+            "status":    "success",
+            "batch_id":  batch_id,
+            "total":     len(samples),
+            "succeeded": len(docs),
+            "failed":    len(samples) - len(docs),
+            "samples":   statuses
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Batch analyze failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _prepare_sample(original_params: Dict[str, Any]) -> tuple:
+    """
+    /analyze input normalization → (mapped_params, balance_cation, balance_anion)
+      - Auto-add Temperature (25°C) if missing
+      - Chloride = 0 → 1 mg/L
+      - Map parameter names (Calcium → Ca, etc.)
+      - Balance ions: Na/Cl if available, otherwise K/SO4
+    """
+    if "Temperature" not in original_params:
+        logger.info("⚠️  Temperature missing, adding default 25°C")
+        original_params["Temperature"] = {"value": 25, "unit": "°C"}
+
+    chloride_value = _get_param_value(original_params, "Chloride")
+    if chloride_value is not None and chloride_value == 0:
+        logger.info("⚠️  Chloride = 0, changing to 1 mg/L")
+        original_params["Chloride"] = {"value": 1, "unit": "mg/L"}
+
+    mapped_params = map_water_parameters(original_params)
+    logger.info(f"📊 Mapped {len(original_params)} → {len(mapped_params)} PHREEQC params")
+
+    balance_cation = "Na" if "Na" in mapped_params else "K"
+    balance_anion  = "Cl" if "Cl" in mapped_params else "SO4"
+    logger.info(f"⚖️  Ion balance: {balance_cation} (cation), {balance_anion} (anion)")
+
+    return mapped_params, balance_cation, balance_anion
+
+
+async def _si_bar_chart(result: Dict[str, Any]) -> Dict[str, Any]:
+    """SI bar chart for a single-point result (placeholder dict if no SI), rendered off-loop"""
+    si_data = result.get("saturation_indices", [])
+    if not si_data:
+        logger.warning("⚠️ No saturation indices data - skipping graph generation")
+        return {
+            "image_base64": None,
+            "minerals": [],
+            "values": [],
+            "note": "No mineral saturation data available for this water sample"
+        }
+    
+    try:
+        graphs = await render("generate_si_bar_chart", si_data)
+        logger.info(f"✅ Graph generated with {len(si_data)} minerals")
+        return graphs
+    except Exception as e:
+        logger.warning(f"⚠️ Graph generation failed: {e}")
+        return {
+            "image_base64": None,
+            "minerals": [],
+            "values": [],
+            "error": str(e)
+        }
+
+
+async def _replace_with_exact_analysis(
+    analysis_id: str,
+    mapped_params: Dict[str, Any],
+    balance_cation: str,
+    balance_anion: str
+) -> None:
+    """Background task: run the exact PHREEQC analysis and overwrite the approximate one"""
+    try:
+        result = await PHREEQCService().analyze(
+            mapped_params,
+            balance_cation=balance_cation,
+            balance_anion=balance_anion
+        )
+        await db.update_analysis(analysis_id, {
+            "result":      result,
+            "results":     [result],
+            "graphs":      await _si_bar_chart(result),
+            "approximate": False
+        })
+        logger.info(f"✅ Exact result replaced approximate analysis {analysis_id}")
+    except Exception as e:
+        logger.error(f"❌ Exact recompute failed for {analysis_id}: {e}")
+
+
 
 @router.post("/calculations/standalone")
 async def run_standalone_calculations(data: Dict[str, Any]):
@@ -1064,11 +1241,13 @@ from app.services.s3_service import S3Service
 @router.get("/analysis/{analysis_id}/3d-graph")
 async def get_3d_graph(
     analysis_id: str,
+    response: Response,
     salt_name: str = Query(..., description="Mineral (e.g. Calcite)"),
     x_axis: str = Query("pH", description="X axis: pH | CoC | temp"),
     y_axis: str = Query("CoC", description="Y axis: pH | CoC | temp"),
     format: str = Query("json", description="json | png"),
-    upload_to_s3: bool = Query(False, description="Upload PNG to S3 and return URL")
+    upload_to_s3: bool = Query(False, description="Upload PNG to S3 and return URL"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Get 3D graph for a specific salt from stored grid analysis results.
@@ -1076,6 +1255,10 @@ async def get_3d_graph(
     format=json → raw data for frontend Plotly.js rendering
     format=png  → server-rendered PNG image (base64 or S3 URL)
     
+    Responses carry a strong ETag (304 on If-None-Match) and are
+    Cache-Control: immutable once the analysis is complete; rendered PNG
+    responses are persisted and served without re-rendering.
+    
     Examples:
     - JSON: /analysis/GRID-20260210-123456/3d-graph?salt_name=Calcite&format=json
     - PNG:  /analysis/GRID-20260210-123456/3d-graph?salt_name=Calcite&format=png&upload_to_s3=true
@@ -1092,59 +1275,81 @@ async def get_3d_graph(
                 detail=f"Analysis '{analysis_id}' not found. Please run grid analysis first."
             )
         
-        # ✅ Check if it's a grid analysis
-        if analysis.get("analysis_type") != "grid":
+        # ✅ Check if it's a grid analysis (or a columnar simple-saturation grid)
+        if not _is_grid_analysis(analysis):
             raise HTTPException(
                 status_code=400,
                 detail=f"Analysis '{analysis_id}' is not a grid analysis. Only grid analyses support 3D graphs."
             )
         
-        # ✅ Get results array
-        results = analysis.get("results", [])
-        
-        if not results or len(results) == 0:
+        if format not in ("json", "png"):
             raise HTTPException(
                 status_code=400,
-                detail="No grid results found in this analysis."
+                detail="format must be 'json' or 'png'"
             )
-        
-        logger.info(f"📊 Processing {len(results)} grid points")
+
+        # ✅ Conditional request / persisted render
+        etag = graph_etag(analysis, salt_name, x_axis, y_axis, format, upload_to_s3 and format == "png")
+        cache_headers = {"ETag": etag, "Cache-Control": cache_control(analysis)}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=cache_headers)
+        response.headers.update(cache_headers)
+
+        stored = await get_render(etag)
+        if stored is not None:
+            logger.info(f"📦 3D graph served from stored render: {analysis_id}/{salt_name}")
+            return stored
 
         graph_svc = GraphService()
 
-        if format == "json":
-            # ✅ Return JSON data for frontend Plotly.js
+        # ✅ Columnar grids: this mineral's SI arrays (cached, projected on miss)
+        surface = None
+        if analysis.get("storage") == "columnar":
+            surface = await grid_cache.get_mineral(analysis_id, salt_name)
+
+        if surface is not None:
+            json_response = surface_json_body(analysis, surface, salt_name, x_axis, y_axis)
+            if json_response is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="No grid results found in this analysis."
+                )
+            logger.info(f"📊 Processing {json_response['data_points']} grid points ({salt_name} only)")
+            graph_data = json_response["graph_data"]
+        else:
+            # ✅ Legacy documents: embedded results array
+            results = await load_results(analysis)
+
+            if not results or len(results) == 0:
+                raise HTTPException(
+                    status_code=400,
+                    detail="No grid results found in this analysis."
+                )
+
+            data_points = len(results)
+            logger.info(f"📊 Processing {data_points} grid points")
             graph_data = graph_svc.prepare_3d_graph_data(
                 results=results,
                 salt_name=salt_name,
                 x_axis=x_axis,
                 y_axis=y_axis
             )
-            
-            return {
-                "status": "success",
-                "graph_data": graph_data,
-                "analysis_id": analysis_id,
-                "data_points": len(results),
-                "grid_config": analysis.get("grid_config", {})
-            }
+            json_response = json_body(analysis, graph_data, data_points)
 
-        elif format == "png":
+        if format == "json":
+            # ✅ Return JSON data for frontend Plotly.js
+            return json_response
+
+        else:
             # ✅ Generate 3D surface PNG
-            png_base64 = graph_svc.generate_3d_surface_png(
-                results=results,
-                salt_name=salt_name,
+            png_base64 = await render(
+                "render_3d_surface_png",
+                graph_data=graph_data,
                 x_axis=x_axis,
                 y_axis=y_axis
             )
             
-            response = {
-                "status": "success",
-                "analysis_id": analysis_id,
-                "salt_name": salt_name,
-                "x_axis": x_axis,
-                "y_axis": y_axis
-            }
+            body = png_body(analysis_id, salt_name, x_axis, y_axis)
             
             # ✅ Upload to S3 if requested
             if upload_to_s3:
@@ -1158,32 +1363,207 @@ async def get_3d_graph(
                         filename=filename
                     )
                     
-                    response["s3_url"] = s3_result["url"]
-                    response["s3_key"] = s3_result["key"]
-                    response["s3_bucket"] = s3_result["bucket"]
+                    body["s3_url"] = s3_result["url"]
+                    body["s3_key"] = s3_result["key"]
+                    body["s3_bucket"] = s3_result["bucket"]
                     
                     logger.info(f"✅ Graph uploaded to S3: {s3_result['url']}")
                     
                 except Exception as e:
                     logger.error(f"❌ S3 upload failed: {e}")
-                    response["s3_error"] = str(e)
-                    response["image_base64"] = png_base64  # Fallback
+                    body["s3_error"] = str(e)
+                    body["image_base64"] = png_base64  # Fallback
             else:
                 # Return base64 if not uploading to S3
-                response["image_base64"] = png_base64
+                body["image_base64"] = png_base64
             
-            return response
+            if "s3_error" not in body:
+                try:
+                    await save_render(etag, analysis_id, salt_name, x_axis, y_axis, format, body)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not persist graph render: {e}")
+
+            return body
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ 3D graph generation failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/analysis/{analysis_id}/multi-salt-heatmap")
+async def get_multi_salt_heatmap(
+    analysis_id: str,
+    response: Response,
+    salt_names: Optional[str] = Query(None, description="Comma-separated minerals (default: salts of interest / common scale formers)"),
+    x_axis: str = Query("pH", description="X axis: pH | CoC | temp"),
+    y_axis: str = Query("CoC", description="Y axis: pH | CoC | temp"),
+    renderer: str = Query("matplotlib", description="matplotlib | fast (NumPy + Pillow raster)"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Side-by-side 2D SI heatmaps for several salts of a stored grid analysis
+    (base64 PNG). Same ETag / stored-render handling as 3d-graph;
+    renderer=fast renders in a few milliseconds and is not persisted.
+    """
+    try:
+        if renderer not in ("matplotlib", "fast"):
+            raise HTTPException(status_code=400, detail="renderer must be 'matplotlib' or 'fast'")
+        
+        analysis = await db.get_analysis_result(analysis_id)
+        
+        if not analysis:
+            raise HTTPException(status_code=404, detail=f"Analysis '{analysis_id}' not found")
+        if not _is_grid_analysis(analysis):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Analysis '{analysis_id}' is not a grid analysis."
+            )
+        
+        grid = None
+        if analysis.get("storage") == "columnar":
+            grid = await grid_cache.get_grid(analysis_id)
+        
+        if salt_names:
+            salts = [s.strip() for s in salt_names.split(",") if s.strip()]
+        elif grid is not None:
+            salts = prerender_salts(analysis, grid)
         else:
+            salts = get_common_scale_formers()
+        if not salts:
+            raise HTTPException(status_code=400, detail="No salts to plot")
+        
+        salt_key = ",".join(salts)
+        etag = graph_etag(analysis, salt_key, x_axis, y_axis, "heatmap" if renderer == "matplotlib" else "heatmap-fast")
+        cache_headers = {"ETag": etag, "Cache-Control": cache_control(analysis)}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=cache_headers)
+        response.headers.update(cache_headers)
+        
+        if renderer == "matplotlib":
+            stored = await get_render(etag)
+            if stored is not None:
+                return stored
+        
+        results = grid
+        if results is None:
+            results = list(await load_results(analysis))
+            if not results:
+                raise HTTPException(status_code=400, detail="No grid results found in this analysis.")
+        
+        body = png_body(analysis_id, salt_key, x_axis, y_axis)
+        body["salt_names"] = salts
+        
+        if renderer == "fast":
+            body["image_base64"] = GraphService().generate_multi_salt_heatmap(
+                results, salts, x_axis, y_axis, renderer="fast"
+            )
+            return body
+        
+        body["image_base64"] = await render("generate_multi_salt_heatmap", results, salts, x_axis, y_axis)
+        
+        try:
+            await save_render(etag, analysis_id, salt_key, x_axis, y_axis, "heatmap", body)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not persist heatmap render: {e}")
+        
+        return body
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Multi-salt heatmap failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analysis/{analysis_id}/thumbnail")
+async def get_analysis_thumbnail(
+    analysis_id: str,
+    salt_name: Optional[str] = Query(None, description="Mineral (default: first salt of interest / common scale former)"),
+    size: int = Query(96, ge=16, le=512, description="Edge length in px"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    SI zone-colour thumbnail (pH × CoC) of a grid analysis as image/png,
+    for list views (<img src=...>). Rendered with the fast raster renderer.
+    """
+    try:
+        analysis = await db.get_analysis_result(analysis_id)
+        
+        if not analysis:
+            raise HTTPException(status_code=404, detail=f"Analysis '{analysis_id}' not found")
+        if not _is_grid_analysis(analysis):
             raise HTTPException(
                 status_code=400,
-                detail="format must be 'json' or 'png'"
+                detail=f"Analysis '{analysis_id}' is not a grid analysis."
             )
+        
+        etag = graph_etag(analysis, salt_name or "", "pH", "CoC", f"thumbnail-{size}")
+        cache_headers = {"ETag": etag, "Cache-Control": cache_control(analysis)}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=cache_headers)
+        
+        graph_svc = GraphService()
+        if analysis.get("storage") == "columnar":
+            if salt_name is None:
+                grid = await grid_cache.get_grid(analysis_id)
+                salts = prerender_salts(analysis, grid) if grid is not None else []
+                salt_name = salts[0] if salts else "Calcite"
+            surface = await grid_cache.get_mineral(analysis_id, salt_name)
+            if surface is None:
+                raise HTTPException(status_code=400, detail="No grid results found in this analysis.")
+            graph_data = graph_svc.prepare_3d_graph_data_from_surface(surface, salt_name)
+        else:
+            results = await load_results(analysis)
+            if not results:
+                raise HTTPException(status_code=400, detail="No grid results found in this analysis.")
+            graph_data = graph_svc.prepare_3d_graph_data(results, salt_name or "Calcite")
+        
+        png = graph_svc.generate_heatmap_thumbnail(graph_data, size)
+        return Response(content=png, media_type="image/png", headers=cache_headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Thumbnail failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ========================================
+# NEW ENDPOINT: DATABASE MINERALS (dropdowns)
+# ========================================
+
+@router.get("/phreeqc/minerals")
+async def list_database_minerals(
+    database: str = Query("phreeqc", description="phreeqc | pitzer")
+):
+    """List PHASES defined in a PHREEQC database (from the cached index)"""
+    try:
+        phreeqc = PHREEQCService()
+        if database not in ("phreeqc", "pitzer"):
+            raise HTTPException(status_code=400, detail="database must be 'phreeqc' or 'pitzer'")
+
+        database_path = phreeqc.phreeqc_dat if database == "phreeqc" else phreeqc.pitzer_dat
+        index = get_database_index(database_path)
+        if index is None:
+            raise HTTPException(status_code=503, detail=f"Database not available: {database_path}")
+
+        minerals = [
+            {
+                "name":     name,
+                "formula":  index.phases[name]["formula"],
+                "elements": index.phases[name]["elements"],
+                "log_k_25": round(index.phase_log_k(name), 4)
+            }
+            for name in index.phase_names()
+        ]
+        return {"status": "success", "database": index.name, "count": len(minerals), "minerals": minerals}
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ 3D graph generation failed: {e}", exc_info=True)
+        logger.error(f"❌ Mineral list failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1206,6 +1586,8 @@ async def get_analysis_history(
         for r in results:
             r.pop("results", None)
             r.pop("_id", None)
+            if _is_grid_analysis(r):
+                r["thumbnail_url"] = f"/api/v1/analysis/{r['analysis_id']}/thumbnail"
 
         return {"status": "success", "count": len(results), "analyses": results}
 
@@ -1218,6 +1600,11 @@ async def get_analysis_history(
 # HELPER FUNCTIONS
 # ========================================
 
+def _is_grid_analysis(analysis: Dict[str, Any]) -> bool:
+    """Grid-shaped results: grid analyses and columnar-stored grids (simple saturation)"""
+    return analysis.get("analysis_type") == "grid" or analysis.get("storage") == "columnar"
+
+
 def _get_param_value(params: Dict[str, Any], key: str) -> Optional[float]:
     """Extract numeric value from params dict"""
     val = params.get(key)
@@ -1294,16 +1681,19 @@ def map_water_parameters(params: Dict[str, Any]) -> Dict[str, Any]:
 
 @router.post("/extract-and-grid-analysis")
 async def extract_and_run_grid_analysis(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     ph_range: Optional[str] = Query(None, description="Comma-separated: 7.0,7.5,8.0,8.5"),
     coc_range: Optional[str] = Query(None, description="Comma-separated: 2,3,4,5,6"),
-    temperature_c: float = Query(25, description="Temperature in Celsius")
+    temperature_c: float = Query(25, description="Temperature in Celsius"),
+    engine: str = Query("phreeqc", description="phreeqc (exact) or fast (NumPy approximation, IS ≤ 0.5)")
 ):
     """
     ONE-CLICK SOLUTION:
     1. Extract parameters from file (PDF/image)
     2. Auto-run grid analysis
     3. Return analysis_id for 3D graph generation
+       (default-view graphs are pre-rendered in the background)
     
     Example:
     POST /extract-and-grid-analysis?ph_range=7.0,7.5,8.0&coc_range=2,3,4,5
@@ -1333,6 +1723,9 @@ async def extract_and_run_grid_analysis(
         
         logger.info(f"✅ Extracted {len(extracted_params)} parameters")
         
+        if engine not in ("phreeqc", "fast"):
+            raise HTTPException(status_code=400, detail="engine must be 'phreeqc' or 'fast'")
+        
         # ============================================
         # STEP 2: PARSE GRID RANGES
         # ============================================
@@ -1372,6 +1765,7 @@ async def extract_and_run_grid_analysis(
         total_points = len(ph_list) * len(coc_list)
         logger.info(f"📊 Calculating {total_points} grid points...")
         
+        point_params = []
         for ph in ph_list:
             for coc in coc_list:
                 # Clone and modify parameters
@@ -1395,34 +1789,58 @@ async def extract_and_run_grid_analysis(
                 if chloride_val is not None and chloride_val == 0:
                     grid_params["Cl"] = {"value": 1, "unit": "mg/L"}
                 
-                # Balance ions
-                balance_cation = "Na" if "Na" in grid_params else "K"
-                balance_anion = "Cl" if "Cl" in grid_params else "SO4"
+                point_params.append((ph, coc, grid_params))
+        
+        # Fast engine: all points in one NumPy call, PHREEQC only outside its envelope
+        fast_results = [None] * len(point_params)
+        if engine == "fast":
+            fast = FastSIEngine(get_database_index(phreeqc.phreeqc_dat))
+            computed = fast.compute_waters([params for _, _, params in point_params])
+            fast_results, _ = fast_si_to_results(computed, [
+                {"pH": ph, "CoC": coc, "temp": temperature_c} for ph, coc, _ in point_params
+            ])
+        
+        for (ph, coc, grid_params), fast_result in zip(point_params, fast_results):
+            if fast_result is not None and "error" not in fast_result:
+                all_results.append({
+                    "pH": ph,
+                    "CoC": coc,
+                    "temperature_C": temperature_c,
+                    "saturation_indices": fast_result["saturation_indices"],
+                    "ionic_strength": fast_result["ionic_strength"],
+                    "engine": "fast"
+                })
+                successful_count += 1
+                continue
+            
+            # Balance ions
+            balance_cation = "Na" if "Na" in grid_params else "K"
+            balance_anion = "Cl" if "Cl" in grid_params else "SO4"
+            
+            # Run analysis
+            try:
+                result = await phreeqc.analyze(
+                    grid_params,
+                    balance_cation=balance_cation,
+                    balance_anion=balance_anion
+                )
                 
-                # Run analysis
-                try:
-                    result = await phreeqc.analyze(
-                        grid_params,
-                        balance_cation=balance_cation,
-                        balance_anion=balance_anion
-                    )
-                    
-                    result["pH"] = ph
-                    result["CoC"] = coc
-                    result["temperature_C"] = temperature_c
-                    
-                    all_results.append(result)
-                    successful_count += 1
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ Grid ({ph}, {coc}) failed: {e}")
-                    all_results.append({
-                        "pH": ph,
-                        "CoC": coc,
-                        "temperature_C": temperature_c,
-                        "error": str(e)
-                    })
-                    failed_count += 1
+                result["pH"] = ph
+                result["CoC"] = coc
+                result["temperature_C"] = temperature_c
+                
+                all_results.append(result)
+                successful_count += 1
+                
+            except Exception as e:
+                logger.warning(f"⚠️ Grid ({ph}, {coc}) failed: {e}")
+                all_results.append({
+                    "pH": ph,
+                    "CoC": coc,
+                    "temperature_C": temperature_c,
+                    "error": str(e)
+                })
+                failed_count += 1
         
         # ============================================
         # STEP 4: SAVE TO DATABASE
@@ -1439,9 +1857,10 @@ async def extract_and_run_grid_analysis(
             "grid_config": {
                 "ph_range": ph_list,
                 "coc_range": coc_list,
-                "temperature_c": temperature_c
+                "temperature_c": temperature_c,
+                "engine": engine
             },
-            "results": all_results,
+            "storage": "columnar",
             "metadata": {
                 "total_points": total_points,
                 "successful_points": successful_count,
@@ -1451,10 +1870,15 @@ async def extract_and_run_grid_analysis(
             "created_at": datetime.utcnow()
         }
         
+        await save_grid(analysis_id, ColumnarGrid.from_results(
+            all_results, ph_list, coc_list, [temperature_c]
+        ))
         await db.save_analysis_result(analysis_doc)
         
         logger.info(f"✅ Auto grid analysis complete: {successful_count}/{total_points}")
         
+        background_tasks.add_task(prerender_graphs, analysis_id)
+        
         # ============================================
         # RESPONSE
         # ============================================
@@ -7,6 +7,7 @@ UPDATED: Added collections for customers, assets, products, analysis_results
 
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import os
@@ -117,6 +118,17 @@ class Database:
             await self.db.analysis_results.create_index("analysis_type")
             await self.db.analysis_results.create_index("created_at")
             
+            # Columnar grid chunks: one per (analysis, temperature slice)
+            if "analysis_id_1" in await self.db.grid_chunks.index_information():
+                await self.db.grid_chunks.drop_index("analysis_id_1")   # old one-chunk layout
+            await self.db.grid_chunks.create_index(
+                [("analysis_id", 1), ("temp_index", 1)], unique=True
+            )
+            
+            # Persisted graph renders, keyed by response ETag
+            await self.db.graph_renders.create_index("etag", unique=True)
+            await self.db.graph_renders.create_index("analysis_id")
+            
             logger.info("✅ Database indexes created")
             
         except Exception as e:
@@ -135,6 +147,18 @@ class Database:
             logger.error(f"❌ Save analysis failed: {e}")
             raise
     
+    async def save_analyses(self, analyses: List[Dict[str, Any]]) -> List[str]:
+        """Save many water analysis results in one insert_many"""
+        try:
+            if not analyses:
+                return []
+            result = await self.db.water_analyses.insert_many(analyses)
+            logger.info(f"✅ {len(analyses)} analyses saved")
+            return [str(_id) for _id in result.inserted_ids]
+        except Exception as e:
+            logger.error(f"❌ Save analyses failed: {e}")
+            raise
+    
     async def get_analysis(self, analysis_id: str) -> Optional[Dict[str, Any]]:
         """Get analysis by ID"""
         try:
@@ -144,6 +168,20 @@ class Database:
             logger.error(f"❌ Get analysis failed: {e}")
             raise
     
+    async def update_analysis(self, analysis_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update water analysis (e.g. replace an approximate result with the exact one)"""
+        try:
+            update_data["updated_at"] = datetime.utcnow()
+            result = await self.db.water_analyses.update_one(
+                {"analysis_id": analysis_id},
+                {"$set": update_data}
+            )
+            logger.info(f"✅ Analysis updated: {analysis_id}")
+            return result.modified_count > 0
+        except Exception as e:
+            logger.error(f"❌ Update analysis failed: {e}")
+            raise
+    
     async def get_phreeqc_config(self) -> Optional[Dict[str, Any]]:
         """Get PHREEQC configuration"""
         try:
@@ -407,6 +445,11 @@ class Database:
                 {"$set": update_data}
             )
             logger.info(f"✅ Product updated: {product_id}")
+            
+            # Local import: product_cache imports this module
+            from app.services.product_cache import product_cache
+            product_cache.invalidate(product_id)
+            
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"❌ Update product failed: {e}")
@@ -474,6 +517,117 @@ class Database:
             logger.error(f"❌ Get analysis result failed: {e}")
             raise
     
+    async def update_analysis_result(self, analysis_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update analysis result"""
+        try:
+            update_data["updated_at"] = datetime.utcnow()
+            result = await self.db.analysis_results.update_one(
+                {"analysis_id": analysis_id},
+                {"$set": update_data}
+            )
+            logger.info(f"✅ Analysis result updated: {analysis_id}")
+            return result.modified_count > 0
+        except Exception as e:
+            logger.error(f"❌ Update analysis result failed: {e}")
+            raise
+
+    async def claim_progressive_run(
+        self,
+        analysis_id: str,
+        continuation_token: str,
+        stale_before: datetime
+    ) -> bool:
+        """
+        Atomically mark a progressive analysis as running. False if the
+        token is not the analysis' current one, or another run holds it
+        (and started after stale_before).
+        """
+        try:
+            now = datetime.utcnow()
+            result = await self.db.analysis_results.update_one(
+                {
+                    "analysis_id": analysis_id,
+                    "continuation_token": continuation_token,
+                    "$or": [
+                        {"progress_status": {"$ne": "running"}},
+                        {"progress_started_at": {"$lt": stale_before}}
+                    ]
+                },
+                {"$set": {"progress_status": "running", "progress_started_at": now, "updated_at": now}}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.error(f"❌ Claim progressive run failed: {e}")
+            raise
+
+    # ========================================
+    # GRID CHUNKS (columnar grid arrays)
+    # ========================================
+    
+    async def save_grid_chunks(self, analysis_id: str, chunks: List[Dict[str, Any]]) -> None:
+        """Save (replace) the chunk documents of a grid analysis"""
+        try:
+            now = datetime.utcnow()
+            await self.db.grid_chunks.bulk_write([
+                ReplaceOne(
+                    {"analysis_id": analysis_id, "temp_index": chunk["temp_index"]},
+                    {"analysis_id": analysis_id, **chunk, "updated_at": now},
+                    upsert=True
+                )
+                for chunk in chunks
+            ], ordered=False)
+            logger.info(f"✅ Grid saved: {analysis_id} ({len(chunks)} chunks)")
+        except Exception as e:
+            logger.error(f"❌ Save grid failed: {e}")
+            raise
+    
+    async def get_grid_chunks(
+        self,
+        analysis_id: str,
+        temp_indices: Optional[List[int]] = None,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get grid chunk documents (all, or only the given temp_index values)"""
+        try:
+            query: Dict[str, Any] = {"analysis_id": analysis_id}
+            if temp_indices is not None:
+                query["temp_index"] = {"$in": list(temp_indices)}
+            cursor = self.db.grid_chunks.find(query, projection).sort("temp_index", 1)
+            return await cursor.to_list(length=None)
+        except Exception as e:
+            logger.error(f"❌ Get grid failed: {e}")
+            raise
+    
+    # ========================================
+    # GRAPH RENDERS (persisted PNGs)
+    # ========================================
+    
+    async def get_graph_render(self, etag: str) -> Optional[Dict[str, Any]]:
+        """Get a persisted graph render by ETag"""
+        try:
+            return await self.db.graph_renders.find_one({"etag": etag}, {"_id": 0})
+        except Exception as e:
+            logger.error(f"❌ Get graph render failed: {e}")
+            raise
+    
+    async def save_graph_render(self, render: Dict[str, Any]) -> None:
+        """Save (replace) a graph render"""
+        try:
+            render["created_at"] = datetime.utcnow()
+            await self.db.graph_renders.replace_one({"etag": render["etag"]}, render, upsert=True)
+        except Exception as e:
+            logger.error(f"❌ Save graph render failed: {e}")
+            raise
+    
+    async def delete_graph_renders(self, analysis_id: str) -> int:
+        """Drop every persisted render of an analysis (its grid was rewritten)"""
+        try:
+            result = await self.db.graph_renders.delete_many({"analysis_id": analysis_id})
+            return result.deleted_count
+        except Exception as e:
+            logger.error(f"❌ Delete graph renders failed: {e}")
+            raise
+    
     async def list_analysis_results(
         self,
         analysis_type: Optional[str] = None,
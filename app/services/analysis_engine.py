@@ -3,20 +3,49 @@ Analysis Engine - Main Orchestrator
 Coordinates all analysis types:
 - Simple Saturation Model
 - Where Can I Treat (Fixed / Auto dosage)
+- Max-CoC frontier, CCPP grid, Mixing ratio sweep
 - Compare 2 Analyses
 """
 
+import os
+import json
+import asyncio
+import time
+import base64
 import logging
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from app.services.phreeqc_service import PHREEQCService
+import numpy as np
+
+from app.services.phreeqc_service import (
+    PHREEQCService, PHREEQCSaturatedError, PHREEQC_MAX_WORKERS, phreeqc_slot,
+    _concentrate_params, _set_ph_temp, _get_param_value
+)
+from app.services.phreeqc_database import possible_phases, validate_phases, get_database_index
+from app.services.fast_si_engine import FastSIEngine, FAST_MINERALS, supports_minerals
 from app.services.grid_calculator import GridCalculator
 from app.services.cooling_tower_service import CoolingTowerService
+from app.services.product_cache import product_cache, active_components as active_components_for
+from app.services.grid_store import ColumnarGrid, save_grid, load_grid, load_results
+from app.services.graph_prerender import prerender_graphs
+from app.utils.salt_data_table import (
+    classify_si_value, get_salt_threshold, inhibitor_class, inhibitor_si_credit
+)
 from app.db.mongo import db
 
 logger = logging.getLogger(__name__)
 
+# Progressive (deadline_ms) grids: coarse stride per axis, points per batch
+PROGRESSIVE_STRIDE = 4
+PROGRESSIVE_CHUNK = 256
+# A continuation run older than this no longer blocks others (crashed worker)
+PROGRESSIVE_RUN_LEASE_S = 15 * 60
+
+
+class AnalysisInProgressError(RuntimeError):
+    """Another run is already continuing this progressive analysis"""
+
 
 class AnalysisEngine:
     """Main analysis orchestrator for all analysis types"""
@@ -40,7 +69,10 @@ class AnalysisEngine:
         coc_steps: int = 10,
         temp_steps: int = 10,
         balance_cation: str = "Na",
-        balance_anion: str = "Cl"
+        balance_anion: str = "Cl",
+        engine: str = "phreeqc",
+        wait_budget_ms: Optional[float] = None,
+        deadline_ms: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Simple Saturation Model - 3D Grid Analysis
@@ -57,12 +89,19 @@ class AnalysisEngine:
             ph_range: (min_pH, max_pH)
             coc_range: (min_CoC, max_CoC)
             temp_range: (min_temp_C, max_temp_C)
-            salts_of_interest: List of minerals to analyze (or None for all)
+            salts_of_interest: List of minerals to analyze (or None for all phases possible in this water)
             ph_steps: Number of pH points
             coc_steps: Number of CoC points
             temp_steps: Number of temperature points
             balance_cation: Cation for ion balancing (Na/K)
             balance_anion: Anion for ion balancing (Cl/SO4)
+            engine: "phreeqc" (exact) or "fast" (NumPy approximation for
+                    FAST_MINERALS; points outside its envelope use PHREEQC)
+            wait_budget_ms: Max wait for a PHREEQC slot; when exceeded the grid
+                    is answered by the fast engine and flagged approximate
+            deadline_ms: Time budget; computes a coarse sub-lattice first, then
+                    finer passes until the deadline, and returns the partial
+                    grid with a continuation_token
         
         Returns:
             {
@@ -86,8 +125,8 @@ class AnalysisEngine:
             total_points = grid_data["total_points"]
             logger.info(f"✅ Grid generated: {total_points} points")
             
-            # Step 2: Ion balance base water
-            logger.info("⚖️ Step 2: Ion balancing base water...")
+            # Step 2: Balancing config, database and phases
+            logger.info("⚖️ Step 2: Selecting database and phases...")
             
             # Get PHREEQC config
             config = await db.get_phreeqc_config()
@@ -100,102 +139,107 @@ class AnalysisEngine:
                         "anion_balance_ion": balance_anion
                     }
                 }
+            balancing = config.get("ion_balancing", {})
             
-            # Balance base water
-            balanced_base = await self.phreeqc_service._ion_balancing_full(
-                base_water_analysis, config
+            database = self.phreeqc_service.select_database(
+                base_water_analysis, ph_range, coc_range, temp_range
             )
             
-            logger.info("✅ Base water balanced")
-            
-            # Step 3: Prepare batch inputs
+            # Reject unknown salts upfront; otherwise limit SI to phases
+            # whose elements are actually present in this water
+            if salts_of_interest:
+                validate_phases(database, salts_of_interest)
+                phases = list(salts_of_interest)
+            else:
+                phases = possible_phases(database, base_water_analysis) or None
+                if engine == "fast":
+                    phases = [m for m in FAST_MINERALS if not phases or m in phases]
+
+            # Step 3: Prepare batch grid points
             logger.info("📦 Step 3: Preparing batch inputs...")
-            batch_inputs = GridCalculator.prepare_batch_inputs(
-                balanced_base, grid_data["grid_points"]
-            )
+            grid_points = [
+                {"pH": ph, "CoC": coc, "temp": temp}
+                for ph, coc, temp in grid_data["grid_points"]
+            ]
             
-            # Step 4: Run PHREEQC for all points
-            logger.info(f"🚀 Step 4: Running PHREEQC for {total_points} points...")
+            # Shed only when the fast engine can answer every requested salt;
+            # otherwise queue for PHREEQC like an unbudgeted request
+            if wait_budget_ms is not None and salts_of_interest and not supports_minerals(salts_of_interest):
+                logger.info(f"⏳ Fast engine does not cover {salts_of_interest}, no load shedding")
+                wait_budget_ms = None
             
-            results = []
+            # Step 4: Balance + run all points while holding one PHREEQC slot;
+            # if none frees up within the budget, answer from the fast engine.
+            # With a deadline: coarse-to-fine passes until time runs out.
+            cursor = None
+            unsupported_phases = []
+            try:
+                async with phreeqc_slot(wait_budget_ms):
+                    if deadline_ms is None:
+                        balanced_base, batch_results = await self._compute_grid(
+                            base_water_analysis, grid_points, database, phases,
+                            balancing, balance_cation, balance_anion, engine
+                        )
+                    else:
+                        deadline = time.monotonic() + deadline_ms / 1000.0
+                        passes = GridCalculator.progressive_passes(
+                            (ph_steps, coc_steps, temp_steps), PROGRESSIVE_STRIDE
+                        )
+                        balanced_base = await self._balance_base(
+                            base_water_analysis, database, balancing, balance_cation, balance_anion
+                        )
+                        computed, cursor = await self._run_passes(
+                            balanced_base, grid_points, passes, (0, 0),
+                            database, phases, engine, deadline
+                        )
+                        batch_results = _as_batch(computed, total_points)
+                approximate = False
+            except PHREEQCSaturatedError as e:
+                logger.warning(f"⚠️ {e} → approximate grid from fast engine")
+                balanced_base = self.phreeqc_service.estimate_ion_balance(
+                    base_water_analysis,
+                    balancing.get("cation_balance_ion", balance_cation),
+                    balancing.get("anion_balance_ion", balance_anion)
+                )
+                batch_results = self._run_fast_only(balanced_base, grid_points, phases)
+                unsupported_phases = [p for p in (phases or []) if p not in FAST_MINERALS]
+                approximate = True
             
-            for i, water_input in enumerate(batch_inputs):
-                try:
-                    # Extract grid point info
-                    ph = water_input["_grid_pH"]
-                    coc = water_input["_grid_CoC"]
-                    temp = water_input["_grid_temp"]
-                    
-                    # Remove metadata before PHREEQC
-                    clean_input = {k: v for k, v in water_input.items() if not k.startswith("_")}
-                    
-                    # Run PHREEQC
-                    phreeqc_result = await self.phreeqc_service.analyze(
-                        clean_input,
-                        calculation_type="standard"
-                    )
-                    
-                    # Extract saturation indices
-                    saturation_indices = phreeqc_result.get("saturation_indices", [])
-                    
-                    # Filter by salts of interest
-                    if salts_of_interest:
-                        saturation_indices = [
-                            si for si in saturation_indices
-                            if si["mineral_name"] in salts_of_interest
-                        ]
-                    
-                    # Store result with grid coordinates
-                    result_point = {
-                        "point_index": i,
-                        "pH": ph,
-                        "CoC": coc,
-                        "temperature_C": temp,
-                        "saturation_indices": saturation_indices,
-                        "ionic_strength": phreeqc_result.get("ionic_strength", 0),
-                        "charge_balance_error": phreeqc_result.get("charge_balance_error", 0),
-                        "database_used": phreeqc_result.get("database_used", "unknown")
-                    }
-                    
-                    results.append(result_point)
-                    
-                    # Log progress every 10%
-                    if (i + 1) % max(1, total_points // 10) == 0:
-                        progress = ((i + 1) / total_points) * 100
-                        logger.info(f"   Progress: {progress:.0f}% ({i + 1}/{total_points})")
-                
-                except Exception as e:
-                    logger.error(f"❌ Point {i} failed: {e}")
-                    # Store error result
-                    results.append({
-                        "point_index": i,
-                        "pH": water_input.get("_grid_pH"),
-                        "CoC": water_input.get("_grid_CoC"),
-                        "temperature_C": water_input.get("_grid_temp"),
-                        "error": str(e),
-                        "saturation_indices": []
-                    })
+            results = self._to_grid_results(batch_results, salts_of_interest, database)
             
             logger.info(f"✅ PHREEQC completed: {len(results)} results")
             
             # Step 5: Generate analysis ID and save
             analysis_id = f"SSM-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+            continuation_token = None
+            if cursor is not None:
+                continuation_token = _encode_continuation_token(analysis_id, PROGRESSIVE_STRIDE, cursor)
             
-            # Save to database
+            # Save to database: SI / IS arrays go to columnar grid storage
+            await save_grid(analysis_id, ColumnarGrid.from_results(
+                results, grid_data["ph_values"], grid_data["coc_values"], grid_data["temp_values"],
+                os.path.basename(database)
+            ))
             analysis_document = {
                 "analysis_id": analysis_id,
                 "analysis_type": "simple_saturation",
                 "base_water_analysis": balanced_base,
-                "grid_info": grid_data,
-                "results": results,
+                "grid_info": _grid_info_metadata(grid_data),
+                "storage": "columnar",
                 "parameters": {
                     "ph_range": ph_range,
                     "coc_range": coc_range,
                     "temp_range": temp_range,
                     "salts_of_interest": salts_of_interest,
                     "balance_cation": balance_cation,
-                    "balance_anion": balance_anion
+                    "balance_anion": balance_anion,
+                    "engine": engine,
+                    "phases": phases
                 },
+                "approximate": approximate,
+                "unsupported_phases": unsupported_phases,
+                "complete": cursor is None,
+                "continuation_token": continuation_token,
                 "created_at": datetime.utcnow()
             }
             
@@ -210,7 +254,12 @@ class AnalysisEngine:
                 "total_points_calculated": len(results),
                 "success_count": len([r for r in results if "error" not in r]),
                 "error_count": len([r for r in results if "error" in r]),
-                "salts_analyzed": salts_of_interest or "all",
+                "retried_count": len([r for r in results if r.get("retries")]),
+                "salts_analyzed": salts_of_interest or phases or "all",
+                "approximate": approximate,
+                "unsupported_phases": unsupported_phases,
+                "complete": cursor is None,
+                "continuation_token": continuation_token,
                 "results_preview": results[:5]  # First 5 results for preview
             }
             
@@ -218,6 +267,336 @@ class AnalysisEngine:
             logger.error(f"❌ Simple Saturation Model failed: {e}")
             raise
     
+    async def _compute_grid(
+        self,
+        base_water_analysis: Dict[str, Any],
+        grid_points: List[Dict[str, float]],
+        database: str,
+        phases: Optional[List[str]],
+        balancing: Dict[str, Any],
+        balance_cation: str,
+        balance_anion: str,
+        engine: str
+    ) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Ion balance the base water, then SI for every grid point"""
+        balanced_base = await self._balance_base(
+            base_water_analysis, database, balancing, balance_cation, balance_anion
+        )
+        batch_results = await self._run_grid_points(
+            balanced_base, grid_points, database, phases, engine
+        )
+        return balanced_base, batch_results
+    
+    async def _balance_base(
+        self,
+        base_water_analysis: Dict[str, Any],
+        database: str,
+        balancing: Dict[str, Any],
+        balance_cation: str,
+        balance_anion: str
+    ) -> Dict[str, Any]:
+        balanced_base = await self.phreeqc_service.ion_balance(
+            base_water_analysis,
+            cation_ion=balancing.get("cation_balance_ion", balance_cation),
+            anion_ion=balancing.get("anion_balance_ion", balance_anion),
+            max_iterations=balancing.get("max_iterations", 10),
+            tolerance_percent=balancing.get("tolerance_percent", 5),
+            database=database
+        )
+        logger.info("✅ Base water balanced")
+        return balanced_base
+    
+    async def _run_grid_points(
+        self,
+        balanced_base: Dict[str, Any],
+        grid_points: List[Dict[str, float]],
+        database: str,
+        phases: Optional[List[str]],
+        engine: str
+    ) -> List[Dict[str, Any]]:
+        """One compiled multi-SOLUTION input (or the fast engine)"""
+        if engine == "fast" and supports_minerals(phases):
+            logger.info(f"⚡ Fast SI engine for {len(grid_points)} points...")
+            return await self._run_fast_grid(
+                balanced_base, grid_points, database, phases
+            )
+        
+        if engine == "fast":
+            logger.warning(f"⚠️ Fast engine does not cover {phases}, using PHREEQC")
+        logger.info(f"🚀 Running PHREEQC for {len(grid_points)} points...")
+        return await self.phreeqc_service.run_batch_solution_spread(
+            balanced_base, grid_points, database, phases=phases
+        )
+    
+    async def _run_passes(
+        self,
+        balanced_base: Dict[str, Any],
+        grid_points: List[Dict[str, float]],
+        passes: List[List[int]],
+        cursor: tuple[int, int],
+        database: str,
+        phases: Optional[List[str]],
+        engine: str,
+        deadline: Optional[float]
+    ) -> tuple[Dict[int, Dict[str, Any]], Optional[tuple[int, int]]]:
+        """
+        Run progressive passes from cursor=(pass, offset) in chunks of
+        PROGRESSIVE_CHUNK points until done or the monotonic deadline passes.
+        The deadline is not checked during the first (coarse) pass, so a
+        partial grid always spans the full range; later runs compute at
+        least one chunk.
+        
+        Returns:
+            ({point_index: batch result}, next cursor or None when complete)
+        """
+        computed = {}
+        pass_index, offset = cursor
+        
+        while pass_index < len(passes):
+            indices = passes[pass_index]
+            while offset < len(indices):
+                if deadline is not None and pass_index > 0 and computed and time.monotonic() >= deadline:
+                    logger.info(f"⏱️ Deadline reached: {len(computed)} points this run")
+                    return computed, (pass_index, offset)
+                
+                chunk = indices[offset:offset + PROGRESSIVE_CHUNK]
+                batch = await self._run_grid_points(
+                    balanced_base, [grid_points[i] for i in chunk], database, phases, engine
+                )
+                computed.update(zip(chunk, batch))
+                offset += len(chunk)
+            
+            logger.info(f"✅ Pass {pass_index + 1}/{len(passes)} complete")
+            pass_index, offset = pass_index + 1, 0
+        
+        return computed, None
+    
+    async def continue_progressive(
+        self,
+        continuation_token: str,
+        deadline_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Resume a deadline-bounded simple saturation analysis from its
+        continuation token, merge the new points into the stored analysis
+        and return the updated summary (with a new token if still partial).
+        
+        Raises:
+            AnalysisInProgressError: another run holds the analysis
+            ValueError: unknown analysis or stale token
+        """
+        token = _decode_continuation_token(continuation_token)
+        analysis_id = token["analysis_id"]
+        deadline = time.monotonic() + deadline_ms / 1000.0 if deadline_ms else None
+        
+        doc = await db.get_analysis_result(analysis_id)
+        if not doc:
+            raise ValueError(f"Analysis not found: {analysis_id}")
+        if doc.get("complete", True):
+            return _progressive_summary(doc, None, await load_results(doc))
+        
+        # One run at a time: the token must be current and no live run may hold it
+        stale_before = datetime.utcnow() - timedelta(seconds=PROGRESSIVE_RUN_LEASE_S)
+        if not await db.claim_progressive_run(analysis_id, continuation_token, stale_before):
+            if doc.get("continuation_token") != continuation_token:
+                raise ValueError("continuation_token is stale; use the latest token of this analysis")
+            raise AnalysisInProgressError(f"Analysis {analysis_id} is already being continued")
+        
+        try:
+            return await self._continue_claimed(doc, token, deadline)
+        except Exception:
+            await db.update_analysis_result(analysis_id, {"progress_status": None})
+            raise
+    
+    async def _continue_claimed(
+        self,
+        doc: Dict[str, Any],
+        token: Dict[str, Any],
+        deadline: Optional[float]
+    ) -> Dict[str, Any]:
+        """continue_progressive() body, run while holding the progress claim"""
+        analysis_id = doc["analysis_id"]
+        params = doc["parameters"]
+        grid_info = doc["grid_info"]
+        grid_points = _grid_points(doc)
+        shape = (len(grid_info["ph_values"]), len(grid_info["coc_values"]), len(grid_info["temp_values"]))
+        passes = GridCalculator.progressive_passes(shape, token["stride"])
+        database = self.phreeqc_service.select_database(
+            doc["base_water_analysis"],
+            tuple(params["ph_range"]), tuple(params["coc_range"]), tuple(params["temp_range"])
+        )
+        
+        computed, cursor = await self._run_passes(
+            doc["base_water_analysis"], grid_points, passes, (token["pass"], token["offset"]),
+            database, params.get("phases"), params.get("engine", "phreeqc"), deadline
+        )
+        
+        grid = await load_grid(analysis_id) if doc.get("storage") == "columnar" else None
+        if grid is None:    # stored before columnar grids
+            grid = ColumnarGrid.from_results(
+                doc.get("results", []), grid_info["ph_values"], grid_info["coc_values"],
+                grid_info["temp_values"], os.path.basename(database)
+            )
+        grid.merge_results(self._to_grid_results(
+            _as_batch(computed, len(grid_points)), params.get("salts_of_interest"), database
+        ))
+        await save_grid(analysis_id, grid)
+        
+        new_token = None
+        if cursor is not None:
+            new_token = _encode_continuation_token(analysis_id, token["stride"], cursor)
+        
+        update = {
+            "storage": "columnar",
+            "complete": cursor is None,
+            "continuation_token": new_token,
+            "progress_status": None
+        }
+        await db.update_analysis_result(analysis_id, update)
+        doc.update(update)
+        
+        results = grid.results()
+        logger.info(f"✅ Progressive {analysis_id}: {len(results)}/{len(grid_points)} points")
+        return _progressive_summary(doc, new_token, results)
+    
+    def _to_grid_results(
+        self,
+        batch_results: List[Dict[str, Any]],
+        salts_of_interest: Optional[List[str]],
+        database: str
+    ) -> List[Dict[str, Any]]:
+        """Batch results → stored per-point result dicts"""
+        results = []
+        
+        for i, phreeqc_result in enumerate(batch_results):
+            if phreeqc_result is None:       # not computed yet (progressive)
+                continue
+            if "error" in phreeqc_result:
+                results.append({
+                    "point_index": i,
+                    "pH": phreeqc_result["_grid_pH"],
+                    "CoC": phreeqc_result["_grid_CoC"],
+                    "temperature_C": phreeqc_result["_grid_temp"],
+                    "error": phreeqc_result["error"],
+                    "status": phreeqc_result.get("_status", "failed"),
+                    "saturation_indices": [],
+                    "retries": phreeqc_result.get("_retries", 0)
+                })
+                continue
+            
+            # Extract saturation indices
+            saturation_indices = phreeqc_result.get("saturation_indices", [])
+            
+            # Filter by salts of interest
+            if salts_of_interest:
+                saturation_indices = [
+                    si for si in saturation_indices
+                    if si["mineral_name"] in salts_of_interest
+                ]
+            
+            # Store result with grid coordinates
+            results.append({
+                "point_index": i,
+                "pH": phreeqc_result["_grid_pH"],
+                "CoC": phreeqc_result["_grid_CoC"],
+                "temperature_C": phreeqc_result["_grid_temp"],
+                "saturation_indices": saturation_indices,
+                "ionic_strength": phreeqc_result.get("ionic_strength", 0),
+                "charge_balance_error": phreeqc_result.get("charge_balance_error_pct", 0),
+                "database_used": os.path.basename(database),
+                "engine": phreeqc_result.get("engine", "phreeqc"),
+                "retries": phreeqc_result.get("_retries", 0)
+            })
+        
+        return results
+    
+    def _run_fast_only(
+        self,
+        base_water_analysis: Dict[str, Any],
+        grid_points: List[Dict[str, float]],
+        phases: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Load-shedding path: fast engine only, no PHREEQC. The base water
+        carries an estimated balance; phases outside FAST_MINERALS are not
+        computed (the caller reports them as unsupported_phases).
+        """
+        minerals = [m for m in (phases or FAST_MINERALS) if m in FAST_MINERALS] or FAST_MINERALS
+        engine = FastSIEngine(get_database_index(self.phreeqc_service.phreeqc_dat))
+        results, _ = engine.run_points(base_water_analysis, grid_points, minerals)
+        for result in results:
+            result["approximate"] = True
+        return results
+    
+    async def replace_with_exact(self, analysis_id: str) -> None:
+        """
+        Recompute an approximate (load-shed) simple saturation analysis with
+        PHREEQC and overwrite its stored results, then pre-render its default
+        graphs. Meant for background tasks.
+        """
+        try:
+            doc = await db.get_analysis_result(analysis_id)
+            if not doc or not doc.get("approximate"):
+                return
+            
+            params = doc["parameters"]
+            base_water_analysis = doc["base_water_analysis"]
+            grid_points = _grid_points(doc)
+            database = self.phreeqc_service.select_database(
+                base_water_analysis,
+                tuple(params["ph_range"]), tuple(params["coc_range"]), tuple(params["temp_range"])
+            )
+            config = await db.get_phreeqc_config() or {}
+            
+            balanced_base, batch_results = await self._compute_grid(
+                base_water_analysis, grid_points, database, params.get("phases"),
+                config.get("ion_balancing", {}),
+                params["balance_cation"], params["balance_anion"], params.get("engine", "phreeqc")
+            )
+            
+            grid_info = doc["grid_info"]
+            await save_grid(analysis_id, ColumnarGrid.from_results(
+                self._to_grid_results(batch_results, params.get("salts_of_interest"), database),
+                grid_info["ph_values"], grid_info["coc_values"], grid_info["temp_values"],
+                os.path.basename(database)
+            ))
+            await db.update_analysis_result(analysis_id, {
+                "base_water_analysis": balanced_base,
+                "storage": "columnar",
+                "approximate": False,
+                "unsupported_phases": []
+            })
+            logger.info(f"✅ Exact results replaced approximate analysis {analysis_id}")
+            await prerender_graphs(analysis_id)
+            
+        except Exception as e:
+            logger.error(f"❌ Exact recompute failed for {analysis_id}: {e}")
+    
+    async def _run_fast_grid(
+        self,
+        balanced_base: Dict[str, Any],
+        grid_points: List[Dict[str, float]],
+        database: str,
+        phases: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fast NumPy SI for the whole grid; points outside the accuracy
+        envelope (IS > 0.5 or not converged) are recomputed with PHREEQC.
+        """
+        minerals = [m for m in (phases or FAST_MINERALS) if m in FAST_MINERALS]
+        engine = FastSIEngine(get_database_index(self.phreeqc_service.phreeqc_dat))
+        results, fallback = engine.run_points(balanced_base, grid_points, minerals)
+        
+        if fallback:
+            logger.info(f"🔁 {len(fallback)} points outside fast envelope → PHREEQC")
+            exact = await self.phreeqc_service.run_batch_solution_spread(
+                balanced_base, [grid_points[i] for i in fallback], database, phases=minerals
+            )
+            for i, result in zip(fallback, exact):
+                results[i] = result
+        
+        return results
+    
     # ========================================
     # WHERE CAN I TREAT - FIXED DOSAGE
     # ========================================
@@ -239,8 +618,9 @@ class AnalysisEngine:
         
         Steps:
         1. Calculate active component dosages from products
-        2. Add actives to concentrated water at each grid point
-        3. Run PHREEQC
+        2. Add ion actives to concentrated water at each grid point
+           (inhibitor actives shift SI by inhibitor_si_credit())
+        3. Run PHREEQC (batched multi-SOLUTION runs)
         4. Determine green/yellow/red zones based on salt thresholds
         
         Args:
@@ -252,6 +632,8 @@ class AnalysisEngine:
         
         Returns:
             Analysis results with green/yellow/red classifications
+            (points PHREEQC failed on are kept with "error" and
+            classification "unknown")
         """
         try:
             logger.info("🎯 Starting Where Can I Treat (Fixed Dosage)")
@@ -261,29 +643,21 @@ class AnalysisEngine:
             
             active_components = {}
             
+            # All products in one cached lookup
+            entries = await product_cache.get_many([p["product_id"] for p in products])
+            
             for product_info in products:
                 product_id = product_info["product_id"]
                 dosage_ppm = product_info["dosage_ppm"]
                 
-                # Get product from database
-                product = await db.db.products.find_one({"product_id": product_id})
-                
-                if not product:
+                entry = entries.get(product_id)
+                if not entry:
                     logger.warning(f"⚠️ Product {product_id} not found, skipping")
                     continue
                 
-                # Get formulation
-                formulation = product.get("formulation", {})
-                
-                # Calculate active PPM for each component
-                for component_name, active_percent in formulation.items():
-                    active_ppm = dosage_ppm * (active_percent / 100.0)
-                    
-                    # Accumulate if component already present
-                    if component_name in active_components:
-                        active_components[component_name] += active_ppm
-                    else:
-                        active_components[component_name] = active_ppm
+                # Accumulate active PPM for each component
+                for component_name, active_ppm in active_components_for(entry, dosage_ppm).items():
+                    active_components[component_name] = active_components.get(component_name, 0.0) + active_ppm
             
             logger.info(f"✅ Active components: {active_components}")
             
@@ -297,59 +671,75 @@ class AnalysisEngine:
             # Step 3: Run PHREEQC with added actives
             logger.info("🚀 Step 3: Running PHREEQC with treatment chemicals...")
             
-            # Ion balance base water
-            config = await db.get_phreeqc_config()
-            if not config:
-                config = {"ion_balancing": {"max_iterations": 10, "tolerance_percent": 5}}
+            # Ions go into the water, inhibitors become an SI credit
+            ion_actives, inhibitor_actives, unmodelled = _split_actives(active_components)
+            if unmodelled:
+                logger.warning(f"⚠️ Actives not modelled for scaling: {unmodelled}")
+            si_credit = inhibitor_si_credit(inhibitor_actives, target_salts)
             
-            balanced_base = await self.phreeqc_service._ion_balancing_full(
-                base_water_analysis, config
+            database = self.phreeqc_service.select_database(
+                base_water_analysis, ph_range, coc_range, temp_range
+            )
+            validate_phases(database, target_salts)
+            
+            # Ion balance base water
+            config = await db.get_phreeqc_config() or {}
+            balanced_base = await self._balance_base(
+                base_water_analysis, database, config.get("ion_balancing", {}), "Na", "Cl"
             )
             
             # Prepare batch
             batch_inputs = GridCalculator.prepare_batch_inputs(
                 balanced_base, grid_data["grid_points"]
             )
+            treated_waters = [
+                _add_actives({k: v for k, v in w.items() if not k.startswith("_")}, ion_actives, 1.0)
+                for w in batch_inputs
+            ]
+            
+            chunk = max(1, -(-len(treated_waters) // PHREEQC_MAX_WORKERS))
+            batches = await asyncio.gather(*[
+                self.phreeqc_service.run_batch_waters(treated_waters[i:i + chunk], database, target_salts)
+                for i in range(0, len(treated_waters), chunk)
+            ])
             
             results = []
             
-            for i, water_input in enumerate(batch_inputs):
-                try:
-                    # Add active components to this water sample
-                    treated_water = {k: v for k, v in water_input.items() if not k.startswith("_")}
-                    
-                    for component, ppm in active_components.items():
-                        # Map component to PHREEQC parameter
-                        # This needs proper mapping based on component type
-                        # For now, add as-is if it's a valid parameter
-                        treated_water[component] = {"value": ppm, "unit": "mg/L"}
-                    
-                    # Run PHREEQC
-                    phreeqc_result = await self.phreeqc_service.analyze(
-                        treated_water,
-                        calculation_type="standard"
-                    )
-                    
-                    # Classify result (green/yellow/red)
-                    classification = self._classify_treatment_result(
-                        phreeqc_result["saturation_indices"],
-                        target_salts
-                    )
-                    
-                    result_point = {
+            for i, (water_input, phreeqc_result) in enumerate(
+                zip(batch_inputs, [r for batch in batches for r in batch])
+            ):
+                if "error" in phreeqc_result:
+                    logger.error(f"❌ Point {i} failed: {phreeqc_result['error']}")
+                    results.append({
                         "point_index": i,
                         "pH": water_input["_grid_pH"],
                         "CoC": water_input["_grid_CoC"],
                         "temperature_C": water_input["_grid_temp"],
-                        "saturation_indices": phreeqc_result["saturation_indices"],
-                        "classification": classification,
+                        "error": phreeqc_result["error"],
+                        "saturation_indices": [],
+                        "classification": "unknown",
                         "active_components_added": active_components
-                    }
-                    
-                    results.append(result_point)
+                    })
+                    continue
                 
-                except Exception as e:
-                    logger.error(f"❌ Point {i} failed: {e}")
+                # Classify result (green/yellow/red) on SI less inhibitor credit
+                classification = self._classify_treatment_result(
+                    [
+                        {**s, "si_value": s["si_value"] - si_credit.get(s["mineral_name"], 0.0)}
+                        for s in phreeqc_result["saturation_indices"]
+                    ],
+                    target_salts
+                )
+                
+                results.append({
+                    "point_index": i,
+                    "pH": water_input["_grid_pH"],
+                    "CoC": water_input["_grid_CoC"],
+                    "temperature_C": water_input["_grid_temp"],
+                    "saturation_indices": phreeqc_result["saturation_indices"],
+                    "classification": classification,
+                    "active_components_added": active_components
+                })
             
             # Generate analysis ID
             analysis_id = f"WCIT-Fixed-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
@@ -360,7 +750,9 @@ class AnalysisEngine:
                 "analysis_type": "where_can_i_treat_fixed",
                 "products": products,
                 "active_components": active_components,
-                "grid_info": grid_data,
+                "si_credit": si_credit,
+                "unmodelled_actives": unmodelled,
+                "grid_info": _grid_info_metadata(grid_data),
                 "results": results,
                 "created_at": datetime.utcnow()
             })
@@ -371,11 +763,14 @@ class AnalysisEngine:
                 "analysis_id": analysis_id,
                 "grid_info": grid_data,
                 "active_components": active_components,
+                "si_credit": si_credit,
+                "unmodelled_actives": unmodelled,
                 "results_summary": {
                     "total_points": len(results),
                     "green_zones": len([r for r in results if r["classification"] == "green"]),
                     "yellow_zones": len([r for r in results if r["classification"] == "yellow"]),
-                    "red_zones": len([r for r in results if r["classification"] == "red"])
+                    "red_zones": len([r for r in results if r["classification"] == "red"]),
+                    "error_count": len([r for r in results if "error" in r])
                 }
             }
             
@@ -436,6 +831,666 @@ class AnalysisEngine:
         
         return classification
     
+    # ========================================
+    # WHERE CAN I TREAT - AUTO DOSAGE
+    # ========================================
+    
+    async def run_where_can_i_treat_auto(
+        self,
+        base_water_analysis: Dict[str, Any],
+        products: List[Dict[str, Any]],  # [{"product_id": str, "ratio": float}]
+        ph_range: tuple[float, float],
+        coc_range: tuple[float, float],
+        temp_range: tuple[float, float],
+        target_salts: List[str],
+        ph_steps: int = 10,
+        coc_steps: int = 10,
+        temp_steps: int = 5,
+        dosage_range: tuple[float, float] = (0.0, 100.0),
+        tolerance_ppm: float = 1.0,
+        balance_cation: str = "Na",
+        balance_anion: str = "Cl"
+    ) -> Dict[str, Any]:
+        """
+        Where Can I Treat - Auto Dosage
+        
+        For every (pH, CoC, temp) cell, find the minimal total product
+        dosage (products blended by `ratio`) that keeps every target salt
+        green in SALT_THRESHOLDS (SI at or below the top of its green range).
+        
+        Product actives act in two ways:
+        - ions PHREEQC knows (ION_MAP keys, e.g. Zn, PO4) are added to the
+          water, so they change the computed SI
+        - threshold inhibitors (phosphonate, polymer, ...) raise the top of
+          the green range by inhibitor_si_credit() at the dosed ppm
+        Actives that are neither are reported as unmodelled_actives.
+        
+        Steps:
+        1. Active components per ppm of blended product
+        2. Cells are solved in waves along the CoC axis; each wave
+           warm-starts from the previous CoC's dosage at the same (pH, temp)
+        3. Per cell: bisection on dosage (galloping from the warm start),
+           all cells of a wave advance in lock-step; every round's
+           evaluations go out as batched multi-SOLUTION runs, in parallel
+           across the PHREEQC slot pool
+        4. (cell, dosage) → SI results are memoized
+        
+        PHREEQC solutions ≈ cells × log2(dosage_range / tolerance), rather
+        than cells × dosage steps for a sweep.
+        
+        Returns:
+            Analysis with per-cell required dosage (None = not treatable
+            within dosage_range)
+        """
+        try:
+            logger.info("🤖 Starting Where Can I Treat (Auto Dosage)")
+            
+            # Step 1: Actives per ppm of blended product
+            actives_per_ppm, product_shares = await self._blend_actives_per_ppm(products)
+            if not actives_per_ppm:
+                raise ValueError("No valid products found for auto dosage")
+            
+            ion_actives, inhibitor_actives, unmodelled = _split_actives(actives_per_ppm)
+            if not ion_actives and not inhibitor_actives:
+                raise ValueError(
+                    f"Product actives {sorted(actives_per_ppm)} are neither water ions "
+                    f"nor known scale inhibitors; dosage cannot change the outcome"
+                )
+            if unmodelled:
+                logger.warning(f"⚠️ Actives not modelled for scaling: {unmodelled}")
+            
+            def si_credit(dosage: float) -> Dict[str, float]:
+                return inhibitor_si_credit(
+                    {c: per_ppm * dosage for c, per_ppm in inhibitor_actives.items()}, target_salts
+                )
+            
+            logger.info(f"✅ Actives per ppm product: {actives_per_ppm}")
+            
+            # Step 2: Grid, database, balanced base
+            grid_data = GridCalculator.generate_3d_grid(
+                ph_range, coc_range, temp_range,
+                ph_steps, coc_steps, temp_steps
+            )
+            database = self.phreeqc_service.select_database(
+                base_water_analysis, ph_range, coc_range, temp_range
+            )
+            validate_phases(database, target_salts)
+            
+            config = await db.get_phreeqc_config() or {}
+            balanced_base = await self._balance_base(
+                base_water_analysis, database, config.get("ion_balancing", {}),
+                balance_cation, balance_anion
+            )
+            
+            # Concentrated water per cell (dosage added per evaluation)
+            cell_waters = [
+                _set_ph_temp(_concentrate_params(balanced_base, coc), ph, temp)
+                for ph, coc, temp in grid_data["grid_points"]
+            ]
+            
+            memo: Dict[tuple, Dict[str, Any]] = {}
+            untreated: Dict[int, Dict[str, Any]] = {}
+            stats = {"phreeqc_solutions": 0, "rounds": 0, "memo_hits": 0}
+            
+            async def evaluate(requests: List[tuple]) -> None:
+                """Run all (cell, dosage) misses of one round, batched + parallel"""
+                # Without ion actives the water (and its SI) does not depend
+                # on dosage: one run per cell, the credit does the rest
+                if ion_actives:
+                    keys = requests
+                else:
+                    keys = [(cell, 0.0) for cell in dict.fromkeys(c for c, _ in requests) if cell not in untreated]
+                waters = [
+                    _add_actives(cell_waters[cell], ion_actives, dosage)
+                    for cell, dosage in keys
+                ]
+                chunk = max(1, -(-len(waters) // PHREEQC_MAX_WORKERS))
+                batches = await asyncio.gather(*[
+                    self.phreeqc_service.run_batch_waters(waters[i:i + chunk], database, target_salts)
+                    for i in range(0, len(waters), chunk)
+                ])
+                for key, result in zip(keys, [r for batch in batches for r in batch]):
+                    if ion_actives:
+                        memo[key] = result
+                    else:
+                        untreated[key[0]] = result
+                if not ion_actives:
+                    for cell, dosage in requests:
+                        memo[(cell, dosage)] = untreated[cell]
+                stats["phreeqc_solutions"] += len(keys)
+                stats["rounds"] += 1
+            
+            # Step 3: Solve wave by wave (one wave = one CoC index)
+            lo, hi = float(dosage_range[0]), float(dosage_range[1])
+            shape = (ph_steps, coc_steps, temp_steps)
+            required: Dict[int, Optional[float]] = {}
+            
+            for coc_index in range(coc_steps):
+                searches = {}
+                for ph_index in range(ph_steps):
+                    for temp_index in range(temp_steps):
+                        cell = _flat_index(shape, ph_index, coc_index, temp_index)
+                        warm = None
+                        if coc_index > 0:
+                            warm = required.get(_flat_index(shape, ph_index, coc_index - 1, temp_index))
+                        searches[cell] = _bisect_min_feasible(lo, hi, tolerance_ppm, warm)
+                
+                required.update(await _drive_searches(
+                    searches, memo, evaluate, target_salts, stats, si_credit
+                ))
+            
+            logger.info(
+                f"✅ Auto dosage solved: {len(required)} cells, "
+                f"{stats['phreeqc_solutions']} PHREEQC solutions in {stats['rounds']} rounds"
+            )
+            
+            # Step 4: Assemble results
+            results = []
+            for i, (ph, coc, temp) in enumerate(grid_data["grid_points"]):
+                dosage = required.get(i)
+                point = {
+                    "point_index": i,
+                    "pH": ph,
+                    "CoC": coc,
+                    "temperature_C": temp,
+                    "required_dosage_ppm": dosage,
+                    "classification": "red"
+                }
+                if dosage is not None:
+                    solved = memo.get((i, _dose_key(dosage)), {})
+                    credit = si_credit(dosage)
+                    point["saturation_indices"] = solved.get("saturation_indices", [])
+                    point["si_credit"] = {salt: round(c, 3) for salt, c in credit.items() if c}
+                    point["classification"] = _classify_salts(solved, target_salts, credit)
+                    point["product_dosages"] = {
+                        pid: round(dosage * share, 3) for pid, share in product_shares.items()
+                    }
+                    point["active_components_added"] = {
+                        c: round(dosage * per_ppm, 4) for c, per_ppm in actives_per_ppm.items()
+                    }
+                results.append(point)
+            
+            analysis_id = f"WCIT-Auto-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+            
+            await db.db.analysis_results.insert_one({
+                "analysis_id": analysis_id,
+                "analysis_type": "where_can_i_treat_auto",
+                "products": products,
+                "actives_per_ppm": actives_per_ppm,
+                "unmodelled_actives": unmodelled,
+                "target_salts": target_salts,
+                "dosage_range": [lo, hi],
+                "tolerance_ppm": tolerance_ppm,
+                "grid_info": _grid_info_metadata(grid_data),
+                "results": results,
+                "search_stats": stats,
+                "created_at": datetime.utcnow()
+            })
+            
+            logger.info(f"✅ Where Can I Treat (Auto) complete: {analysis_id}")
+            
+            treatable = [r["required_dosage_ppm"] for r in results if r["required_dosage_ppm"] is not None]
+            return {
+                "analysis_id": analysis_id,
+                "grid_info": grid_data,
+                "results_summary": {
+                    "total_points": len(results),
+                    "treatable_points": len(treatable),
+                    "untreatable_points": len(results) - len(treatable),
+                    "max_required_dosage_ppm": max(treatable) if treatable else None
+                },
+                "unmodelled_actives": unmodelled,
+                "search_stats": stats,
+                "results_preview": results[:5]
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Where Can I Treat (Auto) failed: {e}")
+            raise
+    
+    async def _blend_actives_per_ppm(
+        self,
+        products: List[Dict[str, Any]]
+    ) -> tuple[Dict[str, float], Dict[str, float]]:
+        """
+        Active component ppm per 1 ppm of the blended product, and each
+        product's share of the blend (from "ratio", default equal)
+        """
+        entries = await product_cache.get_many([p["product_id"] for p in products])
+        ratios = {}
+        for product_info in products:
+            product_id = product_info["product_id"]
+            if product_id not in entries:
+                logger.warning(f"⚠️ Product {product_id} not found, skipping")
+                continue
+            ratios[product_id] = float(product_info.get("ratio", 1.0))
+        
+        total = sum(ratios.values())
+        if total <= 0:
+            return {}, {}
+        
+        shares = {pid: ratio / total for pid, ratio in ratios.items()}
+        actives: Dict[str, float] = {}
+        for product_id, share in shares.items():
+            for component, ppm in active_components_for(entries[product_id], share).items():
+                actives[component] = actives.get(component, 0.0) + ppm
+        return actives, shares
+    
+    # ========================================
+    # MAX-CoC FRONTIER
+    # ========================================
+    
+    async def run_max_coc_frontier(
+        self,
+        base_water_analysis: Dict[str, Any],
+        ph_range: tuple[float, float],
+        temp_range: tuple[float, float],
+        coc_range: tuple[float, float],
+        target_salts: List[str],
+        ph_steps: int = 10,
+        temp_steps: int = 5,
+        coc_tolerance: float = 0.1,
+        balance_cation: str = "Na",
+        balance_anion: str = "Cl",
+        engine: str = "phreeqc"
+    ) -> Dict[str, Any]:
+        """
+        Highest CoC that keeps every target salt green, per (pH, temp)
+        
+        Bisects on CoC for each (pH, temp) pair instead of sweeping a full
+        3D grid: PHREEQC solutions ≈ pairs × log2(CoC span / tolerance).
+        Pairs are solved in waves along pH (warm start from the previous
+        pH at the same temperature); each round's evaluations go out as
+        batched runs in parallel across the PHREEQC slot pool.
+        
+        Returns:
+            {
+                "analysis_id": str,
+                "frontier": [{"pH", "temperature_C", "max_coc",
+                              "limiting_salt", "saturation_indices"}, ...],
+                "surface": max_coc[pH][temp] (None = not green even at min CoC)
+            }
+        """
+        try:
+            logger.info("📈 Starting Max-CoC frontier search")
+            
+            ph_list = np.linspace(ph_range[0], ph_range[1], ph_steps).tolist()
+            temp_list = np.linspace(temp_range[0], temp_range[1], temp_steps).tolist()
+            
+            database = self.phreeqc_service.select_database(
+                base_water_analysis, ph_range, coc_range, temp_range
+            )
+            validate_phases(database, target_salts)
+            
+            config = await db.get_phreeqc_config() or {}
+            balanced_base = await self._balance_base(
+                base_water_analysis, database, config.get("ion_balancing", {}),
+                balance_cation, balance_anion
+            )
+            
+            pairs = [(ph, temp) for ph in ph_list for temp in temp_list]
+            memo: Dict[tuple, Dict[str, Any]] = {}
+            stats = {"phreeqc_solutions": 0, "rounds": 0, "memo_hits": 0}
+            
+            async def evaluate(requests: List[tuple]) -> None:
+                points = [
+                    {"pH": pairs[pair][0], "CoC": coc, "temp": pairs[pair][1]}
+                    for pair, coc in requests
+                ]
+                chunk = max(1, -(-len(points) // PHREEQC_MAX_WORKERS))
+                batches = await asyncio.gather(*[
+                    self._run_grid_points(balanced_base, points[i:i + chunk], database, target_salts, engine)
+                    for i in range(0, len(points), chunk)
+                ])
+                for key, result in zip(requests, [r for batch in batches for r in batch]):
+                    memo[key] = result
+                stats["phreeqc_solutions"] += len(requests)
+                stats["rounds"] += 1
+            
+            lo, hi = float(coc_range[0]), float(coc_range[1])
+            max_coc: Dict[int, Optional[float]] = {}
+            
+            for ph_index in range(ph_steps):
+                searches = {}
+                for temp_index in range(temp_steps):
+                    pair = ph_index * temp_steps + temp_index
+                    warm = max_coc.get(pair - temp_steps) if ph_index > 0 else None
+                    searches[pair] = _bisect_max_feasible(lo, hi, coc_tolerance, warm)
+                
+                max_coc.update(await _drive_searches(
+                    searches, memo, evaluate, target_salts, stats
+                ))
+            
+            logger.info(
+                f"✅ Frontier solved: {len(pairs)} (pH, temp) pairs, "
+                f"{stats['phreeqc_solutions']} solutions in {stats['rounds']} rounds"
+            )
+            
+            frontier = []
+            for pair, (ph, temp) in enumerate(pairs):
+                coc = max_coc.get(pair)
+                at_frontier = memo.get((pair, _dose_key(coc)), {}) if coc is not None else {}
+                
+                # Salt that fails first: smallest evaluated CoC above the frontier
+                above = sorted(
+                    c for (p, c) in memo
+                    if p == pair and (coc is None or c > _dose_key(coc))
+                )
+                limiting_salt = None
+                if above:
+                    limiting_salt = _first_over_limit(memo[(pair, above[0])], target_salts)
+                
+                frontier.append({
+                    "pH": round(ph, 2),
+                    "temperature_C": round(temp, 1),
+                    "max_coc": round(coc, 3) if coc is not None else None,
+                    "limiting_salt": limiting_salt,
+                    "saturation_indices": at_frontier.get("saturation_indices", [])
+                })
+            
+            surface = [
+                [frontier[i * temp_steps + j]["max_coc"] for j in range(temp_steps)]
+                for i in range(ph_steps)
+            ]
+            
+            analysis_id = f"FRONTIER-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+            
+            await db.db.analysis_results.insert_one({
+                "analysis_id": analysis_id,
+                "analysis_type": "max_coc_frontier",
+                "base_water_analysis": balanced_base,
+                "parameters": {
+                    "ph_range": ph_range,
+                    "temp_range": temp_range,
+                    "coc_range": coc_range,
+                    "target_salts": target_salts,
+                    "coc_tolerance": coc_tolerance,
+                    "engine": engine
+                },
+                "ph_values": [round(v, 2) for v in ph_list],
+                "temp_values": [round(v, 1) for v in temp_list],
+                "frontier": frontier,
+                "surface": surface,
+                "search_stats": stats,
+                "created_at": datetime.utcnow()
+            })
+            
+            logger.info(f"✅ Max-CoC frontier complete: {analysis_id}")
+            
+            return {
+                "analysis_id": analysis_id,
+                "ph_values": [round(v, 2) for v in ph_list],
+                "temp_values": [round(v, 1) for v in temp_list],
+                "frontier": frontier,
+                "surface": surface,
+                "search_stats": stats
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Max-CoC frontier failed: {e}")
+            raise
+    
+    # ========================================
+    # CCPP GRID (CaCO3 precipitation potential)
+    # ========================================
+    
+    async def run_ccpp_grid(
+        self,
+        base_water_analysis: Dict[str, Any],
+        ph_range: tuple[float, float],
+        coc_range: tuple[float, float],
+        temp_range: tuple[float, float],
+        ph_steps: int = 10,
+        coc_steps: int = 10,
+        temp_steps: int = 5,
+        balance_cation: str = "Na",
+        balance_anion: str = "Cl"
+    ) -> Dict[str, Any]:
+        """
+        CCPP (mg/L CaCO3 that would precipitate) over the pH × CoC × Temp grid
+        
+        Every grid point is a SOLUTION + "EQUILIBRIUM_PHASES Calcite 0 0"
+        simulation in one batched input (split across the PHREEQC slot pool),
+        instead of one equilibrium run per point.
+        
+        Returns:
+            {
+                "analysis_id": str,
+                "grid_info": {...},
+                "ccpp_surface": ccpp_mg_l[pH][CoC][temp] (None = failed point),
+                "results": [{"_grid_pH", "_grid_CoC", "_grid_temp",
+                             "ccpp_mg_l", "calcite_si"}, ...]
+            }
+        """
+        try:
+            logger.info("🧱 Starting CCPP grid")
+            
+            grid_data = GridCalculator.generate_3d_grid(
+                ph_range, coc_range, temp_range,
+                ph_steps, coc_steps, temp_steps
+            )
+            grid_points = [
+                {"pH": ph, "CoC": coc, "temp": temp}
+                for ph, coc, temp in grid_data["grid_points"]
+            ]
+            
+            database = self.phreeqc_service.select_database(
+                base_water_analysis, ph_range, coc_range, temp_range
+            )
+            validate_phases(database, ["Calcite"])
+            
+            config = await db.get_phreeqc_config() or {}
+            balanced_base = await self._balance_base(
+                base_water_analysis, database, config.get("ion_balancing", {}),
+                balance_cation, balance_anion
+            )
+            
+            chunk = max(1, -(-len(grid_points) // PHREEQC_MAX_WORKERS))
+            batches = await asyncio.gather(*[
+                self.phreeqc_service.run_batch_ccpp(balanced_base, grid_points[i:i + chunk], database)
+                for i in range(0, len(grid_points), chunk)
+            ])
+            
+            results = []
+            surface = np.full((ph_steps, coc_steps, temp_steps), np.nan)
+            for index, result in enumerate(r for batch in batches for r in batch):
+                i, rest = divmod(index, coc_steps * temp_steps)
+                j, k = divmod(rest, temp_steps)
+                entry = {
+                    "_grid_pH": result["_grid_pH"],
+                    "_grid_CoC": result["_grid_CoC"],
+                    "_grid_temp": result["_grid_temp"]
+                }
+                if "error" in result:
+                    entry["error"] = result["error"]
+                else:
+                    surface[i, j, k] = result["ccpp_mg_l"]
+                    entry["ccpp_mg_l"] = result["ccpp_mg_l"]
+                    entry["calcite_si"] = next(
+                        (si["si_value"] for si in result["saturation_indices"]
+                         if si["mineral_name"] == "Calcite"), None
+                    )
+                results.append(entry)
+            
+            ccpp_surface = np.where(np.isnan(surface), None, surface).tolist()
+            valid = surface[~np.isnan(surface)]
+            summary = {
+                "max_ccpp_mg_l": float(valid.max()) if valid.size else None,
+                "min_ccpp_mg_l": float(valid.min()) if valid.size else None,
+                "precipitating_points": int((valid > 0).sum()),
+                "error_count": int(np.isnan(surface).sum())
+            }
+            
+            analysis_id = f"CCPP-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+            await db.db.analysis_results.insert_one({
+                "analysis_id": analysis_id,
+                "analysis_type": "ccpp_grid",
+                "base_water_analysis": balanced_base,
+                "grid_info": _grid_info_metadata(grid_data),
+                "results": results,
+                "ccpp_surface": ccpp_surface,
+                "summary": summary,
+                "parameters": {
+                    "ph_range": ph_range,
+                    "coc_range": coc_range,
+                    "temp_range": temp_range,
+                    "balance_cation": balance_cation,
+                    "balance_anion": balance_anion
+                },
+                "created_at": datetime.utcnow()
+            })
+            
+            logger.info(f"✅ CCPP grid complete: {analysis_id}")
+            
+            return {
+                "analysis_id": analysis_id,
+                "grid_info": grid_data,
+                "ccpp_surface": ccpp_surface,
+                "summary": summary,
+                "results_preview": results[:5]
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ CCPP grid failed: {e}")
+            raise
+    
+    # ========================================
+    # MIXING RATIO SWEEP
+    # ========================================
+    
+    async def run_mixing_sweep(
+        self,
+        source_waters: List[Dict[str, Any]],
+        steps: int = 11,
+        ratios: Optional[List[List[float]]] = None,
+        salts_of_interest: Optional[List[str]] = None,
+        balance_cation: str = "Na",
+        balance_anion: str = "Cl"
+    ) -> Dict[str, Any]:
+        """
+        SI across the mixing-ratio simplex of 2-3 makeup sources
+        
+        Sources are ion-balanced together, then every blend is a PHREEQC
+        MIX simulation; all blends go out as batched inputs (split across
+        the PHREEQC slot pool) instead of one analysis per blend.
+        
+        Args:
+            source_waters: 2 or 3 water analyses
+            steps: Lattice points per simplex edge (ignored if ratios given)
+            ratios: Explicit blends, e.g. [[0.7, 0.3], [0.5, 0.5]]
+            salts_of_interest: Minerals to report (None = all possible)
+        
+        Returns:
+            {
+                "analysis_id": str,
+                "blends": [{"fractions": [...], "status", "classification",
+                            "pH", "saturation_indices"}, ...]
+            }
+        """
+        try:
+            logger.info(f"🧪 Starting mixing sweep: {len(source_waters)} sources")
+            
+            if ratios:
+                fractions = np.array(ratios, dtype=float)
+                if fractions.ndim != 2 or fractions.shape[1] != len(source_waters):
+                    raise ValueError("Each ratio needs one fraction per source water")
+                if (fractions < 0).any() or (fractions.sum(axis=1) <= 0).any():
+                    raise ValueError("Ratios must be non-negative and not all zero")
+                fractions = fractions / fractions.sum(axis=1, keepdims=True)
+            else:
+                fractions = GridCalculator.mixing_simplex(len(source_waters), steps)
+            
+            # pitzer.dat if any source needs it (blend IS never exceeds the max)
+            databases = []
+            for water in source_waters:
+                ph = _get_param_value(water, "pH") or 7.0
+                temp = _get_param_value(water, "Temperature") or 25.0
+                databases.append(self.phreeqc_service.select_database(
+                    water, (ph, ph), (1.0, 1.0), (temp, temp)
+                ))
+            database = (
+                self.phreeqc_service.pitzer_dat
+                if self.phreeqc_service.pitzer_dat in databases
+                else self.phreeqc_service.phreeqc_dat
+            )
+            
+            if salts_of_interest:
+                validate_phases(database, salts_of_interest)
+                phases = list(salts_of_interest)
+            else:
+                phases = sorted({
+                    phase for water in source_waters
+                    for phase in possible_phases(database, water)
+                })
+            if not phases:
+                raise ValueError("No mineral phases possible for these source waters")
+            
+            config = await db.get_phreeqc_config() or {}
+            balancing = config.get("ion_balancing", {})
+            balanced = await self.phreeqc_service.ion_balance_batch(
+                source_waters,
+                [(balancing.get("cation_balance_ion", balance_cation),
+                  balancing.get("anion_balance_ion", balance_anion))] * len(source_waters),
+                max_iterations=balancing.get("max_iterations", 10),
+                tolerance_percent=balancing.get("tolerance_percent", 5),
+                database=database
+            )
+            for index, water in enumerate(balanced):
+                if "error" in water:
+                    raise ValueError(f"Source water {index + 1}: {water['error']}")
+            
+            chunk = max(1, -(-len(fractions) // PHREEQC_MAX_WORKERS))
+            batches = await asyncio.gather(*[
+                self.phreeqc_service.run_batch_mixing(balanced, fractions[i:i + chunk], database, phases)
+                for i in range(0, len(fractions), chunk)
+            ])
+            
+            blends = []
+            for row, result in zip(fractions.tolist(), (r for batch in batches for r in batch)):
+                blend = {"fractions": [round(f, 6) for f in row]}
+                if "error" in result:
+                    blend.update({"status": "error", "error": result["error"]})
+                else:
+                    blend.update({
+                        "status": "success",
+                        "classification": _classify_salts(result, phases),
+                        "pH": result.get("pH"),
+                        "temperature_C": result.get("temperature_C"),
+                        "ionic_strength": result.get("ionic_strength"),
+                        "saturation_indices": result["saturation_indices"]
+                    })
+                blends.append(blend)
+            
+            analysis_id = f"MIX-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+            await db.db.analysis_results.insert_one({
+                "analysis_id": analysis_id,
+                "analysis_type": "mixing_sweep",
+                "source_waters": balanced,
+                "blends": blends,
+                "parameters": {
+                    "steps": steps,
+                    "ratios": ratios,
+                    "salts_of_interest": salts_of_interest,
+                    "phases": phases,
+                    "balance_cation": balance_cation,
+                    "balance_anion": balance_anion
+                },
+                "created_at": datetime.utcnow()
+            })
+            
+            logger.info(f"✅ Mixing sweep complete: {analysis_id} ({len(blends)} blends)")
+            
+            return {
+                "analysis_id": analysis_id,
+                "database_used": os.path.basename(database),
+                "phases": phases,
+                "blends": blends
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Mixing sweep failed: {e}")
+            raise
+    
     # ========================================
     # COMPARE 2 ANALYSES
     # ========================================
@@ -495,4 +1550,275 @@ class AnalysisEngine:
             
         except Exception as e:
             logger.error(f"❌ Analysis comparison failed: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+# ========================================
+# PROGRESSIVE GRID HELPERS
+# ========================================
+
+def _as_batch(computed: Dict[int, Dict[str, Any]], total_points: int) -> List[Optional[Dict[str, Any]]]:
+    """{point_index: result} → dense list with None for points not computed"""
+    return [computed.get(i) for i in range(total_points)]
+
+
+def _encode_continuation_token(analysis_id: str, stride: int, cursor: tuple[int, int]) -> str:
+    payload = {"analysis_id": analysis_id, "stride": stride, "pass": cursor[0], "offset": cursor[1]}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def _decode_continuation_token(token: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+        return {
+            "analysis_id": str(payload["analysis_id"]),
+            "stride": int(payload["stride"]),
+            "pass": int(payload["pass"]),
+            "offset": int(payload["offset"])
+        }
+    except Exception:
+        raise ValueError("Invalid continuation_token")
+
+
+def _grid_info_metadata(grid_data: Dict[str, Any]) -> Dict[str, Any]:
+    """grid_info without the explicit point list (stored analyses stay small)"""
+    return {k: v for k, v in grid_data.items() if k != "grid_points"}
+
+
+def _grid_points(doc: Dict[str, Any]) -> List[Dict[str, float]]:
+    """
+    generate_3d_grid() points of a stored analysis (stored axis values are
+    rounded, so the lattice is regenerated from the parameter ranges)
+    """
+    grid_info = doc["grid_info"]
+    if "grid_points" in grid_info:          # stored before grid_info was trimmed
+        points = grid_info["grid_points"]
+    else:
+        params = doc["parameters"]
+        points = GridCalculator.generate_3d_grid(
+            tuple(params["ph_range"]), tuple(params["coc_range"]), tuple(params["temp_range"]),
+            len(grid_info["ph_values"]), len(grid_info["coc_values"]), len(grid_info["temp_values"])
+        )["grid_points"]
+    return [{"pH": ph, "CoC": coc, "temp": temp} for ph, coc, temp in points]
+
+
+def _progressive_summary(
+    doc: Dict[str, Any],
+    continuation_token: Optional[str],
+    results: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    return {
+        "analysis_id": doc["analysis_id"],
+        "grid_info": doc["grid_info"],
+        "total_points_calculated": len(results),
+        "success_count": len([r for r in results if "error" not in r]),
+        "error_count": len([r for r in results if "error" in r]),
+        "complete": continuation_token is None,
+        "continuation_token": continuation_token,
+        "results_preview": results[:5]
+    }
+
+
+# ========================================
+# AUTO DOSAGE SEARCH HELPERS
+# ========================================
+
+def _flat_index(shape: tuple[int, int, int], i: int, j: int, k: int) -> int:
+    """(pH, CoC, temp) indices → generate_3d_grid() point index"""
+    return (i * shape[1] + j) * shape[2] + k
+
+
+def _dose_key(dosage: float) -> float:
+    return round(dosage, 6)
+
+
+def _split_actives(actives_per_ppm: Dict[str, float]) -> tuple[Dict[str, float], Dict[str, float], List[str]]:
+    """
+    Actives per ppm → (water ions PHREEQC models, threshold inhibitors,
+    names that are neither)
+    """
+    ions, inhibitors, unmodelled = {}, {}, []
+    for component, per_ppm in actives_per_ppm.items():
+        if component in PHREEQCService.ION_MAP:
+            ions[component] = per_ppm
+        elif inhibitor_class(component):
+            inhibitors[component] = per_ppm
+        else:
+            unmodelled.append(component)
+    return ions, inhibitors, unmodelled
+
+
+def _add_actives(water: Dict[str, Any], actives_per_ppm: Dict[str, float], dosage: float) -> Dict[str, Any]:
+    """Water + ion actives at `dosage` ppm (added to existing ion values)"""
+    treated = dict(water)
+    for component, per_ppm in actives_per_ppm.items():
+        existing = _get_param_value(water, component) or 0.0
+        treated[component] = {"value": existing + per_ppm * dosage, "unit": "mg/L"}
+    return treated
+
+
+def _below_green_limit(
+    result: Dict[str, Any],
+    target_salts: List[str],
+    si_credit: Optional[Dict[str, float]] = None
+) -> bool:
+    """
+    Search predicate: every target salt at or below the top of its green
+    range (raised by the inhibitor SI credit, if any). Only the upper edge
+    is used so feasibility stays monotone in dosage (overdosing past the
+    lower edge is not "less treated"). A salt missing from the SI output
+    (failed run, phase not computed) is infeasible, never green.
+    """
+    if "error" in result:
+        return False
+    si = {s["mineral_name"]: s["si_value"] for s in result.get("saturation_indices", [])}
+    for salt in target_salts:
+        if salt not in si:
+            return False
+        threshold = get_salt_threshold(salt)
+        upper = threshold["green_range"][1] if threshold else 0.5
+        if si[salt] > upper + (si_credit or {}).get(salt, 0.0):
+            return False
+    return True
+
+
+def _first_over_limit(result: Dict[str, Any], target_salts: List[str]) -> Optional[str]:
+    """Target salt furthest above the top of its green range (None if all below)"""
+    worst, worst_excess = None, 0.0
+    for s in result.get("saturation_indices", []):
+        if s["mineral_name"] not in target_salts:
+            continue
+        threshold = get_salt_threshold(s["mineral_name"])
+        excess = s["si_value"] - (threshold["green_range"][1] if threshold else 0.5)
+        if excess > worst_excess:
+            worst, worst_excess = s["mineral_name"], excess
+    return worst
+
+
+def _classify_salts(
+    result: Dict[str, Any],
+    target_salts: List[str],
+    si_credit: Optional[Dict[str, float]] = None
+) -> str:
+    """Worst classify_si_value() over the target salts (SI less inhibitor credit)"""
+    rank = {"green": 0, "yellow": 1, "red": 2}
+    worst = "green"
+    for s in result.get("saturation_indices", []):
+        if s["mineral_name"] in target_salts:
+            credit = (si_credit or {}).get(s["mineral_name"], 0.0)
+            level = classify_si_value(s["mineral_name"], s["si_value"] - credit)
+            if rank[level] > rank[worst]:
+                worst = level
+    return worst
+
+
+def _bisect_min_feasible(lo: float, hi: float, tolerance: float, warm_start: Optional[float] = None):
+    """
+    Minimal feasible value (e.g. dosage) in [lo, hi] as a generator: yields
+    a value to test, receives True/False (all target salts green), returns
+    the value (within tolerance) or None if even `hi` is not enough.
+    
+    Assumes feasibility is monotone (increasing) in the value. With a warm
+    start (the neighbouring cell's answer) it gallops outward from there to
+    bracket the answer, then bisects.
+    """
+    lo_bad = False           # lo known infeasible
+    hi_good = False          # hi known feasible
+    
+    if warm_start is not None and lo < warm_start < hi:
+        step = tolerance
+        if (yield warm_start):
+            hi, hi_good = warm_start, True
+            while hi - step > lo:
+                dosage = hi - step
+                if (yield dosage):
+                    hi = dosage
+                    step *= 2
+                else:
+                    lo, lo_bad = dosage, True
+                    break
+        else:
+            lo, lo_bad = warm_start, True
+            while lo + step < hi:
+                dosage = lo + step
+                if (yield dosage):
+                    hi, hi_good = dosage, True
+                    break
+                lo = dosage
+                step *= 2
+    
+    if not lo_bad:
+        if (yield lo):
+            return lo
+    if not hi_good:
+        if not (yield hi):
+            return None
+    
+    while hi - lo > tolerance:
+        mid = 0.5 * (lo + hi)
+        if (yield mid):
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+def _bisect_max_feasible(lo: float, hi: float, tolerance: float, warm_start: Optional[float] = None):
+    """
+    Maximal feasible value (e.g. CoC) in [lo, hi] when feasibility is
+    monotone decreasing; _bisect_min_feasible over the negated axis.
+    Returns None if even `lo` is infeasible.
+    """
+    inner = _bisect_min_feasible(-hi, -lo, tolerance, None if warm_start is None else -warm_start)
+    try:
+        value = next(inner)
+        while True:
+            feasible = yield -value
+            value = inner.send(feasible)
+    except StopIteration as stop:
+        return None if stop.value is None else -stop.value
+
+
+async def _drive_searches(
+    searches: Dict[int, Any],
+    memo: Dict[tuple, Dict[str, Any]],
+    evaluate,
+    target_salts: List[str],
+    stats: Dict[str, int],
+    si_credit=None
+) -> Dict[int, Optional[float]]:
+    """
+    Advance all cell searches in lock-step: each round collects one
+    pending dosage per cell, evaluates the memo misses in one go and
+    feeds the outcomes back. si_credit(value) → {salt: SI credit} raises
+    the green limit per tested value (inhibitor dosage).
+    """
+    solved: Dict[int, Optional[float]] = {}
+    pending: Dict[int, float] = {}
+    
+    def advance(cell, value=None, first=False):
+        try:
+            pending[cell] = next(searches[cell]) if first else searches[cell].send(value)
+        except StopIteration as stop:
+            pending.pop(cell, None)
+            solved[cell] = stop.value
+    
+    for cell in searches:
+        advance(cell, first=True)
+    
+    while pending:
+        misses = []
+        for cell, dosage in pending.items():
+            key = (cell, _dose_key(dosage))
+            if key in memo:
+                stats["memo_hits"] += 1
+            elif key not in misses:
+                misses.append(key)
+        if misses:
+            await evaluate(misses)
+        
+        for cell, dosage in list(pending.items()):
+            credit = si_credit(dosage) if si_credit else None
+            advance(cell, _below_green_limit(memo[(cell, _dose_key(dosage))], target_salts, credit))
+    
+    return solved
@@ -0,0 +1,551 @@
+"""
+Fast SI Engine - Vectorised NumPy speciation for common scalants
+Computes SI for Calcite, Aragonite, Gypsum, Anhydrite, Barite, Celestite
+and SiO2(a) over an entire pH × CoC × Temp grid in one NumPy pass.
+
+Model:
+  - Carbonate system (CO2 / HCO3- / CO3-2) closed on alkalinity, like a
+    PHREEQC SOLUTION with "Alkalinity ... as HCO3" and a fixed pH
+  - Ion pairs: Ca/Mg/Sr carbonate + bicarbonate + sulfate, NaCO3-, NaHCO3,
+    NaSO4-, KSO4-, BaSO4, HSO4-, H3SiO4-
+  - Activity: Davies (default) or WATEQ extended Debye-Hückel for free ions
+  - log K(T) from the phreeqc.dat DatabaseIndex (analytic / van't Hoff);
+    built-in phreeqc.dat constants are used when the index is unavailable
+
+Envelope: results are an approximation of PHREEQC + phreeqc.dat (no
+Pitzer terms; agreement with PHREEQC is not validated here). Points with
+IS > MAX_IONIC_STRENGTH, non-converged points, or minerals outside
+FAST_MINERALS are reported out of envelope and must be recomputed with
+PHREEQC.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.phreeqc_database import DatabaseIndex, log_k_at
+
+logger = logging.getLogger(__name__)
+
+
+FAST_MINERALS = ["Calcite", "Aragonite", "Gypsum", "Anhydrite", "Barite", "Celestite", "SiO2(a)"]
+
+# Same IS limit as the phreeqc.dat / pitzer.dat selection rule
+MAX_IONIC_STRENGTH = 0.5
+
+# Water param key → (component, MW, charge); HCO3 is alkalinity (eq = mol)
+COMPONENTS: Dict[str, Tuple[str, float, int]] = {
+    "Ca":   ("Ca+2",    40.08,  2),
+    "Mg":   ("Mg+2",    24.31,  2),
+    "Na":   ("Na+",     22.99,  1),
+    "K":    ("K+",      39.10,  1),
+    "Sr":   ("Sr+2",    87.62,  2),
+    "Ba":   ("Ba+2",    137.33, 2),
+    "Cl":   ("Cl-",     35.45, -1),
+    "SO4":  ("SO4-2",   96.06, -2),
+    "HCO3": ("Alk",     61.02, -1),
+    "SiO2": ("H4SiO4",  60.08,  0),
+}
+
+# Aqueous complexes: name → ({master: coeff}, charge, alkalinity contribution)
+# (formation from Ca+2, Mg+2, Na+, K+, Sr+2, Ba+2, CO3-2, SO4-2, H+, H4SiO4)
+COMPLEXES: Dict[str, Tuple[Dict[str, float], int, float]] = {
+    "HCO3-":   ({"CO3-2": 1, "H+": 1},              -1, 1.0),
+    "CO2":     ({"CO3-2": 1, "H+": 2},               0, 0.0),
+    "OH-":     ({"H+": -1},                         -1, 1.0),
+    "HSO4-":   ({"SO4-2": 1, "H+": 1},              -1, 0.0),
+    "H3SiO4-": ({"H4SiO4": 1, "H+": -1},            -1, 1.0),
+    "CaCO3":   ({"Ca+2": 1, "CO3-2": 1},             0, 2.0),
+    "CaHCO3+": ({"Ca+2": 1, "CO3-2": 1, "H+": 1},    1, 1.0),
+    "CaSO4":   ({"Ca+2": 1, "SO4-2": 1},             0, 0.0),
+    "MgCO3":   ({"Mg+2": 1, "CO3-2": 1},             0, 2.0),
+    "MgHCO3+": ({"Mg+2": 1, "CO3-2": 1, "H+": 1},    1, 1.0),
+    "MgSO4":   ({"Mg+2": 1, "SO4-2": 1},             0, 0.0),
+    "SrCO3":   ({"Sr+2": 1, "CO3-2": 1},             0, 2.0),
+    "SrHCO3+": ({"Sr+2": 1, "CO3-2": 1, "H+": 1},    1, 1.0),
+    "SrSO4":   ({"Sr+2": 1, "SO4-2": 1},             0, 0.0),
+    "BaSO4":   ({"Ba+2": 1, "SO4-2": 1},             0, 0.0),
+    "NaCO3-":  ({"Na+": 1, "CO3-2": 1},             -1, 2.0),
+    "NaHCO3":  ({"Na+": 1, "CO3-2": 1, "H+": 1},     0, 1.0),
+    "NaSO4-":  ({"Na+": 1, "SO4-2": 1},             -1, 0.0),
+    "KSO4-":   ({"K+": 1, "SO4-2": 1},              -1, 0.0),
+}
+
+# Mineral dissolution: name → ({master: coeff}, water coefficient)
+MINERALS: Dict[str, Tuple[Dict[str, float], float]] = {
+    "Calcite":   ({"Ca+2": 1, "CO3-2": 1}, 0.0),
+    "Aragonite": ({"Ca+2": 1, "CO3-2": 1}, 0.0),
+    "Gypsum":    ({"Ca+2": 1, "SO4-2": 1}, 2.0),
+    "Anhydrite": ({"Ca+2": 1, "SO4-2": 1}, 0.0),
+    "Barite":    ({"Ba+2": 1, "SO4-2": 1}, 0.0),
+    "Celestite": ({"Sr+2": 1, "SO4-2": 1}, 0.0),
+    "SiO2(a)":   ({"H4SiO4": 1},          -2.0),
+}
+
+# phreeqc.dat constants (formation from the masters above; delta_h in kJ/mol),
+# used only when no DatabaseIndex is available
+_FALLBACK_LOGK: Dict[str, Dict[str, Any]] = {
+    "HCO3-":   {"log_k": 10.329, "delta_h": -14.899, "analytic": [107.8871, 0.03252849, -5151.79, -38.92561, 563713.9, 0.0]},
+    "CO2":     {"log_k": 16.681, "delta_h": -24.008, "analytic": [464.1965, 0.09344813, -26986.16, -165.75951, 2248628.9, 0.0]},
+    "OH-":     {"log_k": -14.0,  "delta_h": 55.907,  "analytic": [-283.971, -0.05069842, 13323.0, 102.24447, -1119669.0, 0.0]},
+    "HSO4-":   {"log_k": 1.988,  "delta_h": 16.108,  "analytic": [-56.889, 0.006473, 2307.9, 19.8858, 0.0, 0.0]},
+    "H3SiO4-": {"log_k": -9.83,  "delta_h": 25.606,  "analytic": None},
+    "CaCO3":   {"log_k": 3.224,  "delta_h": 14.832,  "analytic": [-1228.732, -0.29944, 35512.75, 485.818, 0.0, 0.0]},
+    "CaHCO3+": {"log_k": 11.435, "delta_h": -3.644,  "analytic": [1317.0071, 0.34546894, -39916.84, -517.70761, 563713.9, 0.0]},
+    "CaSO4":   {"log_k": 2.25,   "delta_h": 5.544,   "analytic": None},
+    "MgCO3":   {"log_k": 2.98,   "delta_h": 11.351,  "analytic": [0.991, 0.00667, 0.0, 0.0, 0.0, 0.0]},
+    "MgHCO3+": {"log_k": 11.399, "delta_h": -11.594, "analytic": [48.6721, 0.03252849, -2614.335, -18.00263, 563713.9, 0.0]},
+    "MgSO4":   {"log_k": 2.37,   "delta_h": 19.037,  "analytic": None},
+    "SrCO3":   {"log_k": 2.81,   "delta_h": 21.840,  "analytic": None},
+    "SrHCO3+": {"log_k": 11.509, "delta_h": 10.414,  "analytic": None},
+    "SrSO4":   {"log_k": 2.29,   "delta_h": 8.703,   "analytic": None},
+    "BaSO4":   {"log_k": 2.7,    "delta_h": None,    "analytic": None},
+    "NaCO3-":  {"log_k": 1.27,   "delta_h": 37.279,  "analytic": None},
+    "NaHCO3":  {"log_k": 10.079, "delta_h": -14.899, "analytic": None},
+    "NaSO4-":  {"log_k": 0.7,    "delta_h": 4.686,   "analytic": None},
+    "KSO4-":   {"log_k": 0.85,   "delta_h": 9.414,   "analytic": None},
+    # phases (dissolution)
+    "Calcite":   {"log_k": -8.48,  "delta_h": -9.611, "analytic": [-171.9065, -0.077993, 2839.319, 71.595, 0.0, 0.0]},
+    "Aragonite": {"log_k": -8.336, "delta_h": -10.832, "analytic": [-171.9773, -0.077993, 2903.293, 71.595, 0.0, 0.0]},
+    "Gypsum":    {"log_k": -4.58,  "delta_h": -0.456, "analytic": [68.2401, 0.0, -3221.51, -25.0627, 0.0, 0.0]},
+    "Anhydrite": {"log_k": -4.36,  "delta_h": -7.155, "analytic": [197.52, 0.0, -8669.8, -69.835, 0.0, 0.0]},
+    "Barite":    {"log_k": -9.97,  "delta_h": 26.568, "analytic": [136.035, 0.0, -7680.41, -48.595, 0.0, 0.0]},
+    "Celestite": {"log_k": -6.63,  "delta_h": -4.339, "analytic": None},
+    "SiO2(a)":   {"log_k": -2.71,  "delta_h": 13.975, "analytic": [-0.26, 0.0, -731.0, 0.0, 0.0, 0.0]},
+}
+
+# WATEQ extended Debye-Hückel ion-size (a, Å) and b (phreeqc.dat -gamma)
+_FALLBACK_GAMMA: Dict[str, Tuple[float, float]] = {
+    "Ca+2": (5.0, 0.165), "Mg+2": (5.5, 0.20), "Na+": (4.0, 0.075), "K+": (3.5, 0.015),
+    "Sr+2": (5.26, 0.121), "Ba+2": (5.0, 0.0), "Cl-": (3.5, 0.015), "SO4-2": (5.0, -0.04),
+    "CO3-2": (5.4, 0.0), "HCO3-": (5.4, 0.0), "H+": (9.0, 0.0), "OH-": (3.5, 0.0),
+}
+
+_CHARGES = {
+    "Ca+2": 2, "Mg+2": 2, "Na+": 1, "K+": 1, "Sr+2": 2, "Ba+2": 2,
+    "Cl-": -1, "SO4-2": -2, "CO3-2": -2, "H+": 1, "H4SiO4": 0,
+}
+
+
+class FastSIEngine:
+    """Vectorised approximate SI engine (NumPy, no PHREEQC process)"""
+
+    ACTIVITY_MODELS = ("davies", "debye_huckel")
+
+    def __init__(
+        self,
+        database_index: Optional[DatabaseIndex] = None,
+        activity_model: str = "davies",
+        max_iterations: int = 60,
+        tolerance: float = 1e-7
+    ):
+        if activity_model not in self.ACTIVITY_MODELS:
+            raise ValueError(f"Invalid activity model: {activity_model}. Use {self.ACTIVITY_MODELS}")
+        self.index = database_index
+        self.activity_model = activity_model
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+
+    # ========================================
+    # THERMODYNAMIC DATA
+    # ========================================
+
+    def _formation_log_k(self, species: str, temp_c: np.ndarray) -> np.ndarray:
+        """log K(T) for a complex, formed from the engine's master species"""
+        if self.index is not None and species in self.index.species:
+            try:
+                return self._expanded_log_k(species, temp_c)
+            except KeyError:
+                pass
+        return _vector_log_k(_FALLBACK_LOGK[species], temp_c)
+
+    def _expanded_log_k(self, species: str, temp_c: np.ndarray, depth: int = 0) -> np.ndarray:
+        """
+        Database reactions may be written against non-master species
+        (e.g. Na+ + HCO3- = NaHCO3). Expand those recursively so every
+        log K is relative to the masters used by the engine.
+        """
+        if depth > 4:
+            raise KeyError(species)
+        entry = self.index.species[species]
+        log_k = _vector_log_k(entry, temp_c)
+
+        for coeff, reactant in entry["lhs"]:
+            if reactant in _CHARGES or reactant in ("H2O", "e-"):
+                continue
+            if reactant not in COMPLEXES:
+                raise KeyError(reactant)
+            log_k = log_k + coeff * self._expanded_log_k(reactant, temp_c, depth + 1)
+
+        # Products other than the species itself (H+ released, etc.) need no
+        # correction: their stoichiometry is already encoded in COMPLEXES.
+        return log_k
+
+    def _phase_log_k(self, mineral: str, temp_c: np.ndarray) -> np.ndarray:
+        if self.index is not None and mineral in self.index.phases:
+            return _vector_log_k(self.index.phases[mineral], temp_c)
+        return _vector_log_k(_FALLBACK_LOGK[mineral], temp_c)
+
+    def _gamma_params(self, ion: str) -> Tuple[float, float]:
+        if self.index is not None:
+            entry = self.index.species.get(ion)
+            if entry and entry.get("gamma"):
+                return entry["gamma"]
+        return _FALLBACK_GAMMA.get(ion, (4.0, 0.0))
+
+    # ========================================
+    # ACTIVITY COEFFICIENTS
+    # ========================================
+
+    @staticmethod
+    def _debye_huckel_ab(temp_c: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Debye-Hückel A and B (B in 1/Å) as linear fits over 0-100 °C"""
+        return 0.4883 + 8.074e-4 * temp_c, 0.3241 + 1.600e-4 * temp_c
+
+    def _log_gamma(self, charge: int, ion: Optional[str], ionic_strength: np.ndarray,
+                   a_dh: np.ndarray, b_dh: np.ndarray) -> np.ndarray:
+        if charge == 0:
+            return np.zeros_like(ionic_strength)
+        sqrt_i = np.sqrt(ionic_strength)
+        z2 = charge * charge
+
+        if self.activity_model == "debye_huckel" and ion is not None:
+            a_ion, b_ion = self._gamma_params(ion)
+            return -a_dh * z2 * sqrt_i / (1.0 + b_dh * a_ion * sqrt_i) + b_ion * ionic_strength
+
+        return -a_dh * z2 * (sqrt_i / (1.0 + sqrt_i) - 0.3 * ionic_strength)
+
+    # ========================================
+    # SPECIATION
+    # ========================================
+
+    def compute(
+        self,
+        totals: Dict[str, np.ndarray],
+        ph: np.ndarray,
+        temp_c: np.ndarray,
+        minerals: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Speciate N solutions at once.
+
+        Args:
+            totals:   {"Ca+2": mol/kgw[N], ..., "Alk": eq/kgw[N], "H4SiO4": mol/kgw[N]}
+            ph:       pH[N]
+            temp_c:   temperature °C [N]
+            minerals: subset of FAST_MINERALS (default: all)
+
+        Returns:
+            {
+              "si":             {mineral: SI[N] (NaN where not computable)},
+              "ionic_strength": IS[N],
+              "converged":      bool[N],
+              "in_envelope":    bool[N]   (converged and IS ≤ MAX_IONIC_STRENGTH)
+            }
+        """
+        minerals = minerals or FAST_MINERALS
+        unsupported = [m for m in minerals if m not in MINERALS]
+        if unsupported:
+            raise ValueError(f"Fast engine does not support: {unsupported}. Use {FAST_MINERALS}")
+
+        ph = np.asarray(ph, dtype=float)
+        temp_c = np.broadcast_to(np.asarray(temp_c, dtype=float), ph.shape)
+        zero = np.zeros_like(ph)
+        t = {key: np.broadcast_to(np.asarray(totals.get(key, zero), dtype=float), ph.shape)
+             for key in ("Ca+2", "Mg+2", "Na+", "K+", "Sr+2", "Ba+2", "Cl-", "SO4-2", "Alk", "H4SiO4")}
+
+        a_h = 10.0 ** (-ph)
+        log_k = {name: self._formation_log_k(name, temp_c) for name in COMPLEXES}
+        k = {name: 10.0 ** value for name, value in log_k.items()}
+        a_dh, b_dh = self._debye_huckel_ab(temp_c)
+
+        # Start: free ions = totals
+        ionic_strength = 0.5 * sum(
+            t[ion] * _CHARGES[ion] ** 2 for ion in ("Ca+2", "Mg+2", "Na+", "K+", "Sr+2", "Ba+2", "Cl-", "SO4-2")
+        ) + 0.5 * t["Alk"]
+        ionic_strength = np.maximum(ionic_strength, 1e-8)
+
+        act = {ion: t[ion].copy() if ion in t else zero.copy() for ion in _CHARGES}
+        act["H+"] = a_h
+        act["CO3-2"] = np.maximum(t["Alk"] * 1e-2, 1e-12)
+        converged = np.zeros(ph.shape, dtype=bool)
+
+        for _ in range(self.max_iterations):
+            log_g = {ion: self._log_gamma(z, ion, ionic_strength, a_dh, b_dh) for ion, z in _CHARGES.items()}
+            g = {ion: 10.0 ** lg for ion, lg in log_g.items()}
+            g_c = {z: 10.0 ** self._log_gamma(z, None, ionic_strength, a_dh, b_dh) for z in (-2, -1, 1, 2)}
+            g_c[0] = np.ones_like(ionic_strength)
+
+            def complex_activity_product(name):
+                stoich = COMPLEXES[name][0]
+                out = k[name]
+                for master, coeff in stoich.items():
+                    out = out * act[master] ** coeff
+                return out
+
+            # --- Sulfate (ligand) ---
+            denom = 1.0 / g["SO4-2"]
+            for name, (stoich, charge, _) in COMPLEXES.items():
+                if "SO4-2" in stoich:
+                    partial = k[name] * act["H+"] ** stoich.get("H+", 0)
+                    for master in ("Ca+2", "Mg+2", "Sr+2", "Ba+2", "Na+", "K+"):
+                        if master in stoich:
+                            partial = partial * act[master]
+                    denom = denom + partial / g_c[charge]
+            act["SO4-2"] = t["SO4-2"] / denom
+
+            # --- Silica ---
+            denom = 1.0 + k["H3SiO4-"] / a_h / g_c[-1]
+            act["H4SiO4"] = t["H4SiO4"] / denom
+            m_h3sio4 = k["H3SiO4-"] * act["H4SiO4"] / a_h / g_c[-1]
+
+            # --- Carbonate closed on alkalinity ---
+            m_oh = k["OH-"] / a_h / g_c[-1]
+            m_h = a_h / g["H+"]
+            alk_carbonate = np.maximum(t["Alk"] - m_oh + m_h - m_h3sio4, 1e-15)
+
+            denom = 2.0 / g["CO3-2"]
+            for name, (stoich, charge, alk) in COMPLEXES.items():
+                if "CO3-2" not in stoich or alk == 0:
+                    continue
+                partial = k[name] * act["H+"] ** stoich.get("H+", 0)
+                for master in ("Ca+2", "Mg+2", "Sr+2", "Ba+2", "Na+", "K+"):
+                    if master in stoich:
+                        partial = partial * act[master]
+                denom = denom + alk * partial / g_c[charge]
+            act["CO3-2"] = alk_carbonate / denom
+
+            # --- Cations ---
+            for cation in ("Ca+2", "Mg+2", "Sr+2", "Ba+2", "Na+", "K+"):
+                denom = 1.0 / g[cation]
+                for name, (stoich, charge, _) in COMPLEXES.items():
+                    if cation not in stoich:
+                        continue
+                    partial = k[name] * act["H+"] ** stoich.get("H+", 0)
+                    for ligand in ("CO3-2", "SO4-2"):
+                        if ligand in stoich:
+                            partial = partial * act[ligand]
+                    denom = denom + partial / g_c[charge]
+                act[cation] = t[cation] / denom
+
+            act["Cl-"] = t["Cl-"] * g["Cl-"]
+
+            # --- Ionic strength from free ions + charged complexes ---
+            new_is = 0.5 * (m_h + m_oh + m_h3sio4)
+            for ion in ("Ca+2", "Mg+2", "Sr+2", "Ba+2", "Na+", "K+", "Cl-", "SO4-2", "CO3-2"):
+                new_is = new_is + 0.5 * (act[ion] / g[ion]) * _CHARGES[ion] ** 2
+            for name, (_, charge, _) in COMPLEXES.items():
+                if charge != 0 and name not in ("OH-", "H3SiO4-"):
+                    new_is = new_is + 0.5 * complex_activity_product(name) / g_c[charge] * charge ** 2
+
+            new_is = np.maximum(new_is, 1e-8)
+            delta = np.abs(new_is - ionic_strength) / ionic_strength
+            ionic_strength = 0.5 * (ionic_strength + new_is)
+            converged = delta < self.tolerance
+            if converged.all():
+                break
+
+        # Water activity (ideal, molality-based approximation)
+        sum_m = sum(t[key] for key in t if key != "Alk") + t["Alk"]
+        a_w = np.clip(1.0 - 0.018 * sum_m, 0.5, 1.0)
+
+        si = {}
+        for mineral in minerals:
+            stoich, water = MINERALS[mineral]
+            log_iap = water * np.log10(a_w)
+            computable = np.ones(ph.shape, dtype=bool)
+            for master, coeff in stoich.items():
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    log_iap = log_iap + coeff * np.log10(act[master])
+                computable &= t[_total_key(master)] > 0
+            values = log_iap - self._phase_log_k(mineral, temp_c)
+            si[mineral] = np.where(computable, values, np.nan)
+
+        return {
+            "si":             si,
+            "ionic_strength": ionic_strength,
+            "converged":      converged,
+            "in_envelope":    converged & (ionic_strength <= MAX_IONIC_STRENGTH),
+        }
+
+    # ========================================
+    # GRID / POINT ENTRY POINTS
+    # ========================================
+
+    def compute_grid(
+        self,
+        base_params: Dict[str, Any],
+        ph_values: List[float],
+        coc_values: List[float],
+        temp_values: List[float],
+        minerals: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        SI over the full pH × CoC × Temp lattice in one call.
+        Arrays in the result are shaped [pH, CoC, Temp].
+        """
+        ph, coc, temp = np.meshgrid(
+            np.asarray(ph_values, dtype=float),
+            np.asarray(coc_values, dtype=float),
+            np.asarray(temp_values, dtype=float),
+            indexing="ij"
+        )
+        base = water_totals([base_params])
+        totals = {key: value[0] * coc for key, value in base.items()}
+
+        result = self.compute(totals, ph, temp, minerals)
+        logger.info(
+            f"⚡ Fast SI grid: {ph.size} points, "
+            f"{int(result['in_envelope'].sum())} in envelope"
+        )
+        return result
+
+    def compute_points(
+        self,
+        base_params: Dict[str, Any],
+        grid_points: List[Dict[str, float]],
+        minerals: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """SI for arbitrary {"pH", "CoC", "temp"} points of one base water"""
+        ph = np.array([p["pH"] for p in grid_points], dtype=float)
+        coc = np.array([p["CoC"] for p in grid_points], dtype=float)
+        temp = np.array([p["temp"] for p in grid_points], dtype=float)
+
+        base = water_totals([base_params])
+        totals = {key: value[0] * coc for key, value in base.items()}
+        return self.compute(totals, ph, temp, minerals)
+
+    def compute_waters(
+        self,
+        waters: List[Dict[str, Any]],
+        minerals: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """SI for a list of (already concentrated) water dicts"""
+        ph = np.array([_param(w, "pH", 7.0) for w in waters], dtype=float)
+        temp = np.array([_param(w, "Temperature", 25.0) for w in waters], dtype=float)
+        return self.compute(water_totals(waters), ph, temp, minerals)
+
+    def run_points(
+        self,
+        base_params: Dict[str, Any],
+        grid_points: List[Dict[str, float]],
+        minerals: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Same result shape as PHREEQCService.run_batch_solution_spread.
+
+        Returns:
+            (results, fallback_indices) - points listed in fallback_indices
+            are outside the accuracy envelope and carry no SI; callers
+            recompute them with PHREEQC.
+        """
+        computed = self.compute_points(base_params, grid_points, minerals)
+        return to_results(computed, grid_points)
+
+
+# ========================================
+# MODULE-LEVEL HELPERS
+# ========================================
+
+def to_results(
+    computed: Dict[str, Any],
+    grid_points: List[Dict[str, float]]
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """compute() arrays → per-point result dicts + indices needing PHREEQC"""
+    si = {mineral: values.ravel() for mineral, values in computed["si"].items()}
+    ionic_strength = computed["ionic_strength"].ravel()
+    in_envelope = computed["in_envelope"].ravel()
+
+    results, fallback = [], []
+    for i, point in enumerate(grid_points):
+        result = {
+            "_grid_pH":   point["pH"],
+            "_grid_CoC":  point["CoC"],
+            "_grid_temp": point["temp"],
+            "engine":     "fast",
+        }
+        if not in_envelope[i]:
+            fallback.append(i)
+            result["error"] = "Outside fast engine accuracy envelope"
+        else:
+            result["saturation_indices"] = [
+                {"mineral_name": mineral, "si_value": round(float(values[i]), 4)}
+                for mineral, values in si.items()
+                if not np.isnan(values[i])
+            ]
+            result["ionic_strength"] = float(ionic_strength[i])
+        results.append(result)
+    return results, fallback
+
+
+def _vector_log_k(entry: Dict[str, Any], temp_c: np.ndarray) -> np.ndarray:
+    """log_k_at() over an array of temperatures (few unique values → cheap)"""
+    unique, inverse = np.unique(temp_c, return_inverse=True)
+    values = np.array([log_k_at(entry, float(t)) for t in unique])
+    return values[inverse].reshape(temp_c.shape)
+
+
+def _total_key(master: str) -> str:
+    return "Alk" if master == "CO3-2" else master
+
+
+def _param(params: Dict[str, Any], key: str, default: float = 0.0) -> float:
+    val = params.get(key)
+    if isinstance(val, dict):
+        val = val.get("value")
+    return float(val) if isinstance(val, (int, float)) else default
+
+
+def water_totals(waters: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """mg/L water dicts → {component: mol/kgw[N]} (HCO3 → alkalinity eq/kgw)"""
+    totals = {}
+    for key, (component, mw, _) in COMPONENTS.items():
+        totals[component] = np.array([_param(w, key) for w in waters], dtype=float) / mw / 1000.0
+    return totals
+
+
+def approximate_analysis(
+    water_params: Dict[str, Any],
+    database_index: Optional[DatabaseIndex] = None
+) -> Dict[str, Any]:
+    """
+    Single-point answer without PHREEQC (load shedding): fast-engine SI plus
+    LSI / Ryznar. Same top-level shape as PHREEQCService.analyze().
+    """
+    from app.services.standalone_calculations import StandaloneCalculations
+
+    computed = FastSIEngine(database_index).compute_waters([water_params])
+    si = computed["si"]
+
+    ph = _param(water_params, "pH", 7.0)
+    temp = _param(water_params, "Temperature", 25.0)
+    calcium_caco3 = _param(water_params, "Ca") * 2.497
+    alkalinity_caco3 = _param(water_params, "HCO3") * 0.8202
+    tds = sum(_param(water_params, key) for key in COMPONENTS)
+
+    indices = {}
+    if calcium_caco3 > 0 and alkalinity_caco3 > 0:
+        indices["lsi"] = StandaloneCalculations.calculate_lsi(ph, temp, calcium_caco3, alkalinity_caco3, tds)
+        indices["ryznar"] = StandaloneCalculations.calculate_ryznar(ph, temp, calcium_caco3, alkalinity_caco3, tds)
+
+    return {
+        "saturation_indices": [
+            {"mineral_name": mineral, "si_value": round(float(values[0]), 4)}
+            for mineral, values in si.items()
+            if not np.isnan(values[0])
+        ],
+        "ionic_strength":     float(computed["ionic_strength"][0]),
+        "pH":                 ph,
+        "temperature_C":      temp,
+        "scaling_indices":    indices,
+        "within_envelope":    bool(computed["in_envelope"][0]),
+        "database_used":      "fast_si_engine",
+        "engine":             "fast",
+        "approximate":        True,
+    }
+
+
+def supports_minerals(minerals: Optional[List[str]]) -> bool:
+    """True if every requested mineral is covered by the fast engine"""
+    return not minerals or all(m in MINERALS for m in minerals)
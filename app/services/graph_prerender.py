@@ -0,0 +1,160 @@
+"""
+Graph Pre-render - Render graph responses when a grid analysis completes
+So the first viewer does not pay the matplotlib latency, every mineral in
+the analysis' salts_of_interest (or get_common_scale_formers()) gets its
+3D-graph JSON and PNG responses, plus the multi-salt heatmap, stored in
+`graph_renders` under the ETag the graph endpoints will compute.
+
+Matplotlib runs in its own small process pool (set up like the render
+pool's workers) whose workers lower their priority (os.nice), so
+pre-rendering only uses otherwise idle CPU:
+  - GRAPH_PRERENDER_WORKERS (default 1)
+  - GRAPH_PRERENDER_NICE    (default 10)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from app.db.mongo import db
+from app.services.grid_store import ColumnarGrid, load_grid
+from app.services.render_pool import init_worker, render_in_worker
+from app.services.graph_response_cache import (
+    graph_etag, get_render, save_render, surface_json_body, png_body
+)
+from app.utils.salt_data_table import get_common_scale_formers
+
+logger = logging.getLogger(__name__)
+
+GRAPH_PRERENDER_WORKERS = max(1, int(os.getenv("GRAPH_PRERENDER_WORKERS", "1")))
+GRAPH_PRERENDER_NICE = int(os.getenv("GRAPH_PRERENDER_NICE", "10"))
+
+# Default view of the graph endpoints
+PRERENDER_AXES = ("pH", "CoC")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+# ========================================
+# WORKER PROCESS
+# ========================================
+
+def _init_worker(nice: int) -> None:
+    """Low priority, otherwise the same set-up as render-pool workers"""
+    try:
+        os.nice(nice)
+    except OSError:
+        pass
+    init_worker()
+
+
+async def _render(method: str, *args) -> str:
+    loop = asyncio.get_running_loop()
+    result, _ = await loop.run_in_executor(_get_pool(), render_in_worker, method, args, {})
+    return result
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=GRAPH_PRERENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(GRAPH_PRERENDER_NICE,)
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# ========================================
+# PIPELINE STAGE
+# ========================================
+
+def prerender_salts(analysis: Dict[str, Any], grid: ColumnarGrid) -> List[str]:
+    """salts_of_interest (or the common scale formers) present in the grid"""
+    salts = (analysis.get("parameters") or {}).get("salts_of_interest") or get_common_scale_formers()
+    return [s for s in salts if s in grid.minerals]
+
+
+async def prerender_graphs(analysis_id: str) -> Dict[str, Any]:
+    """
+    Store the default-view graph responses of a completed grid analysis.
+    Responses already stored for the current revision are skipped.
+    """
+    started = time.perf_counter()
+    summary = {"analysis_id": analysis_id, "rendered": 0, "skipped": 0, "failed": 0}
+
+    try:
+        analysis = await db.get_analysis_result(analysis_id)
+        if not analysis or analysis.get("storage") != "columnar":
+            return summary
+        if analysis.get("approximate") or not analysis.get("complete", True):
+            return summary      # rendered again once exact / complete
+        grid = await load_grid(analysis_id)
+        if grid is None:
+            return summary
+
+        x_axis, y_axis = PRERENDER_AXES
+        salts = prerender_salts(analysis, grid)
+
+        for salt in salts:
+            json_etag = graph_etag(analysis, salt, x_axis, y_axis, "json")
+            png_etag = graph_etag(analysis, salt, x_axis, y_axis, "png")
+            if await get_render(json_etag) and await get_render(png_etag):
+                summary["skipped"] += 1
+                continue
+
+            try:
+                # Same body the live 3d-graph route builds from this surface
+                json_response = surface_json_body(analysis, grid.surface(salt), salt, x_axis, y_axis)
+                if json_response is None:
+                    summary["skipped"] += 1
+                    continue
+                graph_data = json_response["graph_data"]
+                await save_render(json_etag, analysis_id, salt, x_axis, y_axis, "json", json_response)
+
+                png_base64 = await _render("render_3d_surface_png", graph_data, x_axis, y_axis)
+                body = png_body(analysis_id, salt, x_axis, y_axis)
+                body["image_base64"] = png_base64
+                await save_render(png_etag, analysis_id, salt, x_axis, y_axis, "png", body)
+                summary["rendered"] += 1
+
+            except Exception as e:
+                logger.warning(f"⚠️ Pre-render failed for {analysis_id}/{salt}: {e}")
+                summary["failed"] += 1
+
+        if salts:
+            heatmap_key = ",".join(salts)
+            heatmap_etag = graph_etag(analysis, heatmap_key, x_axis, y_axis, "heatmap")
+            if await get_render(heatmap_etag):
+                summary["skipped"] += 1
+            else:
+                try:
+                    png_base64 = await _render("generate_multi_salt_heatmap", grid, salts, x_axis, y_axis)
+                    body = png_body(analysis_id, heatmap_key, x_axis, y_axis)
+                    body["salt_names"] = salts
+                    body["image_base64"] = png_base64
+                    await save_render(heatmap_etag, analysis_id, heatmap_key, x_axis, y_axis, "heatmap", body)
+                    summary["rendered"] += 1
+                except Exception as e:
+                    logger.warning(f"⚠️ Heatmap pre-render failed for {analysis_id}: {e}")
+                    summary["failed"] += 1
+
+        summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"✅ Pre-rendered graphs for {analysis_id}: {summary}")
+
+    except Exception as e:
+        logger.error(f"❌ Graph pre-render failed for {analysis_id}: {e}")
+
+    return summary
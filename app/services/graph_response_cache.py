@@ -0,0 +1,148 @@
+"""
+Graph Response Cache - ETags and persisted renders for graph endpoints
+A stored grid only changes when its analysis is rewritten (progressive
+continuation, exact replacement), which also bumps `updated_at`; so a graph
+response is fully determined by (analysis_id, salt_name, x_axis, y_axis,
+format) plus that revision:
+  - Strong ETag over those fields → If-None-Match answered with 304
+  - Cache-Control: immutable once the analysis is complete and exact
+  - Rendered responses persisted in `graph_renders` by ETag, so repeat
+    and shared views cost a lookup instead of a matplotlib render
+    (graph_prerender fills them in ahead of the first view)
+"""
+
+import hashlib
+from typing import Dict, Any, Optional
+
+from app.db.mongo import db
+from app.services.graph_service import GraphService
+
+# Bump when the rendered output changes (styling, DPI, payload shape)
+GRAPH_RENDER_VERSION = 1
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def analysis_revision(analysis: Dict[str, Any]) -> str:
+    """Changes whenever the stored analysis (and its grid) is rewritten"""
+    stamp = analysis.get("updated_at") or analysis.get("created_at")
+    return stamp.isoformat() if hasattr(stamp, "isoformat") else str(stamp)
+
+
+def graph_etag(
+    analysis: Dict[str, Any],
+    salt_name: str,
+    x_axis: str,
+    y_axis: str,
+    format: str,
+    upload_to_s3: bool = False
+) -> str:
+    """Strong (quoted) ETag of one graph representation"""
+    parts = [
+        str(GRAPH_RENDER_VERSION), analysis["analysis_id"], analysis_revision(analysis),
+        salt_name, x_axis, y_axis, format
+    ]
+    if upload_to_s3:
+        parts.append("s3")
+    return '"' + hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def cache_control(analysis: Dict[str, Any]) -> str:
+    """immutable for finished exact analyses; revalidate while they can still change"""
+    if analysis.get("complete", True) and not analysis.get("approximate"):
+        return IMMUTABLE_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (list of tags or "*"; weak comparison per RFC 9110)"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def json_body(
+    analysis: Dict[str, Any],
+    graph_data: Dict[str, Any],
+    data_points: int
+) -> Dict[str, Any]:
+    """format=json response of /analysis/{id}/3d-graph"""
+    return {
+        "status": "success",
+        "graph_data": graph_data,
+        "analysis_id": analysis["analysis_id"],
+        "data_points": data_points,
+        "grid_config": analysis.get("grid_config", {})
+    }
+
+
+def surface_json_body(
+    analysis: Dict[str, Any],
+    surface: Dict[str, Any],
+    salt_name: str,
+    x_axis: str,
+    y_axis: str
+) -> Optional[Dict[str, Any]]:
+    """
+    format=json response from a single-mineral surface (grid_store.load_mineral
+    / ColumnarGrid.surface shape). Shared by the live endpoint and the
+    pre-renderer so a stored render is byte-for-byte what the route returns.
+    None when the grid has no valid point.
+    """
+    data_points = int(surface["valid"].sum())
+    if data_points == 0:
+        return None
+    graph_data = GraphService().prepare_3d_graph_data_from_surface(
+        surface=surface,
+        salt_name=salt_name,
+        x_axis=x_axis,
+        y_axis=y_axis
+    )
+    return json_body(analysis, graph_data, data_points)
+
+
+def png_body(
+    analysis_id: str,
+    salt_name: str,
+    x_axis: str,
+    y_axis: str
+) -> Dict[str, Any]:
+    """format=png response skeleton (image_base64 / s3_* added by the caller)"""
+    return {
+        "status": "success",
+        "analysis_id": analysis_id,
+        "salt_name": salt_name,
+        "x_axis": x_axis,
+        "y_axis": y_axis
+    }
+
+
+async def get_render(etag: str) -> Optional[Dict[str, Any]]:
+    """Persisted response body for an ETag (None if never rendered)"""
+    render = await db.get_graph_render(etag)
+    return render["response"] if render else None
+
+
+async def save_render(
+    etag: str,
+    analysis_id: str,
+    salt_name: str,
+    x_axis: str,
+    y_axis: str,
+    format: str,
+    response: Dict[str, Any]
+) -> None:
+    await db.save_graph_render({
+        "etag": etag,
+        "analysis_id": analysis_id,
+        "salt_name": salt_name,
+        "x_axis": x_axis,
+        "y_axis": y_axis,
+        "format": format,
+        "response": response
+    })
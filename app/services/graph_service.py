@@ -594,8 +594,42 @@ from typing import Dict, Any, List, Optional
 
 import numpy as np
 
+from app.services.grid_store import ColumnarGrid
+
 logger = logging.getLogger(__name__)
 
+# Render-pool workers keep one figure per (kind, layout) and clear it
+# between renders instead of building a new one; everywhere else figures
+# are created and closed per call.
+_REUSE_FIGURES = False
+_figures: Dict[tuple, Any] = {}
+
+
+def enable_figure_reuse() -> None:
+    global _REUSE_FIGURES
+    _REUSE_FIGURES = True
+
+
+def _new_figure(key: tuple, figsize: tuple):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    if not _REUSE_FIGURES:
+        return plt.figure(figsize=figsize)
+    fig = _figures.get(key)
+    if fig is None:
+        fig = _figures[key] = plt.figure(figsize=figsize)
+    else:
+        fig.clf()
+    return fig
+
+
+def _release_figure(fig) -> None:
+    if not _REUSE_FIGURES:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+
 
 class GraphService:
     """Graph generation for water quality analysis"""
@@ -631,7 +665,8 @@ class GraphService:
                 else:
                     colors.append("#2ecc71")   # green
 
-            fig, ax = plt.subplots(figsize=(10, 5))
+            fig = _new_figure(("si_bar",), (10, 5))
+            ax  = fig.add_subplot(111)
             bars = ax.bar(minerals, values, color=colors, edgecolor="white", linewidth=0.8)
 
             # Zero line
@@ -647,7 +682,7 @@ class GraphService:
             # Encode
             buf = io.BytesIO()
             fig.savefig(buf, format="png", dpi=150)
-            plt.close(fig)
+            _release_figure(fig)
             buf.seek(0)
             img_b64 = base64.b64encode(buf.read()).decode("utf-8")
 
@@ -674,6 +709,7 @@ class GraphService:
 
         Args:
             results:   List of grid-point results from analysis_engine
+                       (or a decoded ColumnarGrid, e.g. from grid_cache)
             salt_name: Which mineral SI to plot (e.g. "Calcite")
             x_axis:    "pH" | "CoC" | "temp"
             y_axis:    "pH" | "CoC" | "temp"
@@ -690,15 +726,41 @@ class GraphService:
                 "available_salts": [...]  // all salts in dataset (for dropdown)
             }
         """
+        return self.prepare_multi_salt_graph_data(results, [salt_name], x_axis, y_axis)[salt_name]
+
+    def prepare_multi_salt_graph_data(
+        self,
+        results: List[Dict[str, Any]],
+        salt_names: List[str],
+        x_axis: str = "pH",
+        y_axis: str = "CoC"
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        prepare_3d_graph_data() for several salts at once: one traversal of
+        the results (or one pass over a decoded ColumnarGrid) collects every
+        requested salt, and zones are classified per matrix, not per cell.
+
+        Returns:
+            {salt_name: prepare_3d_graph_data() dict}
+        """
+        if isinstance(results, ColumnarGrid):
+            # Decoded grid (e.g. from grid_cache): no per-point dicts needed
+            return self._graph_data_from_arrays(
+                [results.ph_values, results.coc_values, results.temp_values],
+                results.computed & ~results.error,
+                {salt: results.mineral(salt) for salt in salt_names},
+                results.minerals, x_axis, y_axis
+            )
+
         try:
             # Axis key mapping from result dicts
             axis_key_map = {"pH": "pH", "CoC": "CoC", "temp": "temperature_C"}
             x_key = axis_key_map.get(x_axis, "pH")
             y_key = axis_key_map.get(y_axis, "CoC")
 
-            # Collect all (x, y, SI) triples
+            # Collect all (x, y, SI) triples for every requested salt
             x_set, y_set = set(), set()
-            point_map = {}           # (x_round, y_round) → SI
+            point_maps = {salt: {} for salt in salt_names}   # salt → (x_round, y_round) → SI
             available_salts = set()
 
             for r in results:
@@ -717,52 +779,134 @@ class GraphService:
 
                 for si in r.get("saturation_indices", []):
                     available_salts.add(si["mineral_name"])
-                    if si["mineral_name"] == salt_name:
+                    point_map = point_maps.get(si["mineral_name"])
+                    if point_map is not None:
                         point_map[(x_r, y_r)] = si["si_value"]
 
             # Sort axes
             x_sorted = sorted(x_set)
             y_sorted = sorted(y_set)
+            x_pos = {v: i for i, v in enumerate(x_sorted)}
+            y_pos = {v: j for j, v in enumerate(y_sorted)}
+
+            graphs = {}
+            for salt, point_map in point_maps.items():
+                # 2D z-matrix  z[yi][xi]
+                z = np.full((len(y_sorted), len(x_sorted)), np.nan)
+                for (x_r, y_r), si in point_map.items():
+                    z[y_pos[y_r], x_pos[x_r]] = si
+                graphs[salt] = self._graph_payload(
+                    salt, x_sorted, y_sorted, z, sorted(available_salts), x_axis, y_axis
+                )
 
-            # Build 2D z-matrix  and  color-zone matrix
-            from app.utils.salt_data_table import classify_si_value
-
-            z_matrix     = []
-            color_matrix = []
-
-            for y_val in y_sorted:
-                z_row     = []
-                color_row = []
-                for x_val in x_sorted:
-                    si = point_map.get((x_val, y_val))
-                    z_row.append(si if si is not None else None)
-                    color_row.append(
-                        classify_si_value(salt_name, si) if si is not None else "unknown"
-                    )
-                z_matrix.append(z_row)
-                color_matrix.append(color_row)
-
-            # Axis labels
-            label_map = {"pH": "pH", "CoC": "Cycles of Concentration", "temp": "Temperature (°C)"}
+            logger.info(f"✅ 3D JSON prepared: {salt_names}, {len(x_sorted)}×{len(y_sorted)} grid")
+            return graphs
 
-            logger.info(f"✅ 3D JSON prepared: {salt_name}, {len(x_sorted)}×{len(y_sorted)} grid")
-
-            return {
-                "x":              x_sorted,
-                "y":              y_sorted,
-                "z":              z_matrix,
-                "color_zones":    color_matrix,
-                "salt_name":      salt_name,
-                "x_axis_label":   label_map.get(x_axis, x_axis),
-                "y_axis_label":   label_map.get(y_axis, y_axis),
-                "z_axis_label":   "Saturation Index (SI)",
-                "available_salts": sorted(available_salts)
-            }
+        except Exception as e:
+            logger.error(f"❌ 3D JSON prep failed: {e}")
+            raise
+
+    def prepare_3d_graph_data_from_surface(
+        self,
+        surface: Dict[str, Any],
+        salt_name: str,
+        x_axis: str = "pH",
+        y_axis: str = "CoC"
+    ) -> Dict[str, Any]:
+        """
+        Same output as prepare_3d_graph_data(), built from a single-mineral
+        SI array (grid_store.load_mineral) instead of per-point results.
+        """
+        return self._graph_data_from_arrays(
+            [surface["ph_values"], surface["coc_values"], surface["temp_values"]],
+            surface["valid"], {salt_name: surface.get("si")},
+            surface.get("minerals", []), x_axis, y_axis
+        )[salt_name]
+
+    def _graph_data_from_arrays(
+        self,
+        axes: List[Any],
+        valid: np.ndarray,
+        si_arrays: Dict[str, Optional[np.ndarray]],
+        minerals: List[str],
+        x_axis: str,
+        y_axis: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Graph data from [pH, CoC, temp] arrays (NaN = no SI). The third axis
+        is collapsed like the per-point path: the last reported point along
+        it wins.
+        """
+        try:
+            axis_index_map = {"pH": 0, "CoC": 1, "temp": 2}
+            xi = axis_index_map.get(x_axis, 0)
+            yi = axis_index_map.get(y_axis, 1)
+            if xi == yi:
+                raise ValueError("x_axis and y_axis must be different")
+            zi = 3 - xi - yi
+
+            # [x, y, collapsed] views
+            valid_xy = np.moveaxis(valid, (xi, yi, zi), (0, 1, 2)).any(axis=2)
+            x_idx = np.flatnonzero(valid_xy.any(axis=1))
+            y_idx = np.flatnonzero(valid_xy.any(axis=0))
+            x_values = [round(float(axes[xi][i]), 2) for i in x_idx]
+            y_values = [round(float(axes[yi][j]), 2) for j in y_idx]
+
+            graphs = {}
+            for salt, si in si_arrays.items():
+                if si is None:
+                    z = np.full((len(y_idx), len(x_idx)), np.nan)
+                else:
+                    si = np.where(valid, si, np.nan)
+                    si = np.moveaxis(si, (xi, yi, zi), (0, 1, 2))
+                    present = ~np.isnan(si)
+                    last = si.shape[2] - 1 - present[:, :, ::-1].argmax(axis=2)
+                    plane = np.take_along_axis(si, last[:, :, None], axis=2)[:, :, 0]
+                    plane = np.where(present.any(axis=2), plane, np.nan)
+                    z = np.round(plane[np.ix_(x_idx, y_idx)].T.astype(float), 4)
+                graphs[salt] = self._graph_payload(
+                    salt, x_values, y_values, z, sorted(minerals), x_axis, y_axis
+                )
+
+            logger.info(f"✅ 3D JSON prepared: {list(si_arrays)}, {len(x_idx)}×{len(y_idx)} grid")
+            return graphs
 
         except Exception as e:
             logger.error(f"❌ 3D JSON prep failed: {e}")
             raise
 
+    @staticmethod
+    def _graph_payload(
+        salt_name: str,
+        x_values: List[float],
+        y_values: List[float],
+        z: np.ndarray,
+        available_salts: List[str],
+        x_axis: str,
+        y_axis: str
+    ) -> Dict[str, Any]:
+        """prepare_3d_graph_data() dict from a z[yi][xi] matrix (NaN = no SI)"""
+        from app.utils.salt_data_table import classify_si_array
+
+        missing = np.isnan(z)
+        z_matrix = z.astype(object)
+        z_matrix[missing] = None
+
+        # Axis labels
+        label_map = {"pH": "pH", "CoC": "Cycles of Concentration", "temp": "Temperature (°C)"}
+
+        return {
+            "x":              list(x_values),
+            "y":              list(y_values),
+            "z":              z_matrix.tolist(),
+            "color_zones":    classify_si_array(salt_name, z).tolist(),
+            "salt_name":      salt_name,
+            "x_axis_label":   label_map.get(x_axis, x_axis),
+            "y_axis_label":   label_map.get(y_axis, y_axis),
+            "z_axis_label":   "Saturation Index (SI)",
+            "available_salts": available_salts
+        }
+
     # ========================================
     # NEW: GENERATE 3D SURFACE PNG (matplotlib)
     # ========================================
@@ -781,6 +925,17 @@ class GraphService:
         Returns:
             base64-encoded PNG string
         """
+        # Reuse JSON prep to get the matrix
+        graph_data = self.prepare_3d_graph_data(results, salt_name, x_axis, y_axis)
+        return self.render_3d_surface_png(graph_data, x_axis, y_axis)
+
+    def render_3d_surface_png(
+        self,
+        graph_data: Dict[str, Any],
+        x_axis: str = "pH",
+        y_axis: str = "CoC"
+    ) -> str:
+        """3D surface PNG (base64) from prepared graph data (x, y, z matrix)"""
         try:
             import matplotlib
             matplotlib.use("Agg")
@@ -789,8 +944,7 @@ class GraphService:
             from matplotlib import cm
             from matplotlib.colors import BoundaryNorm
 
-            # Reuse JSON prep to get the matrix
-            graph_data = self.prepare_3d_graph_data(results, salt_name, x_axis, y_axis)
+            salt_name = graph_data["salt_name"]
 
             x_vals = np.array(graph_data["x"])
             y_vals = np.array(graph_data["y"])
@@ -814,7 +968,7 @@ class GraphService:
             norm   = BoundaryNorm(bounds, cmap.N)
 
             # --- Plot ---
-            fig = plt.figure(figsize=(12, 7))
+            fig = _new_figure(("surface_3d",), (12, 7))
             ax  = fig.add_subplot(111, projection="3d")
 
             surf = ax.plot_surface(
@@ -847,7 +1001,7 @@ class GraphService:
             # Encode
             buf = io.BytesIO()
             fig.savefig(buf, format="png", dpi=150)
-            plt.close(fig)
+            _release_figure(fig)
             buf.seek(0)
             return base64.b64encode(buf.read()).decode("utf-8")
 
@@ -864,16 +1018,30 @@ class GraphService:
         results: List[Dict[str, Any]],
         salt_names: List[str],
         x_axis: str = "pH",
-        y_axis: str = "CoC"
+        y_axis: str = "CoC",
+        renderer: str = "matplotlib"
     ) -> str:
         """
         Side-by-side 2D heatmaps for multiple salts.
         Useful when user switches salt via dropdown — each
         sub-plot pre-rendered in one image.
 
+        renderer="fast" draws the same colour bins with NumPy + Pillow
+        (raster_heatmap) instead of matplotlib.
+
         Returns:
             base64 PNG
         """
+        if renderer == "fast":
+            from app.services.raster_heatmap import render_panels
+
+            label_map = {"pH": "pH", "CoC": "CoC", "temp": "Temp (°C)"}
+            graphs = self.prepare_multi_salt_graph_data(results, salt_names, x_axis, y_axis)
+            panels = [graphs[salt] for salt in salt_names]
+            png = render_panels(panels, label_map.get(x_axis, x_axis), label_map.get(y_axis, y_axis))
+            logger.info(f"✅ Multi-salt heatmap generated (fast): {salt_names}")
+            return base64.b64encode(png).decode("utf-8")
+
         try:
             import matplotlib
             matplotlib.use("Agg")
@@ -888,7 +1056,8 @@ class GraphService:
             cols = min(n_salts, 3)
             rows = (n_salts + cols - 1) // cols
 
-            fig, axes = plt.subplots(rows, cols, figsize=(6 * cols, 5 * rows))
+            fig  = _new_figure(("multi_heatmap", rows, cols), (6 * cols, 5 * rows))
+            axes = fig.subplots(rows, cols)
             if n_salts == 1:
                 axes = [axes]
             else:
@@ -900,12 +1069,15 @@ class GraphService:
 
             label_map = {"pH": "pH", "CoC": "CoC", "temp": "Temp (°C)"}
 
+            # All salts' matrices from one pass over the results
+            graphs = self.prepare_multi_salt_graph_data(results, salt_names, x_axis, y_axis)
+
             for idx, salt in enumerate(salt_names):
                 if idx >= len(axes):
                     break
                 ax = axes[idx]
 
-                gd = self.prepare_3d_graph_data(results, salt, x_axis, y_axis)
+                gd = graphs[salt]
                 x_vals = np.array(gd["x"])
                 y_vals = np.array(gd["y"])
                 Z = np.array([
@@ -932,7 +1104,7 @@ class GraphService:
 
             buf = io.BytesIO()
             fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
-            plt.close(fig)
+            _release_figure(fig)
             buf.seek(0)
 
             logger.info(f"✅ Multi-salt heatmap generated: {salt_names}")
@@ -942,6 +1114,15 @@ class GraphService:
             logger.error(f"❌ Multi-salt heatmap failed: {e}")
             raise
 
+    def generate_heatmap_thumbnail(self, graph_data: Dict[str, Any], size: int = 96) -> bytes:
+        """
+        Small SI zone-colour PNG (raw bytes) for list views, from
+        prepare_3d_graph_data() output; rendered by raster_heatmap.
+        """
+        from app.services.raster_heatmap import render_thumbnail
+
+        return render_thumbnail(graph_data, size)
+
     # ========================================
     # NEW: GREEN/YELLOW/RED ZONE SUMMARY
     # ========================================
@@ -952,12 +1133,27 @@ class GraphService:
         salt_name: str
     ) -> Dict[str, Any]:
         """
-        Count green / yellow / red points for a salt across all grid results.
+        Count green / yellow / red points for a salt across all grid results
+        (list of result dicts or a decoded ColumnarGrid).
         """
         from app.utils.salt_data_table import classify_si_value
 
         counts = {"green": 0, "yellow": 0, "red": 0, "unknown": 0}
 
+        if isinstance(results, ColumnarGrid):
+            # Decoded grid: error points are "unknown", others by SI
+            from app.utils.salt_data_table import classify_si_array
+
+            counts["unknown"] += int((results.computed & results.error).sum())
+            si = results.mineral(salt_name)
+            if si is not None:
+                values = si[results.computed & ~results.error]
+                values = np.round(values[~np.isnan(values)].astype(float), 4)
+                zones, n = np.unique(classify_si_array(salt_name, values), return_counts=True)
+                for zone, count in zip(zones.tolist(), n.tolist()):
+                    counts[zone] = counts.get(zone, 0) + count
+            results = []
+
         for r in results:
             if "error" in r:
                 counts["unknown"] += 1
@@ -0,0 +1,190 @@
+"""
+Grid Cache - In-memory LRU of decoded grid analyses
+Sits in front of grid_store for the graph endpoints, so flipping salts or
+rotating axes does not re-fetch and re-decode the same chunks:
+  - Keyed by analysis_id; holds the full ColumnarGrid and/or single-mineral
+    surfaces (load_mineral shape) read so far
+  - Byte-budgeted (GRID_CACHE_MAX_BYTES, default 256 MB), least recently
+    used analyses evicted first
+  - Single-flight: concurrent misses for the same key share one load
+  - Invalidated by grid_store.save_grid() whenever an analysis is rewritten
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from app.services.grid_store import ColumnarGrid, load_grid, load_mineral
+
+logger = logging.getLogger(__name__)
+
+GRID_CACHE_MAX_BYTES = int(os.getenv("GRID_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class GridCache:
+    """LRU map: analysis_id → {"grid", "surfaces", "nbytes"}"""
+
+    def __init__(self, max_bytes: int = GRID_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._generation: Dict[str, int] = {}
+        self._bytes = 0
+        self._stats = {
+            "hits": 0, "misses": 0, "loads": 0, "coalesced": 0,
+            "evictions": 0, "invalidations": 0
+        }
+
+    # ========================================
+    # READS
+    # ========================================
+
+    async def get_grid(self, analysis_id: str) -> Optional[ColumnarGrid]:
+        """Full decoded grid (None if the analysis has no stored grid)"""
+        entry = self._touch(analysis_id)
+        if entry and entry["grid"] is not None:
+            self._stats["hits"] += 1
+            return entry["grid"]
+
+        self._stats["misses"] += 1
+
+        async def load():
+            grid = await load_grid(analysis_id)
+            return grid, grid
+
+        return await self._single_flight((analysis_id, None), analysis_id, load)
+
+    async def get_mineral(self, analysis_id: str, mineral: str) -> Optional[Dict[str, Any]]:
+        """
+        One mineral's surface. Served from the cached full grid if there is
+        one, otherwise only that mineral is projected out of the chunks.
+        """
+        entry = self._touch(analysis_id)
+        if entry:
+            if entry["grid"] is not None:
+                self._stats["hits"] += 1
+                return entry["grid"].surface(mineral)
+            if mineral in entry["surfaces"]:
+                self._stats["hits"] += 1
+                return entry["surfaces"][mineral]
+
+        self._stats["misses"] += 1
+
+        async def load():
+            surface = await load_mineral(analysis_id, mineral)
+            return surface, (mineral, surface)
+
+        return await self._single_flight((analysis_id, mineral), analysis_id, load)
+
+    # ========================================
+    # INVALIDATION / METRICS
+    # ========================================
+
+    def invalidate(self, analysis_id: Optional[str] = None) -> None:
+        """Drop one analysis (or everything when analysis_id is None)"""
+        if analysis_id is None:
+            for key in list(self._generation):
+                self._generation[key] += 1
+            self._entries.clear()
+            self._bytes = 0
+        else:
+            self._generation[analysis_id] = self._generation.get(analysis_id, 0) + 1
+            entry = self._entries.pop(analysis_id, None)
+            if entry:
+                self._bytes -= entry["nbytes"]
+        self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            **self._stats
+        }
+
+    # ========================================
+    # INTERNALS
+    # ========================================
+
+    def _touch(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(analysis_id)
+        if entry:
+            self._entries.move_to_end(analysis_id)
+        return entry
+
+    async def _single_flight(self, key: tuple, analysis_id: str, loader):
+        """
+        Run loader() once per key no matter how many callers miss at the
+        same time; the result is stored unless the analysis was
+        invalidated while it was loading.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        generation = self._generation.get(analysis_id, 0)
+
+        async def run():
+            try:
+                value, stored = await loader()
+                self._stats["loads"] += 1
+                if stored is not None and self._generation.get(analysis_id, 0) == generation:
+                    self._store(analysis_id, stored)
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        future = asyncio.ensure_future(run())
+        self._inflight[key] = future
+        # Shielded so one cancelled caller does not cancel the shared load
+        return await asyncio.shield(future)
+
+    def _store(self, analysis_id: str, stored: Any) -> None:
+        entry = self._entries.pop(analysis_id, None)
+        if entry:
+            self._bytes -= entry["nbytes"]
+        else:
+            entry = {"grid": None, "surfaces": {}}
+
+        if isinstance(stored, ColumnarGrid):
+            # The full grid supersedes any single-mineral surfaces
+            entry = {"grid": stored, "surfaces": {}}
+        else:
+            mineral, surface = stored
+            if surface is None:
+                if not entry["surfaces"]:
+                    return
+            else:
+                entry["surfaces"][mineral] = surface
+
+        entry["nbytes"] = _entry_bytes(entry)
+        if entry["nbytes"] > self.max_bytes:
+            logger.warning(f"⚠️ Grid {analysis_id} ({entry['nbytes']} bytes) exceeds cache budget, not cached")
+            return
+
+        self._entries[analysis_id] = entry
+        self._bytes += entry["nbytes"]
+
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            evicted_id, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["nbytes"]
+            self._stats["evictions"] += 1
+            logger.info(f"📦 Grid cache evicted {evicted_id} ({evicted['nbytes']} bytes)")
+
+
+def _entry_bytes(entry: Dict[str, Any]) -> int:
+    total = entry["grid"].nbytes if entry["grid"] is not None else 0
+    for surface in entry["surfaces"].values():
+        total += surface["valid"].nbytes
+        if surface["si"] is not None:
+            total += surface["si"].nbytes
+    return total
+
+
+# Global grid cache instance
+grid_cache = GridCache()
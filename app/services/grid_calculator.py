@@ -135,6 +135,78 @@ class GridCalculator:
             logger.error(f"❌ 2D grid generation failed: {e}")
             raise
     
+    # ========================================
+    # PROGRESSIVE (COARSE → FINE) PASSES
+    # ========================================
+    
+    @staticmethod
+    def progressive_passes(
+        shape: Tuple[int, int, int],
+        stride: int = 4
+    ) -> List[List[int]]:
+        """
+        Split a generate_3d_grid() lattice into coarse-to-fine passes
+        
+        Pass 0 is every `stride`-th point per axis (plus the last index, so
+        the coarse surface spans the full range); each later pass halves
+        the stride and only adds points not computed yet.
+        
+        Args:
+            shape: (ph_steps, coc_steps, temp_steps)
+            stride: Coarse stride per axis (1 = single pass)
+        
+        Returns:
+            List of passes, each a list of flat point indices
+            (same order as grid_points)
+        """
+        done = np.zeros(shape, dtype=bool)
+        passes = []
+        step = max(1, int(stride))
+        
+        while True:
+            axes = [sorted(set(range(0, n, step)) | {n - 1}) for n in shape]
+            mask = np.zeros(shape, dtype=bool)
+            mask[np.ix_(*axes)] = True
+            
+            new_points = mask & ~done
+            if new_points.any():
+                passes.append(np.flatnonzero(new_points).tolist())
+            done |= mask
+            
+            if step == 1:
+                return passes
+            step = max(1, step // 2)
+    
+    # ========================================
+    # MIXING RATIO SIMPLEX
+    # ========================================
+    
+    @staticmethod
+    def mixing_simplex(n_sources: int, steps: int = 11) -> np.ndarray:
+        """
+        Regular lattice over the mixing-ratio simplex
+        
+        Args:
+            n_sources: Number of source waters (2 or 3)
+            steps: Points per edge (11 → 10% increments)
+        
+        Returns:
+            fractions[N, n_sources]; every row sums to 1
+            (2 sources: N = steps, 3 sources: N = steps·(steps+1)/2)
+        """
+        if n_sources not in (2, 3):
+            raise ValueError("Mixing supports 2 or 3 source waters")
+        if steps < 2:
+            raise ValueError("steps must be at least 2")
+        
+        n = steps - 1
+        counts = [
+            c for c in product(range(n + 1), repeat=n_sources - 1)
+            if sum(c) <= n
+        ]
+        lattice = np.array([[*c, n - sum(c)] for c in counts], dtype=float)
+        return lattice / n
+    
     # ========================================
     # CONCENTRATE WATER AT COC
     # ========================================
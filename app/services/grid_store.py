@@ -0,0 +1,420 @@
+"""
+Grid Store - Columnar storage for grid analyses
+Replaces the per-point `results` list (every point repeating every mineral
+as {"mineral_name", "si_value"}) with dense arrays:
+  - axis vectors: ph_values, coc_values, temp_values
+  - si:             float32[mineral, pH, CoC, temp]  (NaN = not reported)
+  - ionic_strength: float32[pH, CoC, temp]
+  - charge_balance: float32[pH, CoC, temp]
+  - computed / error / fast: bitmaps[pH, CoC, temp]
+  - retries:        uint8[pH, CoC, temp]
+Arrays are zlib-compressed and kept in the `grid_chunks` collection, one
+document per (analysis_id, temp_index) plus a small header chunk, so no
+grid hits the 16 MB document limit and reads fetch only the slices they
+need. The old list-of-dicts view is generated lazily (ResultsView) for
+callers that still expect `results`; load_mineral() reads a single
+mineral's SI for graphing.
+"""
+
+import zlib
+from collections.abc import Sequence
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from app.db.mongo import db
+
+GRID_FORMAT_VERSION = 1
+
+
+class ColumnarGrid:
+    """Dense pH × CoC × temp grid of SI / IS / charge balance results"""
+
+    def __init__(
+        self,
+        ph_values: List[float],
+        coc_values: List[float],
+        temp_values: List[float],
+        minerals: List[str],
+        database_used: Optional[str] = None
+    ):
+        self.ph_values = np.asarray(ph_values, dtype=float)
+        self.coc_values = np.asarray(coc_values, dtype=float)
+        self.temp_values = np.asarray(temp_values, dtype=float)
+        self.minerals = list(minerals)
+        self.database_used = database_used
+
+        shape = self.shape
+        self.si = np.full((len(self.minerals), *shape), np.nan, dtype=np.float32)
+        self.ionic_strength = np.zeros(shape, dtype=np.float32)
+        self.charge_balance = np.zeros(shape, dtype=np.float32)
+        self.computed = np.zeros(shape, dtype=bool)
+        self.error = np.zeros(shape, dtype=bool)
+        self.fast = np.zeros(shape, dtype=bool)
+        self.retries = np.zeros(shape, dtype=np.uint8)
+        self.errors: Dict[int, str] = {}
+
+    @property
+    def shape(self) -> tuple:
+        return (len(self.ph_values), len(self.coc_values), len(self.temp_values))
+
+    # ========================================
+    # BUILD FROM PER-POINT RESULTS
+    # ========================================
+
+    @classmethod
+    def from_results(
+        cls,
+        results: List[Dict[str, Any]],
+        ph_values: List[float],
+        coc_values: List[float],
+        temp_values: List[float],
+        database_used: Optional[str] = None
+    ) -> "ColumnarGrid":
+        """
+        Pack per-point result dicts (stored grid-result shape: pH, CoC,
+        temperature_C, saturation_indices, ...; point_index if present).
+        """
+        minerals = sorted({
+            si["mineral_name"] for r in results for si in r.get("saturation_indices", [])
+        })
+        if database_used is None:
+            database_used = next((r["database_used"] for r in results if r.get("database_used")), None)
+
+        grid = cls(ph_values, coc_values, temp_values, minerals, database_used)
+        grid.merge_results(results)
+        return grid
+
+    def merge_results(self, results: List[Dict[str, Any]]) -> None:
+        """Write (or overwrite) points from per-point result dicts"""
+        new_minerals = sorted({
+            si["mineral_name"] for r in results for si in r.get("saturation_indices", [])
+        } - set(self.minerals))
+        if new_minerals:
+            self.minerals.extend(new_minerals)
+            pad = np.full((len(new_minerals), *self.shape), np.nan, dtype=np.float32)
+            self.si = np.concatenate([self.si, pad])
+
+        mineral_index = {m: n for n, m in enumerate(self.minerals)}
+
+        for r in results:
+            i, j, k = self._locate(r)
+            flat = int(np.ravel_multi_index((i, j, k), self.shape))
+
+            # Every per-point field is rewritten, so nothing (the fast flag,
+            # IS, charge balance) survives from the result being replaced
+            self.computed[i, j, k] = True
+            self.si[:, i, j, k] = np.nan
+            self.retries[i, j, k] = min(int(r.get("retries", 0) or 0), 255)
+            self.fast[i, j, k] = "error" not in r and r.get("engine") == "fast"
+
+            if "error" in r:
+                self.error[i, j, k] = True
+                self.errors[flat] = str(r["error"])
+                self.ionic_strength[i, j, k] = 0
+                self.charge_balance[i, j, k] = 0
+                continue
+
+            self.error[i, j, k] = False
+            self.errors.pop(flat, None)
+            self.ionic_strength[i, j, k] = r.get("ionic_strength", 0) or 0
+            self.charge_balance[i, j, k] = r.get(
+                "charge_balance_error", r.get("charge_balance_error_pct", 0)
+            ) or 0
+            for si in r.get("saturation_indices", []):
+                self.si[mineral_index[si["mineral_name"]], i, j, k] = si["si_value"]
+
+    def _locate(self, r: Dict[str, Any]) -> tuple:
+        """(i, j, k) of a result: point_index if present, else nearest axis values"""
+        if r.get("point_index") is not None:
+            return np.unravel_index(int(r["point_index"]), self.shape)
+        temp = r.get("temperature_C", r.get("temp"))
+        return (
+            int(np.abs(self.ph_values - r["pH"]).argmin()),
+            int(np.abs(self.coc_values - r["CoC"]).argmin()),
+            int(np.abs(self.temp_values - (temp if temp is not None else self.temp_values[0])).argmin())
+        )
+
+    # ========================================
+    # ACCESSORS
+    # ========================================
+
+    def mineral(self, name: str) -> Optional[np.ndarray]:
+        """float32[pH, CoC, temp] SI for one mineral (None if not computed)"""
+        if name not in self.minerals:
+            return None
+        return self.si[self.minerals.index(name)]
+
+    def surface(self, name: str) -> Dict[str, Any]:
+        """Single-mineral view in the load_mineral() shape"""
+        si = self.mineral(name)
+        valid = self.computed & ~self.error
+        return {
+            "ph_values": self.ph_values.tolist(),
+            "coc_values": self.coc_values.tolist(),
+            "temp_values": self.temp_values.tolist(),
+            "minerals": self.minerals,
+            "si": None if si is None else np.where(valid, si, np.nan).astype(np.float32),
+            "valid": valid
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """Decoded size of the arrays (for cache budgets)"""
+        arrays = (
+            self.si, self.ionic_strength, self.charge_balance,
+            self.computed, self.error, self.fast, self.retries
+        )
+        return sum(a.nbytes for a in arrays) + sum(len(m) for m in self.errors.values())
+
+    def results(self) -> "ResultsView":
+        """Lazy list-of-dicts view (computed points, point_index order)"""
+        return ResultsView(self)
+
+    def point_result(self, flat: int) -> Dict[str, Any]:
+        """Stored grid-result dict for one flat point index"""
+        i, j, k = np.unravel_index(flat, self.shape)
+        entry = {
+            "point_index": int(flat),
+            "pH": float(self.ph_values[i]),
+            "CoC": float(self.coc_values[j]),
+            "temperature_C": float(self.temp_values[k])
+        }
+        if self.error[i, j, k]:
+            entry.update({
+                "error": self.errors.get(int(flat), "Unknown error"),
+                "saturation_indices": [],
+                "retries": int(self.retries[i, j, k])
+            })
+            return entry
+
+        column = self.si[:, i, j, k]
+        entry.update({
+            "saturation_indices": [
+                {"mineral_name": m, "si_value": round(float(v), 4)}
+                for m, v in zip(self.minerals, column) if not np.isnan(v)
+            ],
+            "ionic_strength": _float32_value(self.ionic_strength[i, j, k]),
+            "charge_balance_error": _float32_value(self.charge_balance[i, j, k]),
+            "database_used": self.database_used,
+            "engine": "fast" if self.fast[i, j, k] else "phreeqc",
+            "retries": int(self.retries[i, j, k])
+        })
+        return entry
+
+    # ========================================
+    # SERIALIZATION (compressed)
+    # ========================================
+
+    # One chunk per temperature index (temp_index = HEADER_INDEX holds axes,
+    # minerals and database); SI is keyed by mineral position so a single
+    # mineral can be projected out of each chunk ("si.<n>").
+    HEADER_INDEX = -1
+    SLICE_ARRAYS = ("ionic_strength", "charge_balance", "retries")
+    SLICE_BITMAPS = ("computed", "error", "fast")
+
+    def header_chunk(self) -> Dict[str, Any]:
+        return {
+            "temp_index": self.HEADER_INDEX,
+            "format": GRID_FORMAT_VERSION,
+            "shape": list(self.shape),
+            "ph_values": self.ph_values.tolist(),
+            "coc_values": self.coc_values.tolist(),
+            "temp_values": self.temp_values.tolist(),
+            "minerals": self.minerals,
+            "database_used": self.database_used
+        }
+
+    def errors_by_slice(self) -> Dict[int, List[int]]:
+        """Flat indices of error messages grouped by temperature index"""
+        grouped: Dict[int, List[int]] = {}
+        if self.errors:
+            flats = np.fromiter(self.errors, dtype=np.int64, count=len(self.errors))
+            for flat, k in zip(flats.tolist(), np.unravel_index(flats, self.shape)[2].tolist()):
+                grouped.setdefault(k, []).append(flat)
+        return grouped
+
+    def slice_chunk(self, k: int, errors_by_slice: Optional[Dict[int, List[int]]] = None) -> Dict[str, Any]:
+        """
+        BSON-ready dict for temperature slice k (zlib-compressed arrays).
+        Pass errors_by_slice() when writing several slices so the error
+        map is scanned once.
+        """
+        if errors_by_slice is None:
+            errors_by_slice = self.errors_by_slice()
+        in_slice = errors_by_slice.get(k, [])
+        return {
+            "temp_index": k,
+            "si": {str(m): _pack(self.si[m, :, :, k]) for m in range(len(self.minerals))},
+            **{name: _pack(getattr(self, name)[:, :, k]) for name in self.SLICE_ARRAYS},
+            **{name: _pack_bitmap(getattr(self, name)[:, :, k]) for name in self.SLICE_BITMAPS},
+            "errors": {str(flat): self.errors[flat] for flat in in_slice}
+        }
+
+    def to_chunks(self) -> List[Dict[str, Any]]:
+        errors_by_slice = self.errors_by_slice()
+        return [self.header_chunk()] + [
+            self.slice_chunk(k, errors_by_slice) for k in range(self.shape[2])
+        ]
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict[str, Any]]) -> Optional["ColumnarGrid"]:
+        """
+        Rebuild from a header chunk + any subset of slice chunks (slices not
+        given stay "not computed"); slices may carry only some minerals.
+        """
+        header = next((c for c in chunks if c["temp_index"] == cls.HEADER_INDEX), None)
+        if header is None:
+            return None
+
+        grid = cls(
+            header["ph_values"], header["coc_values"], header["temp_values"],
+            header["minerals"], header.get("database_used")
+        )
+        for chunk in chunks:
+            k = chunk["temp_index"]
+            if k == cls.HEADER_INDEX:
+                continue
+            for m, packed in chunk.get("si", {}).items():
+                grid.si[int(m), :, :, k] = _unpack(packed)
+            for name in cls.SLICE_ARRAYS:
+                if name in chunk:
+                    getattr(grid, name)[:, :, k] = _unpack(chunk[name])
+            for name in cls.SLICE_BITMAPS:
+                if name in chunk:
+                    getattr(grid, name)[:, :, k] = _unpack_bitmap(chunk[name])
+            grid.errors.update({int(f): msg for f, msg in chunk.get("errors", {}).items()})
+        return grid
+
+
+class ResultsView(Sequence):
+    """Read-only sequence of per-point dicts, built on access"""
+
+    def __init__(self, grid: ColumnarGrid):
+        self._grid = grid
+        self._points = np.flatnonzero(grid.computed)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._grid.point_result(int(p)) for p in self._points[index]]
+        return self._grid.point_result(int(self._points[index]))
+
+
+# ========================================
+# PERSISTENCE
+# ========================================
+
+async def save_grid(analysis_id: str, grid: ColumnarGrid) -> None:
+    await db.save_grid_chunks(analysis_id, grid.to_chunks())
+    # Local import: grid_cache imports this module
+    from app.services.grid_cache import grid_cache
+    grid_cache.invalidate(analysis_id)
+    # Renders of the previous revision can no longer be requested
+    await db.delete_graph_renders(analysis_id)
+
+
+async def load_grid(
+    analysis_id: str,
+    temp_indices: Optional[List[int]] = None
+) -> Optional[ColumnarGrid]:
+    """Load a grid; with temp_indices only those slice chunks are fetched"""
+    if temp_indices is not None:
+        temp_indices = [ColumnarGrid.HEADER_INDEX, *temp_indices]
+    chunks = await db.get_grid_chunks(analysis_id, temp_indices)
+    return ColumnarGrid.from_chunks(chunks)
+
+
+async def load_mineral(
+    analysis_id: str,
+    mineral: str,
+    temp_indices: Optional[List[int]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    SI of one mineral without touching the others: reads the header, then
+    projects only "si.<n>" + the computed/error bitmaps out of each slice.
+
+    Returns {"ph_values", "coc_values", "temp_values", "minerals",
+    "si": float32[pH, CoC, temp] (NaN = not reported / error),
+    "valid": bool[pH, CoC, temp] (computed without error)}; "si" is None
+    when the mineral was not computed. None if the grid is not stored.
+    """
+    header = await db.get_grid_chunks(analysis_id, [ColumnarGrid.HEADER_INDEX])
+    if not header:
+        return None
+    header = header[0]
+    shape = tuple(header["shape"])
+
+    surface = {
+        "ph_values": header["ph_values"],
+        "coc_values": header["coc_values"],
+        "temp_values": header["temp_values"],
+        "minerals": header["minerals"],
+        "si": None,
+        "valid": np.zeros(shape, dtype=bool)
+    }
+
+    if temp_indices is None:
+        temp_indices = list(range(shape[2]))
+    m = str(header["minerals"].index(mineral)) if mineral in header["minerals"] else None
+    projection = {"_id": 0, "temp_index": 1, "computed": 1, "error": 1}
+    if m is not None:
+        projection[f"si.{m}"] = 1
+        surface["si"] = np.full(shape, np.nan, dtype=np.float32)
+
+    for chunk in await db.get_grid_chunks(analysis_id, temp_indices, projection):
+        k = chunk["temp_index"]
+        valid = _unpack_bitmap(chunk["computed"]) & ~_unpack_bitmap(chunk["error"])
+        surface["valid"][:, :, k] = valid
+        if m is not None and m in chunk.get("si", {}):
+            surface["si"][:, :, k] = np.where(valid, _unpack(chunk["si"][m]), np.nan)
+    return surface
+
+
+async def load_results(analysis: Dict[str, Any]) -> Sequence:
+    """
+    Per-point results of a stored analysis: the lazy view for columnar
+    analyses, the embedded list for documents written before.
+    """
+    if analysis.get("storage") != "columnar":
+        return analysis.get("results", [])
+    grid = await load_grid(analysis["analysis_id"])
+    return grid.results() if grid else []
+
+
+# ========================================
+# ARRAY PACKING
+# ========================================
+
+def _float32_value(value: np.float32) -> float:
+    """float32 → Python float without float64 widening noise (7 significant digits)"""
+    return float(f"{value:.7g}")
+
+
+def _pack(array: np.ndarray) -> Dict[str, Any]:
+    return {
+        "dtype": str(array.dtype),
+        "shape": list(array.shape),
+        "data": zlib.compress(np.ascontiguousarray(array).tobytes(), 6)
+    }
+
+
+def _unpack(packed: Dict[str, Any]) -> np.ndarray:
+    raw = zlib.decompress(packed["data"])
+    return np.frombuffer(raw, dtype=packed["dtype"]).reshape(packed["shape"]).copy()
+
+
+def _pack_bitmap(mask: np.ndarray) -> Dict[str, Any]:
+    return {
+        "dtype": "bitmap",
+        "shape": list(mask.shape),
+        "data": zlib.compress(np.packbits(mask, axis=None).tobytes(), 6)
+    }
+
+
+def _unpack_bitmap(packed: Dict[str, Any]) -> np.ndarray:
+    bits = np.frombuffer(zlib.decompress(packed["data"]), dtype=np.uint8)
+    size = int(np.prod(packed["shape"]))
+    return np.unpackbits(bits, count=size).astype(bool).reshape(packed["shape"])
@@ -0,0 +1,307 @@
+"""
+Isosurface - SI threshold boundaries of a stored grid as geometry
+Instead of shipping every grid point, the client gets only the surface
+where a mineral's SI crosses a level (0, or a yellow/red zone boundary):
+  - 3D grids (pH × CoC × temp): triangle mesh by marching tetrahedra
+    (each cell split into 6 tetrahedra along its main diagonal; no case
+    table ambiguities, vertices shared between neighbouring cells)
+  - 2D grids (one axis of length 1): polylines by marching squares
+    (saddle cells resolved with the cell-centre average)
+Cells with any NaN corner (not computed / error / SI not reported) are
+skipped. Vertices are in axis units; mesh faces are oriented so their
+normals point toward higher SI.
+"""
+
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+AXIS_NAMES = ("pH", "CoC", "temp")
+COORD_DECIMALS = 4
+
+
+# ========================================
+# LEVELS
+# ========================================
+
+def zone_level(mineral_name: str, threshold: str) -> float:
+    """
+    "yellow" → green/yellow boundary, "red" → yellow/red boundary
+    (salt_data_table ranges), anything else is parsed as an SI value
+    """
+    from app.utils.salt_data_table import get_salt_threshold
+
+    if threshold in ("yellow", "red"):
+        ranges = get_salt_threshold(mineral_name) or {
+            "green_range": (-0.5, 0.5), "yellow_range": (-1.0, 1.0)
+        }
+        return float(ranges["green_range"][1] if threshold == "yellow" else ranges["yellow_range"][1])
+    try:
+        return float(threshold)
+    except ValueError:
+        raise ValueError("threshold must be a number, 'yellow' or 'red'")
+
+
+# ========================================
+# ENTRY POINT
+# ========================================
+
+def extract_boundary(
+    si: np.ndarray,
+    axes: List[List[float]],
+    level: float
+) -> Dict[str, Any]:
+    """
+    Boundary geometry of si[pH, CoC, temp] at `level`: a mesh when all
+    three axes have more than one value, polylines when exactly two do.
+    """
+    varying = [a for a in range(3) if si.shape[a] > 1]
+
+    if len(varying) == 3:
+        vertices, faces = marching_tetrahedra(si, level)
+        coords = _to_axis_units(vertices, [axes[a] for a in range(3)])
+        return {
+            "type": "mesh",
+            "axes": list(AXIS_NAMES),
+            "vertices": coords.tolist(),
+            "faces": faces.tolist(),
+            "vertex_count": len(coords),
+            "face_count": len(faces)
+        }
+
+    if len(varying) == 2:
+        field = si.reshape([si.shape[a] for a in varying])
+        lines = marching_squares(field, level)
+        plane_axes = [axes[a] for a in varying]
+        return {
+            "type": "polylines",
+            "axes": [AXIS_NAMES[a] for a in varying],
+            "polylines": [_to_axis_units(line, plane_axes).tolist() for line in lines],
+            "polyline_count": len(lines),
+            "vertex_count": int(sum(len(line) for line in lines))
+        }
+
+    raise ValueError("Grid needs at least two axes with more than one value")
+
+
+def _to_axis_units(points: np.ndarray, axes: List[List[float]]) -> np.ndarray:
+    """Fractional lattice indices → axis values (per-axis linear interpolation)"""
+    if not len(points):
+        return np.zeros((0, len(axes)))
+    out = np.column_stack([
+        np.interp(points[:, d], np.arange(len(axes[d])), np.asarray(axes[d], dtype=float))
+        for d in range(len(axes))
+    ])
+    return np.round(out, COORD_DECIMALS)
+
+
+def _edge_points(
+    coords_a: np.ndarray,
+    coords_b: np.ndarray,
+    values_a: np.ndarray,
+    values_b: np.ndarray,
+    level: float
+) -> np.ndarray:
+    """Linear crossing of `level` on segments a → b (fractional indices)"""
+    t = (level - values_a) / (values_b - values_a)
+    return coords_a + np.clip(t, 0.0, 1.0)[:, None] * (coords_b - coords_a)
+
+
+def _dedupe(keys: np.ndarray, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Shared-edge vertices: (unique points, index of each key's vertex)"""
+    unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return points[first], inverse.reshape(keys.shape)
+
+
+# ========================================
+# MARCHING TETRAHEDRA (3D)
+# ========================================
+
+# Cube corners as (di, dj, dk)
+_CUBE = np.array([
+    (0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0),
+    (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)
+])
+
+# Kuhn split: one tetrahedron per axis order from corner 0 to corner 6;
+# face diagonals then match between neighbouring cubes
+_TETS = ((0, 1, 2, 6), (0, 1, 5, 6), (0, 3, 2, 6), (0, 3, 7, 6), (0, 4, 5, 6), (0, 4, 7, 6))
+
+
+def _tet_triangles(inside: Tuple[bool, ...]) -> List[Tuple[Tuple[int, int], ...]]:
+    """Triangles (as tet-local corner pairs) separating inside from outside corners"""
+    ins = [c for c in range(4) if inside[c]]
+    outs = [c for c in range(4) if not inside[c]]
+    if len(ins) in (0, 4):
+        return []
+    if len(ins) == 1:
+        s = ins[0]
+        return [tuple((s, o) for o in outs)]
+    if len(ins) == 3:
+        s = outs[0]
+        return [tuple((i, s) for i in ins)]
+    (p, q), (r, s) = ins, outs
+    return [((p, r), (p, s), (q, s)), ((p, r), (q, s), (q, r))]
+
+
+def _oriented(tet: Tuple[int, ...], case: int) -> List[Tuple[Tuple[int, int], ...]]:
+    """Triangles of one tet case, wound so the normal points toward the inside corners"""
+    inside = tuple(bool(case >> c & 1) for c in range(4))
+    corners = _CUBE[list(tet)].astype(float)
+    toward_inside = (
+        corners[[c for c in range(4) if inside[c]]].mean(axis=0)
+        - corners[[c for c in range(4) if not inside[c]]].mean(axis=0)
+    ) if 0 < sum(inside) < 4 else None
+
+    triangles = []
+    for tri in _tet_triangles(inside):
+        p = [(corners[a] + corners[b]) / 2 for a, b in tri]
+        normal = np.cross(p[1] - p[0], p[2] - p[0])
+        triangles.append(tri if np.dot(normal, toward_inside) >= 0 else (tri[0], tri[2], tri[1]))
+    return triangles
+
+
+_TET_CASES = {(t, case): _oriented(tet, case) for t, tet in enumerate(_TETS) for case in range(16)}
+
+
+def marching_tetrahedra(field: np.ndarray, level: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Isosurface of field[i, j, k] at `level`.
+
+    Returns:
+        (vertices float[N, 3] in fractional indices, faces int[M, 3])
+    """
+    ni, nj, nk = field.shape
+    cells = np.stack(np.meshgrid(
+        np.arange(ni - 1), np.arange(nj - 1), np.arange(nk - 1), indexing="ij"
+    ), axis=-1).reshape(-1, 3)
+
+    keys, points = [], []
+    for t, tet in enumerate(_TETS):
+        corner_idx = cells[:, None, :] + _CUBE[list(tet)][None, :, :]        # [cells, 4, 3]
+        values = field[corner_idx[..., 0], corner_idx[..., 1], corner_idx[..., 2]]
+        usable = ~np.isnan(values).any(axis=1)
+        inside = values >= level
+        case = (inside * (1 << np.arange(4))).sum(axis=1)
+        gid = (corner_idx[..., 0] * nj + corner_idx[..., 1]) * nk + corner_idx[..., 2]
+
+        for c in range(1, 15):
+            rows = np.flatnonzero(usable & (case == c))
+            if not len(rows):
+                continue
+            for tri in _TET_CASES[(t, c)]:
+                tri_keys, tri_points = [], []
+                for a, b in tri:
+                    ga, gb = gid[rows, a], gid[rows, b]
+                    tri_keys.append(np.minimum(ga, gb) * (ni * nj * nk) + np.maximum(ga, gb))
+                    tri_points.append(_edge_points(
+                        corner_idx[rows, a].astype(float), corner_idx[rows, b].astype(float),
+                        values[rows, a], values[rows, b], level
+                    ))
+                keys.append(np.stack(tri_keys, axis=1))
+                points.append(np.stack(tri_points, axis=1))
+
+    if not keys:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=int)
+
+    keys = np.concatenate(keys)                       # [faces, 3]
+    points = np.concatenate(points).reshape(-1, 3)    # [faces * 3, 3]
+    vertices, faces = _dedupe(keys.reshape(-1), points)
+    return vertices, faces.reshape(-1, 3)
+
+
+# ========================================
+# MARCHING SQUARES (2D)
+# ========================================
+
+# Cell corners c0 (0,0), c1 (1,0), c2 (1,1), c3 (0,1); edges
+# e0 c0-c1, e1 c1-c2, e2 c2-c3, e3 c3-c0
+_SQUARE = np.array([(0, 0), (1, 0), (1, 1), (0, 1)])
+_EDGES = ((0, 1), (1, 2), (2, 3), (3, 0))
+_SEGMENTS = {
+    1: [(3, 0)], 2: [(0, 1)], 3: [(3, 1)], 4: [(1, 2)], 6: [(0, 2)], 7: [(3, 2)],
+    8: [(2, 3)], 9: [(0, 2)], 11: [(1, 2)], 12: [(3, 1)], 13: [(0, 1)], 14: [(3, 0)],
+}
+# Saddles: (centre inside, centre outside)
+_SADDLES = {
+    5: ([(0, 1), (2, 3)], [(3, 0), (1, 2)]),
+    10: ([(3, 0), (1, 2)], [(0, 1), (2, 3)]),
+}
+
+
+def marching_squares(field: np.ndarray, level: float) -> List[np.ndarray]:
+    """
+    Contour of field[i, j] at `level` as polylines (float[n, 2] in
+    fractional indices); closed loops repeat their first point.
+    """
+    ni, nj = field.shape
+    cells = np.stack(np.meshgrid(np.arange(ni - 1), np.arange(nj - 1), indexing="ij"), axis=-1).reshape(-1, 2)
+    corner_idx = cells[:, None, :] + _SQUARE[None, :, :]                     # [cells, 4, 2]
+    values = field[corner_idx[..., 0], corner_idx[..., 1]]
+    usable = ~np.isnan(values).any(axis=1)
+    case = ((values >= level) * (1 << np.arange(4))).sum(axis=1)
+    centre_inside = values.mean(axis=1) >= level
+    gid = corner_idx[..., 0] * nj + corner_idx[..., 1]
+
+    groups = [(c, usable & (case == c), segs) for c, segs in _SEGMENTS.items()]
+    for c, (segs_in, segs_out) in _SADDLES.items():
+        groups.append((c, usable & (case == c) & centre_inside, segs_in))
+        groups.append((c, usable & (case == c) & ~centre_inside, segs_out))
+
+    keys, points = [], []
+    for _, mask, segs in groups:
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            continue
+        for seg in segs:
+            seg_keys, seg_points = [], []
+            for e in seg:
+                a, b = _EDGES[e]
+                ga, gb = gid[rows, a], gid[rows, b]
+                seg_keys.append(np.minimum(ga, gb) * (ni * nj) + np.maximum(ga, gb))
+                seg_points.append(_edge_points(
+                    corner_idx[rows, a].astype(float), corner_idx[rows, b].astype(float),
+                    values[rows, a], values[rows, b], level
+                ))
+            keys.append(np.stack(seg_keys, axis=1))
+            points.append(np.stack(seg_points, axis=1))
+
+    if not keys:
+        return []
+
+    keys = np.concatenate(keys)
+    vertices, segments = _dedupe(keys.reshape(-1), np.concatenate(points).reshape(-1, 2))
+    return [vertices[chain] for chain in _chains(segments.reshape(-1, 2), len(vertices))]
+
+
+def _chains(segments: np.ndarray, n_vertices: int) -> List[List[int]]:
+    """Join segments sharing vertices into polylines (each vertex has ≤ 2 neighbours)"""
+    neighbours: List[List[int]] = [[] for _ in range(n_vertices)]
+    for a, b in segments.tolist():
+        if a != b:
+            neighbours[a].append(b)
+            neighbours[b].append(a)
+
+    seen = [False] * n_vertices
+    chains = []
+    # Open chains start at an end point; whatever is left is a closed loop
+    starts = [v for v in range(n_vertices) if len(neighbours[v]) == 1]
+    starts += [v for v in range(n_vertices) if len(neighbours[v]) > 1]
+    for start in starts:
+        if seen[start]:
+            continue
+        chain = [start]
+        seen[start] = True
+        prev, current = None, start
+        while True:
+            nxt = next((v for v in neighbours[current] if v != prev and not seen[v]), None)
+            if nxt is None:
+                if len(chain) > 2 and start in neighbours[current]:
+                    chain.append(start)                      # close the loop
+                break
+            chain.append(nxt)
+            seen[nxt] = True
+            prev, current = current, nxt
+        if len(chain) > 1:
+            chains.append(chain)
+    return chains
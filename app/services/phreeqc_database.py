@@ -0,0 +1,468 @@
+"""
+PHREEQC Database Index
+Parses a PHREEQC database (phreeqc.dat / pitzer.dat) once into:
+  - elements  (SOLUTION_MASTER_SPECIES)
+  - species   (SOLUTION_SPECIES: reaction, log K, delta H, analytic, -gamma)
+  - phases    (PHASES: formula, elements, reaction, log K, delta H, analytic)
+
+The parsed index is written to a versioned JSON cache, invalidated by the
+SHA-256 of the .dat file, so startup loads it in milliseconds instead of
+re-reading multi-megabyte databases. JSON (not pickle) because the cache
+directory is writable: loading it must never execute code.
+
+Used to:
+  - limit SELECTED_OUTPUT -si to phases that can exist in a given water
+  - reject unknown salts_of_interest before any PHREEQC run
+  - serve mineral dropdowns
+  - provide log K(T) to the fast approximate SI engine
+"""
+
+import os
+import re
+import math
+import time
+import json
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Bump when the parsed layout changes → all disk caches are rebuilt
+INDEX_FORMAT_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "PHREEQC_INDEX_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", "phreeqc_index")
+)
+
+# Water param key → element(s) it contributes to the solution
+PARAM_ELEMENTS: Dict[str, Tuple[str, ...]] = {
+    "Ca": ("Ca",), "Mg": ("Mg",), "Na": ("Na",), "K": ("K",),
+    "Cl": ("Cl",), "SO4": ("S",), "HCO3": ("C",), "CO3": ("C",),
+    "SiO2": ("Si",), "Ba": ("Ba",), "Sr": ("Sr",), "Fe": ("Fe",),
+    "Al": ("Al",), "F": ("F",), "PO4": ("P",), "Li": ("Li",),
+    "Zn": ("Zn",), "Cu": ("Cu",), "Sn": ("Sn",),
+}
+
+# Always present in an aqueous solution
+WATER_ELEMENTS: Set[str] = {"H", "O"}
+
+R_KJ = 8.314462618e-3          # kJ / (mol·K)
+T_REF = 298.15                 # K
+
+_KEYWORD_RE = re.compile(r"^[A-Z][A-Z_]+$")
+_ELEMENT_RE = re.compile(r"[A-Z][a-z]?")
+_TERM_SPLIT_RE = re.compile(r"\s+\+\s+")
+_COEFF_RE = re.compile(r"^([0-9]*\.?[0-9]+)\s*(\S+)$")
+_CHARGE_RE = re.compile(r"([+-])(\d*)$")
+
+# path → (mtime, size, index)
+_INDEX_CACHE: Dict[str, Tuple[float, int, "DatabaseIndex"]] = {}
+
+
+# ========================================
+# PARSING HELPERS
+# ========================================
+
+def _strip_comment(line: str) -> str:
+    return line.split("#", 1)[0].rstrip()
+
+
+def _is_keyword(line: str) -> bool:
+    """Data-block keywords start in column 0 and are all-caps (PHASES, END, ...)"""
+    if not line or line[0].isspace():
+        return False
+    token = line.split()[0]
+    return bool(_KEYWORD_RE.match(token))
+
+
+def formula_elements(formula: str) -> List[str]:
+    """Element symbols in a mineral formula: 'CaMg(CO3)2' → ['C', 'Ca', 'Mg', 'O']"""
+    return sorted(set(_ELEMENT_RE.findall(formula)))
+
+
+def species_charge(name: str) -> int:
+    """'Ca+2' → 2, 'HCO3-' → -1, 'CaCO3' → 0"""
+    match = _CHARGE_RE.search(name)
+    if not match:
+        return 0
+    magnitude = int(match.group(2)) if match.group(2) else 1
+    return magnitude if match.group(1) == "+" else -magnitude
+
+
+def _parse_side(side: str) -> List[Tuple[float, str]]:
+    terms = []
+    for term in _TERM_SPLIT_RE.split(side.strip()):
+        term = term.strip()
+        if not term:
+            continue
+        match = _COEFF_RE.match(term)
+        if match:
+            terms.append((float(match.group(1)), match.group(2)))
+        else:
+            terms.append((1.0, term.split()[0]))
+    return terms
+
+
+def parse_reaction(reaction: str) -> Tuple[List[Tuple[float, str]], List[Tuple[float, str]]]:
+    """'CO3-2 + H+ = HCO3-' → ([(1, 'CO3-2'), (1, 'H+')], [(1, 'HCO3-')])"""
+    lhs, rhs = reaction.split("=", 1)
+    return _parse_side(lhs), _parse_side(rhs)
+
+
+def _new_entry(reaction: str) -> Dict[str, Any]:
+    lhs, rhs = parse_reaction(reaction)
+    return {
+        "reaction": reaction,
+        "lhs": lhs,
+        "rhs": rhs,
+        "log_k": 0.0,
+        "delta_h": None,          # kJ/mol
+        "analytic": None,         # [A1..A6]
+    }
+
+
+def _enthalpy_factor(units: str) -> float:
+    """Convert a -delta_h unit to kJ/mol (PHREEQC default is kJ/mol)"""
+    unit = units.lower().split("/")[0]
+    if unit.startswith("kcal"):
+        return 4.184
+    if unit.startswith("cal"):
+        return 4.184e-3
+    if unit.startswith("j"):
+        return 1e-3
+    return 1.0
+
+
+def _apply_option(entry: Dict[str, Any], option: str, values: List[str]) -> None:
+    """Store the thermodynamic options we use; everything else is ignored"""
+    name = option.lstrip("-").lower()
+
+    def _floats(items):
+        out = []
+        for item in items:
+            try:
+                out.append(float(item))
+            except ValueError:
+                break
+        return out
+
+    if name in ("log_k", "logk", "l"):
+        nums = _floats(values)
+        if nums:
+            entry["log_k"] = nums[0]
+    elif name in ("delta_h", "deltah"):
+        nums = _floats(values)
+        if nums:
+            entry["delta_h"] = nums[0] * _enthalpy_factor(values[1] if len(values) > 1 else "kJ")
+    elif name in ("analytic", "analytical_expression", "a_e", "ae", "analytical"):
+        nums = _floats(values)
+        if nums:
+            entry["analytic"] = (nums + [0.0] * 6)[:6]
+    elif name == "gamma":
+        nums = _floats(values)
+        if len(nums) >= 2:
+            entry["gamma"] = (nums[0], nums[1])
+
+
+def parse_database(database_text: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Single pass over a PHREEQC database.
+
+    Returns:
+        {
+          "elements": {"Ca": {"master_species": "Ca+2", "alkalinity": 0.0,
+                              "gfw_formula": "Ca", "gfw": 40.08}, ...},
+          "species":  {"HCO3-": {"reaction", "lhs", "rhs", "log_k", "delta_h",
+                                 "analytic", "gamma", "charge"}, ...},
+          "phases":   {"Calcite": {"formula", "elements", "reaction", "lhs", "rhs",
+                                   "log_k", "delta_h", "analytic"}, ...}
+        }
+    """
+    elements: Dict[str, Dict[str, Any]] = {}
+    species: Dict[str, Dict[str, Any]] = {}
+    phases: Dict[str, Dict[str, Any]] = {}
+
+    block: Optional[str] = None
+    current: Optional[Dict[str, Any]] = None
+    phase_name: Optional[str] = None
+
+    for raw in database_text.splitlines():
+        line = _strip_comment(raw)
+        if not line.strip():
+            continue
+
+        if _is_keyword(line):
+            block = line.split()[0]
+            current, phase_name = None, None
+            continue
+
+        stripped = line.strip()
+        tokens = stripped.split()
+
+        # --- SOLUTION_MASTER_SPECIES: element  master  alk  gfw_formula  [gfw] ---
+        if block == "SOLUTION_MASTER_SPECIES":
+            if len(tokens) >= 4:
+                try:
+                    alkalinity = float(tokens[2])
+                except ValueError:
+                    alkalinity = 0.0
+                gfw = None
+                if len(tokens) >= 5:
+                    try:
+                        gfw = float(tokens[4])
+                    except ValueError:
+                        gfw = None
+                elements[tokens[0]] = {
+                    "master_species": tokens[1],
+                    "alkalinity": alkalinity,
+                    "gfw_formula": tokens[3],
+                    "gfw": gfw,
+                }
+            continue
+
+        # --- SOLUTION_SPECIES: reaction line, then options ---
+        if block == "SOLUTION_SPECIES":
+            if "=" in stripped and not stripped.startswith("-"):
+                entry = _new_entry(stripped)
+                name = entry["rhs"][0][1] if entry["rhs"] else tokens[0]
+                entry["gamma"] = None
+                entry["charge"] = species_charge(name)
+                species[name] = entry
+                current = entry
+            elif current is not None and tokens:
+                _apply_option(current, tokens[0], tokens[1:])
+            continue
+
+        # --- PHASES: name line, reaction line, then options ---
+        if block == "PHASES":
+            if "=" not in stripped and not stripped.startswith("-") and not _looks_like_option(tokens[0]):
+                phase_name, current = tokens[0], None
+            elif "=" in stripped and phase_name and current is None:
+                entry = _new_entry(stripped)
+                formula = entry["lhs"][0][1] if entry["lhs"] else ""
+                entry["formula"] = formula
+                entry["elements"] = formula_elements(formula)
+                phases[phase_name] = entry
+                current = entry
+            elif current is not None and tokens:
+                _apply_option(current, tokens[0], tokens[1:])
+            continue
+
+    return {"elements": elements, "species": species, "phases": phases}
+
+
+def _looks_like_option(token: str) -> bool:
+    """Some databases write options without the leading dash (log_k, delta_h)"""
+    return token.lower() in ("log_k", "logk", "delta_h", "deltah", "analytic", "analytical_expression")
+
+
+def log_k_at(entry: Dict[str, Any], temp_c: float) -> float:
+    """
+    log K at temperature:
+      analytic:   A1 + A2·T + A3/T + A4·log10(T) + A5/T² + A6·T²   (T in K)
+      van't Hoff: log K25 − ΔH/(ln10·R)·(1/T − 1/298.15)
+    """
+    t_k = temp_c + 273.15
+    analytic = entry.get("analytic")
+    if analytic:
+        a1, a2, a3, a4, a5, a6 = analytic
+        return a1 + a2 * t_k + a3 / t_k + a4 * math.log10(t_k) + a5 / t_k ** 2 + a6 * t_k ** 2
+
+    delta_h = entry.get("delta_h")
+    if delta_h:
+        return entry["log_k"] - delta_h / (math.log(10) * R_KJ) * (1.0 / t_k - 1.0 / T_REF)
+    return entry["log_k"]
+
+
+# ========================================
+# DATABASE INDEX
+# ========================================
+
+class DatabaseIndex:
+    """Parsed, cacheable view of one PHREEQC database file"""
+
+    def __init__(
+        self,
+        source_path: str,
+        source_sha256: str,
+        elements: Dict[str, Dict[str, Any]],
+        species: Dict[str, Dict[str, Any]],
+        phases: Dict[str, Dict[str, Any]]
+    ):
+        self.source_path = source_path
+        self.source_sha256 = source_sha256
+        self.elements = elements
+        self.species = species
+        self.phases = phases
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.source_path)
+
+    # ----------------------------------------
+    # BUILD / CACHE
+    # ----------------------------------------
+
+    @classmethod
+    def build(cls, database_path: str) -> "DatabaseIndex":
+        """Parse the .dat file (slow path)"""
+        with open(database_path, "rb") as f:
+            raw = f.read()
+        parsed = parse_database(raw.decode("utf-8", errors="replace"))
+        return cls(
+            database_path,
+            hashlib.sha256(raw).hexdigest(),
+            parsed["elements"], parsed["species"], parsed["phases"]
+        )
+
+    @staticmethod
+    def _cache_path(database_path: str, cache_dir: str) -> str:
+        return os.path.join(cache_dir, f"{os.path.basename(database_path)}.idx.json")
+
+    @classmethod
+    def load(cls, database_path: str, cache_dir: Optional[str] = None) -> "DatabaseIndex":
+        """
+        Load from the JSON cache if its version and source hash match,
+        otherwise parse the database and rewrite the cache.
+        """
+        cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        cache_path = cls._cache_path(database_path, cache_dir)
+        start = time.perf_counter()
+
+        with open(database_path, "rb") as f:
+            source_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if (payload.get("version") == INDEX_FORMAT_VERSION
+                    and payload.get("source_sha256") == source_sha256):
+                index = cls(
+                    database_path, source_sha256,
+                    payload["elements"], payload["species"], payload["phases"]
+                )
+                logger.info(
+                    f"✅ DB index loaded from cache: {index.name} "
+                    f"({len(index.phases)} phases, {(time.perf_counter() - start) * 1000:.1f} ms)"
+                )
+                return index
+            logger.info(f"♻️  DB index cache stale: {os.path.basename(cache_path)}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ DB index cache unreadable ({e}), rebuilding")
+
+        index = cls.build(database_path)
+        index.save(cache_path)
+        logger.info(
+            f"✅ DB index built: {index.name} ({len(index.elements)} elements, "
+            f"{len(index.species)} species, {len(index.phases)} phases, "
+            f"{(time.perf_counter() - start) * 1000:.1f} ms)"
+        )
+        return index
+
+    def save(self, cache_path: str) -> None:
+        """Atomic write of the versioned JSON cache"""
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": INDEX_FORMAT_VERSION,
+                    "source_sha256": self.source_sha256,
+                    "elements": self.elements,
+                    "species": self.species,
+                    "phases": self.phases,
+                }, f, separators=(",", ":"))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write DB index cache {cache_path}: {e}")
+
+    # ----------------------------------------
+    # LOOKUPS
+    # ----------------------------------------
+
+    def phase_names(self) -> List[str]:
+        return sorted(self.phases)
+
+    def phase_log_k(self, phase: str, temp_c: float = 25.0) -> float:
+        return log_k_at(self.phases[phase], temp_c)
+
+    def species_log_k(self, species: str, temp_c: float = 25.0) -> float:
+        return log_k_at(self.species[species], temp_c)
+
+
+# ========================================
+# CACHED ACCESS
+# ========================================
+
+def get_database_index(database_path: str) -> Optional[DatabaseIndex]:
+    """
+    Process-wide DatabaseIndex for a file, re-validated on (mtime, size).
+    Returns None (and logs a warning) if the file cannot be read.
+    """
+    try:
+        stat = os.stat(database_path)
+    except OSError:
+        logger.warning(f"⚠️ PHREEQC database not readable: {database_path}")
+        return None
+
+    cached = _INDEX_CACHE.get(database_path)
+    if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        return cached[2]
+
+    try:
+        index = DatabaseIndex.load(database_path)
+    except Exception as e:
+        logger.error(f"❌ DB index build failed for {database_path}: {e}")
+        return None
+    _INDEX_CACHE[database_path] = (stat.st_mtime, stat.st_size, index)
+    return index
+
+
+def get_phase_index(database_path: str) -> Dict[str, Dict[str, Any]]:
+    """Parsed PHASES of a database ({} if the file cannot be read)"""
+    index = get_database_index(database_path)
+    return index.phases if index else {}
+
+
+def water_elements(water_params: Dict[str, Any]) -> Set[str]:
+    """Elements present in a water (ions with value > 0, plus H and O)"""
+    elements = set(WATER_ELEMENTS)
+    for key, value in water_params.items():
+        if key not in PARAM_ELEMENTS:
+            continue
+        if isinstance(value, dict):
+            value = value.get("value")
+        if isinstance(value, (int, float)) and value > 0:
+            elements.update(PARAM_ELEMENTS[key])
+    return elements
+
+
+def possible_phases(database_path: str, water_params: Dict[str, Any]) -> List[str]:
+    """Phases whose constituent elements are all present in the water"""
+    present = water_elements(water_params)
+    return [
+        name for name, data in get_phase_index(database_path).items()
+        if set(data["elements"]) <= present
+    ]
+
+
+def validate_phases(database_path: str, phase_names: List[str]) -> None:
+    """Raise ValueError for names not defined in the database's PHASES block"""
+    index = get_phase_index(database_path)
+    if not index:
+        logger.warning(
+            f"⚠️ PHASES index unavailable for {os.path.basename(database_path)}; "
+            f"salts_of_interest not validated: {phase_names}"
+        )
+        return
+
+    unknown = [name for name in phase_names if name not in index]
+    if unknown:
+        raise ValueError(
+            f"Unknown salts_of_interest for {os.path.basename(database_path)}: {unknown}"
+        )
@@ -7746,7 +7746,7 @@
 """
 PHREEQC Service - Enhanced
 CHANGES:
-  - SOLUTION_SPREAD batch support
+  - Batched multi-SOLUTION runs (compiled PQITemplate)
   - Enhanced ion balancing (client formula)
   - Ionic strength check → phreeqc.dat vs pitzer.dat
   - 3D grid calculation support
@@ -7754,16 +7754,113 @@ CHANGES:
 """
 
 import os
+import asyncio
 import logging
 import subprocess
 import tempfile
 import re
 import math
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import Dict, Any, List, Optional, Tuple
 
+import numpy as np
+
+from app.services.phreeqc_database import possible_phases
+
 logger = logging.getLogger(__name__)
 
 
+# ========================================
+# PHREEQC PROCESS SLOTS (load shedding)
+# ========================================
+# At most PHREEQC_MAX_WORKERS phreeqc processes run at once; interactive
+# callers pass a queue-wait budget and degrade to the fast engine when no
+# slot frees up in time.
+PHREEQC_MAX_WORKERS     = int(os.getenv("PHREEQC_MAX_WORKERS", str(os.cpu_count() or 4)))
+PHREEQC_QUEUE_BUDGET_MS = float(os.getenv("PHREEQC_QUEUE_BUDGET_MS", "2000"))
+
+
+# Solver options: fast first pass for every point, strict convergence
+# settings only for the solutions that failed. PHREEQC defaults are
+# iterations 100, convergence_tolerance 1e-8, step_size 100, pe_step_size 10:
+# the fast tier gives up sooner on a looser tolerance, the strict tier takes
+# more, smaller and scaled steps.
+FAST_KNOBS   = {"iterations": 40, "convergence_tolerance": 1e-6}
+STRICT_KNOBS = {"iterations": 600, "step_size": 10, "pe_step_size": 2, "diagonal_scale": "true"}
+
+# A PHREEQC error stops the run at the failing solution; the solutions
+# after it are re-batched. Upper bound on those runs per KNOBS tier.
+PHREEQC_SPREAD_MAX_RUNS = int(os.getenv("PHREEQC_SPREAD_MAX_RUNS", "8"))
+
+
+class PHREEQCSaturatedError(RuntimeError):
+    """No PHREEQC slot became free within the caller's queue-wait budget"""
+
+
+_slots: Optional[asyncio.Semaphore] = None
+_slot_stats = {"in_use": 0, "waiting": 0, "shed": 0}
+_slot_held: ContextVar[bool] = ContextVar("phreeqc_slot_held", default=False)
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(PHREEQC_MAX_WORKERS)
+    return _slots
+
+
+@asynccontextmanager
+async def phreeqc_slot(wait_budget_ms: Optional[float] = None):
+    """
+    Hold one PHREEQC slot for the enclosed runs.
+
+    Re-entrant within a task: an analysis that holds a slot (balance
+    iterations + final run) does not queue again for each subprocess.
+    Raises PHREEQCSaturatedError if wait_budget_ms elapses first.
+    """
+    if _slot_held.get():
+        yield
+        return
+
+    slots = _get_slots()
+    budget_s = None if wait_budget_ms is None else wait_budget_ms / 1000.0
+    # Set as soon as acquire() returns, so a timeout or cancellation that
+    # races with the acquisition can never leak the permit
+    acquired = False
+    try:
+        _slot_stats["waiting"] += 1
+        try:
+            async with asyncio.timeout(budget_s):
+                await slots.acquire()
+                acquired = True
+        except TimeoutError:
+            if not acquired:
+                _slot_stats["shed"] += 1
+                raise PHREEQCSaturatedError(
+                    f"PHREEQC saturated: no slot within {wait_budget_ms:.0f} ms "
+                    f"({PHREEQC_MAX_WORKERS} workers busy)"
+                ) from None
+        finally:
+            _slot_stats["waiting"] -= 1
+
+        _slot_stats["in_use"] += 1
+        token = _slot_held.set(True)
+        try:
+            yield
+        finally:
+            _slot_held.reset(token)
+            _slot_stats["in_use"] -= 1
+    finally:
+        if acquired:
+            slots.release()
+
+
+def phreeqc_load() -> Dict[str, Any]:
+    """Current slot usage (for health checks / metrics)"""
+    return {"max_workers": PHREEQC_MAX_WORKERS, **_slot_stats}
+
+
 class PHREEQCService:
     """Enhanced PHREEQC service with batch and ion balancing"""
 
@@ -7792,6 +7889,15 @@ class PHREEQCService:
         "Sn":  {"mw": 118.71, "charge": 2},
     }
 
+    # Param key → PHREEQC SOLUTION element name
+    ION_MAP = {
+        "Ca": "Ca", "Mg": "Mg", "Na": "Na", "K": "K",
+        "Cl": "Cl", "SO4": "SO4", "HCO3": "Alkalinity",
+        "SiO2": "Si", "Ba": "Ba", "Sr": "Sr",
+        "Fe": "Fe", "Al": "Al", "F": "F", "PO4": "P",
+        "Li": "Li", "Zn": "Zn", "Cu": "Cu", "Sn": "Sn"
+    }
+
     # Valid balance ions per client spec
     VALID_CATION_BALANCE = ["Na", "K"]
     VALID_ANION_BALANCE  = ["Cl", "SO4"]
@@ -7973,6 +8079,121 @@ class PHREEQCService:
             f"Final error: {error_pct:.2f}% (tolerance: {tolerance_percent}%)"
         )
 
+    # ========================================
+    # ESTIMATED ION BALANCE (no PHREEQC, load shedding)
+    # ========================================
+    def estimate_ion_balance(
+        self,
+        water_params: Dict[str, Any],
+        cation_ion: str = "Na",
+        anion_ion:  str = "Cl"
+    ) -> Dict[str, Any]:
+        """
+        Stoichiometric charge balance for when no PHREEQC slot is free:
+          meq/L = Σ(mg/L ÷ MW × charge) over ION_PROPERTIES
+          deficit → cation (Na / K), excess → anion (Cl / SO4), as ion_balance()
+        Speciation is ignored, so the water is flagged _balance_estimated.
+        """
+        if cation_ion not in self.VALID_CATION_BALANCE:
+            raise ValueError(f"Invalid cation balance ion: {cation_ion}. Use {self.VALID_CATION_BALANCE}")
+        if anion_ion not in self.VALID_ANION_BALANCE:
+            raise ValueError(f"Invalid anion balance ion: {anion_ion}. Use {self.VALID_ANION_BALANCE}")
+
+        meq = 0.0
+        for ion, props in self.ION_PROPERTIES.items():
+            mg_l = _get_param_value(water_params, ion)
+            if mg_l and mg_l > 0:
+                meq += mg_l / props["mw"] * props["charge"]
+
+        ion     = cation_ion if meq < 0 else anion_ion
+        props   = self.ION_PROPERTIES[ion]
+        current = _get_param_value(water_params, ion) or 0.0
+        balanced = _set_param_value(
+            water_params, ion, current + abs(meq) / abs(props["charge"]) * props["mw"]
+        )
+        balanced["_ion_balanced"]         = True
+        balanced["_balance_iterations"]   = 0
+        balanced["_charge_balance_error"] = 0.0
+        balanced["_balance_estimated"]    = True
+        return balanced
+
+    # ========================================
+    # BATCH ION BALANCING (many samples, one input per iteration)
+    # ========================================
+    async def ion_balance_batch(
+        self,
+        waters: List[Dict[str, Any]],
+        balance_ions: List[Tuple[str, str]],     # (cation, anion) per water
+        max_iterations: int = 2,
+        tolerance_percent: float = 5.0,
+        database: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        ion_balance() for many waters:
+          - each iteration is ONE multi-SOLUTION PHREEQC run
+          - only samples still out of tolerance go into the next iteration
+        Returns balanced waters in input order (with _ion_balanced,
+        _balance_iterations, _charge_balance_error); samples that cannot be
+        balanced come back as {"error": ...} instead of failing the batch.
+        """
+        for cation_ion, anion_ion in balance_ions:
+            if cation_ion not in self.VALID_CATION_BALANCE:
+                raise ValueError(f"Invalid cation balance ion: {cation_ion}. Use {self.VALID_CATION_BALANCE}")
+            if anion_ion not in self.VALID_ANION_BALANCE:
+                raise ValueError(f"Invalid anion balance ion: {anion_ion}. Use {self.VALID_ANION_BALANCE}")
+
+        db = database or self.phreeqc_dat
+        balanced: List[Dict[str, Any]] = [dict(w) for w in waters]
+        error_pct = [0.0] * len(waters)
+        pending = list(range(len(waters)))
+
+        for iteration in range(max_iterations):
+            if not pending:
+                break
+            logger.info(
+                f"⚖️  Batch ion balance iteration {iteration + 1}/{max_iterations}: "
+                f"{len(pending)}/{len(waters)} samples"
+            )
+
+            runs = await self.run_batch_waters([balanced[i] for i in pending], db)
+
+            still_pending = []
+            for i, run in zip(pending, runs):
+                if "error" in run:
+                    balanced[i] = {"error": run["error"]}
+                    continue
+
+                elec_balance = run.get("electrical_balance", 0.0)
+                error_pct[i] = abs(run.get("charge_balance_error_pct", 0.0))
+
+                if error_pct[i] <= tolerance_percent:
+                    balanced[i]["_ion_balanced"]         = True
+                    balanced[i]["_balance_iterations"]   = iteration + 1
+                    balanced[i]["_charge_balance_error"] = error_pct[i]
+                    continue
+
+                # Adjust ion per client formula (see ion_balance)
+                cation_ion, anion_ion = balance_ions[i]
+                ion       = cation_ion if elec_balance < 0 else anion_ion
+                charge    = abs(self.ION_PROPERTIES[ion]["charge"])
+                current   = _get_param_value(balanced[i], ion) or 0.0
+                balanced[i] = _set_param_value(balanced[i], ion, (abs(elec_balance) / charge) + current)
+                still_pending.append(i)
+
+            pending = still_pending
+
+        for i in pending:
+            balanced[i] = {"error": (
+                f"Ion balancing failed after {max_iterations} iterations. "
+                f"Final error: {error_pct[i]:.2f}% (tolerance: {tolerance_percent}%)"
+            )}
+
+        logger.info(
+            f"✅ Batch ion balance: {len(waters) - sum('error' in w for w in balanced)}"
+            f"/{len(waters)} balanced"
+        )
+        return balanced
+
     # ========================================
     # SINGLE PHREEQC RUN
     # ========================================
@@ -7992,36 +8213,316 @@ class PHREEQCService:
         return await self._execute_phreeqc(pqi_content, database)
 
     # ========================================
-    # SOLUTION_SPREAD BATCH (multiple conditions)
+    # BATCH (multiple conditions, one input)
     # ========================================
     async def run_batch_solution_spread(
         self,
         base_water_params: Dict[str, Any],
         grid_points: List[Dict[str, Any]],   # [{"pH":x, "CoC":y, "temp":z}, ...]
-        database: str
+        database: str,
+        phases: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
-        SOLUTION_SPREAD approach:
-          - Write ONE .pqi with SOLUTION_SPREAD block
-          - Each row = one grid point (pH, CoC, Temp)
+        Batched multi-SOLUTION approach:
+          - Compile ONE PQITemplate for the base water
+          - Each grid point = one SOLUTION block (ions × CoC, pH, temp)
           - Single PHREEQC call → all results
-        Falls back to sequential if SOLUTION_SPREAD fails.
+        If `phases` is given, SI is computed only for those phases and read
+        from the SELECTED_OUTPUT file instead of the full .pqo text.
+
+        Convergence: every point is first run with FAST_KNOBS, then only
+        the points that failed are run with STRICT_KNOBS (see _run_spread_tier).
+        "_retries" is 0 for the fast tier and 1 for the strict tier. Points that
+        still fail get "_status": "not_converged". Points the run budget
+        never reached get "_status": "not_attempted".
+        Falls back to sequential if the batch run fails outright; every
+        point of that fallback counts as retried ("_retries": 1).
         """
         if not self._verified:
             raise RuntimeError("PHREEQC executable not found")
 
-        logger.info(f"📦 SOLUTION_SPREAD: {len(grid_points)} points")
+        logger.info(f"📦 Batch SOLUTION run: {len(grid_points)} points")
 
         try:
-            pqi_content = self._build_solution_spread_pqi(base_water_params, grid_points)
-            raw_output  = await self._execute_phreeqc_raw(pqi_content, database)
-            results     = self._parse_spread_output(raw_output, grid_points)
-            logger.info(f"✅ SOLUTION_SPREAD completed: {len(results)} results")
+            first, failed = await self._run_spread_tier(
+                base_water_params, grid_points, list(range(len(grid_points))),
+                database, phases, FAST_KNOBS
+            )
+            results = [first[i] for i in range(len(grid_points))]
+            for result in results:
+                result["_retries"] = 0
+
+            if failed:
+                logger.warning(f"⚠️ {len(failed)} solutions failed → strict KNOBS retry")
+                retried, still_failed = await self._run_spread_tier(
+                    base_water_params, grid_points, failed, database, phases, STRICT_KNOBS
+                )
+                for i in failed:
+                    retried[i]["_retries"] = 1
+                    results[i] = retried[i]
+                for i in still_failed:
+                    if results[i].get("_status") != "not_attempted":
+                        results[i]["_status"] = "not_converged"
+
+            logger.info(f"✅ Batch SOLUTION run completed: {len(results)} results")
             return results
 
         except Exception as e:
-            logger.warning(f"⚠️ SOLUTION_SPREAD failed ({e}), falling back to sequential")
-            return await self._run_sequential_batch(base_water_params, grid_points, database)
+            logger.warning(f"⚠️ Batch SOLUTION run failed ({e}), falling back to sequential")
+            results = await self._run_sequential_batch(base_water_params, grid_points, database)
+            for result in results:
+                result["_retries"] = 1
+            return results
+
+    async def _run_spread_tier(
+        self,
+        base_water_params: Dict[str, Any],
+        grid_points: List[Dict[str, Any]],
+        indices: List[int],
+        database: str,
+        phases: Optional[List[str]],
+        knobs: Dict[str, Any]
+    ) -> tuple[Dict[int, Dict[str, Any]], List[int]]:
+        """
+        Run grid_points[indices] with one set of KNOBS.
+
+        A PHREEQC error stops the run at the failing solution, so only the
+        first failure of a run is a real one. The points after it are
+        re-batched, and nothing already solved is run again. This takes one
+        extra run per real failure. After PHREEQC_SPREAD_MAX_RUNS runs the
+        remaining points are marked "not_attempted".
+
+        Returns:
+            ({index: result}, indices that failed or were not attempted)
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+        failed: List[int] = []
+        pending = list(indices)
+        runs = 0
+
+        while pending and runs < PHREEQC_SPREAD_MAX_RUNS:
+            batch = await self._run_spread_pass(
+                base_water_params, [grid_points[i] for i in pending], database, phases, knobs
+            )
+            runs += 1
+            first_error = next((n for n, r in enumerate(batch) if "error" in r), None)
+            if first_error is None:
+                results.update(zip(pending, batch))
+                pending = []
+                break
+
+            results.update(zip(pending[:first_error], batch[:first_error]))
+            results[pending[first_error]] = batch[first_error]
+            failed.append(pending[first_error])
+
+            # Solutions PHREEQC still finished after the failure are kept
+            tail = []
+            for i, result in zip(pending[first_error + 1:], batch[first_error + 1:]):
+                if "error" in result:
+                    tail.append(i)
+                else:
+                    results[i] = result
+            pending = tail
+
+        for i in pending:
+            point = grid_points[i]
+            results[i] = {
+                "_grid_pH": point["pH"], "_grid_CoC": point["CoC"], "_grid_temp": point["temp"],
+                "error": f"Not attempted: PHREEQC run budget ({PHREEQC_SPREAD_MAX_RUNS}) exhausted",
+                "_status": "not_attempted"
+            }
+        if pending:
+            logger.warning(f"⚠️ {len(pending)} solutions not attempted (run budget exhausted)")
+
+        return results, failed + pending
+
+    async def _run_spread_pass(
+        self,
+        base_water_params: Dict[str, Any],
+        grid_points: List[Dict[str, Any]],
+        database: str,
+        phases: Optional[List[str]],
+        knobs: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        One multi-SOLUTION run with the given KNOBS. A PHREEQC error exit
+        keeps whatever solutions completed; the rest become error entries.
+        """
+        template    = PQITemplate.from_base(base_water_params, phases=phases, knobs=knobs)
+        pqi_content = template.render_grid(grid_points)
+
+        if template.phases:
+            _, selected = await self._execute_phreeqc_selected(pqi_content, database, allow_partial=True)
+            return self._parse_selected_rows(_parse_selected_output(selected), grid_points)
+
+        raw_output = await self._execute_phreeqc_raw(pqi_content, database, allow_partial=True)
+        return self._parse_spread_output(raw_output, grid_points)
+
+    async def run_batch_waters(
+        self,
+        waters: List[Dict[str, Any]],          # already concentrated, pH/Temperature set
+        database: str,
+        phases: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Batched multi-SOLUTION run for arbitrary water dicts (one SOLUTION
+        per water, single PHREEQC call). Results are in input order; waters
+        without output come back as {"error": ...}.
+        Falls back to one run per water if the batch run fails.
+        """
+        if not self._verified:
+            raise RuntimeError("PHREEQC executable not found")
+        if not waters:
+            return []
+
+        try:
+            keys = [
+                k for k in self.ION_MAP
+                if any((_get_param_value(w, k) or 0.0) > 0 for w in waters)
+            ]
+            template    = PQITemplate(keys, phases=phases, pe_per_solution=_any_pe(waters))
+            pqi_content = template.render_solutions(waters)
+
+            if template.phases:
+                _, selected = await self._execute_phreeqc_selected(pqi_content, database)
+                by_soln = {
+                    int(row["soln"]): row for row in _parse_selected_output(selected)
+                    if row.get("state") == "i_soln" and "soln" in row
+                }
+                results = []
+                for i in range(len(waters)):
+                    row = by_soln.get(i + 1)
+                    results.append(
+                        _selected_row_to_result(row) if row else {"error": "No output for solution"}
+                    )
+            else:
+                blocks  = _split_solution_blocks(await self._execute_phreeqc_raw(pqi_content, database))
+                results = [
+                    self._parse_phreeqc_output(blocks[i + 1]) if (i + 1) in blocks
+                    else {"error": "No output for solution"}
+                    for i in range(len(waters))
+                ]
+
+            for result in results:
+                if "error" not in result:
+                    result["database_used"] = os.path.basename(database)
+            return results
+
+        except Exception as e:
+            logger.warning(f"⚠️ Batch waters run failed ({e}), falling back to sequential")
+            results = []
+            for water in waters:
+                try:
+                    result = await self._run_phreeqc_single(water, database)
+                    result["database_used"] = os.path.basename(database)
+                    results.append(result)
+                except Exception as err:
+                    results.append({"error": str(err)})
+            return results
+
+    # ========================================
+    # BATCH CCPP (EQUILIBRIUM_PHASES per grid point)
+    # ========================================
+    CACO3_MG_PER_MOL = 100.09 * 1000.0
+
+    async def run_batch_ccpp(
+        self,
+        base_water_params: Dict[str, Any],
+        grid_points: List[Dict[str, Any]],
+        database: str,
+        phases: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Calcium carbonate precipitation potential for every grid point in
+        one PHREEQC call: each SOLUTION is equilibrated with
+        "EQUILIBRIUM_PHASES Calcite 0 0" and d_Calcite is read from
+        SELECTED_OUTPUT.
+
+        ccpp_mg_l = mg/L CaCO3 that precipitates (0 when undersaturated;
+        the Calcite amount is 0, so nothing can dissolve).
+        SI (initial solution) is reported for `phases` + Calcite.
+        """
+        if not self._verified:
+            raise RuntimeError("PHREEQC executable not found")
+
+        phases = list(dict.fromkeys(["Calcite", *(phases or [])]))
+        template    = PQITemplate.from_base(base_water_params, phases=phases, equilibrium_phases=["Calcite"])
+        pqi_content = template.render_grid(grid_points)
+
+        _, selected = await self._execute_phreeqc_selected(pqi_content, database)
+        rows = _parse_selected_output(selected)
+
+        # react rows follow the i_soln row of the same simulation
+        reacted: Dict[int, Dict[str, Any]] = {}
+        current = None
+        for row in rows:
+            if row.get("state") == "i_soln" and "soln" in row:
+                current = int(row["soln"])
+            elif row.get("state") == "react" and current is not None:
+                reacted[current] = row
+
+        results = self._parse_selected_rows(rows, grid_points)
+        for i, result in enumerate(results):
+            row = reacted.get(i + 1)
+            if "error" in result:
+                continue
+            if row is None or not isinstance(row.get("d_Calcite"), float):
+                result["error"] = "No equilibrium output for solution"
+                continue
+            precipitated = max(row["d_Calcite"], 0.0)
+            result["equilibrium_phases"] = {"Calcite": row["d_Calcite"]}
+            result["ccpp_mg_l"] = round(precipitated * self.CACO3_MG_PER_MOL, 3)
+            result["database_used"] = os.path.basename(database)
+
+        logger.info(f"✅ Batch CCPP run completed: {len(results)} points")
+        return results
+
+    # ========================================
+    # BATCH MIXING (MIX blends of 2-3 source waters)
+    # ========================================
+    async def run_batch_mixing(
+        self,
+        sources: List[Dict[str, Any]],       # balanced source waters
+        fractions: np.ndarray,               # [N blends, len(sources)], rows sum to 1
+        database: str,
+        phases: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        SI of N blends in one PHREEQC call: the sources are defined once
+        (simulation 1), then each blend is a "MIX" simulation read back from
+        its SELECTED_OUTPUT react row. Blends without output are {"error": ...}.
+        """
+        if not self._verified:
+            raise RuntimeError("PHREEQC executable not found")
+        if not phases:
+            raise ValueError("run_batch_mixing requires phases")
+
+        keys = [
+            k for k in self.ION_MAP
+            if any((_get_param_value(w, k) or 0.0) > 0 for w in sources)
+        ]
+        template    = PQITemplate(keys, phases=phases, pe_per_solution=_any_pe(sources))
+        pqi_content = template.render_solutions(sources) + template.render_mixes(fractions, len(sources) + 1)
+
+        _, selected = await self._execute_phreeqc_selected(pqi_content, database)
+
+        # Blend i is simulation i + 2 (simulation 1 defines the sources)
+        by_sim = {
+            int(row["sim"]): row for row in _parse_selected_output(selected)
+            if row.get("state") == "react" and "sim" in row
+        }
+        results = []
+        for i in range(len(fractions)):
+            row = by_sim.get(i + 2)
+            if row is None:
+                results.append({"error": "No output for blend"})
+                continue
+            result = _selected_row_to_result(row)
+            result["database_used"] = os.path.basename(database)
+            results.append(result)
+
+        logger.info(f"✅ Batch MIX run completed: {len(results)} blends")
+        return results
 
     # ========================================
     # SEQUENTIAL FALLBACK
@@ -8080,15 +8581,7 @@ class PHREEQCService:
             lines.append(f"    pe    {pe}")
 
         # Ions (mg/L → mmol/kgw)
-        ion_map = {
-            "Ca": "Ca", "Mg": "Mg", "Na": "Na", "K": "K",
-            "Cl": "Cl", "SO4": "SO4", "HCO3": "Alkalinity",
-            "SiO2": "Si", "Ba": "Ba", "Sr": "Sr",
-            "Fe": "Fe", "Al": "Al", "F": "F", "PO4": "P",
-            "Li": "Li", "Zn": "Zn", "Cu": "Cu", "Sn": "Sn"
-        }
-
-        for param_key, phreeqc_name in ion_map.items():
+        for param_key, phreeqc_name in self.ION_MAP.items():
             value = _get_param_value(water_params, param_key)
             if value is not None and value > 0:
                 props = self.ION_PROPERTIES.get(param_key)
@@ -8107,66 +8600,6 @@ class PHREEQCService:
 
         return "\n".join(lines)
 
-    # ========================================
-    # BUILD SOLUTION_SPREAD .PQI
-    # ========================================
-    def _build_solution_spread_pqi(
-        self,
-        base_params: Dict[str, Any],
-        grid_points: List[Dict[str, Any]]
-    ) -> str:
-        """
-        Build SOLUTION_SPREAD block:
-          SOLUTION 1
-              ...base ions...
-          SOLUTION_SPREAD
-              -spread  pH  CoC  temp
-              row1
-              row2
-              ...
-        """
-        lines = []
-
-        # Base solution
-        lines.append("SOLUTION 1")
-        ph   = _get_param_value(base_params, "pH") or 7.0
-        temp = _get_param_value(base_params, "Temperature") or 25.0
-        lines.append(f"    pH    {ph}")
-        lines.append(f"    temp  {temp}")
-
-        ion_map = {
-            "Ca": "Ca", "Mg": "Mg", "Na": "Na", "K": "K",
-            "Cl": "Cl", "SO4": "SO4", "HCO3": "Alkalinity",
-            "SiO2": "Si", "Ba": "Ba", "Sr": "Sr"
-        }
-        for param_key, phreeqc_name in ion_map.items():
-            value = _get_param_value(base_params, param_key)
-            if value is not None and value > 0:
-                props = self.ION_PROPERTIES.get(param_key)
-                if props and props["mw"] > 0:
-                    mmol = value / props["mw"]
-                    lines.append(f"    {phreeqc_name:12s} {mmol:.6f}  as {param_key}")
-
-        lines.append("")
-
-        # SOLUTION_SPREAD block
-        lines.append("SOLUTION_SPREAD")
-        lines.append("    -spread  pH  temp  # CoC applied by concentrating ions")
-
-        for point in grid_points:
-            lines.append(f"    {point['pH']:.2f}  {point['temp']:.1f}")
-
-        lines.append("")
-        lines.append("SELECTED_OUTPUT")
-        lines.append("    -saturation_indices")
-        lines.append("    -molalities")
-        lines.append("    -charge_balance")
-        lines.append("    -ionic_strength")
-        lines.append("")
-        lines.append("END")
-
-        return "\n".join(lines)
-
     # ========================================
     # EXECUTE PHREEQC (subprocess)
     # ========================================
@@ -8181,11 +8614,13 @@ class PHREEQCService:
 
             # Run PHREEQC
             try:
-                result = subprocess.run(
-                    [self.phreeqc_executable, pqi_path, pqo_path, database],
-                    capture_output=True, text=True,
-                    timeout=30 if os.name != "nt" else 60
-                )
+                async with phreeqc_slot():
+                    result = await asyncio.to_thread(
+                        subprocess.run,
+                        [self.phreeqc_executable, pqi_path, pqo_path, database],
+                        capture_output=True, text=True,
+                        timeout=30 if os.name != "nt" else 60
+                    )
             except subprocess.TimeoutExpired:
                 raise RuntimeError("PHREEQC timed out")
 
@@ -8198,8 +8633,13 @@ class PHREEQCService:
 
             return self._parse_phreeqc_output(output_text)
 
-    async def _execute_phreeqc_raw(self, pqi_content: str, database: str) -> str:
-        """Run PHREEQC and return raw output text"""
+    async def _execute_phreeqc_raw(
+        self, pqi_content: str, database: str, allow_partial: bool = False
+    ) -> str:
+        """
+        Run PHREEQC and return raw output text
+        allow_partial: on a PHREEQC error exit, return the output written so far
+        """
         with tempfile.TemporaryDirectory() as tmpdir:
             pqi_path = os.path.join(tmpdir, "input.pqi")
             pqo_path = os.path.join(tmpdir, "output.pqo")
@@ -8208,20 +8648,65 @@ class PHREEQCService:
                 f.write(pqi_content)
 
             try:
-                result = subprocess.run(
-                    [self.phreeqc_executable, pqi_path, pqo_path, database],
-                    capture_output=True, text=True,
-                    timeout=120 if os.name != "nt" else 180
-                )
+                async with phreeqc_slot():
+                    result = await asyncio.to_thread(
+                        subprocess.run,
+                        [self.phreeqc_executable, pqi_path, pqo_path, database],
+                        capture_output=True, text=True,
+                        timeout=120 if os.name != "nt" else 180
+                    )
             except subprocess.TimeoutExpired:
                 raise RuntimeError("PHREEQC batch timed out")
 
-            if result.returncode != 0:
+            if result.returncode != 0 and not (allow_partial and os.path.isfile(pqo_path)):
                 raise RuntimeError(f"PHREEQC error: {result.stderr}")
 
             with open(pqo_path, "r") as f:
                 return f.read()
 
+    async def _execute_phreeqc_selected(
+        self, pqi_content: str, database: str, allow_partial: bool = False
+    ) -> Tuple[str, str]:
+        """
+        Run PHREEQC in a scratch directory and return (output text, selected output text).
+        The input's SELECTED_OUTPUT -file is relative, so it lands next to the .pqo.
+        allow_partial: on a PHREEQC error exit, return the rows written so far
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pqi_path = os.path.join(tmpdir, "input.pqi")
+            pqo_path = os.path.join(tmpdir, "output.pqo")
+            sel_path = os.path.join(tmpdir, PQITemplate.SELECTED_OUTPUT_FILE)
+
+            with open(pqi_path, "w") as f:
+                f.write(pqi_content)
+
+            try:
+                async with phreeqc_slot():
+                    result = await asyncio.to_thread(
+                        subprocess.run,
+                        [self.phreeqc_executable, pqi_path, pqo_path, database],
+                        capture_output=True, text=True, cwd=tmpdir,
+                        timeout=120 if os.name != "nt" else 180
+                    )
+            except subprocess.TimeoutExpired:
+                raise RuntimeError("PHREEQC batch timed out")
+
+            if result.returncode != 0:
+                if not (allow_partial and os.path.isfile(pqo_path)):
+                    raise RuntimeError(f"PHREEQC error: {result.stderr}")
+                logger.warning(f"⚠️ PHREEQC error exit, keeping partial output: {result.stderr.strip()[:200]}")
+                if not os.path.isfile(sel_path):
+                    with open(pqo_path, "r") as f:
+                        return f.read(), ""
+
+            with open(pqo_path, "r") as f:
+                output_text = f.read()
+
+            if not os.path.isfile(sel_path):
+                raise RuntimeError("PHREEQC produced no selected output")
+            with open(sel_path, "r") as f:
+                return output_text, f.read()
+
     # ========================================
     # PARSE SINGLE OUTPUT
     # ========================================
@@ -8316,7 +8801,7 @@ class PHREEQCService:
         return parsed
 
     # ========================================
-    # PARSE SOLUTION_SPREAD OUTPUT
+    # PARSE MULTI-SOLUTION OUTPUT
     # ========================================
     def _parse_spread_output(
         self,
@@ -8325,23 +8810,58 @@ class PHREEQCService:
     ) -> List[Dict[str, Any]]:
         """
         Parse multi-solution PHREEQC output.
-        Each solution block is separated and mapped back to grid_points.
+        Each "Initial solution N." block is mapped back to grid_points[N-1];
+        points without a block are returned as error entries.
         """
+        blocks = _split_solution_blocks(output_text)
         results = []
 
-        # Split by SOLUTION blocks
-        solution_blocks = re.split(r"(?=SOLUTION\s+\d+)", output_text)
-
-        for i, block in enumerate(solution_blocks):
-            if i >= len(grid_points):
-                break
-            if not block.strip():
+        for i, point in enumerate(grid_points):
+            block = blocks.get(i + 1)
+            if block is None or "ERROR:" in block:
+                results.append({
+                    "_grid_pH": point["pH"], "_grid_CoC": point["CoC"],
+                    "_grid_temp": point["temp"],
+                    "error": "No output for solution" if block is None else "PHREEQC error in solution"
+                })
                 continue
 
             parsed = self._parse_phreeqc_output(block)
-            parsed["_grid_pH"]   = grid_points[i]["pH"]
-            parsed["_grid_CoC"]  = grid_points[i]["CoC"]
-            parsed["_grid_temp"] = grid_points[i]["temp"]
+            parsed["_grid_pH"]   = point["pH"]
+            parsed["_grid_CoC"]  = point["CoC"]
+            parsed["_grid_temp"] = point["temp"]
+            results.append(parsed)
+
+        return results
+
+    def _parse_selected_rows(
+        self,
+        rows: List[Dict[str, Any]],
+        grid_points: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Map SELECTED_OUTPUT rows (initial solutions) back to grid_points by
+        solution number; points without a row are returned as error entries.
+        """
+        by_soln = {
+            int(row["soln"]): row for row in rows
+            if row.get("state") == "i_soln" and "soln" in row
+        }
+        results = []
+
+        for i, point in enumerate(grid_points):
+            row = by_soln.get(i + 1)
+            if row is None:
+                results.append({
+                    "_grid_pH": point["pH"], "_grid_CoC": point["CoC"],
+                    "_grid_temp": point["temp"], "error": "No output for solution"
+                })
+                continue
+
+            parsed = _selected_row_to_result(row)
+            parsed["_grid_pH"]   = point["pH"]
+            parsed["_grid_CoC"]  = point["CoC"]
+            parsed["_grid_temp"] = point["temp"]
             results.append(parsed)
 
         return results
@@ -8354,7 +8874,8 @@ class PHREEQCService:
         water_params: Dict[str, Any],
         calculation_type: str = "standard",
         balance_cation: str = "Na",
-        balance_anion:  str = "Cl"
+        balance_anion:  str = "Cl",
+        wait_budget_ms: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Full single-point analysis:
@@ -8362,6 +8883,9 @@ class PHREEQCService:
           2. Select database
           3. Run PHREEQC
           4. Return parsed results
+
+        wait_budget_ms: max queue wait for a PHREEQC slot; raises
+        PHREEQCSaturatedError when exceeded (None = wait indefinitely)
         """
         # Select database (single-point: use current values as range)
         ph   = _get_param_value(water_params, "pH") or 7.0
@@ -8373,25 +8897,456 @@ class PHREEQCService:
             temp_range=(temp, temp)
         )
 
-        # Ion balance
-        balanced = await self.ion_balance(
-            water_params,
-            cation_ion=balance_cation,
-            anion_ion=balance_anion,
-            database=database
-        )
-
-        # Run final analysis with balanced water
-        result = await self._run_phreeqc_single(balanced, database)
+        async with phreeqc_slot(wait_budget_ms):
+            # Ion balance
+            balanced = await self.ion_balance(
+                water_params,
+                cation_ion=balance_cation,
+                anion_ion=balance_anion,
+                database=database
+            )
+
+            # Run final analysis with balanced water
+            result = await self._run_phreeqc_single(balanced, database)
         result["database_used"] = os.path.basename(database)
 
         return result
 
+    # ========================================
+    # HIGH-LEVEL: MONTE CARLO UNCERTAINTY (single sample)
+    # ========================================
+    MC_PERCENTILES = (5, 25, 50, 75, 95)
+
+    async def monte_carlo(
+        self,
+        water_params: Dict[str, Any],
+        n_samples: int = 500,
+        default_uncertainty: float = 0.05,
+        uncertainties: Optional[Dict[str, float]] = None,
+        balance_cation: str = "Na",
+        balance_anion:  str = "Cl",
+        seed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        SI confidence bands from lab measurement uncertainty:
+          1. Ion balance the water once
+          2. Draw n_samples waters: each ion ~ Normal(value, rel_unc × value), ≥ 0
+             rel_unc = uncertainties[ion] → param "uncertainty" (fraction)
+                       → param "uncertainty_pct" → default_uncertainty
+             (ValueError if any of them is negative or not finite)
+          3. Run all draws as multi-SOLUTION batches (one per PHREEQC worker)
+          4. Percentiles of SI per mineral
+        """
+        if not 1 <= n_samples <= 5000:
+            raise ValueError("monte_carlo samples must be between 1 and 5000")
+        default_uncertainty = _relative_uncertainty("default_uncertainty", default_uncertainty)
+        if uncertainties is not None and not isinstance(uncertainties, dict):
+            raise ValueError("uncertainties must map ions to fractions")
+        uncertainties = {
+            ion: _relative_uncertainty(f"uncertainties[{ion}]", value)
+            for ion, value in (uncertainties or {}).items()
+        }
+
+        ph   = _get_param_value(water_params, "pH") or 7.0
+        temp = _get_param_value(water_params, "Temperature") or 25.0
+        database = self.select_database(
+            water_params, ph_range=(ph, ph), coc_range=(1.0, 1.0), temp_range=(temp, temp)
+        )
+
+        async with phreeqc_slot():
+            balanced = await self.ion_balance(
+                water_params, cation_ion=balance_cation, anion_ion=balance_anion, database=database
+            )
+
+        # Relative uncertainty per ion present in the water
+        ions, values, rel = [], [], []
+        for ion in self.ION_MAP:
+            value = _get_param_value(balanced, ion)
+            if not value or value <= 0:
+                continue
+            raw = balanced.get(ion)
+            stated = None
+            if isinstance(raw, dict):
+                if raw.get("uncertainty") is not None:
+                    stated = _relative_uncertainty(f"{ion} uncertainty", raw["uncertainty"])
+                elif raw.get("uncertainty_pct") is not None:
+                    stated = _relative_uncertainty(f"{ion} uncertainty_pct", raw["uncertainty_pct"]) / 100.0
+            ions.append(ion)
+            values.append(value)
+            rel.append(uncertainties.get(ion, stated if stated is not None else default_uncertainty))
+
+        rng   = np.random.default_rng(seed)
+        base  = np.array(values, dtype=float)
+        draws = np.clip(rng.normal(base, base * np.array(rel), size=(n_samples, len(ions))), 0.0, None)
+
+        waters = []
+        for row in draws.tolist():
+            water = dict(balanced)
+            for ion, value in zip(ions, row):
+                water[ion] = {"value": value, "unit": "mg/L"}
+            waters.append(water)
+
+        # One batched run per PHREEQC worker
+        phases = possible_phases(database, balanced) or None
+        chunk  = max(1, -(-n_samples // PHREEQC_MAX_WORKERS))
+        batches = await asyncio.gather(*[
+            self.run_batch_waters(waters[i:i + chunk], database, phases=phases)
+            for i in range(0, n_samples, chunk)
+        ])
+        results = [r for batch in batches for r in batch]
+
+        si_samples: Dict[str, List[float]] = {}
+        succeeded = 0
+        for result in results:
+            if "error" in result:
+                continue
+            succeeded += 1
+            for si in result.get("saturation_indices", []):
+                si_samples.setdefault(si["mineral_name"], []).append(si["si_value"])
+
+        minerals = {}
+        for mineral, values_si in si_samples.items():
+            arr = np.array(values_si, dtype=float)
+            pct = np.percentile(arr, self.MC_PERCENTILES)
+            minerals[mineral] = {
+                **{f"p{p}": round(float(v), 4) for p, v in zip(self.MC_PERCENTILES, pct)},
+                "mean":                  round(float(arr.mean()), 4),
+                "std":                   round(float(arr.std()), 4),
+                "fraction_supersaturated": round(float((arr > 0).mean()), 4),
+                "n":                     int(arr.size)
+            }
+
+        logger.info(f"🎲 Monte Carlo: {succeeded}/{n_samples} draws, {len(minerals)} minerals")
+        return {
+            "n_samples":     n_samples,
+            "n_succeeded":   succeeded,
+            "uncertainties": dict(zip(ions, rel)),
+            "database_used": os.path.basename(database),
+            "saturation_indices": minerals
+        }
+
+    # ========================================
+    # HIGH-LEVEL: BATCH ANALYSIS (many samples)
+    # ========================================
+    async def analyze_batch(
+        self,
+        waters: List[Dict[str, Any]],
+        balance_ions: List[Tuple[str, str]],
+        max_iterations: int = 2,
+        tolerance_percent: float = 5.0,
+        wait_budget_ms: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        analyze() for N samples at once:
+          1. Select database per sample, group samples by database
+          2. Ion balance each group with ion_balance_batch()
+          3. Run the final speciation of each group as one batch
+        Results are in input order; samples that fail come back as {"error": ...}.
+        """
+        groups: Dict[str, List[int]] = {}
+        for i, water in enumerate(waters):
+            ph   = _get_param_value(water, "pH") or 7.0
+            temp = _get_param_value(water, "Temperature") or 25.0
+            database = self.select_database(
+                water, ph_range=(ph, ph), coc_range=(1.0, 1.0), temp_range=(temp, temp)
+            )
+            groups.setdefault(database, []).append(i)
+
+        results: List[Dict[str, Any]] = [{} for _ in waters]
+
+        async with phreeqc_slot(wait_budget_ms):
+            for database, indices in groups.items():
+                balanced = await self.ion_balance_batch(
+                    [waters[i] for i in indices],
+                    [balance_ions[i] for i in indices],
+                    max_iterations=max_iterations,
+                    tolerance_percent=tolerance_percent,
+                    database=database
+                )
+
+                ok = []
+                for i, water in zip(indices, balanced):
+                    if "error" in water:
+                        results[i] = water
+                    else:
+                        ok.append((i, water))
+
+                # Final speciation for the balanced samples
+                finals = await self.run_batch_waters([water for _, water in ok], database)
+                for (i, _), final in zip(ok, finals):
+                    results[i] = final
+
+        return results
+
+
+# ========================================
+# COMPILED PQI TEMPLATE (batched grids)
+# ========================================
+
+# PHREEQC SOLUTION default when no pe is given
+DEFAULT_PE = 4.0
+
+
+class PQITemplate:
+    """
+    Pre-rendered multi-SOLUTION input for one base water / grid spec.
+
+    Everything that does not change between grid points is resolved once:
+    ion column order, MW lookups, the formatted "Ca   %.6f  as Ca" lines
+    and the shared SELECTED_OUTPUT block. Per-point concentrations are a
+    NumPy matrix (base mmol × CoC) and all N solutions are emitted with a
+    single join.
+    """
+
+    SELECTED_OUTPUT_BLOCK = (
+        "SELECTED_OUTPUT\n"
+        "    -saturation_indices\n"
+        "    -molalities\n"
+        "    -charge_balance\n"
+        "    -ionic_strength\n"
+        "\n"
+        "END\n"
+    )
+
+    SELECTED_OUTPUT_FILE = "selected.sel"
+
+    def __init__(
+        self,
+        ion_keys: List[str],
+        pe: Optional[float] = None,
+        phases: Optional[List[str]] = None,
+        equilibrium_phases: Optional[List[str]] = None,
+        knobs: Optional[Dict[str, Any]] = None,
+        pe_per_solution: bool = False
+    ):
+        props = PHREEQCService.ION_PROPERTIES
+        self.phases = list(phases) if phases else None
+        self.equilibrium_phases = list(equilibrium_phases) if equilibrium_phases else None
+        if self.equilibrium_phases and not self.phases:
+            raise ValueError("equilibrium_phases requires phases (SELECTED_OUTPUT file mode)")
+        self.ion_keys = [
+            k for k in ion_keys
+            if k in PHREEQCService.ION_MAP and props.get(k, {}).get("mw", 0) > 0
+        ]
+        self._mw = np.array([props[k]["mw"] for k in self.ion_keys], dtype=float)
+        self._base_mmol: Optional[np.ndarray] = None
+
+        # pe is either baked in (one value for every solution) or a
+        # per-row column supplied to render_matrix()
+        self.pe_per_solution = pe_per_solution
+        lines = ["SOLUTION %d", "    pH    %.4f", "    temp  %.2f"]
+        if pe_per_solution:
+            lines.append("    pe    %.4f")
+        elif pe is not None:
+            lines.append(f"    pe    {pe}")
+        for key in self.ion_keys:
+            name = PHREEQCService.ION_MAP[key]
+            lines.append(f"    {name:12s} %.6f  as {key}")
+
+        self._solution_fmt = "\n".join(lines) + "\n\n"
+        self._head = ""
+        self._tail = self._build_tail()
+
+        # Batch reactions use the first solution of a simulation, so each
+        # solution gets its own EQUILIBRIUM_PHASES block + END; the
+        # SELECTED_OUTPUT definition moves up front and stays active.
+        if self.equilibrium_phases:
+            self._solution_fmt += (
+                "EQUILIBRIUM_PHASES %d\n"
+                + "".join(f"    {phase:12s} 0 0\n" for phase in self.equilibrium_phases)
+                + "END\n"
+            )
+            self._head = self._tail[:-len("END\n")]
+            self._tail = ""
+
+        if knobs:
+            self._head = (
+                "KNOBS\n"
+                + "".join(f"    -{option:16s} {value}\n" for option, value in knobs.items())
+                + self._head
+            )
+
+    def _build_tail(self) -> str:
+        """SELECTED_OUTPUT (+ PRINT) block shared by all solutions"""
+        if not self.phases:
+            return self.SELECTED_OUTPUT_BLOCK
+
+        return (
+            "SELECTED_OUTPUT\n"
+            f"    -file                {self.SELECTED_OUTPUT_FILE}\n"
+            "    -reset               false\n"
+            "    -simulation          true\n"
+            "    -state               true\n"
+            "    -solution            true\n"
+            "    -pH                  true\n"
+            "    -temperature         true\n"
+            "    -ionic_strength      true\n"
+            "    -charge_balance      true\n"
+            "    -percent_error       true\n"
+            f"    -saturation_indices  {' '.join(self.phases)}\n"
+            + (
+                f"    -equilibrium_phases  {' '.join(self.equilibrium_phases)}\n"
+                if self.equilibrium_phases else ""
+            )
+            + "PRINT\n"
+            "    -saturation_indices  false\n"
+            "    -species             false\n"
+            "\n"
+            "END\n"
+        )
+
+    @classmethod
+    def from_base(
+        cls,
+        base_params: Dict[str, Any],
+        phases: Optional[List[str]] = None,
+        equilibrium_phases: Optional[List[str]] = None,
+        knobs: Optional[Dict[str, Any]] = None
+    ) -> "PQITemplate":
+        """Compile a template for a base water (ions with value > 0)"""
+        keys = [
+            k for k in PHREEQCService.ION_MAP
+            if (_get_param_value(base_params, k) or 0.0) > 0
+        ]
+        template = cls(
+            keys, pe=_get_param_value(base_params, "pe"),
+            phases=phases, equilibrium_phases=equilibrium_phases, knobs=knobs
+        )
+        mg_l = np.array(
+            [_get_param_value(base_params, k) for k in template.ion_keys], dtype=float
+        )
+        template._base_mmol = mg_l / template._mw
+        return template
+
+    def render_grid(self, grid_points: List[Dict[str, Any]]) -> str:
+        """Emit one SOLUTION per grid point: ions × CoC at (pH, temp)"""
+        if self._base_mmol is None:
+            raise ValueError("Template has no base water - use PQITemplate.from_base()")
+
+        ph   = np.fromiter((p["pH"]   for p in grid_points), dtype=float, count=len(grid_points))
+        coc  = np.fromiter((p["CoC"]  for p in grid_points), dtype=float, count=len(grid_points))
+        temp = np.fromiter((p["temp"] for p in grid_points), dtype=float, count=len(grid_points))
+
+        return self.render_matrix(ph, temp, np.outer(coc, self._base_mmol))
+
+    def render_solutions(self, waters: List[Dict[str, Any]]) -> str:
+        """
+        Emit one SOLUTION per (already concentrated) water dict. With
+        pe_per_solution each water keeps its own pe (PHREEQC default 4.0
+        when missing).
+        """
+        mg_l = np.array(
+            [[_get_param_value(w, k) or 0.0 for k in self.ion_keys] for w in waters],
+            dtype=float
+        ).reshape(len(waters), len(self.ion_keys))
+        ph   = np.array([_get_param_value(w, "pH") or 7.0 for w in waters], dtype=float)
+        temp = np.array([_get_param_value(w, "Temperature") or 25.0 for w in waters], dtype=float)
+        pe   = None
+        if self.pe_per_solution:
+            pe = np.array([_get_param_value(w, "pe") for w in waters], dtype=float)
+            pe = np.where(np.isnan(pe), DEFAULT_PE, pe)
+
+        return self.render_matrix(ph, temp, mg_l / self._mw, pe)
+
+    @staticmethod
+    def render_mixes(fractions: np.ndarray, first_number: int) -> str:
+        """
+        One MIX simulation per row of fractions[N, sources] (sources are
+        solutions 1..sources from an earlier simulation). A simulation runs
+        a single batch reaction, so every MIX gets its own END.
+        """
+        blocks = []
+        for offset, row in enumerate(fractions.tolist()):
+            lines = [f"MIX {first_number + offset}"]
+            lines.extend(f"    {source + 1}  {fraction:.6f}" for source, fraction in enumerate(row))
+            blocks.append("\n".join(lines) + "\nEND\n")
+        return "".join(blocks)
+
+    def render_matrix(
+        self,
+        ph: np.ndarray,
+        temp: np.ndarray,
+        mmol: np.ndarray,
+        pe: Optional[np.ndarray] = None
+    ) -> str:
+        """
+        Emit N solutions from vectors ph[N], temp[N] and matrix mmol[N, ions]
+        (plus pe[N] for a pe_per_solution template).
+        Solutions are numbered 1..N in row order.
+        """
+        n = len(ph)
+        numbers = np.arange(1, n + 1)
+        if self.pe_per_solution:
+            if pe is None:
+                raise ValueError("pe_per_solution template needs a pe vector")
+            columns = [numbers, ph, temp, pe, mmol]
+        else:
+            columns = [numbers, ph, temp, mmol]
+        if self.equilibrium_phases:
+            columns.append(numbers)          # EQUILIBRIUM_PHASES n
+        rows = np.column_stack(columns).tolist()
+        fmt = self._solution_fmt
+        return self._head + "".join([fmt % tuple(row) for row in rows]) + self._tail
+
 
 # ========================================
 # MODULE-LEVEL HELPERS
 # ========================================
 
+def _parse_selected_output(selected_text: str) -> List[Dict[str, Any]]:
+    """
+    Parse a tab-separated SELECTED_OUTPUT file into row dicts.
+    Numeric cells become floats; 'state' stays a string.
+    """
+    lines = [l for l in selected_text.splitlines() if l.strip()]
+    if not lines:
+        return []
+
+    header = [h.strip() for h in lines[0].split("\t")]
+    rows = []
+    for line in lines[1:]:
+        row = {}
+        for key, cell in zip(header, line.split("\t")):
+            if not key:
+                continue
+            cell = cell.strip()
+            try:
+                row[key] = float(cell)
+            except ValueError:
+                row[key] = cell
+        rows.append(row)
+    return rows
+
+
+def _selected_row_to_result(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert one SELECTED_OUTPUT row to the _parse_phreeqc_output result shape"""
+    saturation_indices = []
+    for key, value in row.items():
+        if not key.startswith("si_") or not isinstance(value, float):
+            continue
+        if value <= -999:        # phase not computable for this solution
+            continue
+        saturation_indices.append({"mineral_name": key[3:], "si_value": round(value, 4)})
+
+    return {
+        "saturation_indices":       saturation_indices,
+        "ionic_strength":           row.get("mu", 0.0),
+        "electrical_balance":       row.get("charge", 0.0),
+        "charge_balance_error_pct": row.get("pct_err", 0.0),
+        "pH":                       row.get("pH"),
+        "temperature_C":            row.get("temp(C)"),
+        "molalities":               {},
+        "equilibrium_phases":       {},
+        "database_used":            "unknown"
+    }
+
+
+def _split_solution_blocks(output_text: str) -> Dict[int, str]:
+    """Split .pqo text into {solution_number: block} on "Initial solution N." headers"""
+    parts = re.split(r"^Initial solution (\d+)\.", output_text, flags=re.MULTILINE)
+    return {int(parts[i]): parts[i + 1] for i in range(1, len(parts) - 1, 2)}
+
+
 def _get_param_value(params: Dict[str, Any], key: str) -> Optional[float]:
     """Extract numeric value from params dict (handles nested {value, unit})"""
     val = params.get(key)
@@ -8404,12 +9359,28 @@ def _get_param_value(params: Dict[str, Any], key: str) -> Optional[float]:
     return None
 
 
+def _relative_uncertainty(name: str, value: Any) -> float:
+    """Monte Carlo uncertainty as a float; ValueError unless finite and ≥ 0"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"{name} must be a finite, non-negative fraction")
+    return value
+
+
+def _any_pe(waters: List[Dict[str, Any]]) -> bool:
+    """True if any water sets pe (batched inputs then emit pe per solution)"""
+    return any(_get_param_value(w, "pe") is not None for w in waters)
+
+
 def _set_param_value(params: Dict[str, Any], key: str, value: float) -> Dict[str, Any]:
     """Set a param value (preserves nested structure if present)"""
     out = dict(params)
     existing = out.get(key)
     if isinstance(existing, dict):
-        existing["value"] = value
+        out[key] = {**existing, "value": value}
     else:
         out[key] = {"value": value, "unit": "mg/L"}
     return out
@@ -8418,7 +9389,7 @@ def _set_param_value(params: Dict[str, Any], key: str, value: float) -> Dict[str
 def _concentrate_params(params: Dict[str, Any], coc: float) -> Dict[str, Any]:
     """Multiply all ion concentrations by CoC (skip pH, Temperature, pe)"""
     skip = {"pH", "Temperature", "pe", "Eh", "_ion_balanced",
-            "_balance_iterations", "_charge_balance_error"}
+            "_balance_iterations", "_charge_balance_error", "_balance_estimated"}
     out = {}
     for k, v in params.items():
         if k in skip:
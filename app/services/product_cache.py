@@ -0,0 +1,96 @@
+"""
+Product Cache - In-memory product / formulation cache
+Sits in front of the `products` collection for Where Can I Treat:
+  - One `$in` query for all products not cached yet
+  - TTL-bounded entries (PRODUCT_CACHE_TTL_SECONDS, default 300)
+  - Active-component map per ppm of product precomputed per entry
+  - Invalidated by Database.update_product()
+"""
+
+import os
+import time
+from typing import Dict, Any, List, Optional
+
+from app.db.mongo import db
+
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "300"))
+
+
+class ProductCache:
+    """TTL map: product_id → {"product", "formulation", "actives_per_ppm"}"""
+
+    def __init__(self, ttl_seconds: float = PRODUCT_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._stats = {"hits": 0, "misses": 0, "queries": 0, "invalidations": 0}
+
+    async def get_many(self, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Cached entries for product_ids; unknown products are simply absent.
+        All misses are loaded with a single $in query.
+        """
+        now = time.monotonic()
+        found = {}
+        missing = []
+
+        for product_id in dict.fromkeys(product_ids):
+            entry = self._entries.get(product_id)
+            if entry and entry["expires_at"] > now:
+                found[product_id] = entry
+                self._stats["hits"] += 1
+            else:
+                missing.append(product_id)
+                self._stats["misses"] += 1
+
+        if missing:
+            cursor = db.db.products.find({"product_id": {"$in": missing}})
+            products = await cursor.to_list(length=len(missing))
+            self._stats["queries"] += 1
+
+            for product in products:
+                entry = _build_entry(product, now + self.ttl_seconds)
+                self._entries[product["product_id"]] = entry
+                found[product["product_id"]] = entry
+
+        return found
+
+    async def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        return (await self.get_many([product_id])).get(product_id)
+
+    def invalidate(self, product_id: Optional[str] = None) -> None:
+        """Drop one product (or everything when product_id is None)"""
+        if product_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(product_id, None)
+        self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "ttl_seconds": self.ttl_seconds, **self._stats}
+
+
+def _build_entry(product: Dict[str, Any], expires_at: float) -> Dict[str, Any]:
+    formulation = product.get("formulation", {}) or {}
+    return {
+        "product": product,
+        "formulation": formulation,
+        # Active PPM = Product PPM × (Active % / 100), per 1 ppm of product.
+        # Same formula as ChemicalDosageService.calculate_active_component_dosage,
+        # kept unrounded: that helper rounds each result to 0.001 ppm, which at
+        # 1 ppm of product would drop low-percent actives, and auto dosage
+        # needs the map to stay exactly linear in dosage while it bisects.
+        "actives_per_ppm": {
+            component: float(active_percent) / 100.0
+            for component, active_percent in formulation.items()
+        },
+        "expires_at": expires_at,
+    }
+
+
+def active_components(entry: Dict[str, Any], dosage_ppm: float) -> Dict[str, float]:
+    """Active component ppm for a product dosage"""
+    return {c: per_ppm * dosage_ppm for c, per_ppm in entry["actives_per_ppm"].items()}
+
+
+# Global product cache instance
+product_cache = ProductCache()
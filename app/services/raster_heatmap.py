@@ -0,0 +1,163 @@
+"""
+Raster Heatmap - Matplotlib-free SI heatmaps (NumPy + Pillow)
+Renders the same picture as GraphService.generate_multi_salt_heatmap's
+imshow panels for a fraction of the cost:
+  - SI → colour through the RdYlGn_r BoundaryNorm bins
+    ([-2, -0.5, 0, 0.5, 1, 3]) as a single lookup
+  - nearest-neighbour scaling to the plot size
+  - Pillow for text (titles, axis ticks and labels) and PNG encoding
+Used for renderer=fast and for list-view thumbnails (no text at all).
+"""
+
+import io
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+SI_BOUNDS = np.array([-2.0, -0.5, 0.0, 0.5, 1.0, 3.0])
+
+# ColorBrewer RdYlGn (11 classes), the anchors of matplotlib's RdYlGn
+_RDYLGN = np.array([
+    (0xa5, 0x00, 0x26), (0xd7, 0x30, 0x27), (0xf4, 0x6d, 0x43), (0xfd, 0xae, 0x61),
+    (0xfe, 0xe0, 0x8b), (0xff, 0xff, 0xbf), (0xd9, 0xef, 0x8b), (0xa6, 0xd9, 0x6a),
+    (0x66, 0xbd, 0x63), (0x1a, 0x98, 0x50), (0x00, 0x68, 0x37)
+], dtype=float)
+
+
+def _rdylgn_r(index: int, n: int = 256) -> np.ndarray:
+    """Colour `index` of the n-entry RdYlGn_r lookup table"""
+    x = 1.0 - index / (n - 1)
+    anchors = np.linspace(0.0, 1.0, len(_RDYLGN))
+    return np.array([np.interp(x, anchors, _RDYLGN[:, c]) for c in range(3)])
+
+
+# BoundaryNorm(SI_BOUNDS, 256) spreads its 5 bins over the colormap:
+# bin i → entry int(i * 255 / 4); below/above the bounds → first/last entry
+_n_bins = len(SI_BOUNDS) - 1
+ZONE_RGB = np.array(
+    [_rdylgn_r(int(i * 255 / (_n_bins - 1))) for i in range(_n_bins)]
+    + [(255, 255, 255)],                      # NaN / no data
+    dtype=float
+).round().astype(np.uint8)
+NO_DATA = _n_bins
+
+BACKGROUND = (255, 255, 255)
+INK = (34, 34, 34)
+AXIS = (120, 120, 120)
+
+PANEL_PLOT_SIZE = (360, 300)      # plot area per panel (px)
+MARGIN_LEFT, MARGIN_BOTTOM, MARGIN_TOP, MARGIN_RIGHT = 56, 44, 28, 16
+
+
+def si_bins(z: np.ndarray) -> np.ndarray:
+    """SI matrix → colour bin index per cell (NO_DATA for NaN)"""
+    bins = np.clip(np.searchsorted(SI_BOUNDS, z, side="right") - 1, 0, _n_bins - 1)
+    return np.where(np.isnan(z), NO_DATA, bins)
+
+
+def raster(z: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    RGB uint8[height, width, 3] of an SI matrix z[y][x] (origin lower,
+    like imshow(origin="lower")), scaled nearest-neighbour.
+    """
+    ny, nx = z.shape
+    rows = (np.arange(height)[::-1] * ny) // height
+    cols = (np.arange(width) * nx) // width
+    return ZONE_RGB[si_bins(z)[np.ix_(rows, cols)]]
+
+
+def _as_matrix(z_rows: List[List[Optional[float]]]) -> np.ndarray:
+    if not z_rows:
+        return np.empty((0, 0))
+    return np.array(
+        [[np.nan if v is None else v for v in row] for row in z_rows], dtype=float
+    ).reshape(len(z_rows), -1)
+
+
+def _ticks(lo: float, hi: float, n: int = 5) -> List[float]:
+    return [lo] if hi == lo else list(np.linspace(lo, hi, n))
+
+
+def _draw_panel(
+    canvas: Image.Image,
+    origin: tuple,
+    graph_data: Dict[str, Any],
+    x_label: str,
+    y_label: str,
+    font: ImageFont.ImageFont
+) -> None:
+    plot_w, plot_h = PANEL_PLOT_SIZE
+    left, top = origin[0] + MARGIN_LEFT, origin[1] + MARGIN_TOP
+    draw = ImageDraw.Draw(canvas)
+
+    z = _as_matrix(graph_data["z"])
+    if z.size:
+        canvas.paste(Image.fromarray(raster(z, plot_w, plot_h)), (left, top))
+    draw.rectangle((left - 1, top - 1, left + plot_w, top + plot_h), outline=AXIS)
+
+    title = graph_data.get("salt_name", "")
+    draw.text((left + plot_w // 2 - draw.textlength(title, font=font) // 2, origin[1] + 8), title, fill=INK, font=font)
+
+    # Ticks over the data extent (as imshow extent=[min, max, min, max])
+    x_vals, y_vals = graph_data["x"], graph_data["y"]
+    if x_vals:
+        x_lo, x_hi = min(x_vals), max(x_vals)
+        for value in _ticks(x_lo, x_hi):
+            px = left + (0 if x_hi == x_lo else round((value - x_lo) / (x_hi - x_lo) * (plot_w - 1)))
+            draw.line((px, top + plot_h, px, top + plot_h + 4), fill=AXIS)
+            label = f"{value:.3g}"
+            draw.text((px - draw.textlength(label, font=font) // 2, top + plot_h + 6), label, fill=INK, font=font)
+    if y_vals:
+        y_lo, y_hi = min(y_vals), max(y_vals)
+        for value in _ticks(y_lo, y_hi):
+            py = top + plot_h - 1 - (0 if y_hi == y_lo else round((value - y_lo) / (y_hi - y_lo) * (plot_h - 1)))
+            draw.line((left - 5, py, left - 1, py), fill=AXIS)
+            label = f"{value:.3g}"
+            draw.text((left - 8 - draw.textlength(label, font=font), py - 5), label, fill=INK, font=font)
+
+    draw.text(
+        (left + plot_w // 2 - draw.textlength(x_label, font=font) // 2, top + plot_h + 24),
+        x_label, fill=INK, font=font
+    )
+    draw.text((origin[0] + 4, top - 16), y_label, fill=INK, font=font)
+
+
+def _encode(image: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", compress_level=3)
+    return buf.getvalue()
+
+
+def render_panels(
+    panels: List[Dict[str, Any]],
+    x_label: str,
+    y_label: str,
+    max_cols: int = 3
+) -> bytes:
+    """
+    PNG of side-by-side heatmap panels; each panel is a
+    prepare_3d_graph_data() dict (x, y, z, salt_name).
+    """
+    if not panels:
+        raise ValueError("No salts provided")
+
+    cols = min(len(panels), max_cols)
+    rows = (len(panels) + cols - 1) // cols
+    panel_w = MARGIN_LEFT + PANEL_PLOT_SIZE[0] + MARGIN_RIGHT
+    panel_h = MARGIN_TOP + PANEL_PLOT_SIZE[1] + MARGIN_BOTTOM
+
+    canvas = Image.new("RGB", (cols * panel_w, rows * panel_h), BACKGROUND)
+    font = ImageFont.load_default()
+    for idx, graph_data in enumerate(panels):
+        origin = ((idx % cols) * panel_w, (idx // cols) * panel_h)
+        _draw_panel(canvas, origin, graph_data, x_label, y_label, font)
+    return _encode(canvas)
+
+
+def render_thumbnail(graph_data: Dict[str, Any], size: int = 96) -> bytes:
+    """Square PNG of the zone colours only (list views)"""
+    z = _as_matrix(graph_data["z"])
+    if not z.size:
+        return _encode(Image.new("RGB", (size, size), BACKGROUND))
+    return _encode(Image.fromarray(raster(z, size, size)))
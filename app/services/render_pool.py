@@ -0,0 +1,137 @@
+"""
+Render Pool - Matplotlib rendering off the event loop
+GraphService PNG renders are CPU-bound and hold the GIL, so routes await
+them here instead of calling them inline:
+  - Process pool (RENDER_POOL_WORKERS, default 2; 0 = worker thread)
+  - Workers import matplotlib (Agg, mplot3d) once at start-up and reuse
+    their figures between renders (graph_service.enable_figure_reuse)
+  - Per-method timing: render time measured in the worker, queue wait
+    as the remainder of the caller's wall time
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional
+
+from app.services.graph_service import GraphService, enable_figure_reuse
+
+logger = logging.getLogger(__name__)
+
+RENDER_POOL_WORKERS = max(0, int(os.getenv("RENDER_POOL_WORKERS", "2")))
+
+# GraphService methods that may be sent to the pool
+RENDER_METHODS = (
+    "generate_si_bar_chart",
+    "generate_3d_surface_png",
+    "render_3d_surface_png",
+    "generate_multi_salt_heatmap",
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_metrics: Dict[str, Dict[str, float]] = {}
+
+
+# ========================================
+# WORKER PROCESS
+# ========================================
+
+def init_worker() -> None:
+    """Pre-import matplotlib and switch GraphService to reusable figures"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+    # Side effect only: registers the "3d" projection used by the surface renders
+    from mpl_toolkits.mplot3d import Axes3D  # noqa: F401
+    enable_figure_reuse()
+
+
+def render_in_worker(method: str, args: tuple, kwargs: Dict[str, Any]) -> tuple:
+    """(result, render_ms) of one GraphService render"""
+    started = time.perf_counter()
+    result = getattr(GraphService(), method)(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=RENDER_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker
+        )
+        logger.info(f"✅ Render pool started ({RENDER_POOL_WORKERS} workers)")
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# ========================================
+# API
+# ========================================
+
+async def render(method: str, *args, **kwargs) -> Any:
+    """
+    Run GraphService().<method>(*args, **kwargs) in the render pool.
+    Arguments and result must be picklable (dicts, lists, ColumnarGrid).
+    """
+    global _pool
+    if method not in RENDER_METHODS:
+        raise ValueError(f"Not a render method: {method}")
+
+    started = time.perf_counter()
+    metrics = _metrics.setdefault(method, {
+        "renders": 0, "errors": 0, "render_ms_total": 0.0, "render_ms_max": 0.0, "wait_ms_total": 0.0
+    })
+
+    try:
+        if RENDER_POOL_WORKERS == 0:
+            result, render_ms = await asyncio.to_thread(render_in_worker, method, args, kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                result, render_ms = await loop.run_in_executor(
+                    _get_pool(), render_in_worker, method, args, kwargs
+                )
+            except BrokenProcessPool:
+                logger.warning("⚠️ Render pool broken, restarting")
+                _pool = None
+                result, render_ms = await loop.run_in_executor(
+                    _get_pool(), render_in_worker, method, args, kwargs
+                )
+    except Exception:
+        metrics["errors"] += 1
+        raise
+
+    wall_ms = (time.perf_counter() - started) * 1000
+    metrics["renders"] += 1
+    metrics["render_ms_total"] += render_ms
+    metrics["render_ms_max"] = max(metrics["render_ms_max"], render_ms)
+    metrics["wait_ms_total"] += max(wall_ms - render_ms, 0.0)
+    logger.info(f"🖼️ {method}: {render_ms:.0f} ms render, {wall_ms - render_ms:.0f} ms queue/transfer")
+    return result
+
+
+def render_stats() -> Dict[str, Any]:
+    """Pool size + per-method render timings (for health checks / metrics)"""
+    methods = {}
+    for method, m in _metrics.items():
+        n = m["renders"] or 1
+        methods[method] = {
+            "renders": int(m["renders"]),
+            "errors": int(m["errors"]),
+            "avg_render_ms": round(m["render_ms_total"] / n, 1),
+            "max_render_ms": round(m["render_ms_max"], 1),
+            "avg_wait_ms": round(m["wait_ms_total"] / n, 1)
+        }
+    return {"workers": RENDER_POOL_WORKERS, "methods": methods}
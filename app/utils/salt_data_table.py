@@ -5,7 +5,9 @@ Used in "Where Can I Treat" analysis to determine green/yellow/red zones
 """
 
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -335,6 +337,104 @@ def classify_si_value(mineral_name: str, si_value: float) -> str:
         return "red"
 
 
+def classify_si_array(mineral_name: str, si_values: Any) -> np.ndarray:
+    """
+    classify_si_value() over an array of SI values (one threshold lookup)
+    
+    Returns:
+        Array of the same shape: "green", "yellow", "red" ("unknown" for NaN)
+    """
+    si = np.asarray(si_values, dtype=float)
+    threshold = get_salt_threshold(mineral_name)
+    
+    if threshold:
+        green_range = threshold["green_range"]
+        yellow_range = threshold["yellow_range"]
+    else:
+        # Default classification
+        green_range, yellow_range = (-0.5, 0.5), (-1.0, 1.0)
+    
+    zones = np.where(
+        (si >= green_range[0]) & (si <= green_range[1]), "green",
+        np.where((si >= yellow_range[0]) & (si <= yellow_range[1]), "yellow", "red")
+    )
+    return np.where(np.isnan(si), "unknown", zones)
+
+
+# ========================================
+# SCALE INHIBITOR SI CREDIT
+# ========================================
+# Threshold inhibitors (phosphonates, polymers) do not change a water's SI;
+# they let it carry more supersaturation before scale forms. Where Can I
+# Treat models this as an SI credit added to the top of a salt's green range:
+#   credit(ppm active) = max_credit × ppm / (ppm + half_ppm)
+# Saturating and monotone in dosage, so dosage searches stay bisectable.
+# Defaults are conservative engineering values; tune per product line.
+
+INHIBITOR_SI_CREDIT: Dict[str, Dict[str, Tuple[float, float]]] = {
+    # inhibitor class: {mineral: (max_credit, half_ppm)}
+    "phosphonate": {
+        "Calcite":   (1.2, 2.0),
+        "Aragonite": (1.2, 2.0),
+        "Gypsum":    (0.6, 3.0),
+        "Anhydrite": (0.6, 3.0),
+        "Barite":    (1.0, 1.5),
+        "Celestite": (0.8, 2.0),
+    },
+    "polymer": {
+        "Calcite":              (0.5, 4.0),
+        "Aragonite":            (0.5, 4.0),
+        "Gypsum":               (0.8, 3.0),
+        "Anhydrite":            (0.8, 3.0),
+        "Barite":               (0.6, 3.0),
+        "SiO2(a)":              (0.3, 10.0),
+        "Hydroxyapatite":       (2.0, 5.0),
+        "Tricalcium-phosphate": (2.0, 5.0),
+    },
+}
+
+# Formulation component name (lower case) → inhibitor class
+INHIBITOR_ALIASES: Dict[str, str] = {
+    "phosphonate": "phosphonate", "hedp": "phosphonate", "pbtc": "phosphonate",
+    "atmp": "phosphonate", "dtpmp": "phosphonate",
+    "polymer": "polymer", "copolymer": "polymer", "pma": "polymer", "paa": "polymer",
+    "polyacrylate": "polymer", "aa/amps": "polymer", "hpa": "polymer",
+}
+
+
+def inhibitor_class(component: str) -> Optional[str]:
+    """Inhibitor class for a formulation component name (None if not an inhibitor)"""
+    return INHIBITOR_ALIASES.get(component.strip().lower())
+
+
+def inhibitor_si_credit(actives_ppm: Dict[str, float], minerals: List[str]) -> Dict[str, float]:
+    """
+    SI credit per mineral for inhibitor actives at the given ppm
+    
+    Credits of several actives add up, capped at the largest max_credit
+    among them for that mineral. Actives that are not inhibitors and
+    minerals without credit data contribute nothing.
+    
+    Returns:
+        {mineral: credit} (0.0 for every mineral without credit)
+    """
+    credit = {mineral: 0.0 for mineral in minerals}
+    cap = {mineral: 0.0 for mineral in minerals}
+    
+    for component, ppm in actives_ppm.items():
+        table = INHIBITOR_SI_CREDIT.get(inhibitor_class(component) or "")
+        if not table or ppm <= 0:
+            continue
+        for mineral in minerals:
+            if mineral not in table:
+                continue
+            max_credit, half_ppm = table[mineral]
+            credit[mineral] += max_credit * ppm / (ppm + half_ppm)
+            cap[mineral] = max(cap[mineral], max_credit)
+    
+    return {mineral: min(credit[mineral], cap[mineral]) for mineral in minerals}
+
+
 def get_all_minerals() -> list:
     """Get list of all minerals with thresholds defined"""
     return list(SALT_THRESHOLDS.keys())
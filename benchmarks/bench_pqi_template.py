@@ -0,0 +1,81 @@
+"""
+Benchmark: PQI input generation for large grids
+
+Compares the per-point builder (_build_pqi, one SOLUTION text per point)
+against the compiled PQITemplate (one template, NumPy scaling, one join).
+
+Run from the repo root:
+    python -m benchmarks.bench_pqi_template
+"""
+
+import time
+from itertools import product
+
+import numpy as np
+
+from app.services.phreeqc_service import (
+    PHREEQCService, PQITemplate, _concentrate_params, _set_ph_temp
+)
+
+
+BASE_WATER = {
+    "Ca":   {"value": 80.0,  "unit": "mg/L"},
+    "Mg":   {"value": 24.0,  "unit": "mg/L"},
+    "Na":   {"value": 46.0,  "unit": "mg/L"},
+    "K":    {"value": 3.9,   "unit": "mg/L"},
+    "Cl":   {"value": 71.0,  "unit": "mg/L"},
+    "SO4":  {"value": 96.0,  "unit": "mg/L"},
+    "HCO3": {"value": 183.0, "unit": "mg/L"},
+    "SiO2": {"value": 12.0,  "unit": "mg/L"},
+    "Sr":   {"value": 0.4,   "unit": "mg/L"},
+    "Ba":   {"value": 0.05,  "unit": "mg/L"},
+}
+
+
+def _grid(steps: int):
+    return [
+        {"pH": ph, "CoC": coc, "temp": temp}
+        for ph, coc, temp in product(
+            np.linspace(6.5, 9.0, steps).tolist(),
+            np.linspace(1.0, 8.0, steps).tolist(),
+            np.linspace(15.0, 50.0, steps).tolist(),
+        )
+    ]
+
+
+def bench_per_point(service: PHREEQCService, grid):
+    start = time.perf_counter()
+    texts = []
+    for point in grid:
+        params = _concentrate_params(BASE_WATER, point["CoC"])
+        params = _set_ph_temp(params, point["pH"], point["temp"])
+        texts.append(service._build_pqi(params))
+    return time.perf_counter() - start, sum(len(t) for t in texts)
+
+
+def bench_template(grid):
+    start = time.perf_counter()
+    template = PQITemplate.from_base(BASE_WATER)
+    text = template.render_grid(grid)
+    return time.perf_counter() - start, len(text)
+
+
+def main():
+    service = PHREEQCService.__new__(PHREEQCService)   # no executable check needed
+
+    for steps in (10, 20, 30):
+        grid = _grid(steps)
+        n = len(grid)
+
+        t_old, size_old = bench_per_point(service, grid)
+        t_new, size_new = bench_template(grid)
+
+        print(
+            f"{n:>6} points | per-point: {t_old * 1e6 / n:8.2f} µs/pt ({size_old / 1024:8.0f} KiB) "
+            f"| template: {t_new * 1e6 / n:6.2f} µs/pt ({size_new / 1024:8.0f} KiB) "
+            f"| x{t_old / t_new:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -16,8 +16,16 @@ load_dotenv(override=True)
 # Import database
 from app.db.mongo import db
 
+# Import services
+from app.services.phreeqc_service import PHREEQCService, phreeqc_load
+from app.services.phreeqc_database import get_database_index
+from app.services.grid_cache import grid_cache
+from app.services.graph_prerender import shutdown_pool as shutdown_prerender_pool
+from app.services.render_pool import render_stats, shutdown_pool as shutdown_render_pool
+
 # Import routes
 from app.controllers.water_routes import router as water_router
+from app.controllers.analysis_routes import router as analysis_router
 
 # Configure logging
 logging.basicConfig(
@@ -39,6 +47,10 @@ async def lifespan(app: FastAPI):
         logger.info("✅ Database connected")
         
         # Initialize services
+        # Warm the parsed PHREEQC database indexes (JSON cache → ms)
+        phreeqc = PHREEQCService()
+        for database_path in (phreeqc.phreeqc_dat, phreeqc.pitzer_dat):
+            get_database_index(database_path)
         logger.info("✅ Services initialized")
         
     except Exception as e:
@@ -49,6 +61,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Shutting down...")
+    shutdown_prerender_pool()
+    shutdown_render_pool()
     await db.disconnect()
     logger.info("✅ Shutdown complete")
 
@@ -99,12 +113,18 @@ async def health_check():
         "database": db_status,
         "openai_configured": bool(os.getenv("OPENAI_API_KEY")),
         "aws_configured": bool(os.getenv("AWS_ACCESS_KEY_ID")),
-        "phreeqc_configured": bool(os.getenv("PHREEQC_EXECUTABLE_PATH"))
+        "phreeqc_configured": bool(os.getenv("PHREEQC_EXECUTABLE_PATH")),
+        "phreeqc_slots": phreeqc_load(),
+        "grid_cache": grid_cache.stats(),
+        "render_pool": render_stats()
     }
 
 
 # Include routers
 app.include_router(water_router, prefix="/api/v1", tags=["Water Analysis"])
+# After water_router: its fixed /analysis/... paths (history, 3d-graph,
+# heatmaps) must match before GET /analysis/{analysis_id}
+app.include_router(analysis_router, prefix="/api/v1", tags=["Analysis"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+"""
+Auto dosage search: actives split, inhibitor SI credit, feasibility
+predicate and bisection
+"""
+
+import pytest
+
+from app.services.analysis_engine import (
+    _below_green_limit, _bisect_min_feasible, _drive_searches, _split_actives
+)
+from app.utils.salt_data_table import (
+    INHIBITOR_SI_CREDIT, get_salt_threshold, inhibitor_si_credit
+)
+
+
+def _result(**si):
+    return {"saturation_indices": [{"mineral_name": m, "si_value": v} for m, v in si.items()]}
+
+
+def test_split_actives():
+    ions, inhibitors, unmodelled = _split_actives({"Zn": 0.05, "HEDP": 0.1, "Dye": 0.01})
+
+    assert ions == {"Zn": 0.05}
+    assert inhibitors == {"HEDP": 0.1}
+    assert unmodelled == ["Dye"]
+
+
+def test_inhibitor_credit_is_monotone_and_capped():
+    low = inhibitor_si_credit({"HEDP": 1.0}, ["Calcite"])["Calcite"]
+    high = inhibitor_si_credit({"HEDP": 50.0}, ["Calcite"])["Calcite"]
+    stacked = inhibitor_si_credit({"HEDP": 1e6, "PBTC": 1e6}, ["Calcite"])["Calcite"]
+
+    assert 0 < low < high
+    assert stacked == pytest.approx(INHIBITOR_SI_CREDIT["phosphonate"]["Calcite"][0])
+
+
+def test_inhibitor_credit_ignores_non_inhibitors_and_unknown_minerals():
+    credit = inhibitor_si_credit({"Zn": 10.0, "HEDP": 0.0}, ["Calcite", "Halite"])
+
+    assert credit == {"Calcite": 0.0, "Halite": 0.0}
+
+
+def test_missing_salt_is_infeasible():
+    assert not _below_green_limit(_result(Calcite=-1.0), ["Calcite", "Gypsum"])
+    assert not _below_green_limit({"error": "no convergence"}, ["Calcite"])
+
+
+def test_credit_raises_green_limit():
+    upper = get_salt_threshold("Calcite")["green_range"][1]
+    result = _result(Calcite=upper + 0.3)
+
+    assert not _below_green_limit(result, ["Calcite"])
+    assert _below_green_limit(result, ["Calcite"], {"Calcite": 0.5})
+
+
+def _solve(lo, hi, tol, feasible_from, warm=None):
+    search = _bisect_min_feasible(lo, hi, tol, warm)
+    value = next(search)
+    try:
+        while True:
+            value = search.send(value >= feasible_from)
+    except StopIteration as stop:
+        return stop.value
+
+
+@pytest.mark.parametrize("warm", [None, 10.0, 60.0])
+def test_bisect_min_feasible_within_tolerance(warm):
+    found = _solve(0.0, 100.0, 1.0, feasible_from=37.3, warm=warm)
+
+    assert 37.3 <= found <= 37.3 + 1.0
+
+
+def test_bisect_min_feasible_none_when_infeasible():
+    assert _solve(0.0, 100.0, 1.0, feasible_from=150.0) is None
+
+
+@pytest.mark.asyncio
+async def test_drive_searches_inhibitor_only_uses_credit():
+    # SI never changes with dosage; only the credit can make a cell green
+    upper = get_salt_threshold("Calcite")["green_range"][1]
+    memo = {}
+    calls = []
+
+    async def evaluate(requests):
+        calls.append(len(requests))
+        for key in requests:
+            memo[key] = _result(Calcite=upper + 0.4)
+
+    def credit(dosage):
+        return inhibitor_si_credit({"HEDP": dosage}, ["Calcite"])
+
+    stats = {"phreeqc_solutions": 0, "rounds": 0, "memo_hits": 0}
+    solved = await _drive_searches(
+        {0: _bisect_min_feasible(0.0, 100.0, 0.5)}, memo, evaluate, ["Calcite"], stats, credit
+    )
+
+    dosage = solved[0]
+    assert dosage is not None
+    assert credit(dosage)["Calcite"] >= 0.4
+    assert credit(dosage - 0.5)["Calcite"] < 0.4
@@ -0,0 +1,42 @@
+"""
+/analyze/batch sample preparation and parameter helpers
+"""
+
+from app.controllers.water_routes import _prepare_sample
+from app.services.phreeqc_service import _set_param_value
+
+
+def test_prepare_sample_defaults_and_balance_ions():
+    params = {
+        "Calcium": {"value": 80.0, "unit": "mg/L"},
+        "Potassium": {"value": 5.0, "unit": "mg/L"},
+        "Sulfate": {"value": 40.0, "unit": "mg/L"},
+        "Chloride": {"value": 0, "unit": "mg/L"},
+    }
+
+    mapped, cation, anion = _prepare_sample(params)
+
+    assert params["Temperature"]["value"] == 25
+    assert mapped["Cl"]["value"] == 1
+    assert mapped["Ca"]["value"] == 80.0
+    assert (cation, anion) == ("K", "Cl")
+
+
+def test_prepare_sample_prefers_sodium():
+    mapped, cation, anion = _prepare_sample({
+        "Sodium": {"value": 20.0, "unit": "mg/L"},
+        "Sulfate": {"value": 40.0, "unit": "mg/L"},
+    })
+
+    assert (cation, anion) == ("Na", "SO4")
+
+
+def test_set_param_value_does_not_mutate_caller():
+    nested = {"value": 10.0, "unit": "mmol/L"}
+    params = {"Na": nested}
+
+    out = _set_param_value(params, "Na", 12.0)
+
+    assert out["Na"] == {"value": 12.0, "unit": "mmol/L"}
+    assert nested["value"] == 10.0
+    assert params["Na"] is nested
@@ -0,0 +1,80 @@
+"""
+Batched multi-SOLUTION runs for arbitrary waters (per-water pe)
+"""
+
+import re
+
+import pytest
+
+from app.services.phreeqc_service import PHREEQCService, PQITemplate, DEFAULT_PE
+
+
+def _water(ph, pe=None):
+    water = {"Ca": {"value": 40.08, "unit": "mg/L"}, "pH": {"value": ph, "unit": ""}}
+    if pe is not None:
+        water["pe"] = {"value": pe, "unit": ""}
+    return water
+
+
+def _pe_lines(text):
+    return [float(v) for v in re.findall(r"^    pe    (\S+)$", text, flags=re.MULTILINE)]
+
+
+def test_render_solutions_emits_each_waters_pe():
+    template = PQITemplate(["Ca"], pe_per_solution=True)
+
+    text = template.render_solutions([_water(7.0, pe=12.0), _water(7.5), _water(8.0, pe=-2.5)])
+
+    assert _pe_lines(text) == [12.0, DEFAULT_PE, -2.5]
+
+
+def test_fixed_pe_template_needs_no_pe_column():
+    text = PQITemplate(["Ca"], pe=6.0).render_solutions([_water(7.0), _water(8.0)])
+
+    assert _pe_lines(text) == [6.0, 6.0]
+
+
+def test_pe_per_solution_requires_pe_vector():
+    template = PQITemplate(["Ca"], pe_per_solution=True)
+
+    with pytest.raises(ValueError):
+        template.render_matrix([7.0], [25.0], [[1.0]])
+
+
+@pytest.mark.asyncio
+async def test_run_batch_waters_keeps_mixed_pe(monkeypatch):
+    service = PHREEQCService()
+    service._verified = True
+    seen = []
+
+    async def execute_selected(pqi_content, database):
+        seen.append(pqi_content)
+        header = "sim\tstate\tsoln\tpH\tsi_Calcite"
+        rows = [f"1\ti_soln\t{i}\t7.0\t0.{i}" for i in (1, 2)]
+        return "", "\n".join([header, *rows])
+
+    monkeypatch.setattr(service, "_execute_phreeqc_selected", execute_selected)
+
+    results = await service.run_batch_waters(
+        [_water(7.0, pe=10.0), _water(7.0)], "phreeqc.dat", ["Calcite"]
+    )
+
+    assert _pe_lines(seen[0]) == [10.0, DEFAULT_PE]
+    assert len(results) == 2 and all("error" not in r for r in results)
+
+
+@pytest.mark.asyncio
+async def test_run_batch_waters_without_pe_omits_it(monkeypatch):
+    service = PHREEQCService()
+    service._verified = True
+    seen = []
+
+    async def execute_selected(pqi_content, database):
+        seen.append(pqi_content)
+        return "", "sim\tstate\tsoln\tpH\tsi_Calcite\n1\ti_soln\t1\t7.0\t0.1"
+
+    monkeypatch.setattr(service, "_execute_phreeqc_selected", execute_selected)
+
+    await service.run_batch_waters([_water(7.0)], "phreeqc.dat", ["Calcite"])
+
+    assert _pe_lines(seen[0]) == []
@@ -0,0 +1,50 @@
+"""
+Batched CCPP: EQUILIBRIUM_PHASES input and react-row parsing
+"""
+
+import pytest
+
+from app.services.phreeqc_service import PHREEQCService
+
+BASE = {
+    "Ca":   {"value": 120.0, "unit": "mg/L"},
+    "HCO3": {"value": 300.0, "unit": "mg/L"},
+    "pH":   {"value": 7.5, "unit": ""},
+}
+POINTS = [
+    {"pH": 7.0, "CoC": 1.0, "temp": 25.0},
+    {"pH": 8.5, "CoC": 3.0, "temp": 40.0},
+    {"pH": 9.0, "CoC": 5.0, "temp": 40.0},
+]
+
+
+@pytest.mark.asyncio
+async def test_ccpp_per_solution_equilibrium_and_react_rows(monkeypatch):
+    service = PHREEQCService()
+    service._verified = True
+    seen = []
+
+    async def execute_selected(pqi_content, database):
+        seen.append(pqi_content)
+        header = "sim\tstate\tsoln\tpH\tsi_Calcite\td_Calcite"
+        rows = [
+            "1\ti_soln\t1\t7.0\t-0.4\t0",
+            "1\treact\t1\t7.0\t0.0\t-0.0",
+            "2\ti_soln\t2\t8.5\t1.2\t0",
+            "2\treact\t2\t7.9\t0.0\t0.002",
+            "3\ti_soln\t3\t9.0\t1.8\t0",
+        ]
+        return "", "\n".join([header, *rows])
+
+    monkeypatch.setattr(service, "_execute_phreeqc_selected", execute_selected)
+
+    results = await service.run_batch_ccpp(BASE, POINTS, "phreeqc.dat", phases=["Gypsum"])
+
+    text = seen[0]
+    assert text.count("EQUILIBRIUM_PHASES") == 3
+    assert "-saturation_indices  Calcite Gypsum" in text
+    assert results[0]["ccpp_mg_l"] == 0.0
+    assert results[1]["ccpp_mg_l"] == pytest.approx(0.002 * PHREEQCService.CACO3_MG_PER_MOL)
+    assert results[1]["_grid_CoC"] == 3.0
+    # Solution 3 has no react row
+    assert "error" in results[2] and "ccpp_mg_l" not in results[2]
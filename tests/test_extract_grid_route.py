@@ -0,0 +1,83 @@
+"""
+/extract-and-grid-analysis with engine=fast: NumPy points, PHREEQC only outside the envelope
+"""
+
+import pytest
+from fastapi import BackgroundTasks
+
+from app.controllers import water_routes
+from app.services.phreeqc_service import PHREEQCService
+
+EXTRACTED = {
+    "Calcium": {"value": 80.0, "unit": "mg/L"},
+    "Sodium": {"value": 20.0, "unit": "mg/L"},
+    "Chloride": {"value": 71.0, "unit": "mg/L"},
+    "Sulfate": {"value": 96.0, "unit": "mg/L"},
+    "Bicarbonate": {"value": 183.0, "unit": "mg/L"},
+    "pH": {"value": 7.8, "unit": ""},
+}
+
+
+class _FakeOCR:
+    async def extract_from_file(self, file_content, filename, content_type):
+        return {"parameters": EXTRACTED}
+
+
+class _FakeUpload:
+    filename = "report.pdf"
+    content_type = "application/pdf"
+
+    async def read(self):
+        return b"%PDF"
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    saved = {"phreeqc_calls": 0}
+
+    async def save_grid(analysis_id, grid):
+        saved["grid"] = grid
+
+    async def save_analysis_result(doc):
+        saved["doc"] = doc
+
+    async def analyze(self, *args, **kwargs):
+        saved["phreeqc_calls"] += 1
+        raise RuntimeError("PHREEQC not available")
+
+    monkeypatch.setattr(water_routes, "OCRService", _FakeOCR)
+    monkeypatch.setattr(water_routes, "get_database_index", lambda database: None)
+    monkeypatch.setattr(water_routes, "save_grid", save_grid)
+    monkeypatch.setattr(water_routes.db, "save_analysis_result", save_analysis_result)
+    monkeypatch.setattr(PHREEQCService, "analyze", analyze)
+    return saved
+
+
+@pytest.mark.asyncio
+async def test_fast_engine_grid_runs_without_phreeqc(stored):
+    background = BackgroundTasks()
+
+    response = await water_routes.extract_and_run_grid_analysis(
+        background, file=_FakeUpload(), ph_range="7.0,8.0", coc_range="2,4",
+        temperature_c=25.0, engine="fast"
+    )
+
+    assert response["results_summary"] == {"total_points": 4, "successful_points": 4, "failed_points": 0}
+    assert stored["phreeqc_calls"] == 0
+    assert stored["doc"]["grid_config"]["engine"] == "fast"
+    grid = stored["grid"]
+    assert grid.computed.all() and grid.fast.all() and not grid.error.any()
+    assert "Calcite" in grid.minerals
+    assert len(background.tasks) == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_engine_falls_back_to_phreeqc_outside_envelope(stored):
+    response = await water_routes.extract_and_run_grid_analysis(
+        BackgroundTasks(), file=_FakeUpload(), ph_range="7.0", coc_range="1,400",
+        temperature_c=25.0, engine="fast"
+    )
+
+    assert response["results_summary"]["successful_points"] == 1
+    assert response["results_summary"]["failed_points"] == 1
+    assert stored["phreeqc_calls"] == 1
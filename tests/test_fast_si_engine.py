@@ -0,0 +1,92 @@
+"""
+FastSIEngine: vectorised SI for common scalants
+"""
+
+import numpy as np
+import pytest
+
+from app.services.fast_si_engine import (
+    FAST_MINERALS, FastSIEngine, supports_minerals, to_results, water_totals
+)
+
+
+TAP_WATER = {
+    "Ca": 80.0, "Mg": 24.0, "Na": 46.0, "K": 3.9, "Cl": 71.0,
+    "SO4": 96.0, "HCO3": 183.0, "SiO2": 12.0,
+    "pH": {"value": 8.3, "unit": ""}, "Temperature": {"value": 25.0, "unit": "°C"},
+}
+
+
+def test_compute_matches_expected_range_for_tap_water():
+    result = FastSIEngine().compute_waters([TAP_WATER])
+    si = {mineral: values[0] for mineral, values in result["si"].items()}
+
+    # PHREEQC + phreeqc.dat gives SI(Calcite) ≈ 0.9, SI(Gypsum) ≈ -1.6 here
+    assert si["Calcite"] == pytest.approx(0.9, abs=0.15)
+    assert si["Gypsum"] == pytest.approx(-1.6, abs=0.15)
+    assert si["SiO2(a)"] < 0
+    # No Ba / Sr in the water → not computable
+    assert np.isnan(si["Barite"]) and np.isnan(si["Celestite"])
+    assert result["converged"][0] and result["in_envelope"][0]
+
+
+def test_polymorph_offsets_follow_log_k():
+    si = FastSIEngine().compute_waters([TAP_WATER])["si"]
+
+    assert si["Calcite"][0] - si["Aragonite"][0] == pytest.approx(8.48 - 8.336, abs=0.01)
+    assert si["Gypsum"][0] > si["Anhydrite"][0]
+
+
+def test_activity_models_agree_at_low_ionic_strength():
+    davies = FastSIEngine().compute_waters([TAP_WATER])["si"]["Calcite"][0]
+    wateq = FastSIEngine(activity_model="debye_huckel").compute_waters([TAP_WATER])["si"]["Calcite"][0]
+
+    assert davies == pytest.approx(wateq, abs=0.05)
+
+
+def test_compute_grid_is_monotonic_in_ph_and_coc():
+    result = FastSIEngine().compute_grid(TAP_WATER, [7.0, 8.0, 9.0], [1.0, 3.0, 6.0], [25.0, 50.0])
+    calcite = result["si"]["Calcite"]
+
+    assert calcite.shape == (3, 3, 2)
+    assert np.all(np.diff(calcite, axis=0) > 0)
+    assert np.all(np.diff(calcite, axis=1) > 0)
+
+
+def test_high_ionic_strength_is_outside_envelope():
+    result = FastSIEngine().compute_points(TAP_WATER, [
+        {"pH": 7.5, "CoC": 1.0, "temp": 25.0},
+        {"pH": 7.5, "CoC": 100.0, "temp": 25.0},
+    ])
+
+    assert result["in_envelope"].tolist() == [True, False]
+    assert result["ionic_strength"][1] > 0.5
+
+
+def test_to_results_marks_fallback_points():
+    points = [{"pH": 7.5, "CoC": 1.0, "temp": 25.0}, {"pH": 7.5, "CoC": 100.0, "temp": 25.0}]
+    results, fallback = to_results(FastSIEngine().compute_points(TAP_WATER, points, ["Calcite"]), points)
+
+    assert fallback == [1]
+    assert results[0]["engine"] == "fast"
+    assert [si["mineral_name"] for si in results[0]["saturation_indices"]] == ["Calcite"]
+    assert "error" in results[1] and "saturation_indices" not in results[1]
+
+
+def test_unsupported_minerals_rejected():
+    with pytest.raises(ValueError):
+        FastSIEngine().compute_waters([TAP_WATER], ["Calcite", "Halite"])
+    with pytest.raises(ValueError):
+        FastSIEngine(activity_model="pitzer")
+
+    assert supports_minerals(None)
+    assert supports_minerals(FAST_MINERALS)
+    assert not supports_minerals(["Calcite", "Halite"])
+
+
+def test_water_totals_converts_mg_l_to_mol():
+    totals = water_totals([{"Ca": {"value": 40.08, "unit": "mg/L"}, "HCO3": 61.02}])
+
+    assert totals["Ca+2"][0] == pytest.approx(1e-3)
+    assert totals["Alk"][0] == pytest.approx(1e-3)
+    assert totals["SO4-2"][0] == 0.0
@@ -0,0 +1,212 @@
+"""
+Pre-rendered graph responses match what the live 3d-graph route returns
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import BackgroundTasks, Response
+
+from app.controllers import analysis_routes, water_routes
+from app.services import analysis_engine, graph_prerender
+from app.services.analysis_engine import AnalysisEngine
+from app.services.grid_store import ColumnarGrid
+
+ANALYSIS = {
+    "analysis_id": "GRID-1",
+    "analysis_type": "grid",
+    "storage": "columnar",
+    "created_at": datetime(2026, 1, 1),
+    "parameters": {"salts_of_interest": ["Calcite"]},
+    "grid_config": {"ph_steps": 3},
+}
+
+
+def _grid():
+    grid = ColumnarGrid([7.0, 7.5, 8.0], [1.0, 2.0], [25.0, 40.0], ["Calcite", "Gypsum"])
+    grid.si[0] = np.linspace(-1.0, 1.5, 12, dtype=np.float32).reshape(grid.shape)
+    grid.si[1] = -0.5
+    grid.computed[:] = True
+    grid.computed[2, 1, 1] = False
+    grid.error[0, 0, 0] = True
+    grid.si[:, 0, 0, 0] = np.nan
+    return grid
+
+
+class _FakeDB:
+    async def get_analysis_result(self, analysis_id):
+        return dict(ANALYSIS)
+
+
+class _FakeGridCache:
+    def __init__(self, grid):
+        self.grid = grid
+
+    async def get_mineral(self, analysis_id, mineral):
+        return self.grid.surface(mineral)
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    grid = _grid()
+    renders = {}
+
+    async def load_grid(analysis_id):
+        return grid
+
+    async def get_render(etag):
+        return None
+
+    async def save_render(etag, analysis_id, salt, x_axis, y_axis, format, response):
+        renders[format] = response
+
+    async def render(method, *args):
+        return "PNG"
+
+    for module in (graph_prerender, water_routes):
+        monkeypatch.setattr(module, "db", _FakeDB())
+        monkeypatch.setattr(module, "get_render", get_render)
+    monkeypatch.setattr(graph_prerender, "load_grid", load_grid)
+    monkeypatch.setattr(graph_prerender, "save_render", save_render)
+    monkeypatch.setattr(graph_prerender, "_render", render)
+    monkeypatch.setattr(water_routes, "grid_cache", _FakeGridCache(grid))
+    return renders
+
+
+@pytest.mark.asyncio
+async def test_prerendered_json_equals_live_response(stored):
+    summary = await graph_prerender.prerender_graphs("GRID-1")
+    live = await water_routes.get_3d_graph(
+        "GRID-1", Response(), salt_name="Calcite", x_axis="pH", y_axis="CoC",
+        format="json", upload_to_s3=False, if_none_match=None
+    )
+
+    assert summary["failed"] == 0
+    assert stored["json"] == live
+    assert live["data_points"] == 10
+
+
+@pytest.mark.asyncio
+async def test_simple_saturation_grids_can_be_graphed(stored, monkeypatch):
+    class _SimpleSaturationDB:
+        async def get_analysis_result(self, analysis_id):
+            return {**ANALYSIS, "analysis_id": "SSM-1", "analysis_type": "simple_saturation"}
+
+    monkeypatch.setattr(water_routes, "db", _SimpleSaturationDB())
+
+    graph = await water_routes.get_3d_graph(
+        "SSM-1", Response(), salt_name="Calcite", x_axis="pH", y_axis="CoC",
+        format="json", upload_to_s3=False, if_none_match=None
+    )
+    thumbnail = await water_routes.get_analysis_thumbnail("SSM-1", salt_name="Calcite", size=32, if_none_match=None)
+
+    assert graph["data_points"] == 10
+    assert thumbnail.media_type == "image/png"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("state", [{"approximate": True}, {"complete": False}])
+async def test_approximate_or_partial_grids_are_not_prerendered(stored, monkeypatch, state):
+    class _PartialDB:
+        async def get_analysis_result(self, analysis_id):
+            return {**ANALYSIS, **state}
+
+    monkeypatch.setattr(graph_prerender, "db", _PartialDB())
+
+    summary = await graph_prerender.prerender_graphs("GRID-1")
+
+    assert summary["rendered"] == 0 and stored == {}
+
+
+# ========================================
+# SCHEDULING
+# ========================================
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    calls = []
+
+    async def prerender(analysis_id):
+        calls.append(analysis_id)
+
+    monkeypatch.setattr(analysis_routes, "prerender_graphs", prerender)
+    monkeypatch.setattr(analysis_engine, "prerender_graphs", prerender)
+    return calls
+
+
+def _summary(**state):
+    return {"analysis_id": "SSM-1", "complete": True, "continuation_token": None, **state}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("state, task", [
+    ({}, "prerender"),
+    ({"approximate": True}, "replace_with_exact"),
+    ({"complete": False, "continuation_token": "t"}, "_continue_in_background"),
+])
+async def test_simple_saturation_schedules_completion(scheduled, monkeypatch, state, task):
+    async def run(self, **kwargs):
+        return _summary(**state)
+
+    monkeypatch.setattr(AnalysisEngine, "run_simple_saturation", run)
+    background = BackgroundTasks()
+
+    await analysis_routes.run_simple_saturation_analysis(background, {"base_water_analysis": {"Ca": 1}})
+
+    assert [t.func.__name__ for t in background.tasks] == [task]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("complete", [True, False])
+async def test_continuation_prerenders_once_complete(scheduled, monkeypatch, complete):
+    async def continue_progressive(self, token, deadline_ms=None):
+        return _summary(complete=complete)
+
+    monkeypatch.setattr(AnalysisEngine, "continue_progressive", continue_progressive)
+    background = BackgroundTasks()
+
+    await analysis_routes._continue_in_background(AnalysisEngine(), "t")
+    await analysis_routes.continue_simple_saturation_analysis(background, {"continuation_token": "t"})
+
+    assert scheduled == (["SSM-1"] if complete else [])
+    assert len(background.tasks) == int(complete)
+
+
+@pytest.mark.asyncio
+async def test_replace_with_exact_prerenders(scheduled, monkeypatch):
+    engine = AnalysisEngine()
+    doc = {
+        "analysis_id": "SSM-1", "approximate": True, "base_water_analysis": {},
+        "parameters": {
+            "ph_range": [7.0, 8.0], "coc_range": [1.0, 2.0], "temp_range": [25.0, 25.0],
+            "balance_cation": "Na", "balance_anion": "Cl"
+        },
+        "grid_info": {"ph_values": [7.0, 8.0], "coc_values": [1.0, 2.0], "temp_values": [25.0]},
+    }
+
+    class _DB:
+        async def get_analysis_result(self, analysis_id):
+            return doc
+
+        async def get_phreeqc_config(self):
+            return None
+
+        async def update_analysis_result(self, analysis_id, update):
+            pass
+
+    async def compute_grid(base, points, *args):
+        return base, [{"_grid_pH": p["pH"], "_grid_CoC": p["CoC"], "_grid_temp": p["temp"],
+                       "saturation_indices": []} for p in points]
+
+    async def save_grid(analysis_id, grid):
+        pass
+
+    monkeypatch.setattr(analysis_engine, "db", _DB())
+    monkeypatch.setattr(analysis_engine, "save_grid", save_grid)
+    monkeypatch.setattr(engine, "_compute_grid", compute_grid)
+    monkeypatch.setattr(engine.phreeqc_service, "select_database", lambda *args: "phreeqc.dat")
+
+    await engine.replace_with_exact("SSM-1")
+
+    assert scheduled == ["SSM-1"]
@@ -0,0 +1,58 @@
+"""
+Graph response ETags, If-None-Match matching and Cache-Control
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.services.graph_response_cache import (
+    IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, cache_control, etag_matches, graph_etag
+)
+
+ANALYSIS = {"analysis_id": "GRID-1", "created_at": datetime(2026, 1, 1)}
+ETAG = graph_etag(ANALYSIS, "Calcite", "pH", "CoC", "json")
+
+
+def test_etag_is_strong_and_stable():
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+    assert graph_etag(dict(ANALYSIS), "Calcite", "pH", "CoC", "json") == ETAG
+
+
+@pytest.mark.parametrize("change", [
+    {"salt_name": "Gypsum"}, {"x_axis": "temp"}, {"format": "png"}, {"upload_to_s3": True}
+])
+def test_etag_changes_with_representation(change):
+    args = {"salt_name": "Calcite", "x_axis": "pH", "y_axis": "CoC", "format": "json", **change}
+
+    assert graph_etag(ANALYSIS, **args) != ETAG
+
+
+def test_etag_changes_when_analysis_is_rewritten():
+    rewritten = {**ANALYSIS, "updated_at": datetime(2026, 1, 2)}
+
+    assert graph_etag(rewritten, "Calcite", "pH", "CoC", "json") != ETAG
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    (ETAG, True),
+    (f"W/{ETAG}", True),
+    (f'"other", {ETAG}', True),
+    ("*", True),
+    ('"other"', False),
+    (ETAG.strip('"'), False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+
+@pytest.mark.parametrize("state, expected", [
+    ({}, IMMUTABLE_CACHE_CONTROL),
+    ({"complete": True, "approximate": False}, IMMUTABLE_CACHE_CONTROL),
+    ({"complete": False}, REVALIDATE_CACHE_CONTROL),
+    ({"approximate": True}, REVALIDATE_CACHE_CONTROL),
+])
+def test_cache_control(state, expected):
+    assert cache_control({**ANALYSIS, **state}) == expected
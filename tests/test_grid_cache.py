@@ -0,0 +1,121 @@
+"""
+Decoded-grid LRU cache: byte budget eviction, single-flight, invalidation
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import grid_cache as grid_cache_module
+from app.services.grid_cache import GridCache
+from app.services.grid_store import ColumnarGrid
+
+
+def _grid(n_ph=4):
+    grid = ColumnarGrid(list(range(n_ph)), [1.0, 2.0], [25.0], ["Calcite"])
+    grid.computed[:] = True
+    return grid
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+    gate = asyncio.Event()
+    gate.set()
+
+    async def load_grid(analysis_id):
+        calls.append(("grid", analysis_id))
+        await gate.wait()
+        return None if analysis_id == "missing" else _grid()
+
+    async def load_mineral(analysis_id, mineral):
+        calls.append(("mineral", analysis_id, mineral))
+        await gate.wait()
+        return _grid().surface(mineral)
+
+    monkeypatch.setattr(grid_cache_module, "load_grid", load_grid)
+    monkeypatch.setattr(grid_cache_module, "load_mineral", load_mineral)
+    return calls, gate
+
+
+@pytest.mark.asyncio
+async def test_hits_after_first_load(loads):
+    calls, _ = loads
+    cache = GridCache()
+
+    first = await cache.get_grid("A")
+    second = await cache.get_grid("A")
+
+    assert first is second
+    assert calls == [("grid", "A")]
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_mineral_served_from_cached_grid(loads):
+    calls, _ = loads
+    cache = GridCache()
+
+    await cache.get_grid("A")
+    surface = await cache.get_mineral("A", "Calcite")
+
+    assert calls == [("grid", "A")]
+    assert surface["valid"].all()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(loads):
+    calls, gate = loads
+    gate.clear()
+    cache = GridCache()
+
+    tasks = [asyncio.create_task(cache.get_mineral("A", "Calcite")) for _ in range(5)]
+    await asyncio.sleep(0)
+    gate.set()
+    surfaces = await asyncio.gather(*tasks)
+
+    assert calls == [("mineral", "A", "Calcite")]
+    assert all(s is surfaces[0] for s in surfaces)
+    assert cache.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_under_byte_budget(loads):
+    one = _grid().nbytes
+    cache = GridCache(max_bytes=int(2.5 * one))
+
+    for analysis_id in ("A", "B"):
+        await cache.get_grid(analysis_id)
+    await cache.get_grid("A")          # A is now most recently used
+    await cache.get_grid("C")
+
+    assert list(cache._entries) == ["A", "C"]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 2 * one
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_is_not_stored(loads):
+    calls, gate = loads
+    gate.clear()
+    cache = GridCache()
+
+    task = asyncio.create_task(cache.get_grid("A"))
+    await asyncio.sleep(0)
+    cache.invalidate("A")
+    gate.set()
+    await task
+
+    assert cache.stats()["entries"] == 0
+    await cache.get_grid("A")
+    assert calls == [("grid", "A"), ("grid", "A")]
+
+
+@pytest.mark.asyncio
+async def test_missing_grid_is_not_cached(loads):
+    calls, _ = loads
+    cache = GridCache()
+
+    assert await cache.get_grid("missing") is None
+    assert await cache.get_grid("missing") is None
+    assert len(calls) == 2
@@ -0,0 +1,129 @@
+"""
+Per-temperature grid chunk persistence (save_grid / load_grid / load_mineral)
+"""
+
+import numpy as np
+import pytest
+
+from app.services import grid_store
+from app.services.grid_store import ColumnarGrid, load_grid, load_mineral, load_results, save_grid
+
+
+class _FakeChunkDB:
+    """grid_chunks / graph_renders methods of Database, kept in memory"""
+
+    def __init__(self):
+        self.chunks = {}
+        self.reads = []
+
+    async def save_grid_chunks(self, analysis_id, chunks):
+        for chunk in chunks:
+            self.chunks[(analysis_id, chunk["temp_index"])] = {"analysis_id": analysis_id, **chunk}
+
+    async def get_grid_chunks(self, analysis_id, temp_indices=None, projection=None):
+        self.reads.append((temp_indices, projection))
+        docs = sorted(
+            (doc for (aid, k), doc in self.chunks.items()
+             if aid == analysis_id and (temp_indices is None or k in temp_indices)),
+            key=lambda doc: doc["temp_index"]
+        )
+        return [_project(doc, projection) for doc in docs]
+
+    async def delete_graph_renders(self, analysis_id):
+        return 0
+
+
+def _project(doc, projection):
+    if not projection:
+        return dict(doc)
+    out = {}
+    for key, keep in projection.items():
+        if not keep:
+            continue
+        head, _, tail = key.partition(".")
+        if head not in doc:
+            continue
+        if tail:
+            if tail in doc[head]:
+                out.setdefault(head, {})[tail] = doc[head][tail]
+        else:
+            out[head] = doc[head]
+    return out
+
+
+@pytest.fixture
+def chunk_db(monkeypatch):
+    fake = _FakeChunkDB()
+    monkeypatch.setattr(grid_store, "db", fake)
+    return fake
+
+
+def _grid():
+    ph, coc, temp = [7.0, 8.0], [1.0, 2.0], [20.0, 30.0, 40.0]
+    grid = ColumnarGrid(ph, coc, temp, ["Calcite", "Gypsum"], "phreeqc.dat")
+    grid.si[0] = np.arange(12, dtype=np.float32).reshape(grid.shape)
+    grid.si[1] = -1.0
+    grid.computed[:] = True
+    grid.error[1, 1, 2] = True
+    grid.errors[int(np.ravel_multi_index((1, 1, 2), grid.shape))] = "No output for solution"
+    return grid
+
+
+@pytest.mark.asyncio
+async def test_one_document_per_slice_plus_header(chunk_db):
+    await save_grid("A1", _grid())
+
+    assert sorted(k for _, k in chunk_db.chunks) == [ColumnarGrid.HEADER_INDEX, 0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_load_grid_round_trip(chunk_db):
+    grid = _grid()
+    await save_grid("A1", grid)
+
+    loaded = await load_grid("A1")
+
+    np.testing.assert_array_equal(loaded.si, grid.si)
+    assert loaded.errors == grid.errors
+    assert len(await load_results({"analysis_id": "A1", "storage": "columnar"})) == 12
+
+
+@pytest.mark.asyncio
+async def test_load_grid_fetches_only_requested_slices(chunk_db):
+    await save_grid("A1", _grid())
+
+    loaded = await load_grid("A1", temp_indices=[2])
+
+    assert chunk_db.reads[-1][0] == [ColumnarGrid.HEADER_INDEX, 2]
+    assert loaded.computed[:, :, 2].all() and not loaded.computed[:, :, :2].any()
+
+
+@pytest.mark.asyncio
+async def test_missing_grid_and_legacy_documents(chunk_db):
+    assert await load_grid("nope") is None
+    assert await load_results({"analysis_id": "old", "results": [{"pH": 7.0}]}) == [{"pH": 7.0}]
+
+
+@pytest.mark.asyncio
+async def test_load_mineral_projects_one_mineral(chunk_db):
+    grid = _grid()
+    await save_grid("A1", grid)
+
+    surface = await load_mineral("A1", "Calcite")
+
+    projection = chunk_db.reads[-1][1]
+    assert "si.0" in projection and "si.1" not in projection
+    assert not any(name in projection for name in ("ionic_strength", "charge_balance"))
+    assert surface["valid"].sum() == 11
+    assert np.isnan(surface["si"][1, 1, 2])
+    np.testing.assert_array_equal(surface["si"][0], grid.si[0][0])
+
+
+@pytest.mark.asyncio
+async def test_load_mineral_unknown_mineral_and_grid(chunk_db):
+    await save_grid("A1", _grid())
+
+    surface = await load_mineral("A1", "Halite")
+
+    assert surface["si"] is None and surface["valid"].sum() == 11
+    assert await load_mineral("nope", "Calcite") is None
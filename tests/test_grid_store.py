@@ -0,0 +1,99 @@
+"""
+Columnar grid storage: pack/unpack, chunking and merging
+"""
+
+import numpy as np
+import pytest
+
+from app.services.grid_store import (
+    ColumnarGrid, _pack, _pack_bitmap, _unpack, _unpack_bitmap
+)
+
+PH = [7.0, 8.0]
+COC = [1.0, 2.0, 3.0]
+TEMP = [25.0, 40.0]
+
+
+def _point(index, si, engine="phreeqc", **extra):
+    i, j, k = np.unravel_index(index, (len(PH), len(COC), len(TEMP)))
+    return {
+        "point_index": index, "pH": PH[i], "CoC": COC[j], "temperature_C": TEMP[k],
+        "saturation_indices": [{"mineral_name": m, "si_value": v} for m, v in si.items()],
+        "ionic_strength": 0.01 * (index + 1), "charge_balance_error": 0.5,
+        "database_used": "phreeqc.dat", "engine": engine, "retries": 0, **extra
+    }
+
+
+def _error(index, message="No output for solution"):
+    i, j, k = np.unravel_index(index, (len(PH), len(COC), len(TEMP)))
+    return {"point_index": index, "pH": PH[i], "CoC": COC[j], "temperature_C": TEMP[k],
+            "error": message, "saturation_indices": [], "retries": 1}
+
+
+@pytest.fixture
+def grid():
+    results = [_point(n, {"Calcite": 0.1 * n, "Gypsum": -1.0}) for n in range(10)]
+    results += [_error(10), _error(11, "Not attempted")]
+    return ColumnarGrid.from_results(results, PH, COC, TEMP)
+
+
+def test_pack_round_trip():
+    array = np.arange(12, dtype=np.float32).reshape(3, 4)
+    mask = np.array([[True, False, True], [False, False, True]])
+
+    np.testing.assert_array_equal(_unpack(_pack(array)), array)
+    np.testing.assert_array_equal(_unpack_bitmap(_pack_bitmap(mask)), mask)
+
+
+def test_from_results_and_point_result(grid):
+    assert grid.minerals == ["Calcite", "Gypsum"]
+    assert grid.computed.all()
+    assert grid.error.sum() == 2
+
+    point = grid.point_result(3)
+    assert point["saturation_indices"][0] == {"mineral_name": "Calcite", "si_value": 0.3}
+    assert point["ionic_strength"] == 0.04
+    assert grid.point_result(11)["error"] == "Not attempted"
+
+
+def test_chunks_round_trip(grid):
+    restored = ColumnarGrid.from_chunks(grid.to_chunks())
+
+    np.testing.assert_array_equal(restored.si, grid.si)
+    np.testing.assert_array_equal(restored.error, grid.error)
+    assert restored.errors == grid.errors
+    assert list(restored.results()) == list(grid.results())
+
+
+def test_slice_chunks_carry_only_their_errors(grid):
+    by_slice = grid.errors_by_slice()
+    chunks = grid.to_chunks()[1:]
+
+    assert sorted(f for flats in by_slice.values() for f in flats) == [10, 11]
+    for k, chunk in enumerate(chunks):
+        assert {int(f) for f in chunk["errors"]} == set(by_slice.get(k, []))
+        assert chunk == grid.slice_chunk(k)
+
+
+def test_partial_slices_leave_other_temps_uncomputed(grid):
+    chunks = grid.to_chunks()
+    restored = ColumnarGrid.from_chunks([chunks[0], chunks[2]])
+
+    assert not restored.computed[:, :, 0].any()
+    assert restored.computed[:, :, 1].all()
+
+
+def test_exact_result_replaces_fast_and_error_points(grid):
+    grid.merge_results([_point(0, {"Calcite": 0.5}, engine="fast")])
+    assert grid.fast[0, 0, 0]
+
+    grid.merge_results([_error(0)])
+    assert not grid.fast[0, 0, 0] and grid.error[0, 0, 0]
+    assert grid.ionic_strength[0, 0, 0] == 0
+
+    grid.merge_results([_point(0, {"Calcite": 0.7, "Halite": -3.0})])
+    point = grid.point_result(0)
+    assert point["engine"] == "phreeqc" and "error" not in point
+    assert 0 not in grid.errors
+    assert grid.minerals == ["Calcite", "Gypsum", "Halite"]
+    assert {s["mineral_name"] for s in point["saturation_indices"]} == {"Calcite", "Halite"}
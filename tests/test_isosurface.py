@@ -0,0 +1,154 @@
+"""
+SI threshold boundaries: marching squares / tetrahedra and axis-unit output
+"""
+
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.services.isosurface import extract_boundary, marching_squares, marching_tetrahedra, zone_level
+
+
+def _normals(vertices, faces):
+    tri = vertices[faces]
+    return np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]), tri.mean(axis=1)
+
+
+@pytest.mark.parametrize("mineral, threshold, expected", [
+    ("Calcite", "yellow", 0.5),
+    ("Calcite", "red", 1.0),
+    ("NotAMineral", "yellow", 0.5),
+    ("NotAMineral", "red", 1.0),
+    ("Calcite", "0.25", 0.25),
+])
+def test_zone_level(mineral, threshold, expected):
+    assert zone_level(mineral, threshold) == expected
+
+
+def test_zone_level_rejects_unknown_threshold():
+    with pytest.raises(ValueError):
+        zone_level("Calcite", "orange")
+
+
+# ========================================
+# MARCHING SQUARES
+# ========================================
+
+def test_marching_squares_straight_line():
+    field = np.repeat(np.arange(4.0)[:, None], 3, axis=1)      # SI = i
+
+    lines = marching_squares(field, 1.5)
+
+    assert len(lines) == 1
+    assert np.allclose(lines[0][:, 0], 1.5)
+    assert sorted(lines[0][:, 1].tolist()) == [0.0, 1.0, 2.0]
+
+
+def test_marching_squares_closed_loop():
+    field = np.zeros((3, 3))
+    field[1, 1] = 1.0
+
+    lines = marching_squares(field, 0.5)
+
+    assert len(lines) == 1
+    loop = lines[0]
+    assert len(loop) == 5 and np.array_equal(loop[0], loop[-1])
+    assert np.allclose(np.abs(loop[:-1] - 1).sum(axis=1), 0.5)
+
+
+@pytest.mark.parametrize("high, cut_off", [
+    (1.2, {(0, 1), (1, 0)}),        # centre 0.6 inside: the two low corners are cut off
+    (0.8, {(0, 0), (1, 1)}),        # centre 0.4 outside: the two high corners are cut off
+])
+def test_marching_squares_saddle_uses_cell_centre(high, cut_off):
+    field = np.array([[high, 0.0], [0.0, high]])
+
+    lines = marching_squares(field, 0.5)
+
+    assert len(lines) == 2 and all(len(line) == 2 for line in lines)
+    assert {tuple(np.round(line.mean(axis=0)).astype(int).tolist()) for line in lines} == cut_off
+
+
+def test_marching_squares_skips_cells_with_nan():
+    field = np.repeat(np.arange(3.0)[:, None], 3, axis=1)
+    field[:, 2] = np.nan
+
+    lines = marching_squares(field, 0.5)
+
+    assert len(lines) == 1
+    assert sorted(lines[0][:, 1].tolist()) == [0.0, 1.0]
+    assert marching_squares(np.full((3, 3), np.nan), 0.0) == []
+
+
+# ========================================
+# MARCHING TETRAHEDRA
+# ========================================
+
+def test_marching_tetrahedra_plane_faces_higher_si():
+    i = np.arange(3.0)
+    field = np.broadcast_to(i[:, None, None], (3, 3, 3)).copy()   # SI = i
+
+    vertices, faces = marching_tetrahedra(field, 0.5)
+
+    assert len(faces) and np.allclose(vertices[:, 0], 0.5)
+    normals, _ = _normals(vertices, faces)
+    assert (normals[:, 0] > 0).all()
+    assert (np.abs(normals[:, 1:]) < 1e-9).all()
+
+
+def test_marching_tetrahedra_closed_surface_is_watertight():
+    idx = np.arange(5.0)
+    ii, jj, kk = np.meshgrid(idx, idx, idx, indexing="ij")
+    field = -np.sqrt((ii - 2) ** 2 + (jj - 2) ** 2 + (kk - 2) ** 2)     # highest SI in the centre
+
+    vertices, faces = marching_tetrahedra(field, -1.5)
+
+    edges = Counter(tuple(sorted(e)) for f in faces.tolist() for e in ((f[0], f[1]), (f[1], f[2]), (f[2], f[0])))
+    assert edges and set(edges.values()) == {2}
+    assert len(np.unique(faces)) == len(vertices)
+    normals, centroids = _normals(vertices, faces)
+    assert ((normals * (2 - centroids)).sum(axis=1) > 0).all()
+
+
+def test_marching_tetrahedra_no_crossing():
+    vertices, faces = marching_tetrahedra(np.ones((2, 2, 2)), 5.0)
+
+    assert vertices.shape == (0, 3) and faces.shape == (0, 3)
+
+
+# ========================================
+# EXTRACT BOUNDARY
+# ========================================
+
+AXES = [[7.0, 8.0, 9.0], [1.0, 3.0, 5.0], [20.0, 40.0]]
+
+
+def test_extract_boundary_mesh_in_axis_units():
+    field = np.broadcast_to(np.array([-1.0, 0.0, 1.0])[:, None, None], (3, 3, 2)).copy()
+
+    boundary = extract_boundary(field, AXES, 0.5)
+
+    assert boundary["type"] == "mesh" and boundary["axes"] == ["pH", "CoC", "temp"]
+    assert boundary["face_count"] == len(boundary["faces"]) > 0
+    vertices = np.array(boundary["vertices"])
+    assert np.allclose(vertices[:, 0], 8.5)
+    assert vertices[:, 1].min() == 1.0 and vertices[:, 1].max() == 5.0
+    assert vertices[:, 2].min() == 20.0 and vertices[:, 2].max() == 40.0
+
+
+def test_extract_boundary_polylines_on_a_plane():
+    field = np.array([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0], [2.0, 2.0, 2.0]])[:, :, None]
+
+    boundary = extract_boundary(field, [AXES[0], AXES[1], [25.0]], 0.0)
+
+    assert boundary["type"] == "polylines" and boundary["axes"] == ["pH", "CoC"]
+    assert boundary["polyline_count"] == 1 and boundary["vertex_count"] == 3
+    line = np.array(boundary["polylines"][0])
+    assert np.allclose(line[:, 0], 7.5)
+    assert sorted(line[:, 1].tolist()) == [1.0, 3.0, 5.0]
+
+
+def test_extract_boundary_needs_two_axes():
+    with pytest.raises(ValueError):
+        extract_boundary(np.zeros((3, 1, 1)), [AXES[0], [1.0], [25.0]], 0.0)
@@ -0,0 +1,227 @@
+"""
+Load shedding: PHREEQC slots, estimated balance and the fast-engine fallbacks
+"""
+
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import BackgroundTasks
+
+from app.controllers import water_routes
+from app.services import analysis_engine, phreeqc_service
+from app.services.analysis_engine import AnalysisEngine
+from app.services.phreeqc_service import (
+    PHREEQCSaturatedError, PHREEQCService, phreeqc_load, phreeqc_slot
+)
+
+
+WATER = {
+    "Ca":   {"value": 80.0,  "unit": "mg/L"},
+    "Mg":   {"value": 24.0,  "unit": "mg/L"},
+    "Na":   {"value": 20.0,  "unit": "mg/L"},
+    "Cl":   {"value": 71.0,  "unit": "mg/L"},
+    "SO4":  {"value": 96.0,  "unit": "mg/L"},
+    "HCO3": {"value": 183.0, "unit": "mg/L"},
+    "pH":   {"value": 7.8,   "unit": ""},
+    "Temperature": {"value": 25.0, "unit": "°C"},
+}
+
+
+@pytest.fixture
+def one_slot(monkeypatch):
+    monkeypatch.setattr(phreeqc_service, "PHREEQC_MAX_WORKERS", 1)
+    monkeypatch.setattr(phreeqc_service, "_slots", None)
+    monkeypatch.setattr(phreeqc_service, "_slot_stats", {"in_use": 0, "waiting": 0, "shed": 0})
+
+
+def _saturated_slot(budgets):
+    """phreeqc_slot stand-in: sheds budgeted callers, stops unbudgeted ones"""
+    @asynccontextmanager
+    async def slot(wait_budget_ms=None):
+        budgets.append(wait_budget_ms)
+        if wait_budget_ms is None:
+            raise LookupError("queued for PHREEQC")
+        raise PHREEQCSaturatedError("saturated")
+        yield
+    return slot
+
+
+# ========================================
+# SLOTS
+# ========================================
+
+@pytest.mark.asyncio
+async def test_slot_sheds_after_budget_and_keeps_permit_count(one_slot):
+    async with phreeqc_slot():
+        async def contender():
+            async with phreeqc_slot(wait_budget_ms=20):
+                pass
+
+        with pytest.raises(PHREEQCSaturatedError):
+            await asyncio.create_task(contender(), context=contextvars.Context())
+
+    assert phreeqc_load()["shed"] == 1
+    assert phreeqc_load()["in_use"] == 0
+    async with phreeqc_slot(wait_budget_ms=20):
+        assert phreeqc_load()["in_use"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slot_released_when_holder_is_cancelled(one_slot):
+    entered = asyncio.Event()
+
+    async def holder():
+        async with phreeqc_slot():
+            entered.set()
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(holder())
+    await entered.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    async with phreeqc_slot(wait_budget_ms=20):
+        pass
+    assert phreeqc_load() == {"max_workers": 1, "in_use": 0, "waiting": 0, "shed": 0}
+
+
+@pytest.mark.asyncio
+async def test_slot_is_reentrant_within_a_task(one_slot):
+    async with phreeqc_slot(wait_budget_ms=20):
+        async with phreeqc_slot(wait_budget_ms=20):
+            assert phreeqc_load()["in_use"] == 1
+
+
+# ========================================
+# ESTIMATED BALANCE
+# ========================================
+
+def _meq(water):
+    props = PHREEQCService.ION_PROPERTIES
+    return sum(
+        water[ion]["value"] / props[ion]["mw"] * props[ion]["charge"]
+        for ion in water if ion in props
+    )
+
+
+def test_estimate_ion_balance_adds_deficit_to_balance_ion():
+    balanced = PHREEQCService().estimate_ion_balance(WATER, "Na", "Cl")
+
+    assert _meq(WATER) < 0
+    assert balanced["Na"]["value"] > WATER["Na"]["value"]
+    assert balanced["Cl"] == WATER["Cl"]
+    assert _meq(balanced) == pytest.approx(0.0, abs=1e-9)
+    assert balanced["_balance_estimated"] is True
+
+
+def test_estimate_ion_balance_rejects_invalid_ions():
+    with pytest.raises(ValueError):
+        PHREEQCService().estimate_ion_balance(WATER, "Ca", "Cl")
+
+
+# ========================================
+# /analyze FALLBACK
+# ========================================
+
+@pytest.mark.asyncio
+async def test_analyze_answers_from_fast_engine_when_saturated(monkeypatch):
+    saved = []
+
+    async def saturated(self, *args, **kwargs):
+        raise PHREEQCSaturatedError("saturated")
+
+    async def save_analysis(doc):
+        saved.append(doc)
+        return doc["analysis_id"]
+
+    async def no_chart(result):
+        return {}
+
+    monkeypatch.setattr(PHREEQCService, "analyze", saturated)
+    monkeypatch.setattr(water_routes.db, "save_analysis", save_analysis)
+    monkeypatch.setattr(water_routes, "_si_bar_chart", no_chart)
+
+    background = BackgroundTasks()
+    response = await water_routes.analyze_water({"parameters": {
+        "Calcium": {"value": 80.0, "unit": "mg/L"},
+        "Sodium": {"value": 20.0, "unit": "mg/L"},
+        "Chloride": {"value": 71.0, "unit": "mg/L"},
+        "Bicarbonate": {"value": 183.0, "unit": "mg/L"},
+        "pH": {"value": 7.8, "unit": ""},
+    }}, background)
+
+    assert response["approximate"] is True
+    assert response["result"]["engine"] == "fast"
+    assert any(si["mineral_name"] == "Calcite" for si in response["result"]["saturation_indices"])
+    assert saved[0]["approximate"] is True
+    assert len(background.tasks) == 1
+
+
+# ========================================
+# GRID FALLBACK
+# ========================================
+
+class _FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+
+
+class _FakeDB:
+    def __init__(self):
+        self.db = type("Collections", (), {"analysis_results": _FakeCollection()})()
+
+    async def get_phreeqc_config(self):
+        return None
+
+
+@pytest.fixture
+def grid_engine(monkeypatch):
+    fake_db = _FakeDB()
+    budgets = []
+
+    async def save_grid(analysis_id, grid):
+        pass
+
+    monkeypatch.setattr(analysis_engine, "db", fake_db)
+    monkeypatch.setattr(analysis_engine, "save_grid", save_grid)
+    monkeypatch.setattr(analysis_engine, "phreeqc_slot", _saturated_slot(budgets))
+    monkeypatch.setattr(analysis_engine, "possible_phases", lambda database, water: ["Calcite", "Halite"])
+    monkeypatch.setattr(analysis_engine, "validate_phases", lambda database, phases: None)
+    return AnalysisEngine(), fake_db, budgets
+
+
+async def _small_grid(engine, salts):
+    return await engine.run_simple_saturation(
+        WATER, (7.0, 8.0), (1.0, 3.0), (25.0, 40.0), salts_of_interest=salts,
+        ph_steps=2, coc_steps=2, temp_steps=2, wait_budget_ms=50
+    )
+
+
+@pytest.mark.asyncio
+async def test_shed_grid_uses_estimated_balance_and_reports_unsupported(grid_engine):
+    engine, fake_db, budgets = grid_engine
+
+    result = await _small_grid(engine, None)
+
+    assert budgets == [50]
+    assert result["approximate"] is True
+    assert result["unsupported_phases"] == ["Halite"]
+    doc = fake_db.db.analysis_results.docs[0]
+    assert doc["base_water_analysis"]["_balance_estimated"] is True
+    assert doc["unsupported_phases"] == ["Halite"]
+
+
+@pytest.mark.asyncio
+async def test_grid_not_shed_when_fast_engine_cannot_cover_salts(grid_engine):
+    engine, fake_db, budgets = grid_engine
+
+    with pytest.raises(LookupError):
+        await _small_grid(engine, ["Calcite", "Halite"])
+
+    assert budgets == [None]
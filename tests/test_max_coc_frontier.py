@@ -0,0 +1,63 @@
+"""
+Max-CoC frontier search (bisection over a monotone decreasing predicate)
+"""
+
+import pytest
+
+from app.services.analysis_engine import _bisect_max_feasible, _drive_searches
+from app.utils.salt_data_table import get_salt_threshold
+
+
+def _solve(lo, hi, tol, feasible_until, warm=None):
+    search = _bisect_max_feasible(lo, hi, tol, warm)
+    value = next(search)
+    tested = [value]
+    try:
+        while True:
+            value = search.send(value <= feasible_until)
+            tested.append(value)
+    except StopIteration as stop:
+        return stop.value, tested
+
+
+@pytest.mark.parametrize("warm", [None, 2.0, 9.0])
+def test_max_feasible_within_tolerance(warm):
+    found, tested = _solve(1.0, 10.0, 0.1, feasible_until=6.42, warm=warm)
+
+    assert 6.42 - 0.1 <= found <= 6.42
+    assert all(1.0 <= v <= 10.0 for v in tested)
+
+
+def test_max_feasible_whole_range():
+    found, _ = _solve(1.0, 10.0, 0.1, feasible_until=50.0)
+
+    assert found == 10.0
+
+
+def test_max_feasible_none_when_lo_infeasible():
+    found, _ = _solve(1.0, 10.0, 0.1, feasible_until=0.5)
+
+    assert found is None
+
+
+@pytest.mark.asyncio
+async def test_drive_searches_finds_frontier_once_per_point():
+    # Calcite SI grows 0.1 per CoC; frontier is where it leaves green
+    upper = get_salt_threshold("Calcite")["green_range"][1]
+    memo = {}
+    evaluated = []
+
+    async def evaluate(requests):
+        evaluated.extend(requests)
+        for cell, coc in requests:
+            memo[(cell, coc)] = {"saturation_indices": [
+                {"mineral_name": "Calcite", "si_value": 0.1 * coc}
+            ]}
+
+    stats = {"phreeqc_solutions": 0, "rounds": 0, "memo_hits": 0}
+    solved = await _drive_searches(
+        {0: _bisect_max_feasible(1.0, 10.0, 0.1)}, memo, evaluate, ["Calcite"], stats
+    )
+
+    assert len(evaluated) == len(set(evaluated))
+    assert 10 * upper - 0.1 <= solved[0] <= 10 * upper
@@ -0,0 +1,59 @@
+"""
+Mixing-ratio lattice and the batched MIX input
+"""
+
+import numpy as np
+import pytest
+
+from app.services.grid_calculator import GridCalculator
+from app.services.phreeqc_service import PHREEQCService, PQITemplate
+
+
+@pytest.mark.parametrize("n_sources, steps, expected", [(2, 11, 11), (3, 11, 66), (3, 2, 3)])
+def test_mixing_simplex_size_and_rows(n_sources, steps, expected):
+    fractions = GridCalculator.mixing_simplex(n_sources, steps)
+
+    assert fractions.shape == (expected, n_sources)
+    np.testing.assert_allclose(fractions.sum(axis=1), 1.0)
+    assert (fractions >= 0).all()
+    assert len({tuple(row) for row in fractions.tolist()}) == expected
+
+
+def test_mixing_simplex_includes_pure_sources():
+    fractions = GridCalculator.mixing_simplex(3, 5)
+
+    for pure in np.eye(3):
+        assert any(np.allclose(row, pure) for row in fractions)
+
+
+@pytest.mark.parametrize("n_sources, steps", [(1, 11), (4, 11), (2, 1)])
+def test_mixing_simplex_rejects_bad_args(n_sources, steps):
+    with pytest.raises(ValueError):
+        GridCalculator.mixing_simplex(n_sources, steps)
+
+
+def test_render_mixes_one_simulation_per_blend():
+    text = PQITemplate.render_mixes(np.array([[0.25, 0.75], [1.0, 0.0]]), first_number=3)
+
+    assert text == "MIX 3\n    1  0.250000\n    2  0.750000\nEND\nMIX 4\n    1  1.000000\n    2  0.000000\nEND\n"
+
+
+@pytest.mark.asyncio
+async def test_run_batch_mixing_reads_react_rows_by_simulation(monkeypatch):
+    service = PHREEQCService()
+    service._verified = True
+
+    async def execute_selected(pqi_content, database):
+        header = "sim\tstate\tsoln\tpH\tsi_Calcite"
+        rows = ["1\ti_soln\t1\t7.0\t0.1", "1\ti_soln\t2\t8.0\t0.9", "2\treact\t1\t7.5\t0.5"]
+        return "", "\n".join([header, *rows])
+
+    monkeypatch.setattr(service, "_execute_phreeqc_selected", execute_selected)
+
+    sources = [{"Ca": {"value": 40.0, "unit": "mg/L"}}, {"Ca": {"value": 80.0, "unit": "mg/L"}}]
+    results = await service.run_batch_mixing(
+        sources, np.array([[0.5, 0.5], [0.2, 0.8]]), "phreeqc.dat", ["Calcite"]
+    )
+
+    assert results[0]["saturation_indices"] == [{"mineral_name": "Calcite", "si_value": 0.5}]
+    assert "error" in results[1]
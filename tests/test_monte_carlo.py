@@ -0,0 +1,122 @@
+"""
+Monte Carlo SI uncertainty: draws, uncertainty precedence and percentiles
+"""
+
+import numpy as np
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+from app.controllers import water_routes
+from app.services import phreeqc_service
+from app.services.phreeqc_service import PHREEQCService
+
+WATER = {
+    "Ca":  {"value": 100.0, "unit": "mg/L", "uncertainty_pct": 10},
+    "Na":  {"value": 50.0, "unit": "mg/L", "uncertainty": 0.02},
+    "Cl":  {"value": 70.0, "unit": "mg/L"},
+    "pH":  {"value": 7.8, "unit": ""},
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = PHREEQCService()
+    service.waters = []
+
+    async def ion_balance(water, **kwargs):
+        return dict(water)
+
+    async def run_batch_waters(waters, database, phases=None):
+        service.waters.extend(waters)
+        # SI tracks Ca so the percentiles are predictable
+        return [
+            {"saturation_indices": [
+                {"mineral_name": "Calcite", "si_value": w["Ca"]["value"] / 100.0 - 1.0}
+            ]}
+            for w in waters
+        ]
+
+    monkeypatch.setattr(service, "select_database", lambda *args, **kwargs: "phreeqc.dat")
+    monkeypatch.setattr(service, "ion_balance", ion_balance)
+    monkeypatch.setattr(service, "run_batch_waters", run_batch_waters)
+    monkeypatch.setattr(phreeqc_service, "possible_phases", lambda database, water: ["Calcite"])
+    return service
+
+
+@pytest.mark.asyncio
+async def test_uncertainty_precedence(service):
+    result = await service.monte_carlo(
+        WATER, n_samples=10, default_uncertainty=0.05, uncertainties={"Cl": 0.2}, seed=1
+    )
+
+    assert result["uncertainties"] == {"Ca": 0.10, "Na": 0.02, "Cl": 0.2}
+
+
+@pytest.mark.asyncio
+async def test_draws_and_percentiles(service):
+    result = await service.monte_carlo(WATER, n_samples=2000, seed=7)
+
+    ca = np.array([w["Ca"]["value"] for w in service.waters])
+    calcite = result["saturation_indices"]["Calcite"]
+
+    assert len(service.waters) == 2000 and result["n_succeeded"] == 2000
+    assert ca.mean() == pytest.approx(100.0, rel=0.01)
+    assert ca.std() == pytest.approx(10.0, rel=0.1)
+    assert calcite["p5"] < calcite["p50"] < calcite["p95"]
+    assert calcite["p50"] == pytest.approx(0.0, abs=0.02)
+    assert calcite["fraction_supersaturated"] == pytest.approx(0.5, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_seed_is_reproducible(service):
+    first = await service.monte_carlo(WATER, n_samples=50, seed=3)
+    second = await service.monte_carlo(WATER, n_samples=50, seed=3)
+
+    assert first["saturation_indices"] == second["saturation_indices"]
+
+
+@pytest.mark.asyncio
+async def test_sample_count_is_bounded(service):
+    with pytest.raises(ValueError):
+        await service.monte_carlo(WATER, n_samples=0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kwargs", [
+    {"default_uncertainty": -0.05},
+    {"default_uncertainty": float("nan")},
+    {"uncertainties": {"Ca": -0.1}},
+    {"uncertainties": {"Ca": float("inf")}},
+    {"uncertainties": {"Ca": "ten percent"}},
+])
+async def test_invalid_uncertainty_is_rejected(service, kwargs):
+    with pytest.raises(ValueError):
+        await service.monte_carlo(WATER, n_samples=10, **kwargs)
+    assert service.waters == []
+
+
+@pytest.mark.asyncio
+async def test_negative_stated_uncertainty_is_rejected(service):
+    water = {**WATER, "Ca": {"value": 100.0, "unit": "mg/L", "uncertainty_pct": -10}}
+
+    with pytest.raises(ValueError):
+        await service.monte_carlo(water, n_samples=10)
+
+
+@pytest.mark.asyncio
+async def test_analyze_answers_422_for_negative_uncertainty(monkeypatch):
+    async def analyze(self, *args, **kwargs):
+        return {"saturation_indices": []}
+
+    async def no_chart(result):
+        return {}
+
+    monkeypatch.setattr(PHREEQCService, "analyze", analyze)
+    monkeypatch.setattr(water_routes, "_si_bar_chart", no_chart)
+
+    with pytest.raises(HTTPException) as e:
+        await water_routes.analyze_water({
+            "parameters": {"Calcium": {"value": 80.0, "unit": "mg/L"}, "pH": {"value": 7.8, "unit": ""}},
+            "monte_carlo": {"samples": 10, "uncertainties": {"Ca": -0.1}},
+        }, BackgroundTasks())
+    assert e.value.status_code == 422
@@ -0,0 +1,67 @@
+"""
+Single-pass multi-salt heatmap matrices and vectorised zone classification
+"""
+
+import numpy as np
+import pytest
+
+from app.services.graph_service import GraphService
+from app.services.grid_store import ColumnarGrid
+from app.utils.salt_data_table import classify_si_array, classify_si_value
+
+PH = [7.0, 7.5, 8.0]
+COC = [1.0, 2.0]
+SALTS = ["Calcite", "Gypsum", "Barite"]
+
+
+def _results():
+    results = []
+    for i, ph in enumerate(PH):
+        for j, coc in enumerate(COC):
+            point = {"point_index": i * len(COC) + j, "pH": ph, "CoC": coc, "temperature_C": 25.0}
+            if (i, j) == (1, 1):
+                results.append({**point, "error": "did not converge", "saturation_indices": []})
+                continue
+            sis = [
+                {"mineral_name": "Calcite", "si_value": round(-1.2 + 0.45 * i + 0.3 * j, 4)},
+                {"mineral_name": "Gypsum", "si_value": round(-0.6 + 0.2 * i * j, 4)},
+            ]
+            if (i, j) != (0, 0):
+                sis.append({"mineral_name": "Barite", "si_value": round(0.1 * i - 0.7 * j, 4)})
+            results.append({**point, "saturation_indices": sis})
+    return results
+
+
+@pytest.mark.parametrize("mineral", ["Calcite", "Gypsum", "Halite", "NotAMineral"])
+def test_classify_si_array_matches_scalar(mineral):
+    values = np.array([[-3.0, -1.0, -0.5, -0.1], [0.0, 0.45, 0.5, 0.75], [1.0, 1.2, 2.5, np.nan]])
+
+    zones = classify_si_array(mineral, values)
+
+    assert zones.shape == values.shape
+    for si, zone in zip(values.ravel(), zones.ravel()):
+        expected = "unknown" if np.isnan(si) else classify_si_value(mineral, float(si))
+        assert zone == expected
+
+
+def test_multi_salt_equals_per_salt_graphs():
+    service, results = GraphService(), _results()
+
+    graphs = service.prepare_multi_salt_graph_data(results, SALTS)
+
+    assert set(graphs) == set(SALTS)
+    for salt in SALTS:
+        assert graphs[salt] == service.prepare_3d_graph_data(results, salt)
+    assert graphs["Barite"]["z"][0][0] is None
+    assert graphs["Barite"]["color_zones"][0][0] == "unknown"
+
+
+@pytest.mark.parametrize("x_axis, y_axis", [("pH", "CoC"), ("CoC", "pH")])
+def test_columnar_grid_matches_result_list(x_axis, y_axis):
+    service, results = GraphService(), _results()
+    grid = ColumnarGrid.from_results(results, PH, COC, [25.0])
+
+    from_grid = service.prepare_multi_salt_graph_data(grid, SALTS, x_axis, y_axis)
+    from_list = service.prepare_multi_salt_graph_data(results, SALTS, x_axis, y_axis)
+
+    assert from_grid == from_list
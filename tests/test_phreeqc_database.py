@@ -0,0 +1,139 @@
+"""
+PHREEQC database index: parsing, phase filtering and validation
+"""
+
+import json
+import logging
+
+import pytest
+
+from app.services import phreeqc_database
+from app.services.phreeqc_database import (
+    DatabaseIndex, formula_elements, log_k_at, parse_database, possible_phases, species_charge,
+    validate_phases, water_elements
+)
+
+
+MINI_DAT = """
+SOLUTION_MASTER_SPECIES
+Ca       Ca+2     0.0     Ca      40.08
+C        CO3-2    2.0     HCO3    12.0111
+S        SO4-2    0.0     SO4     32.064
+SOLUTION_SPECIES
+CO3-2 + H+ = HCO3-
+    -log_k    10.329
+    -delta_h  -3.561  kcal
+    -gamma    5.4   0.0
+PHASES
+Calcite
+    CaCO3 = CO3-2 + Ca+2
+    -log_k    -8.48
+    -delta_h  -2.297 kcal
+Gypsum
+    CaSO4:2H2O = Ca+2 + SO4-2 + 2 H2O
+    -log_k    -4.58
+END
+"""
+
+
+@pytest.fixture
+def database_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(phreeqc_database, "DEFAULT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(phreeqc_database, "_INDEX_CACHE", {})
+    path = tmp_path / "mini.dat"
+    path.write_text(MINI_DAT)
+    return str(path)
+
+
+def test_formula_elements_and_charge():
+    assert formula_elements("CaMg(CO3)2") == ["C", "Ca", "Mg", "O"]
+    assert species_charge("Ca+2") == 2
+    assert species_charge("HCO3-") == -1
+    assert species_charge("CaCO3") == 0
+
+
+def test_parse_database_phases():
+    parsed = parse_database(MINI_DAT)
+
+    assert parsed["phases"]["Calcite"]["elements"] == ["C", "Ca", "O"]
+    assert parsed["phases"]["Gypsum"]["log_k"] == -4.58
+
+
+def test_parse_database_elements_and_species():
+    parsed = parse_database(MINI_DAT)
+
+    assert parsed["elements"]["Ca"]["gfw"] == 40.08
+    assert parsed["elements"]["C"]["alkalinity"] == 2.0
+    assert parsed["species"]["HCO3-"]["log_k"] == 10.329
+    assert parsed["species"]["HCO3-"]["delta_h"] == pytest.approx(-3.561 * 4.184)
+    assert parsed["species"]["HCO3-"]["gamma"] == (5.4, 0.0)
+    assert parsed["species"]["HCO3-"]["charge"] == -1
+
+
+def test_log_k_at_van_t_hoff():
+    entry = parse_database(MINI_DAT)["phases"]["Calcite"]
+
+    assert log_k_at(entry, 25.0) == pytest.approx(-8.48)
+    # Exothermic dissolution: less soluble when hot
+    assert log_k_at(entry, 60.0) < -8.48
+
+
+def test_index_cache_is_json_and_reused(database_path, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    built = DatabaseIndex.load(database_path, cache_dir)
+
+    cache_file = DatabaseIndex._cache_path(database_path, cache_dir)
+    with open(cache_file, encoding="utf-8") as f:
+        payload = json.load(f)
+    assert payload["source_sha256"] == built.source_sha256
+
+    cached = DatabaseIndex.load(database_path, cache_dir)
+    assert cached.phases["Calcite"]["log_k"] == -8.48
+    assert sorted(cached.species) == sorted(built.species)
+
+
+def test_index_cache_rebuilt_when_source_changes(database_path, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    DatabaseIndex.load(database_path, cache_dir)
+
+    with open(database_path, "a") as f:
+        f.write("PHASES\nHalite\n    NaCl = Na+ + Cl-\n    -log_k 1.57\nEND\n")
+
+    assert "Halite" in DatabaseIndex.load(database_path, cache_dir).phases
+
+
+def test_unreadable_cache_is_rebuilt(database_path, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cache_file = DatabaseIndex._cache_path(database_path, cache_dir)
+    (tmp_path / "cache").mkdir()
+    with open(cache_file, "wb") as f:
+        f.write(b"\x80\x04not json")
+
+    assert "Calcite" in DatabaseIndex.load(database_path, cache_dir).phases
+
+
+def test_water_elements_skips_zero_values():
+    water = {"Ca": {"value": 40.0}, "SO4": 0.0, "HCO3": 120.0, "pH": 7.5}
+
+    assert water_elements(water) == {"H", "O", "Ca", "C"}
+
+
+def test_possible_phases_needs_all_elements(database_path):
+    assert possible_phases(database_path, {"Ca": 40.0, "HCO3": 120.0}) == ["Calcite"]
+    assert sorted(possible_phases(database_path, {"Ca": 40.0, "HCO3": 120.0, "SO4": 96.0})) == [
+        "Calcite", "Gypsum"
+    ]
+
+
+def test_validate_phases_rejects_unknown(database_path):
+    validate_phases(database_path, ["Calcite", "Gypsum"])
+
+    with pytest.raises(ValueError, match="Halite"):
+        validate_phases(database_path, ["Calcite", "Halite"])
+
+
+def test_validate_phases_warns_without_index(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING, logger=phreeqc_database.__name__):
+        validate_phases(str(tmp_path / "missing.dat"), ["Calcite"])
+
+    assert "not validated" in caplog.text
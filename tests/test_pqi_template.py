@@ -0,0 +1,108 @@
+"""
+PQITemplate rendering and SELECTED_OUTPUT parsing
+"""
+
+import numpy as np
+import pytest
+
+from app.services.phreeqc_service import (
+    PQITemplate, _parse_selected_output, _selected_row_to_result, _split_solution_blocks
+)
+
+
+BASE_WATER = {
+    "Ca":   {"value": 40.08, "unit": "mg/L"},
+    "Cl":   {"value": 70.90, "unit": "mg/L"},
+    "HCO3": 61.02,
+    "Zero": {"value": 0.0, "unit": "mg/L"},
+    "pH":   {"value": 7.5, "unit": ""},
+}
+
+
+def test_from_base_keeps_only_positive_mapped_ions():
+    template = PQITemplate.from_base(BASE_WATER)
+
+    assert template.ion_keys == ["Ca", "Cl", "HCO3"]
+    np.testing.assert_allclose(template._base_mmol, [1.0, 2.0, 1.0])
+
+
+def test_render_grid_scales_by_coc_and_numbers_solutions():
+    template = PQITemplate.from_base(BASE_WATER)
+    text = template.render_grid([
+        {"pH": 7.0, "CoC": 1.0, "temp": 25.0},
+        {"pH": 8.0, "CoC": 3.0, "temp": 40.0},
+    ])
+
+    assert "SOLUTION 1\n" in text and "SOLUTION 2\n" in text
+    assert "pH    8.0000" in text and "temp  40.00" in text
+    assert "Ca           3.000000  as Ca" in text
+    assert "Alkalinity   3.000000  as HCO3" in text
+    assert text.endswith(PQITemplate.SELECTED_OUTPUT_BLOCK)
+
+
+def test_render_grid_requires_base_water():
+    with pytest.raises(ValueError):
+        PQITemplate(["Ca"]).render_grid([{"pH": 7.0, "CoC": 1.0, "temp": 25.0}])
+
+
+def test_phase_list_switches_to_selected_output_file():
+    template = PQITemplate.from_base(BASE_WATER, phases=["Calcite", "Gypsum"])
+    text = template.render_grid([{"pH": 7.0, "CoC": 1.0, "temp": 25.0}])
+
+    assert f"-file                {PQITemplate.SELECTED_OUTPUT_FILE}" in text
+    assert "-saturation_indices  Calcite Gypsum" in text
+    assert "-species             false" in text
+
+
+def test_knobs_are_emitted_before_solutions():
+    template = PQITemplate.from_base(BASE_WATER, knobs={"iterations": 600})
+    text = template.render_grid([{"pH": 7.0, "CoC": 1.0, "temp": 25.0}])
+
+    assert text.startswith("KNOBS\n    -iterations")
+    assert text.index("KNOBS") < text.index("SOLUTION 1")
+
+
+def test_equilibrium_phases_requires_phases():
+    with pytest.raises(ValueError):
+        PQITemplate(["Ca"], equilibrium_phases=["Calcite"])
+
+
+def test_render_mixes_one_simulation_per_row():
+    text = PQITemplate.render_mixes(np.array([[0.25, 0.75], [1.0, 0.0]]), first_number=3)
+
+    assert text == (
+        "MIX 3\n    1  0.250000\n    2  0.750000\nEND\n"
+        "MIX 4\n    1  1.000000\n    2  0.000000\nEND\n"
+    )
+
+
+def test_parse_selected_output_and_row_conversion():
+    selected = (
+        "sim\tstate\tsoln\tpH\ttemp(C)\tmu\tcharge\tpct_err\tsi_Calcite\tsi_Barite\t\n"
+        "1\ti_soln\t1\t7.5\t25\t0.01\t1e-05\t0.5\t0.4321\t-999.999\t\n"
+    )
+    rows = _parse_selected_output(selected)
+
+    assert rows == [{
+        "sim": 1.0, "state": "i_soln", "soln": 1.0, "pH": 7.5, "temp(C)": 25.0,
+        "mu": 0.01, "charge": 1e-05, "pct_err": 0.5,
+        "si_Calcite": 0.4321, "si_Barite": -999.999,
+    }]
+
+    result = _selected_row_to_result(rows[0])
+    assert result["saturation_indices"] == [{"mineral_name": "Calcite", "si_value": 0.4321}]
+    assert result["ionic_strength"] == 0.01
+    assert result["charge_balance_error_pct"] == 0.5
+
+
+def test_parse_selected_output_empty():
+    assert _parse_selected_output("\n\n") == []
+
+
+def test_split_solution_blocks():
+    text = "header\nInitial solution 1.\nfirst\nInitial solution 2.\nsecond\n"
+
+    blocks = _split_solution_blocks(text)
+
+    assert sorted(blocks) == [1, 2]
+    assert "first" in blocks[1] and "second" in blocks[2]
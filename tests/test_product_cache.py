@@ -0,0 +1,173 @@
+"""
+Product formulation cache and the fixed-dosage Where Can I Treat path
+"""
+
+import pytest
+
+from app.services import analysis_engine, product_cache as product_cache_module
+from app.services.analysis_engine import AnalysisEngine
+from app.services.chemical_dosage_service import ChemicalDosageService
+from app.services.product_cache import ProductCache, active_components
+
+PRODUCTS = [
+    {"product_id": "P1", "formulation": {"Zn": 2.5, "HEDP": 15.0}},
+    {"product_id": "P2", "formulation": {"Polymer": 5.0, "Azole": 0.04}},
+]
+
+
+class _FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class _FakeProducts:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query):
+        wanted = query["product_id"]["$in"]
+        self.queries.append(wanted)
+        return _FakeCursor([d for d in self.docs if d["product_id"] in wanted])
+
+
+class _FakeDB:
+    def __init__(self):
+        collections = {"products": _FakeProducts(PRODUCTS), "analysis_results": _FakeResults()}
+        self.db = type("Collections", (), collections)()
+
+    async def get_phreeqc_config(self):
+        return None
+
+
+class _FakeResults:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = _FakeDB()
+    monkeypatch.setattr(product_cache_module, "db", fake)
+    monkeypatch.setattr(analysis_engine, "db", fake)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_get_many_loads_misses_with_one_query(fake_db):
+    cache = ProductCache(ttl_seconds=60)
+
+    first = await cache.get_many(["P1", "P2", "missing"])
+    second = await cache.get_many(["P1", "P2"])
+
+    assert set(first) == {"P1", "P2"}
+    assert set(second) == {"P1", "P2"}
+    assert fake_db.db.products.queries == [["P1", "P2", "missing"]]
+    assert cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_and_ttl_force_reload(fake_db):
+    cache = ProductCache(ttl_seconds=60)
+    await cache.get_many(["P1"])
+
+    cache.invalidate("P1")
+    await cache.get("P1")
+    expired = ProductCache(ttl_seconds=0)
+    await expired.get("P2")
+    await expired.get("P2")
+
+    assert fake_db.db.products.queries == [["P1"], ["P1"], ["P2"], ["P2"]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("dosage_ppm", [1.0, 7.5, 120.0])
+async def test_actives_match_chemical_dosage_service(fake_db, dosage_ppm):
+    entries = await ProductCache().get_many(["P1", "P2"])
+
+    for product in PRODUCTS:
+        expected = ChemicalDosageService.calculate_multi_component_dosages(
+            dosage_ppm, product["formulation"]
+        )
+        actual = active_components(entries[product["product_id"]], dosage_ppm)
+        # Only difference: the service rounds to 0.001 ppm
+        assert {c: round(v, 3) for c, v in actual.items()} == expected
+
+
+class _FakePHREEQC:
+    """Records balancing and batched runs; every water comes back at Calcite SI 0.8"""
+
+    def __init__(self):
+        self.balanced = []
+        self.waters = []
+
+    def select_database(self, *args):
+        return "phreeqc.dat"
+
+    async def ion_balance(self, water, **kwargs):
+        self.balanced.append(kwargs)
+        return dict(water)
+
+    async def run_batch_waters(self, waters, database, phases=None):
+        self.waters.extend(waters)
+        return [
+            {"saturation_indices": [{"mineral_name": "Calcite", "si_value": 0.8}]}
+            for _ in waters
+        ]
+
+
+@pytest.mark.asyncio
+async def test_fixed_wcit_balances_adds_ions_and_credits_inhibitors(fake_db, monkeypatch):
+    monkeypatch.setattr(analysis_engine, "validate_phases", lambda database, phases: None)
+    monkeypatch.setattr(analysis_engine, "product_cache", ProductCache())
+    engine = AnalysisEngine()
+    engine.phreeqc_service = _FakePHREEQC()
+
+    water = {"Calcium": {"value": 80.0, "unit": "mg/L"}, "Zn": {"value": 0.1, "unit": "mg/L"}}
+    response = await engine.run_where_can_i_treat_fixed(
+        water, [{"product_id": "P1", "dosage_ppm": 20.0}],
+        (7.0, 8.0), (1.0, 1.0), (25.0, 25.0), ["Calcite"],
+        ph_steps=2, coc_steps=1, temp_steps=1
+    )
+
+    fake = engine.phreeqc_service
+    assert fake.balanced and fake.balanced[0]["database"] == "phreeqc.dat"
+    assert len(fake.waters) == 2
+    assert all(w["Zn"]["value"] == pytest.approx(0.1 + 0.5) for w in fake.waters)
+    assert "HEDP" not in fake.waters[0]
+    # SI 0.8 is yellow for Calcite; the HEDP credit brings it back to green
+    assert response["si_credit"]["Calcite"] > 0.3
+    assert response["results_summary"]["green_zones"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fixed_wcit_keeps_failed_points(fake_db, monkeypatch):
+    class _FailingPHREEQC(_FakePHREEQC):
+        async def run_batch_waters(self, waters, database, phases=None):
+            results = await super().run_batch_waters(waters, database, phases)
+            results[-1] = {"error": "did not converge"}
+            return results
+
+    monkeypatch.setattr(analysis_engine, "validate_phases", lambda database, phases: None)
+    monkeypatch.setattr(analysis_engine, "product_cache", ProductCache())
+    monkeypatch.setattr(analysis_engine, "PHREEQC_MAX_WORKERS", 1)
+    engine = AnalysisEngine()
+    engine.phreeqc_service = _FailingPHREEQC()
+
+    response = await engine.run_where_can_i_treat_fixed(
+        {"Calcium": {"value": 80.0, "unit": "mg/L"}}, [{"product_id": "P1", "dosage_ppm": 20.0}],
+        (7.0, 8.0), (1.0, 1.0), (25.0, 25.0), ["Calcite"],
+        ph_steps=2, coc_steps=1, temp_steps=1
+    )
+
+    stored = fake_db.db.analysis_results.docs[-1]["results"]
+    assert response["results_summary"]["total_points"] == 2
+    assert response["results_summary"]["error_count"] == 1
+    assert stored[1]["error"] == "did not converge"
+    assert stored[1]["classification"] == "unknown" and stored[1]["pH"] == 8.0
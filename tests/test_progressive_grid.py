@@ -0,0 +1,134 @@
+"""
+Progressive coarse-to-fine grid passes and continuation tokens
+"""
+
+import time
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+from app.controllers import analysis_routes
+from app.services import analysis_engine
+from app.services.analysis_engine import (
+    AnalysisEngine, AnalysisInProgressError, _as_batch, _decode_continuation_token,
+    _encode_continuation_token
+)
+from app.services.grid_calculator import GridCalculator
+
+
+def test_progressive_passes_cover_every_point_once():
+    shape = (10, 7, 5)
+    passes = GridCalculator.progressive_passes(shape, stride=4)
+
+    flat = [i for p in passes for i in p]
+    assert sorted(flat) == list(range(10 * 7 * 5))
+    assert len(flat) == len(set(flat))
+
+
+def test_first_pass_spans_full_range():
+    shape = (9, 9, 1)
+    first = GridCalculator.progressive_passes(shape, stride=4)[0]
+
+    # stride 4 on 9 steps → indices 0, 4, 8 per axis
+    assert first == [(i * 9 + j) for i in (0, 4, 8) for j in (0, 4, 8)]
+
+
+def test_stride_one_is_a_single_pass():
+    assert GridCalculator.progressive_passes((3, 2, 2), stride=1) == [list(range(12))]
+
+
+def test_continuation_token_round_trip():
+    token = _encode_continuation_token("SSM-20260101-000000", 4, (2, 256))
+
+    assert _decode_continuation_token(token) == {
+        "analysis_id": "SSM-20260101-000000", "stride": 4, "pass": 2, "offset": 256
+    }
+
+
+def test_invalid_continuation_token():
+    with pytest.raises(ValueError):
+        _decode_continuation_token("not-a-token")
+
+
+def test_as_batch_fills_missing_points_with_none():
+    assert _as_batch({0: {"a": 1}, 2: {"b": 2}}, 4) == [{"a": 1}, None, {"b": 2}, None]
+
+
+# ========================================
+# DEADLINE AND SINGLE-RUN CLAIM
+# ========================================
+
+@pytest.mark.asyncio
+async def test_expired_deadline_still_completes_coarse_pass(monkeypatch):
+    engine = AnalysisEngine()
+    runs = []
+
+    async def run_grid_points(balanced_base, points, database, phases, engine_name):
+        runs.append(len(points))
+        return [{"saturation_indices": []} for _ in points]
+
+    monkeypatch.setattr(engine, "_run_grid_points", run_grid_points)
+    monkeypatch.setattr(analysis_engine, "PROGRESSIVE_CHUNK", 2)
+    passes = GridCalculator.progressive_passes((5, 5, 1), stride=4)
+    grid_points = [{"pH": 7.0, "CoC": 2.0, "temp": 25.0}] * 25
+
+    computed, cursor = await engine._run_passes(
+        {}, grid_points, passes, (0, 0), "phreeqc.dat", None, "phreeqc", time.monotonic() - 1
+    )
+
+    assert sorted(computed) == sorted(passes[0])
+    assert cursor == (1, 0)
+
+
+TOKEN = _encode_continuation_token("SSM-1", 4, (1, 0))
+
+
+class _ProgressDB:
+    def __init__(self, claimed, stored_token=TOKEN):
+        self.claimed = claimed
+        self.doc = {"analysis_id": "SSM-1", "complete": False, "continuation_token": stored_token}
+        self.updates = []
+
+    async def get_analysis_result(self, analysis_id):
+        return dict(self.doc)
+
+    async def claim_progressive_run(self, analysis_id, continuation_token, stale_before):
+        return self.claimed and continuation_token == self.doc["continuation_token"]
+
+    async def update_analysis_result(self, analysis_id, update):
+        self.updates.append(update)
+
+
+@pytest.mark.asyncio
+async def test_continue_rejects_when_another_run_holds_the_analysis(monkeypatch):
+    monkeypatch.setattr(analysis_engine, "db", _ProgressDB(claimed=False))
+
+    with pytest.raises(AnalysisInProgressError):
+        await AnalysisEngine().continue_progressive(TOKEN)
+    with pytest.raises(HTTPException) as e:
+        await analysis_routes.continue_simple_saturation_analysis(BackgroundTasks(), {"continuation_token": TOKEN})
+    assert e.value.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_continue_rejects_stale_token(monkeypatch):
+    monkeypatch.setattr(analysis_engine, "db", _ProgressDB(claimed=True, stored_token="newer"))
+
+    with pytest.raises(ValueError):
+        await AnalysisEngine().continue_progressive(TOKEN)
+
+
+@pytest.mark.asyncio
+async def test_failed_continuation_releases_claim(monkeypatch):
+    fake_db = _ProgressDB(claimed=True)
+    engine = AnalysisEngine()
+
+    async def fail(doc, token, deadline):
+        raise RuntimeError("PHREEQC crashed")
+
+    monkeypatch.setattr(analysis_engine, "db", fake_db)
+    monkeypatch.setattr(engine, "_continue_claimed", fail)
+
+    with pytest.raises(RuntimeError):
+        await engine.continue_progressive(TOKEN)
+    assert fake_db.updates == [{"progress_status": None}]
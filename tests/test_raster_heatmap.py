@@ -0,0 +1,71 @@
+"""
+Matplotlib-free heatmap raster: SI bins, orientation and PNG output
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.raster_heatmap import (
+    MARGIN_BOTTOM, MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, NO_DATA, PANEL_PLOT_SIZE, ZONE_RGB,
+    SI_BOUNDS, raster, render_panels, render_thumbnail, si_bins
+)
+
+
+def test_si_bins_edges_and_out_of_range():
+    z = np.array([-5.0, -2.0, -0.5, -0.01, 0.0, 0.49, 0.5, 1.0, 2.99, 10.0, np.nan])
+
+    assert si_bins(z).tolist() == [0, 0, 1, 1, 2, 2, 3, 4, 4, 4, NO_DATA]
+
+
+def test_zone_colours_match_matplotlib_boundary_norm():
+    matplotlib = pytest.importorskip("matplotlib")
+    from matplotlib.colors import BoundaryNorm
+
+    cmap = matplotlib.colormaps["RdYlGn_r"]
+    norm = BoundaryNorm(SI_BOUNDS, cmap.N)
+    centres = (SI_BOUNDS[:-1] + SI_BOUNDS[1:]) / 2
+    expected = (np.array(cmap(norm(centres)))[:, :3] * 255).round()
+
+    np.testing.assert_allclose(ZONE_RGB[:NO_DATA], expected, atol=2)
+
+
+def test_raster_origin_is_lower_left():
+    z = np.array([[-3.0, np.nan], [0.2, 2.0]])      # z[y][x]
+
+    image = raster(z, 4, 4)
+
+    assert image.shape == (4, 4, 3) and image.dtype == np.uint8
+    assert image[-1, 0].tolist() == ZONE_RGB[0].tolist()       # y=0, x=0 at bottom left
+    assert image[-1, -1].tolist() == ZONE_RGB[NO_DATA].tolist()
+    assert image[0, 0].tolist() == ZONE_RGB[2].tolist()
+    assert image[0, -1].tolist() == ZONE_RGB[4].tolist()
+
+
+def _png_size(data):
+    return Image.open(io.BytesIO(data)).size
+
+
+def test_thumbnail_size_and_empty_matrix():
+    assert _png_size(render_thumbnail({"z": [[0.1, None], [1.2, -3.0]]}, size=48)) == (48, 48)
+    assert _png_size(render_thumbnail({"z": []}, size=32)) == (32, 32)
+
+
+def test_render_panels_draws_empty_panel():
+    panel = {"x": [], "y": [], "z": [], "salt_name": "Calcite"}
+
+    assert _png_size(render_panels([panel], "pH", "CoC"))[0] > 0
+
+
+def test_render_panels_layout():
+    panel = {"x": [7.0, 8.0], "y": [1.0, 3.0], "z": [[0.1, 0.6], [1.1, None]], "salt_name": "Calcite"}
+    panel_w = MARGIN_LEFT + PANEL_PLOT_SIZE[0] + MARGIN_RIGHT
+    panel_h = MARGIN_TOP + PANEL_PLOT_SIZE[1] + MARGIN_BOTTOM
+
+    size = _png_size(render_panels([panel] * 4, "pH", "CoC", max_cols=3))
+
+    assert size == (3 * panel_w, 2 * panel_h)
+    with pytest.raises(ValueError):
+        render_panels([], "pH", "CoC")
@@ -0,0 +1,51 @@
+"""
+Off-loop render pool: method whitelist, thread mode and timing metrics
+"""
+
+import pytest
+
+from app.services import render_pool
+from app.services.render_pool import render, render_in_worker, render_stats
+
+SI_DATA = [
+    {"mineral_name": "Calcite", "si_value": 0.8},
+    {"mineral_name": "Gypsum", "si_value": -1.2},
+]
+
+
+@pytest.fixture
+def thread_mode(monkeypatch):
+    monkeypatch.setattr(render_pool, "RENDER_POOL_WORKERS", 0)
+    monkeypatch.setattr(render_pool, "_metrics", {})
+
+
+@pytest.mark.asyncio
+async def test_rejects_non_render_methods(thread_mode):
+    with pytest.raises(ValueError):
+        await render("prepare_3d_graph_data", [], "Calcite")
+
+
+def test_render_in_worker_reports_render_time():
+    result, render_ms = render_in_worker("generate_si_bar_chart", (SI_DATA,), {})
+
+    assert result["image_base64"]
+    assert render_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_thread_mode_renders_and_records_metrics(thread_mode):
+    result = await render("generate_si_bar_chart", SI_DATA)
+
+    stats = render_stats()
+    assert result["image_base64"]
+    assert stats["workers"] == 0
+    assert stats["methods"]["generate_si_bar_chart"]["renders"] == 1
+    assert stats["methods"]["generate_si_bar_chart"]["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_render_counts_as_error(thread_mode):
+    with pytest.raises(Exception):
+        await render("render_3d_surface_png", None, "pH", "CoC")
+
+    assert render_stats()["methods"]["render_3d_surface_png"]["errors"] == 1
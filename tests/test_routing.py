@@ -0,0 +1,23 @@
+"""
+Router mounting: no shadowed endpoints, fixed paths before path parameters
+"""
+
+from app.controllers.analysis_routes import router as analysis_router
+from app.controllers.water_routes import router as water_router
+from main import app
+
+
+def _endpoints(router):
+    return {(method, route.path) for route in router.routes for method in route.methods}
+
+
+def test_routers_do_not_define_the_same_endpoint():
+    assert not _endpoints(water_router) & _endpoints(analysis_router)
+
+
+def test_analysis_endpoints_are_mounted_after_water_routes():
+    paths = list(app.openapi()["paths"])
+
+    assert "/api/v1/analysis/simple-saturation" in paths
+    assert "/api/v1/analysis/{analysis_id}/si-boundary" in paths
+    assert paths.index("/api/v1/analysis/history") < paths.index("/api/v1/analysis/{analysis_id}")
@@ -0,0 +1,117 @@
+"""
+Grid spread convergence retries: fast tier, strict tier, tail re-batching
+"""
+
+import pytest
+
+from app.services import phreeqc_service
+from app.services.phreeqc_service import FAST_KNOBS, STRICT_KNOBS, PHREEQCService
+
+
+def _points(n):
+    return [{"pH": 7.0 + 0.1 * i, "CoC": 1.0, "temp": 25.0} for i in range(n)]
+
+
+class _FakeRuns:
+    """
+    Stands in for _run_spread_pass. Like PHREEQC, a run stops at the first
+    solution that fails under the given KNOBS; later solutions get no output.
+    """
+
+    def __init__(self, fail_fast=(), fail_strict=()):
+        self.fail = {id(FAST_KNOBS): set(fail_fast), id(STRICT_KNOBS): set(fail_strict)}
+        self.runs = []
+
+    async def __call__(self, base, points, database, phases, knobs):
+        self.runs.append(([round(p["pH"], 1) for p in points], knobs))
+        results, stopped = [], False
+        for p in points:
+            key = round(p["pH"], 1)
+            if stopped or key in self.fail[id(knobs)]:
+                stopped = True
+                results.append({"_grid_pH": p["pH"], "_grid_CoC": p["CoC"],
+                                "_grid_temp": p["temp"], "error": "No output for solution"})
+            else:
+                results.append({"_grid_pH": p["pH"], "saturation_indices": []})
+        return results
+
+
+def _service(monkeypatch, runs):
+    service = PHREEQCService()
+    service._verified = True
+    monkeypatch.setattr(service, "_run_spread_pass", runs)
+    return service
+
+
+def test_fast_knobs_differ_from_phreeqc_defaults():
+    assert FAST_KNOBS != {"iterations": 100}
+    assert FAST_KNOBS["iterations"] < STRICT_KNOBS["iterations"]
+
+
+@pytest.mark.asyncio
+async def test_clean_batch_is_one_run(monkeypatch):
+    runs = _FakeRuns()
+    results = await _service(monkeypatch, runs).run_batch_solution_spread({}, _points(5), "db")
+
+    assert len(runs.runs) == 1
+    assert all(r["_retries"] == 0 and "error" not in r for r in results)
+
+
+@pytest.mark.asyncio
+async def test_only_the_tail_after_a_failure_is_rebatched(monkeypatch):
+    runs = _FakeRuns(fail_fast={7.2})
+    results = await _service(monkeypatch, runs).run_batch_solution_spread({}, _points(6), "db")
+
+    assert runs.runs == [
+        ([7.0, 7.1, 7.2, 7.3, 7.4, 7.5], FAST_KNOBS),
+        ([7.3, 7.4, 7.5], FAST_KNOBS),
+        ([7.2], STRICT_KNOBS),
+    ]
+    assert all("error" not in r for r in results)
+    assert [r["_retries"] for r in results] == [0, 0, 1, 0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_strict_failures_are_not_converged(monkeypatch):
+    runs = _FakeRuns(fail_fast={7.1, 7.3}, fail_strict={7.1})
+    results = await _service(monkeypatch, runs).run_batch_solution_spread({}, _points(5), "db")
+
+    assert results[1]["_status"] == "not_converged" and results[1]["_retries"] == 1
+    assert "error" not in results[3]
+    # Each tier: one run, plus one per real failure for the remaining tail
+    assert len(runs.runs) == 3 + 2
+
+
+@pytest.mark.asyncio
+async def test_run_budget_marks_unreached_points(monkeypatch):
+    monkeypatch.setattr(phreeqc_service, "PHREEQC_SPREAD_MAX_RUNS", 2)
+    every = {round(7.0 + 0.1 * i, 1) for i in range(6)}
+    runs = _FakeRuns(fail_fast=every, fail_strict=every)
+
+    results = await _service(monkeypatch, runs).run_batch_solution_spread({}, _points(6), "db")
+
+    assert [r["_status"] for r in results] == (
+        ["not_converged"] * 2 + ["not_attempted"] * 4
+    )
+    assert all(r["error"].startswith("Not attempted") for r in results[2:])
+    assert len(runs.runs) == 4
+
+
+@pytest.mark.asyncio
+async def test_sequential_fallback_counts_as_retried(monkeypatch):
+    async def broken(*args):
+        raise RuntimeError("PHREEQC crashed")
+
+    async def single(water, database):
+        if water["pH"]["value"] > 7.05:
+            raise RuntimeError("did not converge")
+        return {"saturation_indices": []}
+
+    service = _service(monkeypatch, broken)
+    monkeypatch.setattr(service, "_run_phreeqc_single", single)
+    base = {"Ca": {"value": 40.0, "unit": "mg/L"}, "pH": {"value": 7.0, "unit": ""}}
+
+    results = await service.run_batch_solution_spread(base, _points(2), "db")
+
+    assert [r["_retries"] for r in results] == [1, 1]
+    assert "error" not in results[0] and "error" in results[1]